@@ -0,0 +1,106 @@
+"""
+Benchmark: endpoints de operación sync (gunicorn WSGI) vs async (ASGI).
+
+Lanza ``--concurrency`` clientes HTTP en paralelo contra cada despliegue, con
+una mezcla de operaciones baratas (transpuesta) y caras (SVD de tamaño
+``--size``), y reporta peticiones/s y latencias p50/p95.
+
+Arrancar antes ambos servidores con la misma base de datos y un presupuesto de
+rate limiting amplio, por ejemplo:
+
+    RATE_LIMIT_CAPACITY=1e9 gunicorn --workers 2 --threads 4 matrixcalc_web.wsgi:application -b :8000
+    RATE_LIMIT_CAPACITY=1e9 gunicorn -k uvicorn.workers.UvicornWorker --workers 2 \\
+        matrixcalc_web.asgi:application -b :8001
+
+Uso:
+    python benchmarks/bench_async_views.py --sync-url http://localhost:8000 --async-url http://localhost:8001
+    python benchmarks/bench_async_views.py --concurrency 64 --requests 512 --size 150
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            body = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        body, status = e.read(), e.code
+    return status, body, time.perf_counter() - start
+
+
+def create_matrix(base_url, size, seed):
+    rng = random.Random(seed)
+    data = [[rng.uniform(-1, 1) + (size if i == j else 0) for j in range(size)] for i in range(size)]
+    status, body, _ = post(f"{base_url}/api/matrices/", {'name': f'bench-{size}', 'rows': size, 'cols': size, 'data': data})
+    if status != 201:
+        raise SystemExit(f"No se pudo crear la matriz de benchmark ({status}): {body[:200]!r}")
+    return json.loads(body)['id']
+
+
+def run(base_url, prefix, jobs, concurrency):
+    def call(job):
+        operation, matrix_id = job
+        return post(f"{base_url}{prefix}{operation}/", {'matrix_id': matrix_id})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[2] for r in results)
+    errors = sum(1 for r in results if r[0] != 201)
+    return {
+        'rps': len(jobs) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync-url', default='http://localhost:8000')
+    parser.add_argument('--async-url', default='http://localhost:8001')
+    parser.add_argument('--concurrency', type=int, default=32, help='Clientes simultáneos')
+    parser.add_argument('--requests', type=int, default=256, help='Peticiones por ronda')
+    parser.add_argument('--size', type=int, default=100, help='Dimensión de la matriz para la SVD')
+    parser.add_argument('--heavy-ratio', type=float, default=0.25, help='Fracción de SVDs')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    small_id = create_matrix(args.sync_url, 10, seed=1)
+    large_id = create_matrix(args.sync_url, args.size, seed=2)
+
+    rng = random.Random(0)
+    jobs = [
+        ('svd', large_id) if rng.random() < args.heavy_ratio else ('transpose', small_id)
+        for _ in range(args.requests)
+    ]
+
+    print(f"concurrencia: {args.concurrency} | peticiones: {args.requests} | "
+          f"SVD {args.size}x{args.size}: {args.heavy_ratio:.0%}")
+    targets = [
+        ('sync (WSGI)', args.sync_url, '/api/operations/'),
+        ('async (ASGI)', args.async_url, '/api/async/operations/'),
+    ]
+    for label, base_url, prefix in targets:
+        rounds = [run(base_url, prefix, jobs, args.concurrency) for _ in range(args.repeat)]
+        best = max(rounds, key=lambda r: r['rps'])
+        print(f"{label:14s} {best['rps']:8.1f} req/s  p50 {best['p50_ms']:7.1f} ms  "
+              f"p95 {best['p95_ms']:7.1f} ms  errores {best['errors']}")
+
+
+if __name__ == '__main__':
+    main()
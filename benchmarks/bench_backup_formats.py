@@ -0,0 +1,87 @@
+"""
+Benchmark: tamaño y tiempo de ida y vuelta de los formatos de backup.
+
+Crea una base de datos SQLite temporal con ``--matrices`` matrices de
+``--size``x``--size`` (más una operación por matriz), y para cada formato
+mide el tamaño del archivo, el tiempo de ``export_backup`` y el de
+``restore_backup`` (con ``clear=True``) sobre la misma base de datos.
+
+Uso:
+    python benchmarks/bench_backup_formats.py --matrices 2000 --size 50
+    python benchmarks/bench_backup_formats.py --formats json.gz npz
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matrixcalc_web.settings')
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix='matrixcalc-bench-'))
+# Nunca contra la base de datos configurada: restore_backup la vacía
+os.environ['DATABASE_URL'] = f"sqlite:///{TMP_DIR / 'bench.sqlite3'}"
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from calculator import backup, restore  # noqa: E402
+from calculator.models import Matrix, Operation  # noqa: E402
+
+FORMATS = {
+    'json': '.json',
+    'json.gz': '.json.gz',
+    'json.zst': '.json.zst',
+    'npz': '.npz',
+}
+
+
+def populate(count, size, seed=0):
+    rng = np.random.default_rng(seed)
+    matrices = Matrix.objects.bulk_create([
+        Matrix(name=f'bench-{i}', rows=size, cols=size, data=rng.standard_normal((size, size)).tolist())
+        for i in range(count)
+    ])
+    Operation.objects.bulk_create([
+        Operation(operation_type='TRANSPOSE', matrix_a=m, result=m, execution_time_ms=1) for m in matrices
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matrices', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=50, help='Dimensión de cada matriz')
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS), choices=FORMATS)
+    parser.add_argument('--batch-size', type=int, default=restore.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    populate(args.matrices, args.size)
+    print(f"{args.matrices} matrices {args.size}x{args.size} (float64) | base temporal: {TMP_DIR}")
+
+    for label in args.formats:
+        if label == 'json.zst' and backup.zstandard is None:
+            print(f"{label:9s} omitido (zstandard no instalado)")
+            continue
+        path = TMP_DIR / f'backup{FORMATS[label]}'
+
+        start = time.perf_counter()
+        backup.export_backup(path, checkpoint_path=TMP_DIR / 'checkpoint.json')
+        export_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restore.restore_backup([path], batch_size=args.batch_size, clear=True, state_path=TMP_DIR / 'state.json')
+        restore_s = time.perf_counter() - start
+
+        size_mb = path.stat().st_size / 1e6
+        print(f"{label:9s} {size_mb:9.2f} MB  export {export_s:7.2f} s  restore {restore_s:7.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: throughput de operaciones concurrentes por política de hilos BLAS.
+
+Simula un worker de gunicorn con ``--threads N``: N hilos ejecutan en paralelo
+una mezcla de kernels pequeños (20x20) y pesados (SVD/inversa de tamaño
+``--size``) mediante las funciones de ``calculator.utils.matrix_model``, y se
+mide el throughput para cada política de ``calculator.utils.blas``.
+
+Uso:
+    python benchmarks/bench_blas_policy.py --threads 4 --size 300 --tasks 64
+    python benchmarks/bench_blas_policy.py --policies auto single --blas-threads 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matrixcalc_web.settings')
+
+import numpy as np  # noqa: E402
+
+from calculator.utils import blas, safe_svd, safe_inv, safe_dot  # noqa: E402
+
+
+def build_tasks(count, size, small_ratio, seed=0):
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for i in range(count):
+        if rng.random() < small_ratio:
+            A = rng.standard_normal((20, 20))
+            tasks.append((safe_dot, (A, A)))
+        else:
+            A = rng.standard_normal((size, size)) + size * np.eye(size)
+            tasks.append((safe_svd if i % 2 else safe_inv, (A,)))
+    return tasks
+
+
+def run(tasks, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda task: task[0](*task[1]), tasks))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=4, help='Hilos de petición concurrentes (gunicorn --threads)')
+    parser.add_argument('--size', type=int, default=300, help='Dimensión de los kernels pesados')
+    parser.add_argument('--tasks', type=int, default=64, help='Operaciones por ronda')
+    parser.add_argument('--small-ratio', type=float, default=0.5, help='Fracción de operaciones pequeñas')
+    parser.add_argument('--blas-threads', type=int, default=os.cpu_count() or 1, help='Hilos BLAS para kernels pesados')
+    parser.add_argument('--max-heavy', type=int, default=2, help='Kernels pesados concurrentes por proceso')
+    parser.add_argument('--policies', nargs='+', default=list(blas.POLICIES), choices=blas.POLICIES)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tasks = build_tasks(args.tasks, args.size, args.small_ratio)
+    print(f"CPUs: {os.cpu_count()} | hilos de petición: {args.threads} | "
+          f"pesados: {args.size}x{args.size} | tareas: {args.tasks}")
+    print(f"{'política':<10} {'mejor (s)':>10} {'ops/s':>10}")
+
+    for policy in args.policies:
+        blas.configure(
+            policy=policy,
+            threads=args.blas_threads,
+            heavy_threshold=args.size * args.size,
+            max_concurrent_heavy=args.max_heavy,
+        )
+        run(tasks[:args.threads], args.threads)  # calentamiento
+        best = min(run(tasks, args.threads) for _ in range(args.repeat))
+        print(f"{policy:<10} {best:>10.3f} {args.tasks / best:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: rango y subespacios por QR con pivoteo frente a SVD.
+
+Para matrices altas, anchas y cuadradas de rango completo y de rango bajo
+mide el tiempo de ``safe_rank``, ``safe_column_space``, ``safe_null_space`` y
+``safe_rref`` con ``method='qr'`` y ``method='svd'``, y comprueba que ambos
+métodos dan el mismo rango.
+
+Uso:
+    python benchmarks/bench_rank_methods.py
+    python benchmarks/bench_rank_methods.py --shapes 2000x50 50x2000 --rank 10 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matrixcalc_web.settings')
+
+import numpy as np  # noqa: E402
+
+from calculator.utils import (  # noqa: E402
+    RANK_METHODS, safe_column_space, safe_null_space, safe_rank, safe_rref,
+)
+
+OPERATIONS = {
+    'rank': lambda A, method: safe_rank(A, method=method),
+    'colspace': lambda A, method: safe_column_space(A, method)['rank'],
+    'nullspace': lambda A, method: safe_null_space(A, method)['rank'],
+    'rref': lambda A, method: safe_rref(A, method)['rank'],
+}
+
+
+def build_matrix(rows, cols, rank, seed=0):
+    rng = np.random.default_rng(seed)
+    if rank is None or rank >= min(rows, cols):
+        return rng.standard_normal((rows, cols))
+    return rng.standard_normal((rows, rank)) @ rng.standard_normal((rank, cols))
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', default=['1000x50', '50x1000', '100x100'],
+                        help='Formas FILASxCOLUMNAS a medir')
+    parser.add_argument('--rank', type=int, default=5, help='Rango de las variantes de rango bajo')
+    parser.add_argument('--operations', nargs='+', default=list(OPERATIONS), choices=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'forma':<10} {'rango':>6} {'operación':<10} "
+          + ' '.join(f"{method + ' (ms)':>10}" for method in RANK_METHODS) + f" {'qr/svd':>7}")
+    for shape in args.shapes:
+        rows, cols = (int(x) for x in shape.lower().split('x'))
+        for rank in (None, args.rank):
+            A = build_matrix(rows, cols, rank)
+            for operation in args.operations:
+                timings = {}
+                ranks = set()
+                for method in RANK_METHODS:
+                    elapsed, found = best_time(lambda: OPERATIONS[operation](A, method), args.repeat)
+                    timings[method] = elapsed
+                    ranks.add(found)
+                label = 'completo' if rank is None else str(rank)
+                mismatch = '' if len(ranks) == 1 else f"  ¡rangos distintos: {sorted(ranks)}!"
+                print(f"{shape:<10} {label:>6} {operation:<10} "
+                      + ' '.join(f"{timings[method] * 1000:>10.2f}" for method in RANK_METHODS)
+                      + f" {timings['qr'] / timings['svd']:>7.2f}{mismatch}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: transporte de operandos al pool de cómputo, pickle frente a memoria compartida.
+
+Para cada tamaño envía una operación al pool de procesos de
+``calculator.compute_pool`` con ``COMPUTE_POOL_TRANSPORT='pickle'`` y
+``'shm'`` y mide el tiempo de ida y vuelta (envío de operandos, cómputo y
+recogida del resultado) y, aparte, el tiempo de cómputo que informa el
+propio worker: la diferencia es el costo del transporte. ``TRANSPOSE`` por
+defecto, porque su cómputo es despreciable frente a mover los arrays.
+
+Los tamaños pueden superar ``MAX_DIMENSION``: el benchmark lo amplía para sus
+propios procesos.
+
+Uso:
+    python benchmarks/bench_shared_memory.py
+    python benchmarks/bench_shared_memory.py --sizes 100 1000 3000 --operation MULTIPLY --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matrixcalc_web.settings')
+
+TRANSPORTS = ('pickle', 'shm')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 500, 1000, 2000],
+                        help='Dimensiones n de los operandos n x n')
+    parser.add_argument('--operation', default='TRANSPOSE', help='Tipo de operación (unaria o binaria)')
+    parser.add_argument('--workers', type=int, default=1, help='Procesos del pool')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    # Los procesos del pool (spawn) heredan el entorno y leen MATRIX_CONFIG al arrancar
+    os.environ['MAX_DIMENSION'] = str(max(args.sizes))
+    import django
+    django.setup()
+
+    import numpy as np
+    from django.conf import settings
+
+    from calculator import compute_pool
+
+    binary = args.operation in {'SUM', 'SUBTRACT', 'MULTIPLY', 'LSTSQ'}
+    print(f"operación: {args.operation} | procesos: {args.workers} | repeticiones: {args.repeat}")
+    print(f"{'n':>6} {'MB ida':>8} {'transporte':<10} {'total (ms)':>11} {'cómputo (ms)':>13} {'transporte (ms)':>16}")
+    results = {}
+    for transport in TRANSPORTS:
+        settings.MATRIX_CONFIG = {
+            **settings.MATRIX_CONFIG,
+            'COMPUTE_POOL_WORKERS': args.workers,
+            'COMPUTE_POOL_TIMEOUT': 600,
+            'COMPUTE_POOL_TRANSPORT': transport,
+        }
+        compute_pool.warm()
+        for n in args.sizes:
+            rng = np.random.default_rng(n)
+            a = compute_pool.Operand('A', rng.standard_normal((n, n)))
+            b = compute_pool.Operand('B', rng.standard_normal((n, n))) if binary else None
+            totals, computes = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                out = compute_pool.run_operation(args.operation, a, b)
+                totals.append((time.perf_counter() - start) * 1000)
+                computes.append(out[4])
+            results[transport, n] = (statistics.median(totals), statistics.median(computes))
+            megabytes = (a.array.nbytes + (b.array.nbytes if b else 0)) / 1e6
+            total, compute = results[transport, n]
+            print(f"{n:>6} {megabytes:>8.1f} {transport:<10} {total:>11.2f} {compute:>13.0f} {total - compute:>16.2f}")
+        compute_pool.shutdown()
+
+    print()
+    for n in args.sizes:
+        speedup = results['pickle', n][0] / results['shm', n][0]
+        print(f"n={n}: shm {speedup:.2f}x frente a pickle")
+
+
+if __name__ == '__main__':
+    main()
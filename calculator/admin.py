@@ -2,7 +2,7 @@
 Configuración del Django Admin para calculator.
 """
 from django.contrib import admin
-from calculator.models import Matrix, Operation
+from calculator.models import Matrix, MatrixStack, Operation, OperationComponent, StackOperation, StepTrace
 
 
 @admin.register(Matrix)
@@ -10,16 +10,53 @@ class MatrixAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'dimensions', 'created_at']
     list_filter = ['created_at', 'rows', 'cols']
     search_fields = ['name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['content_hash', 'created_at', 'updated_at']
+    exclude = ['payload']
     date_hierarchy = 'created_at'
 
 
+class OperationComponentInline(admin.TabularInline):
+    model = OperationComponent
+    fields = ['name', 'rows', 'cols']
+    readonly_fields = ['name', 'rows', 'cols']
+    extra = 0
+    can_delete = False
+
+
 @admin.register(Operation)
 class OperationAdmin(admin.ModelAdmin):
     list_display = ['id', 'operation_type', 'matrix_a', 'matrix_b', 'created_at', 'execution_time_ms']
     list_filter = ['operation_type', 'created_at']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
+    inlines = [OperationComponentInline]
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('matrix_a', 'matrix_b', 'result')
+        return super().get_queryset(request).select_related('matrix_a__payload', 'matrix_b__payload', 'result__payload')
+
+
+@admin.register(MatrixStack)
+class MatrixStackAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'count', 'rows', 'cols', 'created_at']
+    list_filter = ['created_at', 'rows', 'cols']
+    search_fields = ['name']
+    readonly_fields = ['invalid_items', 'created_at']
+    exclude = ['payload']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(StackOperation)
+class StackOperationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'operation_type', 'stack', 'precision', 'created_at', 'execution_time_ms']
+    list_filter = ['operation_type', 'created_at']
+    readonly_fields = ['errors', 'created_at']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(StepTrace)
+class StepTraceAdmin(admin.ModelAdmin):
+    list_display = ['id', 'algorithm', 'matrix', 'step_count', 'keyframe_interval', 'created_at']
+    list_filter = ['algorithm', 'created_at']
+    readonly_fields = ['pivot_columns', 'created_at']
+    exclude = ['payload', 'steps']
+    date_hierarchy = 'created_at'
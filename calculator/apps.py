@@ -13,12 +13,31 @@ class CalculatorConfig(AppConfig):
     def ready(self):
         """
         Código que se ejecuta cuando la app está lista.
-        Configura el scheduler para tareas programadas.
+        Aplica la política de hilos BLAS, conecta los eventos push y configura
+        el scheduler para tareas programadas.
         """
+        from calculator import events
+
+        self.configure_blas()
+        events.connect()
+
         # Solo ejecutar scheduler si está habilitado y no en runserver reload
         if os.environ.get('RUN_SCHEDULER') == 'true' and not os.environ.get('RUN_MAIN'):
             self.start_scheduler()
     
+    def configure_blas(self):
+        """Aplica la política de hilos BLAS/LAPACK de MATRIX_CONFIG a este proceso."""
+        from django.conf import settings
+        from calculator.utils import blas
+
+        config = settings.MATRIX_CONFIG
+        blas.configure(
+            policy=config['BLAS_POLICY'],
+            threads=config['BLAS_THREADS'],
+            heavy_threshold=config['BLAS_HEAVY_THRESHOLD'],
+            max_concurrent_heavy=config['BLAS_MAX_CONCURRENT_HEAVY'],
+        )
+    
     def start_scheduler(self):
         """Inicia el scheduler para tareas programadas."""
         from apscheduler.schedulers.background import BackgroundScheduler
@@ -47,5 +66,3 @@ class CalculatorConfig(AppConfig):
         )
         scheduler.start()
         logger.info("Scheduler iniciado: limpieza diaria a las 2:00 AM")
-        
-        # TODO v2.0: Agregar job para broadcast de stats via WebSocket
@@ -0,0 +1,552 @@
+"""
+Formato de backup binario columnar (``.npz``).
+
+Alternativa al JSON de ``backup``: el archivo es un zip de arrays ``.npy``
+legible con ``numpy.load``. Los registros se agrupan en bloques de
+``chunk_size`` y cada bloque se guarda por columnas:
+
+    header.npy                       cabecera JSON (utf-8, uint8)
+    matrices/00000/id.npy            int64
+    matrices/00000/rows.npy          int64
+    matrices/00000/cols.npy          int64
+    matrices/00000/created_at.npy    int64 (microsegundos desde epoch, UTC)
+    matrices/00000/updated_at.npy    int64
+    matrices/00000/name.npy          lista JSON (utf-8, uint8)
+    matrices/00000/encoding.npy      lista JSON (codificación de cada payload)
+    matrices/00000/data.npy          float64: datos de todas las matrices del
+                                     bloque concatenados (fila mayor)
+    operations/00000/id.npy          int64
+    operations/00000/matrix_a.npy    int64
+    operations/00000/matrix_b.npy    int64 (-1 = sin matriz B)
+    operations/00000/result.npy      int64
+    operations/00000/execution_time_ms.npy
+    operations/00000/created_at.npy
+    operations/00000/operation_type.npy   lista JSON
+    operations/00000/precision.npy        lista JSON
+    operations/00000/extra_data.npy       lista JSON
+    components/00000/id.npy          int64
+    components/00000/operation.npy   int64
+    components/00000/rows.npy        int64
+    components/00000/cols.npy        int64
+    components/00000/name.npy        lista JSON
+    components/00000/encoding.npy    lista JSON
+    components/00000/data.npy        float64 concatenados, como en matrices
+    stacks/00000/id.npy              int64
+    stacks/00000/count.npy           int64
+    stacks/00000/rows.npy            int64
+    stacks/00000/cols.npy            int64
+    stacks/00000/created_at.npy      int64
+    stacks/00000/name.npy            lista JSON
+    stacks/00000/invalid_items.npy   lista JSON
+    stacks/00000/encoding.npy        lista JSON
+    stacks/00000/data.npy            float64 concatenados (count * rows * cols por pila)
+    stack_operations/00000/id.npy        int64
+    stack_operations/00000/stack.npy     int64
+    stack_operations/00000/rhs.npy       int64 (-1 = sin pila)
+    stack_operations/00000/result.npy    int64
+    stack_operations/00000/vectors.npy   int64 (-1 = sin pila)
+    stack_operations/00000/execution_time_ms.npy
+    stack_operations/00000/created_at.npy
+    stack_operations/00000/operation_type.npy   lista JSON
+    stack_operations/00000/errors.npy           lista JSON
+    stack_operations/00000/precision.npy        lista JSON
+    traces/00000/id.npy              int64
+    traces/00000/matrix.npy          int64
+    traces/00000/rows.npy            int64
+    traces/00000/cols.npy            int64
+    traces/00000/step_count.npy      int64
+    traces/00000/keyframe_interval.npy   int64
+    traces/00000/keyframe_count.npy      int64
+    traces/00000/rank.npy            int64
+    traces/00000/execution_time_ms.npy
+    traces/00000/created_at.npy
+    traces/00000/algorithm.npy       lista JSON
+    traces/00000/pivot_columns.npy   lista JSON
+    traces/00000/encoding.npy        lista JSON
+    traces/00000/steps.npy           uint8: deltas de todas las trazas concatenados
+                                     (``glassbox.STEP_DTYPE``, step_count por traza)
+    traces/00000/data.npy            float64: fotogramas clave concatenados
+
+Los float64 se guardan en binario (sin convertir a texto) y se escriben y leen
+por bloques, así que la memoria usada depende de ``chunk_size`` y no del
+tamaño de la base de datos. ``ArchiveReader`` ofrece la misma interfaz que
+``backup.BackupReader``, de modo que ``restore`` admite ambos formatos; el
+campo ``data`` de sus registros es un ``np.ndarray`` (vista del bloque) en
+vez de listas anidadas, y se valida y codifica sin pasar por Python.
+"""
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+
+from calculator import encodings
+from calculator.utils import glassbox
+
+ZIP_MAGIC = b'PK\x03\x04'
+HEADER_ENTRY = 'header.npy'
+SECTIONS = ('matrices', 'operations', 'components', 'stacks', 'stack_operations', 'traces')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+NO_MATRIX = -1
+
+# Compresión del zip: los float64 apenas se comprimen, por defecto se guardan
+# tal cual (ZIP_STORED); 'gzip' usa deflate, que numpy.load también entiende
+ZIP_COMPRESSIONS = {'none': zipfile.ZIP_STORED, 'gzip': zipfile.ZIP_DEFLATED}
+
+MATRIX_FIELDS = ('id', 'name', 'rows', 'cols', 'payload__blob', 'payload__encoding', 'created_at', 'updated_at')
+OPERATION_FIELDS = (
+    'id', 'operation_type', 'matrix_a_id', 'matrix_b_id', 'result_id',
+    'extra_data', 'created_at', 'execution_time_ms', 'precision',
+)
+COMPONENT_FIELDS = ('id', 'operation_id', 'name', 'rows', 'cols', 'payload__blob', 'payload__encoding')
+STACK_FIELDS = (
+    'id', 'name', 'count', 'rows', 'cols', 'invalid_items', 'payload__blob', 'payload__encoding', 'created_at',
+)
+STACK_OPERATION_FIELDS = (
+    'id', 'operation_type', 'stack_id', 'rhs_id', 'result_id', 'vectors_id',
+    'errors', 'created_at', 'execution_time_ms', 'precision',
+)
+TRACE_FIELDS = (
+    'id', 'algorithm', 'matrix_id', 'rows', 'cols', 'step_count', 'keyframe_interval', 'keyframe_count',
+    'steps', 'rank', 'pivot_columns', 'execution_time_ms', 'payload__blob', 'payload__encoding', 'created_at',
+)
+
+
+def is_archive(path):
+    """True si ``path`` es un backup en formato ``.npz`` (zip)."""
+    with open(path, 'rb') as f:
+        return f.read(4) == ZIP_MAGIC
+
+
+# --- Conversión de columnas ---
+
+def _to_micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def _json_column(values):
+    return np.frombuffer(json.dumps(values, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+
+
+def _read_json_column(array):
+    return json.loads(array.tobytes().decode('utf-8'))
+
+
+def _entry(section, chunk, column):
+    return f'{section}/{chunk:05d}/{column}.npy'
+
+
+# --- Escritura ---
+
+class ArchiveWriter:
+    """Escribe bloques columnares en un zip ``.npz``."""
+
+    def __init__(self, path, compression='none'):
+        if compression not in ZIP_COMPRESSIONS:
+            raise ValueError(f"Compresión no soportada en formato npz: {compression}")
+        self.zip = zipfile.ZipFile(path, 'w', compression=ZIP_COMPRESSIONS[compression], allowZip64=True)
+        self.chunks = {section: 0 for section in SECTIONS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.zip.close()
+        return False
+
+    def write_array(self, name, array):
+        with self.zip.open(name, 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+    def write_chunk(self, section, columns):
+        chunk = self.chunks[section]
+        for column, array in columns.items():
+            self.write_array(_entry(section, chunk, column), array)
+        self.chunks[section] += 1
+
+    def write_header(self, header):
+        self.write_array(HEADER_ENTRY, _json_column({**header, 'chunks': self.chunks}))
+
+
+def _concat_payloads(blobs, codings, n_rows, n_cols):
+    if all(coding == 'raw' for coding in codings):
+        # Los payloads ya son float64 little-endian: se concatenan sin decodificar
+        return np.frombuffer(b''.join(bytes(blob) for blob in blobs), dtype='<f8')
+    return np.concatenate([
+        encodings.decode(blob, coding, rows, cols).reshape(-1)
+        for blob, coding, rows, cols in zip(blobs, codings, n_rows, n_cols)
+    ])
+
+
+def _matrix_columns(rows):
+    ids, names, n_rows, n_cols, blobs, codings, created, updated = zip(*rows)
+    payload = _concat_payloads(blobs, codings, n_rows, n_cols)
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'rows': np.array(n_rows, dtype=np.int64),
+        'cols': np.array(n_cols, dtype=np.int64),
+        'created_at': np.array([_to_micros(v) for v in created], dtype=np.int64),
+        'updated_at': np.array([_to_micros(v) for v in updated], dtype=np.int64),
+        'name': _json_column(list(names)),
+        'encoding': _json_column(list(codings)),
+        'data': payload,
+    }
+
+
+def _operation_columns(rows):
+    ids, types, matrix_a, matrix_b, result, extra, created, elapsed, precisions = zip(*rows)
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'matrix_a': np.array(matrix_a, dtype=np.int64),
+        'matrix_b': np.array([NO_MATRIX if v is None else v for v in matrix_b], dtype=np.int64),
+        'result': np.array(result, dtype=np.int64),
+        'execution_time_ms': np.array(elapsed, dtype=np.int64),
+        'created_at': np.array([_to_micros(v) for v in created], dtype=np.int64),
+        'operation_type': _json_column(list(types)),
+        'extra_data': _json_column(list(extra)),
+        'precision': _json_column(list(precisions)),
+    }
+
+
+def _component_columns(rows):
+    ids, operations, names, n_rows, n_cols, blobs, codings = zip(*rows)
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'operation': np.array(operations, dtype=np.int64),
+        'rows': np.array(n_rows, dtype=np.int64),
+        'cols': np.array(n_cols, dtype=np.int64),
+        'name': _json_column(list(names)),
+        'encoding': _json_column(list(codings)),
+        'data': _concat_payloads(blobs, codings, n_rows, n_cols),
+    }
+
+
+def _stack_columns(rows):
+    ids, names, counts, n_rows, n_cols, invalid, blobs, codings, created = zip(*rows)
+    # El payload de una pila es (count * rows) x cols
+    payload_rows = [count * r for count, r in zip(counts, n_rows)]
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'count': np.array(counts, dtype=np.int64),
+        'rows': np.array(n_rows, dtype=np.int64),
+        'cols': np.array(n_cols, dtype=np.int64),
+        'created_at': np.array([_to_micros(v) for v in created], dtype=np.int64),
+        'name': _json_column(list(names)),
+        'invalid_items': _json_column(list(invalid)),
+        'encoding': _json_column(list(codings)),
+        'data': _concat_payloads(blobs, codings, payload_rows, n_cols),
+    }
+
+
+def _stack_operation_columns(rows):
+    ids, types, stacks, rhs, result, vectors, errors, created, elapsed, precisions = zip(*rows)
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'stack': np.array(stacks, dtype=np.int64),
+        'rhs': np.array([NO_MATRIX if v is None else v for v in rhs], dtype=np.int64),
+        'result': np.array(result, dtype=np.int64),
+        'vectors': np.array([NO_MATRIX if v is None else v for v in vectors], dtype=np.int64),
+        'execution_time_ms': np.array(elapsed, dtype=np.int64),
+        'created_at': np.array([_to_micros(v) for v in created], dtype=np.int64),
+        'operation_type': _json_column(list(types)),
+        'errors': _json_column(list(errors)),
+        'precision': _json_column(list(precisions)),
+    }
+
+
+def _trace_columns(rows):
+    (ids, algorithms, matrices, n_rows, n_cols, step_counts, intervals, keyframe_counts,
+     steps, ranks, pivots, elapsed, blobs, codings, created) = zip(*rows)
+    # Los fotogramas clave van en un payload de (keyframe_count * rows) x cols
+    payload_rows = [count * r for count, r in zip(keyframe_counts, n_rows)]
+    return {
+        'id': np.array(ids, dtype=np.int64),
+        'matrix': np.array(matrices, dtype=np.int64),
+        'rows': np.array(n_rows, dtype=np.int64),
+        'cols': np.array(n_cols, dtype=np.int64),
+        'step_count': np.array(step_counts, dtype=np.int64),
+        'keyframe_interval': np.array(intervals, dtype=np.int64),
+        'keyframe_count': np.array(keyframe_counts, dtype=np.int64),
+        'rank': np.array(ranks, dtype=np.int64),
+        'execution_time_ms': np.array(elapsed, dtype=np.int64),
+        'created_at': np.array([_to_micros(v) for v in created], dtype=np.int64),
+        'algorithm': _json_column(list(algorithms)),
+        'pivot_columns': _json_column(list(pivots)),
+        'encoding': _json_column(list(codings)),
+        'steps': np.frombuffer(b''.join(bytes(blob) for blob in steps), dtype=np.uint8),
+        'data': _concat_payloads(blobs, codings, payload_rows, n_cols),
+    }
+
+
+# Columnas leídas de la base de datos y conversión a bloque de cada sección
+SECTION_COLUMNS = {
+    'matrices': (MATRIX_FIELDS, _matrix_columns),
+    'operations': (OPERATION_FIELDS, _operation_columns),
+    'components': (COMPONENT_FIELDS, _component_columns),
+    'stacks': (STACK_FIELDS, _stack_columns),
+    'stack_operations': (STACK_OPERATION_FIELDS, _stack_operation_columns),
+    'traces': (TRACE_FIELDS, _trace_columns),
+}
+
+
+def _write_section(writer, section, queryset, fields, to_columns, chunk_size):
+    total = 0
+    rows = []
+    for row in queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            writer.write_chunk(section, to_columns(rows))
+            total += len(rows)
+            rows = []
+    if rows:
+        writer.write_chunk(section, to_columns(rows))
+        total += len(rows)
+    return total
+
+
+def write_archive(path, querysets, header, chunk_size, compression='none'):
+    """
+    Escribe un backup ``.npz`` con los querysets dados (por sección).
+
+    Returns:
+        dict: Registros exportados por sección
+    """
+    totals = {}
+    with ArchiveWriter(path, compression) as writer:
+        for section in SECTIONS:
+            fields, to_columns = SECTION_COLUMNS[section]
+            totals[section] = _write_section(writer, section, querysets[section], fields, to_columns, chunk_size)
+        writer.write_header({
+            **header,
+            'format': 'npz',
+            **{f'total_{section}': total for section, total in totals.items()},
+        })
+    return totals
+
+
+# --- Lectura ---
+
+class ArchiveReader:
+    """
+    Lector de backups ``.npz`` con la interfaz de ``backup.BackupReader``.
+
+    ``records()`` reconstruye los registros en el formato del serializer de
+    Django, bloque a bloque.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self.zip = None
+
+    def __enter__(self):
+        self.zip = zipfile.ZipFile(self.path, 'r')
+        self.header = _read_json_column(self._array(HEADER_ENTRY))
+        return self
+
+    def __exit__(self, *exc):
+        self.zip.close()
+        return False
+
+    def _array(self, name):
+        with self.zip.open(name) as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    def _columns(self, section, chunk, names):
+        return {name: self._array(_entry(section, chunk, name)) for name in names}
+
+    def _encodings(self, section, chunk, count):
+        # Archivos anteriores a las codificaciones: todo float64
+        name = _entry(section, chunk, 'encoding')
+        if name not in self.zip.NameToInfo:
+            return ['raw'] * count
+        return _read_json_column(self._array(name))
+
+    def records(self):
+        """Itera (sección, registro) de cada sección de ``SECTIONS``, en orden."""
+        readers = {
+            'matrices': self._matrix_records,
+            'operations': self._operation_records,
+            'components': self._component_records,
+            'stacks': self._stack_records,
+            'stack_operations': self._stack_operation_records,
+            'traces': self._trace_records,
+        }
+        chunks = self.header.get('chunks', {})
+        for section in SECTIONS:
+            for chunk in range(chunks.get(section, 0)):
+                yield from ((section, record) for record in readers[section](chunk))
+
+    def _matrix_records(self, chunk):
+        columns = self._columns('matrices', chunk, ('id', 'rows', 'cols', 'created_at', 'updated_at', 'data'))
+        names = _read_json_column(self._array(_entry('matrices', chunk, 'name')))
+        codings = self._encodings('matrices', chunk, len(names))
+        payload = columns['data']
+        offset = 0
+        for i, name in enumerate(names):
+            rows, cols = int(columns['rows'][i]), int(columns['cols'][i])
+            size = rows * cols
+            values = payload[offset:offset + size]
+            offset += size
+            yield {
+                'model': 'calculator.matrix',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'name': name,
+                    'rows': rows,
+                    'cols': cols,
+                    'data': values.reshape(rows, cols) if values.size == size else values,
+                    'encoding': codings[i],
+                    'created_at': _from_micros(columns['created_at'][i]),
+                    'updated_at': _from_micros(columns['updated_at'][i]),
+                },
+            }
+
+    def _operation_records(self, chunk):
+        columns = self._columns(
+            'operations', chunk, ('id', 'matrix_a', 'matrix_b', 'result', 'execution_time_ms', 'created_at')
+        )
+        types = _read_json_column(self._array(_entry('operations', chunk, 'operation_type')))
+        extra = _read_json_column(self._array(_entry('operations', chunk, 'extra_data')))
+        precision_entry = _entry('operations', chunk, 'precision')
+        precisions = (
+            _read_json_column(self._array(precision_entry)) if precision_entry in self.zip.NameToInfo
+            else ['float64'] * len(types)
+        )
+        for i, operation_type in enumerate(types):
+            matrix_b = int(columns['matrix_b'][i])
+            yield {
+                'model': 'calculator.operation',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'operation_type': operation_type,
+                    'matrix_a': int(columns['matrix_a'][i]),
+                    'matrix_b': None if matrix_b == NO_MATRIX else matrix_b,
+                    'result': int(columns['result'][i]),
+                    'extra_data': extra[i],
+                    'created_at': _from_micros(columns['created_at'][i]),
+                    'execution_time_ms': int(columns['execution_time_ms'][i]),
+                    'precision': precisions[i],
+                },
+            }
+
+    def _component_records(self, chunk):
+        columns = self._columns('components', chunk, ('id', 'operation', 'rows', 'cols', 'data'))
+        names = _read_json_column(self._array(_entry('components', chunk, 'name')))
+        codings = self._encodings('components', chunk, len(names))
+        payload = columns['data']
+        offset = 0
+        for i, name in enumerate(names):
+            rows, cols = int(columns['rows'][i]), int(columns['cols'][i])
+            size = rows * cols
+            values = payload[offset:offset + size]
+            offset += size
+            yield {
+                'model': 'calculator.operationcomponent',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'operation': int(columns['operation'][i]),
+                    'name': name,
+                    'rows': rows,
+                    'cols': cols,
+                    'data': values.reshape(rows, cols) if values.size == size else values,
+                    'encoding': codings[i],
+                },
+            }
+
+    def _stack_records(self, chunk):
+        columns = self._columns('stacks', chunk, ('id', 'count', 'rows', 'cols', 'created_at', 'data'))
+        names = _read_json_column(self._array(_entry('stacks', chunk, 'name')))
+        invalid = _read_json_column(self._array(_entry('stacks', chunk, 'invalid_items')))
+        codings = self._encodings('stacks', chunk, len(names))
+        payload = columns['data']
+        offset = 0
+        for i, name in enumerate(names):
+            count, rows, cols = int(columns['count'][i]), int(columns['rows'][i]), int(columns['cols'][i])
+            size = count * rows * cols
+            values = payload[offset:offset + size]
+            offset += size
+            yield {
+                'model': 'calculator.matrixstack',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'name': name,
+                    'count': count,
+                    'rows': rows,
+                    'cols': cols,
+                    'invalid_items': invalid[i],
+                    'data': values.reshape(count * rows, cols) if values.size == size else values,
+                    'encoding': codings[i],
+                    'created_at': _from_micros(columns['created_at'][i]),
+                },
+            }
+
+    def _stack_operation_records(self, chunk):
+        columns = self._columns(
+            'stack_operations', chunk,
+            ('id', 'stack', 'rhs', 'result', 'vectors', 'execution_time_ms', 'created_at'),
+        )
+        types = _read_json_column(self._array(_entry('stack_operations', chunk, 'operation_type')))
+        errors = _read_json_column(self._array(_entry('stack_operations', chunk, 'errors')))
+        precisions = _read_json_column(self._array(_entry('stack_operations', chunk, 'precision')))
+        for i, operation_type in enumerate(types):
+            rhs, vectors = int(columns['rhs'][i]), int(columns['vectors'][i])
+            yield {
+                'model': 'calculator.stackoperation',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'operation_type': operation_type,
+                    'stack': int(columns['stack'][i]),
+                    'rhs': None if rhs == NO_MATRIX else rhs,
+                    'result': int(columns['result'][i]),
+                    'vectors': None if vectors == NO_MATRIX else vectors,
+                    'errors': errors[i],
+                    'created_at': _from_micros(columns['created_at'][i]),
+                    'execution_time_ms': int(columns['execution_time_ms'][i]),
+                    'precision': precisions[i],
+                },
+            }
+
+    def _trace_records(self, chunk):
+        columns = self._columns('traces', chunk, (
+            'id', 'matrix', 'rows', 'cols', 'step_count', 'keyframe_interval', 'keyframe_count',
+            'rank', 'execution_time_ms', 'created_at', 'steps', 'data',
+        ))
+        algorithms = _read_json_column(self._array(_entry('traces', chunk, 'algorithm')))
+        pivots = _read_json_column(self._array(_entry('traces', chunk, 'pivot_columns')))
+        codings = self._encodings('traces', chunk, len(algorithms))
+        steps, payload = columns['steps'], columns['data']
+        steps_offset = offset = 0
+        for i, algorithm in enumerate(algorithms):
+            rows, cols = int(columns['rows'][i]), int(columns['cols'][i])
+            step_count, keyframe_count = int(columns['step_count'][i]), int(columns['keyframe_count'][i])
+            step_bytes = step_count * glassbox.STEP_DTYPE.itemsize
+            size = keyframe_count * rows * cols
+            values = payload[offset:offset + size]
+            offset += size
+            yield {
+                'model': 'calculator.steptrace',
+                'pk': int(columns['id'][i]),
+                'fields': {
+                    'algorithm': algorithm,
+                    'matrix': int(columns['matrix'][i]),
+                    'rows': rows,
+                    'cols': cols,
+                    'step_count': step_count,
+                    'keyframe_interval': int(columns['keyframe_interval'][i]),
+                    'keyframe_count': keyframe_count,
+                    'steps': steps[steps_offset:steps_offset + step_bytes].tobytes(),
+                    'rank': int(columns['rank'][i]),
+                    'pivot_columns': pivots[i],
+                    'execution_time_ms': int(columns['execution_time_ms'][i]),
+                    'data': values.reshape(keyframe_count * rows, cols) if values.size == size else values,
+                    'encoding': codings[i],
+                    'created_at': _from_micros(columns['created_at'][i]),
+                },
+            }
+            steps_offset += step_bytes
@@ -0,0 +1,360 @@
+"""
+Vistas async para operaciones matriciales, matrices y eventos push (despliegue ASGI).
+
+Equivalentes a las vistas de ``views.py`` pero nativas de asyncio: las
+consultas e inserciones usan el ORM async y el cómputo NumPy se delega a un
+``ThreadPoolExecutor`` acotado (``MATRIX_CONFIG['ASYNC_COMPUTE_WORKERS']``),
+de modo que una petición esperando a la base de datos o a LAPACK no ocupa un
+hilo de petición.
+
+Se sirven con ``matrixcalc_web.asgi:application``, por ejemplo:
+
+    gunicorn -k uvicorn.workers.UvicornWorker --workers 2 matrixcalc_web.asgi:application
+"""
+import asyncio
+import contextvars
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django_ratelimit.core import is_ratelimited
+from rest_framework import serializers as drf_serializers
+from rest_framework.exceptions import Throttled
+
+from calculator import events, metrics
+from calculator.components import result_encoding, save_components
+from calculator.models import Matrix, Operation, as_payload_array
+from calculator.ratelimit import ITERATIVE_OPERATIONS, charge, operand_ids
+from calculator.serializers import MatrixSerializer, OperationSerializer
+from calculator.utils import PRECISIONS, InvalidMatrixError, NumericError
+from calculator.views import _compute_operation
+
+# Slug de URL -> tipo de operación (mismos endpoints que la API sync). El
+# producto en cadena (``matrix_ids``, sin operandos fijos) solo está en la API sync
+OPERATION_SLUGS = {
+    'sum': 'SUM',
+    'subtract': 'SUBTRACT',
+    'multiply': 'MULTIPLY',
+    'inverse': 'INVERSE',
+    'pinv': 'PINV',
+    'lstsq': 'LSTSQ',
+    'determinant': 'DETERMINANT',
+    'transpose': 'TRANSPOSE',
+    'rank': 'RANK',
+    'colspace': 'COLSPACE',
+    'nullspace': 'NULLSPACE',
+    'rref': 'RREF',
+    'eigenvalues': 'EIGEN',
+    'svd': 'SVD',
+    'qr': 'QR',
+    'cholesky': 'CHOLESKY',
+    'power': 'POWER',
+    'expm': 'EXPM',
+    'sqrtm': 'SQRTM',
+    'logm': 'LOGM',
+    'cg': 'CG',
+    'gmres': 'GMRES',
+}
+BINARY_OPERATIONS = {'SUM', 'SUBTRACT', 'MULTIPLY', 'LSTSQ', 'CG', 'GMRES'}
+ITERATIVE_PARAMS = ('tol', 'max_iter', 'preconditioner', 'restart', 'x0_id')
+# Parámetros del body que cada operación recibe en extra_data
+OPERATION_PARAMS = {
+    'POWER': ('exponent',),
+    'INVERSE': ('fallback', 'rcond'),
+    'PINV': ('rcond',),
+    'LSTSQ': ('rcond',),
+    'RANK': ('method', 'rcond'),
+    'COLSPACE': ('method', 'rcond'),
+    'NULLSPACE': ('method', 'rcond'),
+    'RREF': ('method', 'rcond'),
+    'CG': ITERATIVE_PARAMS,
+    'GMRES': ITERATIVE_PARAMS,
+}
+
+_executor = None
+
+
+def get_executor():
+    """Executor compartido por el proceso para el cómputo NumPy."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.MATRIX_CONFIG['ASYNC_COMPUTE_WORKERS'],
+            thread_name_prefix='matrixcalc-compute',
+        )
+    return _executor
+
+
+async def run_compute(func, *args):
+    """
+    Ejecuta ``func`` en el executor de cómputo.
+
+    Se copia el contexto para que ``profiling.annotate`` y similares vean
+    las variables de contexto de la petición.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args))
+
+
+def async_api_view(methods):
+    """
+    Decorador mínimo para vistas async de la API.
+
+    Restringe los métodos HTTP, exime de CSRF (como ``@api_view`` de DRF) y
+    traduce las excepciones de dominio igual que ``custom_exception_handler``.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Método "{request.method}" no permitido.'}, status=405)
+            try:
+                return await view_func(request, *args, **kwargs)
+            except InvalidMatrixError as exc:
+                return JsonResponse({'error': 'invalid_matrix', 'detail': str(exc)}, status=400)
+            except NumericError as exc:
+                return JsonResponse({'error': 'numeric_error', 'detail': str(exc)}, status=422)
+            except Throttled as exc:
+                response = JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+                if exc.wait is not None:
+                    response['Retry-After'] = str(int(exc.wait))
+                return response
+            except drf_serializers.ValidationError as exc:
+                return JsonResponse(exc.detail, status=400, safe=False)
+
+        # csrf_exempt() de Django 4.2 envuelve con una función sync
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        raise drf_serializers.ValidationError({'error': 'JSON inválido'})
+
+
+def _compute_and_convert(operation_type, matrix_a, matrix_b, precision, extra_data=None, x0=None):
+    """Cómputo + normalización a float64 (ambos CPU-bound) en el executor."""
+    res_arr, name, extra_data, components, execution_time_ms = _compute_operation(
+        operation_type, matrix_a, matrix_b, extra_data, precision=precision, x0=x0
+    )
+    data = as_payload_array(res_arr)
+    if components:
+        components = {key: as_payload_array(value) for key, value in components.items()}
+    return data.shape, data, name, extra_data, components, execution_time_ms
+
+
+def _save_operation(operation_type, matrix_a, matrix_b, name, shape, data, extra_data, components,
+                    execution_time_ms, precision):
+    """Persiste resultado, operación y componentes en una transacción; devuelve la serialización."""
+    encoding = result_encoding(precision)
+    with transaction.atomic():
+        result_matrix = Matrix.objects.create(name=name, rows=shape[0], cols=shape[1], data=data, encoding=encoding)
+        operation = Operation.objects.create(
+            operation_type=operation_type,
+            matrix_a=matrix_a,
+            matrix_b=matrix_b,
+            result=result_matrix,
+            execution_time_ms=execution_time_ms,
+            extra_data=extra_data,
+            precision=precision,
+        )
+        if components:
+            save_components(operation, components, encoding)
+    return OperationSerializer(operation).data
+
+
+@async_api_view(['POST'])
+async def operation_view(request, slug):
+    """Ejecuta una operación matricial (``/api/async/operations/<slug>/``)."""
+    operation_type = OPERATION_SLUGS.get(slug)
+    if operation_type is None:
+        return JsonResponse({'error': f'Operación desconocida: {slug}'}, status=404)
+
+    body = _json_body(request)
+    precision = body.get('precision') or 'float64'
+    if precision not in PRECISIONS:
+        return JsonResponse({'error': f'Precisión no soportada: {precision}'}, status=400)
+    if operation_type in BINARY_OPERATIONS:
+        wanted = operand_ids(body, ('matrix_a_id', 'matrix_b_id'))
+    else:
+        wanted = operand_ids(body, ('matrix_id',))
+    extra_data = {
+        key: body[key] for key in OPERATION_PARAMS.get(operation_type, ()) if body.get(key) is not None
+    } or None
+    if operation_type in ITERATIVE_OPERATIONS:
+        if not body.get('matrix_b_id'):
+            raise InvalidMatrixError(f"{operation_type} requiere matrix_b_id (vector b).")
+        limit = settings.MATRIX_CONFIG['ITERATIVE_MAX_ITERATIONS']
+        max_iter = body.get('max_iter')
+        if isinstance(max_iter, int) and not isinstance(max_iter, bool) and max_iter > limit:
+            raise InvalidMatrixError(f"max_iter no puede superar {limit}.")
+
+    # Formas sin cargar los payloads: un operando inexistente responde 404 sin cobrar
+    shapes = {
+        pk: (rows, cols)
+        async for pk, rows, cols in Matrix.objects.filter(id__in=wanted).values_list('id', 'rows', 'cols')
+    }
+    expected = 2 if operation_type in BINARY_OPERATIONS else 1
+    if len(wanted) != expected or any(i not in shapes for i in wanted):
+        return JsonResponse({'error': 'Una o ambos matrices no existen'}, status=404)
+
+    cost, remaining = await sync_to_async(charge)(
+        request, operation_type, [shapes[i] for i in wanted], params=body
+    )
+
+    # Una sola consulta para los datos de ambos operandos (y la solución inicial)
+    x0_ids = operand_ids(body, ('x0_id',)) if operation_type in ITERATIVE_OPERATIONS else []
+    matrices = {m.id: m async for m in Matrix.objects.filter(id__in=[*wanted, *x0_ids])}
+    if any(i not in matrices for i in [*wanted, *x0_ids]):
+        return JsonResponse({'error': 'Una o ambos matrices no existen'}, status=404)
+
+    matrix_a = matrices[wanted[0]]
+    matrix_b = matrices[wanted[1]] if expected == 2 else None
+    x0 = matrices[x0_ids[0]].array if x0_ids else None
+
+    shape, data, name, extra_data, components, execution_time_ms = await run_compute(
+        _compute_and_convert, operation_type, matrix_a, matrix_b, precision, extra_data, x0
+    )
+
+    operation_data = await sync_to_async(_save_operation)(
+        operation_type, matrix_a, matrix_b, name, shape, data, extra_data, components, execution_time_ms, precision
+    )
+
+    response = JsonResponse(operation_data, status=201)
+    response['X-RateLimit-Cost'] = f"{cost:.2f}"
+    response['X-RateLimit-Remaining'] = f"{remaining:.2f}"
+    return response
+
+
+@async_api_view(['GET', 'POST'])
+async def matrix_list_view(request):
+    """
+    Lista (paginada como la API sync) o crea matrices (``/api/async/matrices/``).
+    """
+    if request.method == 'POST':
+        limited = await sync_to_async(is_ratelimited)(
+            request, group='async-matrix-create', key='ip', rate='100/m', method='POST', increment=True
+        )
+        if limited:
+            return JsonResponse({'detail': 'Demasiadas peticiones.'}, status=429)
+
+        serializer = MatrixSerializer(data=_json_body(request))
+        serializer.is_valid(raise_exception=True)
+        validated_data = serializer.normalize_data(dict(serializer.validated_data))
+        matrix = await Matrix.objects.acreate(**validated_data)
+        return JsonResponse(MatrixSerializer(matrix).data, status=201)
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    queryset = Matrix.objects.order_by('-created_at')
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    results = [MatrixSerializer(m).data async for m in queryset[offset:offset + page_size]]
+
+    base_url = request.build_absolute_uri(request.path)
+    return JsonResponse({
+        'count': count,
+        'next': f"{base_url}?page={page + 1}" if offset + page_size < count else None,
+        'previous': f"{base_url}?page={page - 1}" if page > 1 else None,
+        'results': results,
+    })
+
+
+@async_api_view(['GET'])
+async def matrix_detail_view(request, pk):
+    """Obtiene una matriz por ID (``/api/async/matrices/<pk>/``)."""
+    try:
+        matrix = await Matrix.objects.aget(pk=pk)
+    except Matrix.DoesNotExist:
+        return JsonResponse({'detail': 'No encontrado.'}, status=404)
+    return JsonResponse(MatrixSerializer(matrix).data)
+
+
+# --- Eventos push (SSE) ---
+
+def _replay(last_event_id, cursor):
+    """
+    Eventos perdidos por un cliente que reconecta con ``Last-Event-ID``.
+
+    Si parte de ellos ya expiró del log se antepone un ``stats.resync``.
+    """
+    if last_event_id is None or last_event_id == cursor:
+        return []
+    if last_event_id > cursor:
+        # El contador se reinició: los ids del cliente ya no son válidos
+        return [events.format_sse({'id': cursor, 'type': 'stats.resync', 'data': {'reason': 'reset'}})]
+
+    replay = events.read_events(last_event_id, cursor)
+    chunks = []
+    if not replay or replay[0]['id'] != last_event_id + 1:
+        chunks.append(events.format_sse({'id': last_event_id, 'type': 'stats.resync', 'data': {'reason': 'expired'}}))
+    chunks.extend(events.format_sse(event) for event in replay)
+    return chunks
+
+
+def _overflow_message():
+    metrics.EVENTS_OVERFLOW.inc()
+    return f"event: overflow\ndata: {json.dumps({'reason': 'slow_consumer'})}\n\n"
+
+
+async def _async_event_stream(last_event_id):
+    config = settings.MATRIX_CONFIG
+    loop = asyncio.get_running_loop()
+    broker = events.get_broker()
+    subscriber, cursor = broker.subscribe(config['EVENTS_QUEUE_SIZE'], loop=loop)
+    try:
+        yield 'retry: 3000\n\n'
+        for chunk in await sync_to_async(_replay)(last_event_id, cursor):
+            yield chunk
+
+        deadline = loop.time() + config['EVENTS_MAX_STREAM_SECONDS']
+        while loop.time() < deadline:
+            event = await subscriber.aget(config['EVENTS_KEEPALIVE_SECONDS'])
+            if event is not None:
+                yield events.format_sse(event)
+            elif not subscriber.overflowed:
+                yield ': keepalive\n\n'
+            if subscriber.overflowed and subscriber.drained:
+                yield _overflow_message()
+                return
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+@async_api_view(['GET'])
+async def events_view(request):
+    """
+    Stream Server-Sent Events de operaciones y deltas de estadísticas (``/api/events/``).
+
+    Solo bajo ASGI, donde la conexión ocupa una corrutina. Bajo WSGI cada
+    stream retendría un hilo de gunicorn (o un worker sync) hasta
+    ``EVENTS_MAX_STREAM_SECONDS``, así que se responde ``204``: EventSource no
+    reconecta y el frontend vuelve al polling. El stream se cierra tras
+    ``EVENTS_MAX_STREAM_SECONDS`` y el navegador reconecta con ``Last-Event-ID``.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(_async_event_stream(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Sin buffering en nginx
+    return response
@@ -0,0 +1,507 @@
+"""
+Exportación de backups en streaming.
+
+Los registros se leen con ``.iterator(chunk_size=...)`` y el serializer JSON
+de Django los escribe uno a uno directamente en el archivo (opcionalmente
+comprimido con gzip o zstd), de modo que la memoria usada no depende del
+tamaño de la base de datos.
+
+El formato es el mismo JSON de ``import_backup`` (versión 2.0): las claves
+``total_<sección>`` (``total_matrices``, ``total_operations``, ...) se
+escriben al final, cuando ya se conocen los totales. Cada modelo va en su
+propia lista, en el orden de ``RECORD_SECTIONS``: matrices, operaciones,
+componentes de descomposiciones (``OperationComponent``), pilas
+(``MatrixStack``), operaciones sobre pilas (``StackOperation``) y trazas
+GlassBox (``StepTrace``, con sus deltas en base64).
+
+Backups incrementales: cada backup de la cadena registra un checkpoint
+(máximo id de cada modelo, y el instante de corte) en ``checkpoint.json``. Un
+backup incremental exporta solo las operaciones, pilas y trazas nuevas y las matrices
+nuevas o modificadas (``updated_at``) desde el checkpoint anterior, y guarda en su cabecera ``since`` (checkpoint de partida) y
+``checkpoint`` (el nuevo), con lo que ``import_backup`` puede validar la cadena
+completo + incrementales. Los borrados no se registran: restaurar la cadena
+recupera también filas que la limpieza eliminó después.
+
+El máximo id no basta como corte: una transacción que reservó un id menor y
+confirma después del checkpoint quedaría fuera de la cadena. Por eso cada
+incremental vuelve a exportar las filas creadas o modificadas en los últimos
+``MATRIX_CONFIG['BACKUP_CHECKPOINT_MARGIN']`` segundos antes del checkpoint
+anterior; la restauración hace upsert por id, así que repetirlas no duplica nada.
+
+Solo los backups incrementales (y los completos que lo piden con
+``update_checkpoint``) mueven el checkpoint: un backup completo puntual no
+rompe la cadena en curso.
+
+Formato alternativo: con ``backup_format='npz'`` (o una ruta ``.npz``) se
+escribe el archivo binario columnar de ``calculator.archive``; ``open_reader``
+detecta el formato al leer.
+"""
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import Serializer as JSONSerializer
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils import timezone
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+from calculator import archive
+from calculator.models import (
+    Matrix, MatrixStack, Operation, OperationComponent, PayloadBackedModel, StackOperation, StepTrace,
+)
+
+BACKUP_VERSION = '2.0'
+CHECKPOINT_FILENAME = 'checkpoint.json'
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+EXTENSIONS = {'none': '.json', 'gzip': '.json.gz', 'zstd': '.json.zst'}
+FORMATS = ('json', 'npz')
+ARCHIVE_EXTENSION = '.npz'
+DEFAULT_CHUNK_SIZE = 500
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def compression_for_path(path):
+    """Deduce la compresión a partir de la extensión del archivo."""
+    name = str(path)
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        return 'zstd'
+    return 'none'
+
+
+def format_for_path(path):
+    """Deduce el formato (json o npz) a partir de la extensión del archivo."""
+    return 'npz' if str(path).endswith(ARCHIVE_EXTENSION) else 'json'
+
+
+def backup_extension(backup_format='json', compression=None):
+    """Extensión por defecto de un backup nuevo."""
+    if backup_format == 'npz':
+        return ARCHIVE_EXTENSION
+    return EXTENSIONS[compression or 'none']
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("La compresión zstd requiere el paquete 'zstandard' (pip install zstandard)")
+
+
+def open_backup_for_write(path, compression=None):
+    """Abre ``path`` para escribir texto, comprimiendo según ``compression``."""
+    compression = compression or compression_for_path(path)
+    if compression == 'gzip':
+        # compresslevel 6: buena relación tamaño/CPU para JSON numérico
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    if compression == 'zstd':
+        _require_zstandard()
+        raw = open(path, 'wb')
+        writer = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def open_backup_for_read(path):
+    """Abre un backup para leer texto, detectando la compresión por su cabecera."""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if magic == _ZSTD_MAGIC:
+        _require_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+RECORD_SECTIONS = ('matrices', 'operations', 'components', 'stacks', 'stack_operations', 'traces')
+
+
+class BackupReader:
+    """
+    Lector incremental de un backup JSON (plano o comprimido).
+
+    Parsea el objeto de nivel superior por partes: las claves escalares van a
+    ``header`` y las listas de ``RECORD_SECTIONS`` se entregan registro a
+    registro desde ``records()``, sin cargar el archivo entero. Tanto los
+    backups actuales como los antiguos (con ``indent=2``, sin ``components``
+    ni pilas) tienen la cabecera antes de las listas.
+
+    Uso:
+        with BackupReader(path) as reader:
+            reader.header['backup_type']
+            for section, record in reader.records():
+                ...
+    """
+
+    READ_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self._stream = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+        self._pending_section = None
+        self._done = False
+
+    def __enter__(self):
+        self._stream = open_backup_for_read(self.path)
+        self._expect('{')
+        self._read_header()
+        return self
+
+    def __exit__(self, *exc):
+        self._stream.close()
+        return False
+
+    # -- Buffer --
+
+    def _fill(self):
+        chunk = self._stream.read(self.READ_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        # Descartar lo ya consumido para que el buffer no crezca
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Siguiente carácter que no sea espacio (sin consumirlo)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise json.JSONDecodeError('Fin de archivo inesperado', self._buffer, self._pos)
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Se esperaba '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Valor incompleto en el buffer: leer más y reintentar
+                if self._eof or not self._fill():
+                    raise
+                continue
+            # Un número al final del buffer puede estar cortado
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    # -- Estructura --
+
+    def _next_key(self):
+        """Lee la siguiente clave del objeto raíz, o None si terminó."""
+        char = self._peek()
+        if char == '}':
+            self._pos += 1
+            self._done = True
+            return None
+        if char == ',':
+            self._pos += 1
+        key = self._value()
+        self._expect(':')
+        return key
+
+    def _read_header(self):
+        while True:
+            key = self._next_key()
+            if key is None:
+                return
+            if key in RECORD_SECTIONS and self._peek() == '[':
+                self._pending_section = key
+                return
+            self.header[key] = self._value()
+
+    def records(self):
+        """Itera (sección, registro) de cada lista de ``RECORD_SECTIONS``, en orden."""
+        while self._pending_section is not None:
+            section = self._pending_section
+            self._pending_section = None
+            self._expect('[')
+            if self._peek() == ']':
+                self._pos += 1
+            else:
+                while True:
+                    yield section, self._value()
+                    if self._peek() == ',':
+                        self._pos += 1
+                        continue
+                    self._expect(']')
+                    break
+            if not self._done:
+                self._read_header()
+
+
+def open_reader(path):
+    """Lector del backup (``BackupReader`` o ``archive.ArchiveReader``) según su contenido."""
+    if archive.is_archive(path):
+        return archive.ArchiveReader(path)
+    return BackupReader(path)
+
+
+class BackupSerializer(JSONSerializer):
+    """
+    Serializer JSON de Django que escribe los datos de cada matriz (y
+    componente o pila) en ``fields.data`` (en lugar de la referencia a su payload),
+    de modo que el backup sigue siendo autocontenido.
+    """
+
+    def get_dump_object(self, obj):
+        dump = super().get_dump_object(obj)
+        if isinstance(obj, PayloadBackedModel):
+            dump['fields'].pop('payload', None)
+            dump['fields'].pop('content_hash', None)
+            dump['fields']['data'] = obj.data
+            dump['fields']['encoding'] = obj.encoding
+        return dump
+
+
+class _Counter:
+    """Itera un queryset contando los registros servidos."""
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
+
+
+def _write_records(stream, queryset, chunk_size):
+    records = _Counter(queryset.order_by('id').iterator(chunk_size=chunk_size))
+    BackupSerializer().serialize(records, stream=stream)
+    return records.count
+
+
+def all_querysets():
+    """Querysets de todos los registros, por sección."""
+    return {
+        'matrices': Matrix.objects.all(),
+        'operations': Operation.objects.all(),
+        'components': OperationComponent.objects.select_related('payload'),
+        'stacks': MatrixStack.objects.all(),
+        'stack_operations': StackOperation.objects.all(),
+        'traces': StepTrace.objects.all(),
+    }
+
+
+def write_backup(stream, querysets=None, chunk_size=DEFAULT_CHUNK_SIZE, extra=None):
+    """
+    Escribe un backup JSON en ``stream`` registro a registro.
+
+    Args:
+        querysets: Querysets a exportar por sección (por defecto, todo)
+        extra: Claves adicionales de cabecera
+
+    Returns:
+        dict: Registros exportados por sección
+    """
+    querysets = all_querysets() if querysets is None else querysets
+
+    header = {
+        'version': BACKUP_VERSION,
+        'timestamp': timezone.now().isoformat(),
+        'database': connection.vendor,
+        **(extra or {}),
+    }
+    stream.write(json.dumps(header, ensure_ascii=False)[:-1])
+
+    totals = {}
+    for section in RECORD_SECTIONS:
+        stream.write(f', "{section}": ')
+        totals[section] = _write_records(stream, querysets[section], chunk_size)
+
+    stream.write(''.join(f', "total_{section}": {total}' for section, total in totals.items()) + '}\n')
+    return totals
+
+
+# --- Checkpoints ---
+
+def default_checkpoint_path():
+    return Path(settings.BACKUP_DIR) / CHECKPOINT_FILENAME
+
+
+# Clave del checkpoint con el máximo id de cada modelo. Se leen antes los que
+# referencian a otros (operaciones antes que matrices, operaciones sobre pilas
+# antes que pilas): lo que esté por debajo de un máximo ya existía al leer el
+# siguiente, así que sus referencias quedan también dentro del backup
+CHECKPOINT_IDS = (
+    ('trace_max_id', StepTrace),
+    ('operation_max_id', Operation),
+    ('matrix_max_id', Matrix),
+    ('stack_operation_max_id', StackOperation),
+    ('stack_max_id', MatrixStack),
+)
+
+
+def take_checkpoint():
+    """Estado actual de la base de datos que delimita un backup."""
+    checkpoint = {key: model.objects.aggregate(value=Max('id'))['value'] or 0 for key, model in CHECKPOINT_IDS}
+    checkpoint['timestamp'] = timezone.now().isoformat()
+    return checkpoint
+
+
+def read_checkpoint(path=None):
+    """Último checkpoint registrado, o None si no hay ninguno."""
+    path = Path(path or default_checkpoint_path())
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_checkpoint(checkpoint, backup_path, path=None):
+    """Registra el checkpoint de un backup terminado (escritura atómica)."""
+    path = Path(path or default_checkpoint_path())
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({**checkpoint, 'backup': str(backup_path)}, f)
+    os.replace(tmp_path, path)
+
+
+def _checkpoint_key(checkpoint):
+    # Los checkpoints anteriores a las pilas y las trazas no tienen sus claves
+    return tuple(checkpoint.get(key) for key, _ in CHECKPOINT_IDS) + (checkpoint['timestamp'],)
+
+
+def same_checkpoint(a, b):
+    return a is not None and b is not None and _checkpoint_key(a) == _checkpoint_key(b)
+
+
+def full_querysets(until):
+    """Registros de un backup completo acotado por el checkpoint ``until``, por sección."""
+    return {
+        'matrices': Matrix.objects.filter(id__lte=until['matrix_max_id']),
+        'operations': Operation.objects.filter(id__lte=until['operation_max_id']),
+        'components': OperationComponent.objects.select_related('payload').filter(
+            operation_id__lte=until['operation_max_id']
+        ),
+        'stacks': MatrixStack.objects.filter(id__lte=until['stack_max_id']),
+        'stack_operations': StackOperation.objects.filter(id__lte=until['stack_operation_max_id']),
+        'traces': StepTrace.objects.filter(id__lte=until['trace_max_id']),
+    }
+
+
+def incremental_querysets(since, until, margin=None):
+    """
+    Registros nuevos o modificados entre dos checkpoints, por sección.
+
+    Las operaciones (y sus componentes), las pilas y las trazas no se
+    modifican tras crearse, así que basta el rango de ids; las matrices además
+    pueden editarse (``updated_at``). Un ``since`` anterior a las pilas o las
+    trazas no tiene sus máximos: se exportan todas.
+    Se incluyen también las filas con id anterior a ``since`` creadas o
+    modificadas en los ``margin`` segundos previos a él (por defecto
+    ``BACKUP_CHECKPOINT_MARGIN``): las que confirmaron tarde.
+    """
+    if margin is None:
+        margin = settings.MATRIX_CONFIG['BACKUP_CHECKPOINT_MARGIN']
+    window_start = datetime.fromisoformat(since['timestamp']) - timedelta(seconds=margin)
+    until_ts = datetime.fromisoformat(until['timestamp'])
+    matrices = Matrix.objects.filter(id__lte=until['matrix_max_id']).filter(
+        Q(id__gt=since['matrix_max_id'])
+        | Q(updated_at__gt=window_start, updated_at__lte=until_ts)
+    )
+    operations = Operation.objects.filter(id__lte=until['operation_max_id']).filter(
+        Q(id__gt=since['operation_max_id']) | Q(created_at__gt=window_start)
+    )
+    components = OperationComponent.objects.select_related('payload').filter(
+        operation_id__lte=until['operation_max_id']
+    ).filter(
+        Q(operation_id__gt=since['operation_max_id']) | Q(operation__created_at__gt=window_start)
+    )
+    stacks = MatrixStack.objects.filter(id__lte=until['stack_max_id']).filter(
+        Q(id__gt=since.get('stack_max_id', 0)) | Q(created_at__gt=window_start)
+    )
+    stack_operations = StackOperation.objects.filter(id__lte=until['stack_operation_max_id']).filter(
+        Q(id__gt=since.get('stack_operation_max_id', 0)) | Q(created_at__gt=window_start)
+    )
+    traces = StepTrace.objects.filter(id__lte=until['trace_max_id']).filter(
+        Q(id__gt=since.get('trace_max_id', 0)) | Q(created_at__gt=window_start)
+    )
+    return {
+        'matrices': matrices,
+        'operations': operations,
+        'components': components,
+        'stacks': stacks,
+        'stack_operations': stack_operations,
+        'traces': traces,
+    }
+
+
+def export_backup(output_path, compression=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  incremental=False, checkpoint_path=None, backup_format=None, update_checkpoint=False):
+    """
+    Exporta un backup a ``output_path``.
+
+    Con ``incremental=True`` exporta solo los cambios desde el último
+    checkpoint (si no existe ninguno se hace un backup completo) y registra
+    el nuevo. Un backup completo solo registra su checkpoint con
+    ``update_checkpoint=True`` (empieza una cadena nueva).
+    ``backup_format`` ('json' o 'npz') se deduce de la extensión si se omite.
+
+    Returns:
+        dict: path, tipo, formato, compresión y totales exportados por sección
+    """
+    backup_format = backup_format or format_for_path(output_path)
+    compression = compression or ('none' if backup_format == 'npz' else compression_for_path(output_path))
+    checkpoint = take_checkpoint()
+    since = read_checkpoint(checkpoint_path) if incremental else None
+
+    if since is not None:
+        backup_type = 'incremental'
+        querysets = incremental_querysets(since, checkpoint)
+        extra = {'backup_type': backup_type, 'since': since, 'checkpoint': checkpoint}
+    else:
+        backup_type = 'full'
+        querysets = full_querysets(checkpoint)
+        extra = {'backup_type': backup_type, 'checkpoint': checkpoint}
+
+    if backup_format == 'npz':
+        header = {
+            'version': BACKUP_VERSION,
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            **extra,
+        }
+        totals = archive.write_archive(output_path, querysets, header, chunk_size, compression)
+    else:
+        with open_backup_for_write(output_path, compression) as stream:
+            totals = write_backup(stream, querysets, chunk_size=chunk_size, extra=extra)
+    if incremental or update_checkpoint:
+        write_checkpoint(checkpoint, output_path, checkpoint_path)
+
+    return {
+        'path': str(output_path),
+        'type': backup_type,
+        'format': backup_format,
+        'compression': compression,
+        **totals,
+    }
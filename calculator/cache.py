@@ -0,0 +1,352 @@
+"""
+Backends de cache para MatrixCalc.
+
+- ``SharedSQLiteCache``: cache compartido entre los workers de un host.
+- ``Instrumented*``: variantes que registran hits/misses en las métricas de
+  runtime (``matrixcalc_cache_requests_total``).
+"""
+import contextlib
+import os
+import pickle
+import sqlite3
+import stat
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from calculator.metrics import record_cache_access
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Mixin que contabiliza hits y misses de ``get``.
+
+    ``BaseCache.get_many`` delega en ``get``, así que no se instrumenta aparte.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        record_cache_access(hit=value is not _MISSING)
+        return default if value is _MISSING else value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    """LocMemCache con métricas de hit rate."""
+
+
+class SharedSQLiteCache(BaseCache):
+    """
+    Cache compartido entre procesos del mismo host sobre un archivo SQLite.
+
+    Todos los workers de gunicorn abren el mismo archivo (``LOCATION``), por lo
+    que los contadores de django_ratelimit y cualquier resultado cacheado son
+    comunes a la instancia. SQLite en modo WAL con ``mmap_size`` mapea el
+    archivo en memoria; ubicarlo en un tmpfs evita tocar disco.
+
+    Los valores se deserializan con pickle, así que quien pueda escribir el
+    archivo ejecuta código en los workers. El directorio se crea con modo
+    0700 y el archivo con 0600, y se rechazan (``ImproperlyConfigured``) un
+    directorio o archivo de otro usuario o escribible por otros, y un enlace
+    simbólico en lugar del archivo.
+
+    - ``add``/``incr`` se ejecutan dentro de ``BEGIN IMMEDIATE``, que toma el
+      lock de escritura del archivo: son atómicos entre procesos.
+    - La capacidad se acota por número de entradas (``MAX_ENTRIES``) y por
+      bytes (``MAX_BYTES``); al superarla se eliminan primero las entradas
+      expiradas y luego las menos usadas recientemente (LRU aproximado).
+    - Las lecturas no toman el lock de escritura: el instante de último acceso
+      de cada hit (como mucho uno por clave y segundo) se acumula en memoria
+      del proceso y se escribe en la siguiente transacción de escritura, antes
+      de podar.
+
+    OPTIONS:
+        MAX_ENTRIES: Número máximo de claves (por defecto 300, como Django)
+        CULL_FREQUENCY: Fracción (1/N) de entradas a eliminar al podar
+        MAX_BYTES: Tamaño máximo de los valores serializados
+        MMAP_SIZE: Bytes del archivo a mapear en memoria
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Resolución (s) con la que se actualiza el instante de último acceso
+    access_resolution = 1.0
+    # Accesos pendientes de escribir por proceso; los que superen el límite
+    # se descartan hasta la siguiente escritura
+    max_pending_accesses = 1024
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._mmap_size = int(options.get('MMAP_SIZE', 64 * 1024 * 1024))
+        self._local = threading.local()
+        self._pending_accesses = {}
+        self._pending_lock = threading.Lock()
+
+    # --- Conexión -----------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # Tras un fork (gunicorn preload) la conexión del padre no es reutilizable
+        if conn is None or self._local.pid != os.getpid():
+            self._prepare_path()
+            conn = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={self._mmap_size}')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value BLOB NOT NULL,'
+                ' expires REAL,'
+                ' accessed REAL NOT NULL,'
+                ' size INTEGER NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _prepare_path(self):
+        """Crea el directorio y el archivo privados, o rechaza los que no lo son."""
+        path = os.path.abspath(self._path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        except FileExistsError:
+            pass
+        else:
+            os.close(fd)
+        _check_private(directory, os.stat(directory), 'directorio')
+        info = os.lstat(path)
+        if not stat.S_ISREG(info.st_mode):
+            raise ImproperlyConfigured(f"El cache {path} no es un archivo regular (¿enlace simbólico?).")
+        _check_private(path, info, 'archivo')
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Transacción con lock de escritura exclusivo entre procesos."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._flush_accesses(conn)
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    # --- Helpers --------------------------------------------------------------
+
+    def _record_access(self, key, now):
+        with self._pending_lock:
+            if key in self._pending_accesses or len(self._pending_accesses) < self.max_pending_accesses:
+                self._pending_accesses[key] = now
+
+    def _flush_accesses(self, conn):
+        with self._pending_lock:
+            pending, self._pending_accesses = self._pending_accesses, {}
+        if pending:
+            conn.executemany(
+                'UPDATE cache SET accessed = MAX(accessed, ?) WHERE key = ?',
+                [(accessed, key) for key, accessed in pending.items()],
+            )
+
+    def _load_live(self, conn, key, now):
+        row = conn.execute('SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            return None
+        return row
+
+    def _store(self, conn, key, value, timeout, now):
+        blob = pickle.dumps(value, self.pickle_protocol)
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)',
+            (key, blob, self.get_backend_timeout(timeout), now, len(blob)),
+        )
+        self._cull(conn, now)
+
+    def _cull(self, conn, now):
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        if count <= self._max_entries and total <= self._max_bytes:
+            return
+
+        conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+
+        if count > self._max_entries:
+            excess = count - self._max_entries
+            batch = max(excess, count // self._cull_frequency) if self._cull_frequency else count
+            conn.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (batch,),
+            )
+        while total > self._max_bytes:
+            oldest = conn.execute('SELECT key, size FROM cache ORDER BY accessed LIMIT 64').fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                total -= size
+                if total <= self._max_bytes:
+                    break
+
+    # --- API de BaseCache -----------------------------------------------------
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            if self._load_live(conn, key, now) is not None:
+                return False
+            self._store(conn, key, value, timeout, now)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        conn = self._connection()
+        row = self._load_live(conn, key, now)
+        if row is None:
+            return default
+        if now - row[2] > self.access_resolution:
+            self._record_access(key, now)
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            self._store(conn, key, value, timeout, time.time())
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            if self._load_live(conn, key, now) is None:
+                return False
+            conn.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ?',
+                (self.get_backend_timeout(timeout), now, key),
+            )
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            row = self._load_live(conn, key, now)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(new_value, self.pickle_protocol)
+            conn.execute(
+                'UPDATE cache SET value = ?, accessed = ?, size = ? WHERE key = ?',
+                (blob, now, len(blob), key),
+            )
+            return new_value
+
+    def consume_tokens(self, key, cost, capacity, refill_rate, version=None):
+        """
+        Recarga y cobra un token bucket de forma atómica entre procesos.
+
+        Returns:
+            tuple: (allowed, tokens restantes, segundos de espera)
+        """
+        from calculator.ratelimit import bucket_ttl, refill_and_consume
+
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            row = self._load_live(conn, key, now)
+            state = pickle.loads(row[0]) if row is not None else None
+            allowed, state, remaining, wait = refill_and_consume(state, cost, capacity, refill_rate, now)
+            self._store(conn, key, state, bucket_ttl(capacity, refill_rate), now)
+        return allowed, remaining, wait
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            return conn.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._load_live(self._connection(), key, time.time()) is not None
+
+    def clear(self):
+        with self._write() as conn:
+            conn.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Las conexiones se mantienen abiertas por hilo durante la vida del proceso
+        pass
+
+
+def _check_private(path, info, kind):
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise ImproperlyConfigured(f"El {kind} del cache {path} pertenece a otro usuario (uid {info.st_uid}).")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ImproperlyConfigured(f"El {kind} del cache {path} es escribible por otros usuarios.")
+
+
+class InstrumentedSharedSQLiteCache(InstrumentedCacheMixin, SharedSQLiteCache):
+    """SharedSQLiteCache con métricas de hit rate (backend por defecto)."""
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """RedisCache con métricas de hit rate (alternativa a SharedSQLiteCache)."""
+
+    # Misma lógica que calculator.ratelimit.refill_and_consume, ejecutada en
+    # Redis para que sea atómica entre hosts.
+    _TOKEN_BUCKET_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local cost = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+cost = math.min(cost, capacity)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+elseif rate > 0 then
+    wait = (cost - tokens) / rate
+else
+    wait = -1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+if rate > 0 then
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+end
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+    def consume_tokens(self, key, cost, capacity, refill_rate, version=None):
+        """
+        Recarga y cobra un token bucket de forma atómica (script Lua).
+
+        Returns:
+            tuple: (allowed, tokens restantes, segundos de espera)
+        """
+        key = self.make_and_validate_key(key, version=version)
+        client = self._cache.get_client(key, write=True)
+        allowed, remaining, wait = client.eval(
+            self._TOKEN_BUCKET_SCRIPT, 1, key, cost, capacity, refill_rate, time.time()
+        )
+        wait = float(wait)
+        return bool(allowed), float(remaining), float('inf') if wait < 0 else wait
@@ -1,13 +1,22 @@
 from __future__ import annotations
+import time
+
 from celery import shared_task
+from celery.exceptions import TimeoutError as CeleryTimeoutError
 
 from .services import export_backup_service, cleanup_data_service
+from .shared_memory import compute_operation, dispatch
 
 
 @shared_task(bind=True, name='calculator.export_backup')
-def export_backup_task(self, output_path: str | None = None):
-    """Tarea Celery que ejecuta el servicio de exportación."""
-    result = export_backup_service(output_path=output_path)
+def export_backup_task(
+    self, output_path: str | None = None, compression: str | None = None, incremental: bool = False,
+    backup_format: str | None = None,
+):
+    """Tarea Celery que ejecuta el servicio de exportación (streaming)."""
+    result = export_backup_service(
+        output_path=output_path, compression=compression, incremental=incremental, backup_format=backup_format
+    )
     if result.get('status') != 'ok':
         raise Exception(f"export_backup failed: {result.get('message')}")
     return result
@@ -20,3 +29,48 @@ def cleanup_old_data_task(self, dry_run: bool = False, days: int | None = None):
     if result.get('status') != 'ok':
         raise Exception(f"cleanup_old_data failed: {result.get('message')}")
     return result
+
+
+@shared_task(bind=True, name='calculator.compute_operation')
+def compute_operation_task(
+    self, token: str, operation_type: str, operands: dict, extra_data: dict | None = None,
+    precision: str = 'float64', deadline: float | None = None,
+):
+    """
+    Tarea Celery que ejecuta una operación con operandos en memoria compartida.
+
+    Solo recibe handles de segmentos, así que el worker debe estar en el mismo
+    host que quien la envía (ver ``run_operation_on_worker``). Pasado
+    ``deadline`` descarta su resultado en vez de dejar segmentos sin dueño.
+    """
+    return compute_operation(token, operation_type, operands, extra_data, precision, deadline)
+
+
+def run_operation_on_worker(operation_type, matrix_a, matrix_b=None, extra_data=None, precision='float64',
+                            x0=None, timeout=None):
+    """
+    Ejecuta una operación en un worker Celery del mismo host por memoria compartida.
+
+    Con ``timeout`` la tarea se revoca si no responde a tiempo, y el worker
+    que ya la estaba ejecutando descarta su resultado (``deadline``).
+
+    Returns:
+        tuple: Lo mismo que ``_compute_operation``
+
+    Raises:
+        celery.exceptions.TimeoutError: Si la tarea no responde en ``timeout`` segundos
+    """
+    deadline = time.time() + timeout if timeout is not None else None
+
+    def submit(**kwargs):
+        result = compute_operation_task.apply_async(kwargs=kwargs, expires=timeout)
+        try:
+            return result.get(timeout=timeout)
+        except CeleryTimeoutError:
+            result.revoke()
+            # ``dispatch`` barre los segmentos del token al volver: debe ser
+            # después del plazo que comprueba el worker
+            time.sleep(max(0.0, deadline - time.time()))
+            raise
+
+    return dispatch(submit, operation_type, matrix_a, matrix_b, extra_data, precision, x0, deadline)
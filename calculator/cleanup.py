@@ -0,0 +1,268 @@
+"""
+Limpieza por lotes de datos antiguos (política de retención).
+
+En lugar de un único ``delete()`` dentro de una transacción larga, la limpieza
+avanza por rangos de id (paginación por clave, ``id > último``) en lotes de
+``batch_size`` filas, cada uno en su propia transacción corta:
+
+1. Operaciones con ``created_at < cutoff``. Solo sus componentes
+   (``OperationComponent``) referencian a ``Operation``: se borran ambos con
+   DELETE directos (sin el collector de Django, que carga los objetos en
+   memoria para resolver cascadas) y se recalcula ``ref_count`` de los
+   payloads de los componentes.
+2. Trazas GlassBox (``StepTrace``) con ``created_at < cutoff``, también con
+   DELETE directo y recálculo de los payloads de sus fotogramas clave.
+3. Matrices huérfanas anteriores al cutoff. La condición de huérfana se
+   expresa con ``NOT EXISTS`` por cada FK (indexadas) y se evalúa dentro del
+   mismo DELETE, de modo que una matriz referenciada entre la selección del
+   lote y el borrado no se elimina. Después se recalcula ``ref_count`` de los
+   payloads que usaban.
+4. Payloads (``MatrixPayload``) sin referencias.
+
+Entre lotes se puede dormir ``sleep`` segundos para ceder la base de datos.
+El progreso (fase, último id y cutoff) se guarda en un archivo de estado tras
+cada lote: una limpieza interrumpida se retoma con ``resume=True`` usando el
+mismo cutoff.
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.deletion import Collector
+
+from calculator import events
+from calculator.models import Matrix, MatrixPayload, MatrixStack, Operation, OperationComponent, StepTrace
+
+logger = logging.getLogger(__name__)
+
+STATE_FILENAME = 'cleanup_state.json'
+PHASES = ('operations', 'traces', 'matrices', 'payloads')
+
+
+def expired_operations(cutoff):
+    return Operation.objects.filter(created_at__lt=cutoff)
+
+
+def expired_traces(cutoff):
+    return StepTrace.objects.filter(created_at__lt=cutoff)
+
+
+def orphan_matrices(cutoff):
+    """
+    Matrices anteriores al cutoff que ninguna operación ni traza referencia
+    (las trazas expiradas se borran en la fase anterior).
+    """
+    return Matrix.objects.filter(created_at__lt=cutoff).filter(
+        ~Exists(Operation.objects.filter(matrix_a=OuterRef('pk'))),
+        ~Exists(Operation.objects.filter(matrix_b=OuterRef('pk'))),
+        ~Exists(Operation.objects.filter(result=OuterRef('pk'))),
+        ~Exists(StepTrace.objects.filter(matrix=OuterRef('pk'))),
+    )
+
+
+def unreferenced_payloads(cutoff=None):
+    """Payloads sin referencias (``ref_count`` a cero y, por seguridad, sin filas que los usen)."""
+    return MatrixPayload.objects.filter(ref_count=0).filter(
+        ~Exists(Matrix._base_manager.filter(payload=OuterRef('pk'))),
+        ~Exists(OperationComponent._base_manager.filter(payload=OuterRef('pk'))),
+        ~Exists(MatrixStack._base_manager.filter(payload=OuterRef('pk'))),
+        ~Exists(StepTrace._base_manager.filter(payload=OuterRef('pk'))),
+    )
+
+
+QUERYSETS = {
+    'operations': expired_operations,
+    'traces': expired_traces,
+    'matrices': orphan_matrices,
+    'payloads': unreferenced_payloads,
+}
+
+
+def _set_delete(queryset):
+    """
+    DELETE en una sola sentencia cuando no hay cascadas ni señales de borrado;
+    si las hay, ``delete()`` normal.
+
+    Returns:
+        int: Filas eliminadas
+    """
+    using = router.db_for_write(queryset.model)
+    if Collector(using=using, origin=queryset).can_fast_delete(queryset):
+        return queryset._raw_delete(using)
+    return queryset.delete()[0]
+
+
+def _delete_operations(queryset):
+    # La única cascada de Operation son sus componentes: se borran antes con
+    # un DELETE directo y se recalculan las referencias de sus payloads
+    using = router.db_for_write(Operation)
+    components = OperationComponent._base_manager.filter(operation__in=queryset.values('id'))
+    payload_ids = set(components.values_list('payload_id', flat=True))
+    if payload_ids:
+        components._raw_delete(using)
+    deleted = queryset._raw_delete(using)
+    MatrixPayload.objects.recount(payload_ids)
+    return deleted
+
+
+def _delete_traces(queryset):
+    # StepTrace no tiene cascadas; el DELETE directo no emite post_delete
+    payload_ids = set(queryset.values_list('payload_id', flat=True))
+    deleted = queryset._raw_delete(router.db_for_write(StepTrace))
+    MatrixPayload.objects.recount(payload_ids)
+    return deleted
+
+
+def _delete_matrices(queryset):
+    # Matrix tiene cascadas hacia Operation, pero el queryset solo incluye
+    # huérfanas (NOT EXISTS evaluado en el propio DELETE): no hay nada que
+    # propagar y se puede borrar directamente. El DELETE directo no emite
+    # post_delete, así que las referencias a payloads se recalculan aquí.
+    payload_ids = set(queryset.values_list('payload_id', flat=True))
+    deleted = queryset._raw_delete(router.db_for_write(Matrix))
+    MatrixPayload.objects.recount(payload_ids)
+    return deleted
+
+
+# --- Estado (reanudación) ---
+
+class CleanupState:
+    """Progreso persistido de una limpieza: cutoff, fase y último id procesado."""
+
+    def __init__(self, path, cutoff):
+        self.path = Path(path) if path is not None else None
+        self.cutoff = cutoff
+        self.phase = PHASES[0]
+        self.last_id = 0
+
+    @classmethod
+    def load(cls, path):
+        """Estado guardado, o None si no hay ninguna limpieza a medias."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        state = cls(path, datetime.fromisoformat(saved['cutoff']))
+        state.phase = saved['phase']
+        state.last_id = saved['last_id']
+        return state
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'cutoff': self.cutoff.isoformat(), 'phase': self.phase, 'last_id': self.last_id}, f)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+def default_state_path():
+    return Path(settings.BACKUP_DIR) / STATE_FILENAME
+
+
+# --- Limpieza ---
+
+def count_expired(cutoff):
+    """Filas que eliminaría una limpieza con ese cutoff."""
+    return {phase: QUERYSETS[phase](cutoff).count() for phase in PHASES}
+
+
+def _next_batch(phase, cutoff, after, batch_size):
+    """Rango [primer id, último id] del siguiente lote, o None si no quedan filas."""
+    ids = list(
+        QUERYSETS[phase](cutoff).filter(id__gt=after).order_by('id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return None
+    return ids[0], ids[-1]
+
+
+def run_cleanup(cutoff=None, batch_size=None, sleep=None, resume=False, state_path=None, progress=None):
+    """
+    Elimina por lotes las operaciones y trazas expiradas y luego las matrices huérfanas.
+
+    Args:
+        cutoff: Fecha límite (se ignora si se reanuda: se usa la guardada)
+        batch_size: Filas por lote/transacción (MATRIX_CONFIG['CLEANUP_BATCH_SIZE'])
+        sleep: Segundos de pausa entre lotes (MATRIX_CONFIG['CLEANUP_SLEEP_SECONDS'])
+        resume: Retomar la limpieza interrumpida del archivo de estado
+        progress: Callback opcional que recibe un dict tras cada lote
+
+    Returns:
+        dict: Filas eliminadas por fase, lotes, cutoff usado y segundos
+    """
+    config = settings.MATRIX_CONFIG
+    batch_size = batch_size or config['CLEANUP_BATCH_SIZE']
+    sleep = config['CLEANUP_SLEEP_SECONDS'] if sleep is None else sleep
+    state_path = state_path or default_state_path()
+
+    state = CleanupState.load(state_path) if resume else None
+    if state is None:
+        if cutoff is None:
+            raise ValueError("Se requiere un cutoff para iniciar una limpieza")
+        state = CleanupState(state_path, cutoff)
+    state.save()
+
+    totals = {'operations': 0, 'traces': 0, 'matrices': 0, 'payloads': 0, 'batches': 0, 'skipped_batches': 0}
+    started = time.monotonic()
+    deleters = {'operations': _delete_operations, 'traces': _delete_traces, 'matrices': _delete_matrices, 'payloads': _set_delete}
+
+    for phase in PHASES[PHASES.index(state.phase):]:
+        if phase != state.phase:
+            state.phase, state.last_id = phase, 0
+            state.save()
+
+        while True:
+            bounds = _next_batch(phase, state.cutoff, state.last_id, batch_size)
+            if bounds is None:
+                break
+            first_id, last_id = bounds
+            batch_started = time.monotonic()
+            try:
+                with transaction.atomic():
+                    deleted = deleters[phase](
+                        QUERYSETS[phase](state.cutoff).filter(id__gte=first_id, id__lte=last_id)
+                    )
+            except IntegrityError as e:
+                # Carrera con una escritura concurrente: el lote se reintenta
+                # en la próxima limpieza
+                logger.warning(f"Lote {phase} {first_id}-{last_id} omitido: {e}")
+                deleted = 0
+                totals['skipped_batches'] += 1
+
+            totals[phase] += deleted
+            totals['batches'] += 1
+            state.last_id = last_id
+            state.save()
+
+            if progress is not None:
+                elapsed = time.monotonic() - started
+                progress({
+                    'phase': phase,
+                    'deleted': deleted,
+                    'last_id': last_id,
+                    'batch_ms': (time.monotonic() - batch_started) * 1000,
+                    'total': totals[phase],
+                    'rows_per_second': sum(totals[p] for p in PHASES) / elapsed if elapsed > 0 else 0.0,
+                })
+            if sleep:
+                time.sleep(sleep)
+
+    state.discard()
+    if totals['operations'] or totals['traces'] or totals['matrices']:
+        events.publish_on_commit('stats.resync', {'reason': 'cleanup'})
+
+    totals['cutoff'] = state.cutoff.isoformat()
+    totals['seconds'] = round(time.monotonic() - started, 2)
+    return totals
@@ -0,0 +1,79 @@
+"""
+Componentes de descomposiciones (SVD, QR, EIGEN).
+
+Cada descomposición produce una matriz resultado principal (la que se guarda
+como ``Operation.result``) y varios componentes. Los componentes se guardan
+una sola vez, en binario, como ``OperationComponent`` con payload compartido.
+Los payloads se deduplican por contenido, así que el componente igual al
+resultado (S en SVD, Q en QR) usa el mismo ``MatrixPayload``. En EIGEN el
+resultado (parte real de los autovalores, una columna) no coincide con el
+componente ``eigenvalues`` (columnas real e imaginaria) y tiene su propio
+payload.
+
+Las operaciones anteriores a los componentes guardaban la descomposición en
+``extra_data``; la migración 0016 la mueve a componentes.
+
+La API lista los componentes (nombre y forma) junto con la operación y solo
+decodifica los datos de un componente cuando se piden explícitamente.
+"""
+import numpy as np
+
+from calculator.models import OperationComponent
+from calculator.utils import safe_eig, safe_qr, safe_svd
+
+DECOMPOSITIONS = ('EIGEN', 'SVD', 'QR')
+
+
+def _column(values):
+    return np.asarray(values).reshape(-1, 1)
+
+
+def result_encoding(precision):
+    """
+    Codificación de los payloads de un resultado calculado en ``precision``.
+
+    Un resultado float32 cabe sin pérdida en un payload float32; en float64 se
+    usa la codificación por defecto.
+    """
+    return 'float32' if precision == 'float32' else None
+
+
+def decompose(operation_type, A, precision='float64'):
+    """
+    Calcula una descomposición en la precisión dada.
+
+    Returns:
+        tuple: (resultado principal como np.ndarray 2D, {nombre: np.ndarray 2D})
+    """
+    if operation_type == 'SVD':
+        svd = safe_svd(A, as_arrays=True, precision=precision)
+        components = {'U': svd['U'], 'S': _column(svd['S']), 'Vh': svd['Vh']}
+        return components['S'], components
+
+    if operation_type == 'QR':
+        qr = safe_qr(A, as_arrays=True, precision=precision)
+        return qr['Q'], {'Q': qr['Q'], 'R': qr['R']}
+
+    if operation_type == 'EIGEN':
+        vals, vecs = safe_eig(A, precision=precision)
+        # Autovalores como columnas [real, imag]; los autovectores complejos
+        # se separan en parte real e imaginaria
+        components = {
+            'eigenvalues': np.column_stack([vals.real, vals.imag]),
+            'eigenvectors': np.ascontiguousarray(vecs.real),
+        }
+        if np.iscomplexobj(vecs) and np.any(vecs.imag):
+            components['eigenvectors_imag'] = np.ascontiguousarray(vecs.imag)
+        return _column(vals.real), components
+
+    raise ValueError(f"{operation_type} no es una descomposición")
+
+
+def save_components(operation, components, encoding=None):
+    """Guarda los componentes de una operación (un ``bulk_create``)."""
+    return OperationComponent.objects.bulk_create([
+        OperationComponent(
+            operation=operation, name=name, rows=array.shape[0], cols=array.shape[1], data=array, encoding=encoding
+        )
+        for name, array in components.items()
+    ])
@@ -0,0 +1,192 @@
+"""
+Pool de procesos persistente para el cómputo de las operaciones.
+
+Buena parte del tiempo de una operación es Python puro que retiene el GIL
+(bucles de las funciones ``safe_*``, conversiones, armado de componentes), así
+que los hilos de un worker de gunicorn compiten entre sí aunque LAPACK suelte
+el GIL. Con ``MATRIX_CONFIG['COMPUTE_POOL_WORKERS'] > 0``,
+``_perform_matrix_operation`` envía el cómputo (``_compute_operation``) a un
+``ProcessPoolExecutor`` propio de cada worker; la lectura de operandos y la
+persistencia siguen en el hilo de la petición.
+
+- ``COMPUTE_POOL_MIN_ELEMENTS``: operaciones con menos elementos (sumando los
+  operandos) se calculan en el propio hilo, donde el envío de los arrays entre
+  procesos costaría más que el cómputo.
+- ``COMPUTE_POOL_TRANSPORT``: ``pickle`` envía los arrays serializados por
+  la tubería del pool; ``shm`` los pasa por memoria compartida (ver
+  ``shared_memory``) y solo viajan sus handles.
+- ``COMPUTE_POOL_TIMEOUT``: segundos máximos por tarea. Un proceso no se puede
+  interrumpir a mitad de una tarea, así que al vencer se terminan los procesos
+  del pool (las demás tareas en curso fallan también) y se crea otro en la
+  siguiente petición.
+
+Los procesos se arrancan con ``spawn`` (hacer ``fork`` de un worker con hilos
+puede heredar locks tomados), configuran Django e importan NumPy al arrancar;
+``warm()`` los arranca todos de antemano (hook ``post_worker_init`` de
+``gunicorn.conf.py``) para que la primera petición no pague ese costo.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+# Lo único que ``_compute_operation`` lee de una matriz: se envía esto y no la
+# instancia del modelo
+Operand = namedtuple('Operand', ['name', 'array'])
+
+_lock = threading.Lock()
+_pool = None
+
+
+class ComputePoolUnavailable(APIException):
+    """El pool no pudo completar la tarea (tiempo agotado o proceso caído)."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'El servicio de cómputo no está disponible. Reintente más tarde.'
+    default_code = 'compute_unavailable'
+
+
+def _initialize_worker():
+    """Inicializa un proceso del pool: Django (apps y settings) y NumPy."""
+    # El scheduler de tareas programadas solo corre en el proceso principal
+    os.environ.pop('RUN_SCHEDULER', None)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matrixcalc_web.settings')
+    import django
+    django.setup()
+    import numpy  # noqa: F401
+    import calculator.views  # noqa: F401
+
+
+def _ready():
+    return os.getpid()
+
+
+def enabled():
+    return settings.MATRIX_CONFIG['COMPUTE_POOL_WORKERS'] > 0
+
+
+def should_dispatch(*arrays):
+    """Indica si una operación sobre ``arrays`` se envía al pool."""
+    if not enabled():
+        return False
+    elements = sum(array.size for array in arrays if array is not None)
+    return elements >= settings.MATRIX_CONFIG['COMPUTE_POOL_MIN_ELEMENTS']
+
+
+def get_pool():
+    """Pool del proceso actual; se crea en el primer uso."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.MATRIX_CONFIG['COMPUTE_POOL_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_initialize_worker,
+            )
+        return _pool
+
+
+def warm():
+    """
+    Arranca todos los procesos del pool y espera a que terminen de inicializarse.
+
+    Returns:
+        int: Procesos listos (0 si el pool está deshabilitado)
+    """
+    if not enabled():
+        return 0
+    pool = get_pool()
+    # Cada tarea enviada sin procesos ociosos arranca un proceso nuevo
+    futures = [pool.submit(_ready) for _ in range(settings.MATRIX_CONFIG['COMPUTE_POOL_WORKERS'])]
+    done, _ = wait(futures, timeout=settings.MATRIX_CONFIG['COMPUTE_POOL_TIMEOUT'])
+    return len({future.result() for future in done if future.exception() is None})
+
+
+def _close(pool, terminate):
+    if terminate:
+        # ProcessPoolExecutor no expone otra forma de cancelar una tarea en curso
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=not terminate, cancel_futures=True)
+
+
+def _discard(pool):
+    """Termina ``pool`` si sigue siendo el actual (otro hilo pudo reemplazarlo ya)."""
+    global _pool
+    with _lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    _close(pool, terminate=True)
+
+
+def shutdown(terminate=False):
+    """
+    Cierra el pool actual; el siguiente uso crea otro.
+
+    Con ``terminate`` se matan los procesos en vez de esperar a sus tareas.
+    """
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        _close(pool, terminate)
+
+
+def run(func, *args, **kwargs):
+    """
+    Ejecuta ``func(*args, **kwargs)`` en el pool y espera su resultado.
+
+    ``func`` y los argumentos deben poder serializarse con pickle. Las
+    excepciones de ``func`` se propagan tal cual.
+
+    Raises:
+        ComputePoolUnavailable: Si se agota ``COMPUTE_POOL_TIMEOUT`` o un
+            proceso del pool muere
+    """
+    timeout = settings.MATRIX_CONFIG['COMPUTE_POOL_TIMEOUT']
+    pool = get_pool()
+    try:
+        future = pool.submit(func, *args, **kwargs)
+    except RuntimeError:
+        # Otro hilo cerró este pool entre ``get_pool()`` y el envío
+        future = get_pool().submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning("Tarea de cómputo sin terminar tras %ss; se reinicia el pool", timeout)
+        _discard(pool)
+        raise ComputePoolUnavailable(f"El cómputo superó el tiempo máximo de {timeout:g} s.")
+    except (BrokenProcessPool, CancelledError):
+        # Un proceso murió o el pool se terminó por el timeout de otra tarea
+        logger.error("El pool de cómputo se interrumpió; se reinicia")
+        _discard(pool)
+        raise ComputePoolUnavailable()
+
+
+def run_operation(operation_type, matrix_a, matrix_b=None, extra_data=None, precision='float64', x0=None):
+    """
+    Ejecuta ``_compute_operation`` en el pool con el transporte configurado.
+
+    ``matrix_a`` y ``matrix_b`` son matrices o ``Operand``; se envían solo su
+    nombre y su array.
+    """
+    from calculator import shared_memory
+    from calculator.views import _compute_operation
+
+    a = Operand(matrix_a.name, matrix_a.array)
+    b = Operand(matrix_b.name, matrix_b.array) if matrix_b else None
+    if settings.MATRIX_CONFIG['COMPUTE_POOL_TRANSPORT'] == 'shm':
+        return shared_memory.dispatch(
+            lambda **kwargs: run(shared_memory.compute_operation, **kwargs),
+            operation_type, a, b, extra_data, precision, x0,
+        )
+    return run(_compute_operation, operation_type, a, b, extra_data, precision, x0, observe=False)
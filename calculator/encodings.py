@@ -0,0 +1,126 @@
+"""
+Codificaciones de almacenamiento de los payloads de matrices.
+
+Cada ``MatrixPayload`` guarda sus datos en ``blob`` con una de estas
+codificaciones (columna ``encoding``):
+
+- ``raw``: float64 little-endian en orden fila mayor (sin pérdida).
+- ``zstd``: float64 con los bytes reordenados por posición (byte-shuffle) y
+  comprimidos con zstd. Sin pérdida; el reordenado agrupa los bytes de
+  exponente, muy repetidos, y mejora la compresión. Requiere ``zstandard``.
+- ``float32``: float32 little-endian (~7 dígitos, la mitad de espacio).
+- ``quantized``: 16 bits por valor, lineal entre el mínimo y el máximo de la
+  matriz (cabecera de 16 bytes con ambos float64). Con pérdida: pensado solo
+  para resultados que se visualizan.
+
+``encode`` y ``decode`` trabajan con el array canónico (float64 2D); ``decode``
+siempre devuelve float64, de modo que la codificación es transparente para el
+resto de la aplicación.
+"""
+import numpy as np
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+ENCODINGS = ('raw', 'zstd', 'float32', 'quantized')
+LOSSLESS_ENCODINGS = ('raw', 'zstd')
+
+ZSTD_LEVEL = 3
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+QUANTIZED_LEVELS = 2 ** 16 - 1
+QUANTIZED_HEADER = np.dtype([('low', '<f8'), ('high', '<f8')])
+
+
+def default_encoding():
+    """Codificación por defecto (``MATRIX_CONFIG['PAYLOAD_ENCODING']``)."""
+    return settings.MATRIX_CONFIG.get('PAYLOAD_ENCODING', 'raw')
+
+
+def validate_encoding(encoding):
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Codificación desconocida: {encoding} (opciones: {', '.join(ENCODINGS)})")
+    if encoding == 'zstd' and zstandard is None:
+        raise ImportError("La codificación zstd requiere el paquete 'zstandard' (pip install zstandard)")
+    return encoding
+
+
+def _shuffle(array):
+    # (n, 8) -> (8, n): primero todos los bytes 0, luego todos los 1, ...
+    return np.ascontiguousarray(array.astype('<f8', copy=False).reshape(-1).view(np.uint8).reshape(-1, 8).T)
+
+
+def _unshuffle(buffer, size):
+    return np.ascontiguousarray(np.frombuffer(buffer, dtype=np.uint8).reshape(8, size).T).view('<f8').reshape(-1)
+
+
+def encode(array, encoding):
+    """
+    Codifica un array canónico (float64 2D).
+
+    Raises:
+        ValueError: Si los valores no son representables en la codificación
+    """
+    validate_encoding(encoding)
+    if encoding == 'raw':
+        return array.astype('<f8', copy=False).tobytes()
+
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(_shuffle(array).tobytes())
+
+    finite = np.isfinite(array)
+    if encoding == 'float32':
+        if np.any(np.abs(array[finite]) > FLOAT32_MAX):
+            raise ValueError("Hay valores fuera del rango de float32")
+        return array.astype('<f4').tobytes()
+
+    # quantized
+    if not finite.all():
+        raise ValueError("La codificación quantized requiere valores finitos")
+    low = float(array.min()) if array.size else 0.0
+    high = float(array.max()) if array.size else 0.0
+    span = high - low
+    levels = np.zeros(array.shape, dtype='<u2') if span == 0 else np.rint(
+        (array - low) / span * QUANTIZED_LEVELS
+    ).astype('<u2')
+    return np.array((low, high), dtype=QUANTIZED_HEADER).tobytes() + levels.tobytes()
+
+
+def decode(blob, encoding, rows, cols):
+    """Datos de un payload como np.ndarray float64 (rows, cols)."""
+    blob = bytes(blob)
+    size = rows * cols
+    if encoding == 'raw':
+        values = np.frombuffer(blob, dtype='<f8')
+    elif encoding == 'zstd':
+        validate_encoding(encoding)
+        values = _unshuffle(zstandard.ZstdDecompressor().decompress(blob, max_output_size=size * 8), size)
+    elif encoding == 'float32':
+        values = np.frombuffer(blob, dtype='<f4').astype(np.float64)
+    elif encoding == 'quantized':
+        header = np.frombuffer(blob[:QUANTIZED_HEADER.itemsize], dtype=QUANTIZED_HEADER)[0]
+        low, high = float(header['low']), float(header['high'])
+        levels = np.frombuffer(blob[QUANTIZED_HEADER.itemsize:], dtype='<u2')
+        values = low + levels * ((high - low) / QUANTIZED_LEVELS)
+    else:
+        raise ValueError(f"Codificación desconocida: {encoding}")
+    return values.reshape(rows, cols)
+
+
+def stored_array(array, encoding):
+    """
+    Valores que devolverá ``decode`` tras codificar ``array``.
+
+    En las codificaciones sin pérdida es el propio array; en las demás, el
+    redondeo aplicado (el hash de contenido se calcula sobre este resultado).
+
+    Returns:
+        tuple: (blob codificado, array decodificado)
+    """
+    blob = encode(array, encoding)
+    if encoding in LOSSLESS_ENCODINGS:
+        return blob, array
+    # -0.0 y 0.0: mismo criterio que as_payload_array
+    return blob, decode(blob, encoding, *array.shape) + 0.0
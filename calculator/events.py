@@ -0,0 +1,344 @@
+"""
+Eventos push (Server-Sent Events) de operaciones y estadísticas.
+
+Las vistas, tareas Celery y comandos no publican directamente a los clientes:
+las señales ``post_save`` de ``Matrix``/``Operation`` añaden el evento a un log
+en el cache compartido (``matrixcalc:events:<seq>``, con TTL), de modo que
+cualquier worker lo ve. En cada proceso un único hilo ``EventBroker`` lee el
+log y lo reparte a los suscriptores locales (conexiones SSE).
+
+Cada suscriptor tiene una cola acotada (``EVENTS_QUEUE_SIZE``). Si un cliente
+lento la llena, se descartan sus eventos siguientes y el stream se cierra con
+un evento ``overflow``: el cliente debe recargar ``/api/stats/`` y reconectar.
+Así un cliente lento nunca acumula memoria en el servidor.
+
+Los brokers con suscriptores lo anuncian en ``matrixcalc:events:listeners``
+(con TTL); sin ningún anuncio vigente las señales no publican nada, para no
+pagar tres escrituras en el cache por cada ``post_save`` sin nadie escuchando.
+El TTL cubre la reconexión de un cliente (``retry`` del stream).
+
+Tipos de evento:
+  - ``operation.completed``: resumen de la operación + delta de estadísticas
+  - ``matrix.created``: delta de estadísticas
+  - ``stats.resync``: cambios masivos (borrados, limpieza); recargar stats
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SEQ_KEY = 'matrixcalc:events:seq'
+EVENT_KEY = 'matrixcalc:events:{}'
+LISTENERS_KEY = 'matrixcalc:events:listeners'
+# Segundos que dura el anuncio de un broker con suscriptores; se renueva
+# cada tercio de este tiempo
+LISTENERS_TTL = 30
+
+# Deltas de storage_mb, coherentes con la estimación de stats_view
+MATRIX_STORAGE_MB = 0.01
+OPERATION_STORAGE_MB = 0.001
+
+
+# --- Publicación ---
+
+def current_seq():
+    """Último número de secuencia publicado (0 si no hay eventos)."""
+    return cache.get(SEQ_KEY) or 0
+
+
+def publish(event_type, data):
+    """
+    Añade un evento al log compartido.
+
+    Returns:
+        int: Número de secuencia asignado (``id`` del evento SSE)
+    """
+    cache.add(SEQ_KEY, 0, None)
+    seq = cache.incr(SEQ_KEY)
+    cache.set(
+        EVENT_KEY.format(seq),
+        {'id': seq, 'type': event_type, 'data': data},
+        settings.MATRIX_CONFIG['EVENTS_RETENTION_SECONDS'],
+    )
+    get_broker().notify()
+    return seq
+
+
+def announce_listeners():
+    """Anuncia que hay suscriptores en algún proceso (durante ``LISTENERS_TTL``)."""
+    cache.set(LISTENERS_KEY, True, LISTENERS_TTL)
+
+
+def has_listeners():
+    return cache.get(LISTENERS_KEY) is not None
+
+
+def publish_on_commit(event_type, data):
+    """
+    Publica el evento cuando la transacción en curso confirme.
+
+    Si ningún proceso tiene suscriptores no se publica.
+    """
+    try:
+        if not has_listeners():
+            return
+    except Exception as e:
+        logger.warning(f"No se pudo consultar los suscriptores de eventos: {e}")
+        return
+    transaction.on_commit(lambda: _safe_publish(event_type, data))
+
+
+def _safe_publish(event_type, data):
+    # Un cache caído no debe romper la petición que originó el evento
+    try:
+        publish(event_type, data)
+    except Exception as e:
+        logger.warning(f"No se pudo publicar el evento {event_type}: {e}")
+
+
+def read_events(after, until):
+    """Lee del log los eventos con ``after < id <= until`` que sigan vigentes."""
+    keys = [EVENT_KEY.format(seq) for seq in range(after + 1, until + 1)]
+    if not keys:
+        return []
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+# --- Señales ---
+
+# Las cargas raw (loaddata, import_backup) no emiten eventos por fila: quien
+# las ejecuta publica un único ``stats.resync``.
+
+def _on_matrix_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_on_commit('matrix.created', {
+            'matrix_id': instance.id,
+            'delta': {'total_matrices': 1, 'storage_mb': MATRIX_STORAGE_MB},
+        })
+
+
+def _on_operation_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    created_at = instance.created_at or timezone.now()
+    publish_on_commit('operation.completed', {
+        'operation': {
+            'id': instance.id,
+            'operation_type': instance.operation_type,
+            'matrix_a': instance.matrix_a_id,
+            'matrix_b': instance.matrix_b_id,
+            'result': instance.result_id,
+            'execution_time_ms': instance.execution_time_ms,
+            'created_at': created_at.isoformat(),
+        },
+        'delta': {
+            'total_operations': 1,
+            'recent_operations_count': 1,
+            'storage_mb': OPERATION_STORAGE_MB,
+            'operation_type': instance.operation_type,
+            'execution_time_ms': instance.execution_time_ms,
+            'date': timezone.localdate(created_at).isoformat(),
+        },
+    })
+
+
+def connect():
+    """Conecta las señales de modelos (``CalculatorConfig.ready``)."""
+    from calculator.models import Matrix, Operation
+
+    post_save.connect(_on_matrix_saved, sender=Matrix, dispatch_uid='matrixcalc_events_matrix')
+    post_save.connect(_on_operation_saved, sender=Operation, dispatch_uid='matrixcalc_events_operation')
+
+
+# --- Suscripción ---
+
+class Subscriber:
+    """
+    Cola acotada de eventos de una conexión.
+
+    Con ``loop`` la cola es un ``asyncio.Queue`` alimentado desde el hilo del
+    broker vía ``call_soon_threadsafe``; sin él, un ``queue.Queue`` para
+    streams sync (WSGI).
+    """
+
+    def __init__(self, maxsize, loop=None):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize) if loop else queue.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._put, event)
+        else:
+            self._put(event)
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except (asyncio.QueueFull, queue.Full):
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Siguiente evento o None si vence ``timeout`` (streams sync)."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout):
+        """Siguiente evento o None si vence ``timeout`` (streams async)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def drained(self):
+        return self.queue.empty()
+
+
+class EventBroker:
+    """
+    Lee el log de eventos del cache y lo reparte a los suscriptores del proceso.
+
+    Un solo hilo por proceso consulta el cache cada ``poll_interval`` segundos
+    (o de inmediato si el evento se publicó en este mismo proceso), en lugar
+    de una consulta por conexión.
+    """
+
+    # Segundos que se espera un número de secuencia reservado cuyo evento aún
+    # no está escrito (entre incr y set) antes de darlo por perdido
+    GAP_TIMEOUT = 2.0
+
+    def __init__(self, poll_interval=0.5):
+        self.poll_interval = poll_interval
+        self.cursor = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._gap_since = None
+        self._announced_at = None
+
+    def subscribe(self, maxsize, loop=None):
+        """
+        Registra un suscriptor.
+
+        Returns:
+            tuple: (subscriber, cursor) — el suscriptor recibirá los eventos
+            con id mayor que ``cursor``
+        """
+        subscriber = Subscriber(maxsize, loop)
+        with self._lock:
+            if self.cursor is None:
+                self.cursor = current_seq()
+            self._subscribers.add(subscriber)
+            cursor = self.cursor
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='matrixcalc-events', daemon=True)
+                self._thread.start()
+        self._announce(force=True)
+        return subscriber, cursor
+
+    def _announce(self, force=False):
+        now = time.monotonic()
+        if force or self._announced_at is None or now - self._announced_at > LISTENERS_TTL / 3:
+            announce_listeners()
+            self._announced_at = now
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self.cursor = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Error leyendo el log de eventos: {e}")
+
+    def poll(self):
+        """Entrega los eventos nuevos a los suscriptores (una pasada)."""
+        with self._lock:
+            if not self._subscribers:
+                self.cursor = None
+                return
+            cursor = self.cursor
+            subscribers = list(self._subscribers)
+
+        self._announce()
+        latest = current_seq()
+        if latest < cursor:
+            # El contador se perdió (cache reiniciado o desalojado)
+            cursor = latest
+        events = read_events(cursor, latest)
+
+        delivered = []
+        expected = cursor + 1
+        while expected <= latest:
+            if events and events[0]['id'] == expected:
+                delivered.append(events.pop(0))
+                expected += 1
+                continue
+            # Hueco: evento aún no escrito o ya expirado. Se espera GAP_TIMEOUT
+            # y luego se salta al siguiente disponible.
+            now = time.monotonic()
+            if self._gap_since is None:
+                self._gap_since = now
+            if now - self._gap_since < self.GAP_TIMEOUT:
+                break
+            self._gap_since = None
+            expected = events[0]['id'] if events else latest + 1
+        if expected > latest:
+            self._gap_since = None
+
+        for event in delivered:
+            for subscriber in subscribers:
+                subscriber.offer(event)
+
+        with self._lock:
+            if self.cursor is not None:
+                self.cursor = max(self.cursor, expected - 1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = EventBroker(settings.MATRIX_CONFIG['EVENTS_POLL_INTERVAL'])
+        return _broker
+
+
+# --- Formato SSE ---
+
+def format_sse(event):
+    """Serializa un evento en formato ``text/event-stream``."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -1,20 +1,18 @@
 """
 Management command para limpiar datos antiguos.
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Q
 from datetime import timedelta
-from calculator.models import Matrix, Operation
+from calculator import cleanup
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = 'Limpia operaciones y matrices antiguas según RETENTION_DAYS'
+    help = 'Limpia operaciones y matrices antiguas según RETENTION_DAYS (por lotes)'
     
     def add_arguments(self, parser):
         parser.add_argument(
@@ -27,12 +25,37 @@ class Command(BaseCommand):
             action='store_true',
             help='Simula la limpieza sin eliminar datos',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Filas eliminadas por lote/transacción (por defecto CLEANUP_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            help='Segundos de pausa entre lotes para no saturar la base de datos',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Retomar una limpieza interrumpida (mismo cutoff, sin nuevo backup)',
+        )
+        parser.add_argument(
+            '--state-file',
+            type=str,
+            help='Archivo de estado para reanudar (por defecto BACKUP_DIR/cleanup_state.json)',
+        )
     
     def handle(self, *args, **options):
         days = options.get('days') or settings.MATRIX_CONFIG['RETENTION_DAYS']
         dry_run = options.get('dry_run', False)
+        resume = options.get('resume', False)
+        state_path = options.get('state_file') or cleanup.default_state_path()
         
-        cutoff_date = timezone.now() - timedelta(days=days)
+        saved = cleanup.CleanupState.load(state_path) if resume else None
+        if resume and saved is None:
+            raise CommandError("No hay ninguna limpieza interrumpida que reanudar")
+        cutoff_date = saved.cutoff if saved else timezone.now() - timedelta(days=days)
         
         self.stdout.write(
             self.style.WARNING(f"Limpiando datos anteriores a {cutoff_date.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -40,56 +63,65 @@ class Command(BaseCommand):
         
         if dry_run:
             self.stdout.write(self.style.NOTICE("Modo DRY RUN - No se eliminarán datos"))
+            counts = cleanup.count_expired(cutoff_date)
+            self.stdout.write(f"Operaciones a eliminar: {counts['operations']}")
+            self.stdout.write(f"Trazas GlassBox a eliminar: {counts['traces']}")
+            self.stdout.write(f"Matrices huérfanas a eliminar: {counts['matrices']}")
+            self.stdout.write(f"Payloads sin referencias a eliminar: {counts['payloads']}")
+            self.stdout.write(self.style.SUCCESS("Simulación completada"))
+            return
         
-        # Auto-backup antes de eliminar (solo si no es dry-run)
-        if not dry_run:
+        # Auto-backup antes de eliminar (al reanudar ya se hizo en la primera ejecución)
+        if saved is None:
             try:
                 from django.core.management import call_command
-                self.stdout.write("Creando backup automático...")
-                call_command('export_backup')
+                # Incremental: solo lo añadido desde el backup anterior
+                self.stdout.write("Creando backup automático (incremental)...")
+                call_command('export_backup', incremental=True)
                 self.stdout.write(self.style.SUCCESS("✓ Backup creado"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Error al crear backup: {e}"))
                 self.stdout.write(self.style.WARNING("Continuando sin backup..."))
+        else:
+            self.stdout.write(f"Reanudando desde {saved.phase} (id > {saved.last_id})")
         
-        # Contar operaciones a eliminar
-        operations_to_delete = Operation.objects.filter(created_at__lt=cutoff_date)
-        op_count = operations_to_delete.count()
-        
-        # Contar matrices huérfanas a eliminar
-        matrices_to_delete = Matrix.objects.filter(
-            Q(operations_as_a__isnull=True) &
-            Q(operations_as_b__isnull=True) &
-            Q(operations_as_result__isnull=True) &
-            Q(created_at__lt=cutoff_date)
-        )
-        matrix_count = matrices_to_delete.count()
-        
-        self.stdout.write(f"Operaciones a eliminar: {op_count}")
-        self.stdout.write(f"Matrices huérfanas a eliminar: {matrix_count}")
-        
-        if dry_run:
-            self.stdout.write(self.style.SUCCESS("Simulación completada"))
-            return
-        
-        # Eliminar con transacción
+        # Lotes por rango de id, cada uno en su propia transacción
         try:
-            with transaction.atomic():
-                # Eliminar operaciones (cascade eliminará relaciones)
-                deleted_ops = operations_to_delete.delete()
-                
-                # Eliminar matrices huérfanas
-                deleted_matrices = matrices_to_delete.delete()
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"✓ Eliminadas {deleted_ops[0]} operaciones y {deleted_matrices[0]} matrices"
-                    )
-                )
-                
-                logger.info(f"Limpieza completada: {deleted_ops[0]} ops, {deleted_matrices[0]} matrices")
-        
+            totals = cleanup.run_cleanup(
+                cutoff=cutoff_date,
+                batch_size=options.get('batch_size'),
+                sleep=options.get('sleep'),
+                resume=resume,
+                state_path=state_path,
+                progress=self.report_progress,
+            )
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error durante limpieza: {e}"))
+            self.stdout.write(self.style.WARNING("Puede retomarse con --resume"))
             logger.error(f"Error en limpieza: {e}")
             raise
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Eliminadas {totals['operations']} operaciones y {totals['matrices']} matrices "
+                f"en {totals['batches']} lotes ({totals['seconds']}s); {totals['payloads']} payloads liberados"
+            )
+        )
+        if totals['traces']:
+            self.stdout.write(f"✓ Eliminadas {totals['traces']} trazas GlassBox")
+        if totals['skipped_batches']:
+            self.stdout.write(self.style.WARNING(
+                f"{totals['skipped_batches']} lotes omitidos por escrituras concurrentes"
+            ))
+        
+        logger.info(
+            f"Limpieza completada: {totals['operations']} ops, {totals['matrices']} matrices, "
+            f"{totals['seconds']}s"
+        )
+    
+    def report_progress(self, progress):
+        self.stdout.write(
+            f"  {progress['phase']}: -{progress['deleted']} (id <= {progress['last_id']}, "
+            f"{progress['batch_ms']:.0f} ms) total {progress['total']}, "
+            f"{progress['rows_per_second']:.0f} filas/s"
+        )
@@ -1,16 +1,14 @@
 """
 Management command para exportar backup completo.
 """
-import json
 from django.core.management.base import BaseCommand
-from django.core import serializers
 from django.utils import timezone
 from django.conf import settings
-from calculator.models import Matrix, Operation
+from calculator import backup
 
 
 class Command(BaseCommand):
-    help = 'Exporta todas las matrices y operaciones a JSON'
+    help = 'Exporta matrices y operaciones a JSON o npz (completo o incremental, en streaming)'
     
     def add_arguments(self, parser):
         parser.add_argument(
@@ -18,40 +16,69 @@ class Command(BaseCommand):
             type=str,
             help='Ruta del archivo de salida',
         )
+        parser.add_argument(
+            '--compress',
+            choices=backup.COMPRESSIONS,
+            help='Compresión del archivo (por defecto se deduce de la extensión de --output, o ninguna)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=backup.FORMATS,
+            help='Formato: json o npz (binario columnar); por defecto se deduce de --output, o json',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=backup.DEFAULT_CHUNK_SIZE,
+            help='Registros leídos de la base de datos por lote',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Exportar solo los cambios desde el último checkpoint (completo si no hay ninguno)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Archivo de checkpoint (por defecto BACKUP_DIR/checkpoint.json)',
+        )
+        parser.add_argument(
+            '--update-checkpoint',
+            action='store_true',
+            help='Registrar el checkpoint de un backup completo (empieza una cadena de incrementales nueva)',
+        )
     
     def handle(self, *args, **options):
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-        output_path = options.get('output') or settings.BACKUP_DIR / f'backup_{timestamp}.json'
+        compression = options.get('compress')
+        backup_format = options.get('format')
+        incremental = options.get('incremental', False)
+        output_path = options.get('output')
+        if not output_path:
+            timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            suffix = '_inc' if incremental else ''
+            extension = backup.backup_extension(backup_format or 'json', compression)
+            output_path = settings.BACKUP_DIR / f'backup_{timestamp}{suffix}{extension}'
         
         self.stdout.write(f"Exportando backup a: {output_path}")
         
-        # Serializar modelos
-        matrices = Matrix.objects.all().order_by('id')
-        operations = Operation.objects.all().select_related(
-            'matrix_a', 'matrix_b', 'result'
-        ).order_by('id')
-        
-        matrices_data = json.loads(serializers.serialize('json', matrices))
-        operations_data = json.loads(serializers.serialize('json', operations))
-        
-        # Estructura del backup
-        backup_data = {
-            'version': '2.0',
-            'timestamp': timezone.now().isoformat(),
-            'database': 'postgresql',
-            'total_matrices': len(matrices_data),
-            'total_operations': len(operations_data),
-            'matrices': matrices_data,
-            'operations': operations_data
-        }
+        # Los registros se escriben a medida que se leen: memoria constante
+        result = backup.export_backup(
+            output_path,
+            compression=compression,
+            chunk_size=options.get('chunk_size') or backup.DEFAULT_CHUNK_SIZE,
+            incremental=incremental,
+            checkpoint_path=options.get('checkpoint'),
+            backup_format=backup_format,
+            update_checkpoint=options.get('update_checkpoint', False),
+        )
         
-        # Guardar a archivo
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, indent=2, ensure_ascii=False)
+        if incremental and result['type'] == 'full':
+            self.stdout.write(self.style.WARNING("No hay checkpoint previo: se exportó un backup completo"))
         
         self.stdout.write(
             self.style.SUCCESS(
-                f"✓ Backup exportado: {len(matrices_data)} matrices, {len(operations_data)} operaciones"
+                f"✓ Backup {result['type']} exportado: {result['matrices']} matrices, {result['operations']} operaciones, "
+                f"{result['stacks']} pilas, {result['traces']} trazas"
             )
         )
         self.stdout.write(f"Archivo: {output_path}")
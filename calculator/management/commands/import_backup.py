@@ -1,82 +1,93 @@
 """
 Management command para importar backup.
 """
-import json
-from django.core.management.base import BaseCommand
-from django.core import serializers
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator import restore
 
 
 class Command(BaseCommand):
-    help = 'Importa matrices y operaciones desde backup JSON'
+    help = 'Importa matrices y operaciones desde un backup completo y sus incrementales (por lotes)'
     
     def add_arguments(self, parser):
         parser.add_argument(
-            'backup_file',
+            'backup_files',
+            nargs='+',
             type=str,
-            help='Ruta del archivo de backup a importar',
+            metavar='backup_file',
+            help='Backup a importar; tras un backup completo pueden indicarse sus incrementales, en orden',
         )
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Eliminar datos existentes antes de importar',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=restore.DEFAULT_BATCH_SIZE,
+            help='Registros por lote de bulk_create (cada lote es una transacción)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Retomar una importación interrumpida desde el archivo de estado',
+        )
+        parser.add_argument(
+            '--state-file',
+            type=str,
+            help='Archivo de estado para reanudar (por defecto BACKUP_DIR/restore_state.json)',
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Abortar ante el primer registro inválido en lugar de omitirlo',
+        )
+        parser.add_argument(
+            '--atomic',
+            action='store_true',
+            help='Importar todo en una única transacción (no reanudable)',
+        )
     
     def handle(self, *args, **options):
-        backup_file = options['backup_file']
-        clear_existing = options.get('clear', False)
+        backup_files = options['backup_files']
         
-        self.stdout.write(f"Importando backup desde: {backup_file}")
+        for backup_file in backup_files:
+            self.stdout.write(f"Importando backup desde: {backup_file}")
         
-        # Leer archivo
         try:
-            with open(backup_file, 'r', encoding='utf-8') as f:
-                backup_data = json.load(f)
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f"Archivo no encontrado: {backup_file}"))
-            return
-        except json.JSONDecodeError as e:
-            self.stdout.write(self.style.ERROR(f"Error al parsear JSON: {e}"))
-            return
-        
-        # Validar versión
-        version = backup_data.get('version', '1.0')
-        if float(version) < 2.0:
-            self.stdout.write(self.style.WARNING(f"Versión de backup antigua: {version}"))
-        
-        matrices_data = backup_data.get('matrices', [])
-        operations_data = backup_data.get('operations', [])
-        
-        self.stdout.write(f"Matrices en backup: {len(matrices_data)}")
-        self.stdout.write(f"Operaciones en backup: {len(operations_data)}")
+            totals = restore.restore_backup(
+                backup_files,
+                batch_size=options.get('batch_size') or restore.DEFAULT_BATCH_SIZE,
+                clear=options.get('clear', False),
+                resume=options.get('resume', False),
+                state_path=options.get('state_file'),
+                strict=options.get('strict', False),
+                atomic=options.get('atomic', False),
+                progress=self.report_progress,
+            )
+        except FileNotFoundError as e:
+            raise CommandError(f"Archivo no encontrado: {e.filename}")
+        except ValueError as e:
+            # json.JSONDecodeError es subclase de ValueError
+            raise CommandError(f"Error al parsear el backup: {e}")
+        except restore.RestoreError as e:
+            raise CommandError(str(e))
         
-        # Importar con transacción
-        try:
-            with transaction.atomic():
-                if clear_existing:
-                    from calculator.models import Matrix, Operation
-                    self.stdout.write(self.style.WARNING("Eliminando datos existentes..."))
-                    Operation.objects.all().delete()
-                    Matrix.objects.all().delete()
-                
-                # Deserializar matrices
-                self.stdout.write("Importando matrices...")
-                matrices_json = json.dumps(matrices_data)
-                for obj in serializers.deserialize('json', matrices_json):
-                    obj.save()
-                
-                # Deserializar operaciones
-                self.stdout.write("Importando operaciones...")
-                operations_json = json.dumps(operations_data)
-                for obj in serializers.deserialize('json', operations_json):
-                    obj.save()
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"✓ Importación completada: {len(matrices_data)} matrices, {len(operations_data)} operaciones"
-                    )
-                )
-        
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error durante importación: {e}"))
-            raise
+        if totals['invalid'] or totals['rejected']:
+            self.stdout.write(self.style.WARNING(
+                f"Registros omitidos: {totals['invalid']} inválidos, "
+                f"{totals['rejected']} con referencias inexistentes"
+            ))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Importación completada: {totals['inserted']} registros en {totals['seconds']}s"
+            )
+        )
+    
+    def report_progress(self, progress):
+        self.stdout.write(
+            f"  {progress['file']} [{progress['section']}]: "
+            f"{progress['inserted']} insertados, {progress['read']} leídos "
+            f"({progress['records_per_second']:.0f} reg/s)"
+        )
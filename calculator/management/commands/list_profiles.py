@@ -0,0 +1,44 @@
+"""
+Management command para listar perfiles capturados por ProfilingMiddleware.
+"""
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from calculator.profiling import read_index
+
+
+class Command(BaseCommand):
+    help = 'Lista perfiles de peticiones filtrando por tipo de operación y forma'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operation',
+            type=str,
+            help='Tipo de operación (ej: SVD)',
+        )
+        parser.add_argument(
+            '--shape',
+            type=str,
+            help='Forma de la matriz operando (ej: 100x100)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Número máximo de perfiles a mostrar (los más recientes)',
+        )
+
+    def handle(self, *args, **options):
+        profile_dir = settings.MATRIX_CONFIG['PROFILING_DIR']
+        entries = read_index(profile_dir, operation_type=options.get('operation'), shape=options.get('shape'))
+
+        if not entries:
+            self.stdout.write(self.style.WARNING("No hay perfiles que coincidan"))
+            return
+
+        for entry in entries[-options['limit']:]:
+            self.stdout.write(
+                f"{entry['created_at']}  {entry['operation_type']:<12} {entry['shape']:<9} "
+                f"{entry['duration_ms']:>9.2f} ms  {entry['samples']:>5} muestras  "
+                f"{profile_dir}/{entry['path']}"
+            )
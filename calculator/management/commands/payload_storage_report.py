@@ -0,0 +1,121 @@
+"""
+Management command que resume el espacio usado por los payloads de matrices.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Length
+
+from calculator import encodings
+from calculator.models import Matrix, MatrixPayload, MatrixStack, OperationComponent, StepTrace
+
+FLOAT64_BYTES = 8
+
+# Celdas de cada fila: las pilas y las trazas guardan varias matrices por payload
+LOGICAL_CELLS = {
+    Matrix: F('rows') * F('cols'),
+    OperationComponent: F('rows') * F('cols'),
+    MatrixStack: F('count') * F('rows') * F('cols'),
+    StepTrace: F('keyframe_count') * F('rows') * F('cols'),
+}
+
+
+def _mb(value):
+    return f"{value / 1e6:10.2f} MB"
+
+
+def storage_report():
+    """
+    Bytes lógicos (float64 por fila), tras deduplicar y tras codificar.
+
+    Returns:
+        dict: Totales y desglose por codificación
+    """
+    logical = sum(
+        model._base_manager.aggregate(total=Coalesce(Sum(cells), 0))['total'] * FLOAT64_BYTES
+        for model, cells in LOGICAL_CELLS.items()
+    )
+    by_encoding = {
+        row['encoding']: row
+        for row in MatrixPayload.objects.order_by().values('encoding').annotate(
+            payloads=Count('id'),
+            refs=Coalesce(Sum('ref_count'), 0),
+            float64_bytes=Coalesce(Sum(F('rows') * F('cols')), 0) * FLOAT64_BYTES,
+            stored_bytes=Coalesce(Sum(Length('blob')), 0),
+        )
+    }
+    deduplicated = sum(row['float64_bytes'] for row in by_encoding.values())
+    stored = sum(row['stored_bytes'] for row in by_encoding.values())
+    return {
+        'logical_bytes': logical,
+        'deduplicated_bytes': deduplicated,
+        'stored_bytes': stored,
+        'by_encoding': by_encoding,
+    }
+
+
+def estimate_encodings(sample):
+    """
+    Tamaño que tendrían hasta ``sample`` payloads ``raw`` en cada codificación.
+
+    Returns:
+        dict: {codificación: bytes} sobre la muestra (incluye 'raw')
+    """
+    sizes = {}
+    available = [e for e in encodings.ENCODINGS if e != 'zstd' or encodings.zstandard is not None]
+    for payload in MatrixPayload.objects.filter(encoding='raw').order_by('id')[:sample].iterator():
+        array = payload.to_array()
+        for encoding in available:
+            try:
+                size = len(encodings.encode(array, encoding))
+            except ValueError:
+                # No representable (p. ej. fuera de rango float32): se quedaría en raw
+                size = array.nbytes
+            sizes[encoding] = sizes.get(encoding, 0) + size
+    return sizes
+
+
+class Command(BaseCommand):
+    help = 'Muestra los bytes ahorrados por la deduplicación y la codificación de los payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--estimate',
+            type=int,
+            metavar='N',
+            help='Estimar el tamaño de hasta N payloads raw en cada codificación',
+        )
+
+    def handle(self, *args, **options):
+        report = storage_report()
+        logical = report['logical_bytes']
+        deduplicated = report['deduplicated_bytes']
+        stored = report['stored_bytes']
+
+        self.stdout.write(f"{'codificación':12s} {'payloads':>9s} {'refs':>9s} {'float64':>13s} {'guardado':>13s}")
+        for encoding, row in sorted(report['by_encoding'].items()):
+            self.stdout.write(
+                f"{encoding:12s} {row['payloads']:9d} {row['refs']:9d} "
+                f"{_mb(row['float64_bytes'])} {_mb(row['stored_bytes'])}"
+            )
+
+        self.stdout.write(f"Datos lógicos (float64 por fila):  {_mb(logical)}")
+        self.stdout.write(f"Tras deduplicar:                   {_mb(deduplicated)}")
+        self.stdout.write(f"Guardado (tras codificar):         {_mb(stored)}")
+        saved = logical - stored
+        ratio = saved / logical * 100 if logical else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Ahorro: {_mb(saved).strip()} ({ratio:.1f}%): "
+            f"{_mb(logical - deduplicated).strip()} por deduplicación, "
+            f"{_mb(deduplicated - stored).strip()} por codificación"
+        ))
+
+        if options.get('estimate'):
+            if options['estimate'] < 1:
+                raise CommandError("--estimate debe ser un entero positivo")
+            sizes = estimate_encodings(options['estimate'])
+            if not sizes:
+                self.stdout.write("No hay payloads raw que estimar")
+                return
+            self.stdout.write(f"Estimación sobre {options['estimate']} payloads raw como máximo:")
+            for encoding, size in sizes.items():
+                self.stdout.write(f"  {encoding:10s} {_mb(size)} ({size / sizes['raw'] * 100:5.1f}% de raw)")
@@ -0,0 +1,218 @@
+"""
+Métricas de runtime en formato Prometheus para MatrixCalc.
+
+Define los contadores/histogramas del backend y los helpers que usan las
+vistas, el middleware y el cache para registrar eventos.
+
+Con varios workers de gunicorn cada proceso tiene sus propios contadores.
+Si la variable de entorno ``PROMETHEUS_MULTIPROC_DIR`` está definida,
+``prometheus_client`` escribe los valores en archivos mmap dentro de ese
+directorio y ``render_metrics`` los agrega al momento del scrape, de modo que
+cualquier worker que atienda ``/metrics`` devuelve los totales de la instancia.
+"""
+import os
+import logging
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Buckets pensados para dimensiones de matriz (MAX_DIMENSION por defecto = 100)
+DIMENSION_BUCKETS = (1, 2, 3, 4, 5, 8, 10, 16, 25, 32, 50, 64, 100, 200, 500)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_COUNT = Counter(
+    'matrixcalc_http_requests_total',
+    'Peticiones HTTP atendidas, por ruta, método y código de estado.',
+    ['route', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'matrixcalc_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por ruta.',
+    ['route', 'method'],
+)
+OPERATION_COMPUTE = Histogram(
+    'matrixcalc_operation_compute_seconds',
+    'Tiempo de cómputo numérico por tipo de operación (sin acceso a BD).',
+    ['operation_type'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+MATRIX_DIMENSION = Histogram(
+    'matrixcalc_operation_matrix_dimension',
+    'Distribución de dimensiones de los operandos por tipo de operación.',
+    ['operation_type', 'axis'],
+    buckets=DIMENSION_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'matrixcalc_cache_requests_total',
+    'Lecturas del cache de Django, clasificadas como hit o miss.',
+    ['result'],
+)
+DB_QUERIES = Histogram(
+    'matrixcalc_db_queries_per_request',
+    'Número de consultas SQL ejecutadas por petición.',
+    ['route'],
+    buckets=QUERY_BUCKETS,
+)
+RATELIMIT_REJECTIONS = Counter(
+    'matrixcalc_ratelimit_rejections_total',
+    'Peticiones rechazadas por rate limiting.',
+    ['route'],
+)
+RATELIMIT_TOKENS = Counter(
+    'matrixcalc_ratelimit_tokens_total',
+    'Tokens cobrados por el rate limiting ponderado por costo.',
+    ['operation_type'],
+)
+EVENTS_OVERFLOW = Counter(
+    'matrixcalc_events_overflow_total',
+    'Streams SSE cerrados porque el cliente no consumía los eventos a tiempo.',
+)
+
+
+def observe_operation(operation_type, seconds, *shapes):
+    """Registra el tiempo de cómputo y las dimensiones de los operandos."""
+    OPERATION_COMPUTE.labels(operation_type=operation_type).observe(seconds)
+    for shape in shapes:
+        if shape is None:
+            continue
+        MATRIX_DIMENSION.labels(operation_type=operation_type, axis='rows').observe(shape[0])
+        MATRIX_DIMENSION.labels(operation_type=operation_type, axis='cols').observe(shape[1])
+
+
+def record_cache_access(hit):
+    """Registra una lectura del cache como hit o miss."""
+    CACHE_REQUESTS.labels(result='hit' if hit else 'miss').inc()
+
+
+def record_ratelimit_rejection(route):
+    """Registra una petición rechazada por rate limiting."""
+    RATELIMIT_REJECTIONS.labels(route=route or 'unknown').inc()
+
+
+def route_name(request):
+    """
+    Retorna una etiqueta de baja cardinalidad para la ruta de la petición.
+
+    Se usa el nombre de la URL resuelta (``sum-matrices``, ``matrix-detail``...)
+    en lugar del path, que incluye IDs.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class CeleryQueueCollector:
+    """
+    Collector que consulta la profundidad de las colas de Celery en cada scrape.
+
+    Solo se consulta el broker si ``CELERY_BROKER_URL`` está configurado; un
+    broker caído no debe romper el endpoint de métricas.
+    """
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            'matrixcalc_celery_queue_depth',
+            'Mensajes pendientes en cada cola de Celery.',
+            labels=['queue'],
+        )
+        if os.environ.get('CELERY_BROKER_URL'):
+            for queue in settings.MATRIX_CONFIG['METRICS_CELERY_QUEUES']:
+                depth = _celery_queue_depth(queue)
+                if depth is not None:
+                    family.add_metric([queue], depth)
+        yield family
+
+
+class BlasSettingsCollector:
+    """
+    Expone la política de hilos BLAS vigente en el proceso que atiende el scrape.
+
+    La configuración sale de MATRIX_CONFIG y es idéntica en todos los workers.
+    """
+
+    def collect(self):
+        from calculator.utils import blas
+
+        current = blas.current_settings()
+        info = GaugeMetricFamily(
+            'matrixcalc_blas_policy_info',
+            'Política de hilos BLAS configurada.',
+            labels=['policy'],
+        )
+        info.add_metric([current['policy']], 1)
+        yield info
+
+        yield GaugeMetricFamily(
+            'matrixcalc_blas_heavy_threads',
+            'Hilos BLAS usados por kernels pesados.',
+            value=current['threads'],
+        )
+        yield GaugeMetricFamily(
+            'matrixcalc_blas_heavy_threshold_elements',
+            'Elementos a partir de los cuales un kernel se considera pesado.',
+            value=current['heavy_threshold'],
+        )
+        yield GaugeMetricFamily(
+            'matrixcalc_blas_max_concurrent_heavy',
+            'Kernels pesados simultáneos permitidos por proceso.',
+            value=current['max_concurrent_heavy'],
+        )
+        yield GaugeMetricFamily(
+            'matrixcalc_blas_heavy_in_flight',
+            'Kernels pesados en ejecución en el proceso del scrape.',
+            value=current['heavy_in_flight'],
+        )
+
+        library_threads = GaugeMetricFamily(
+            'matrixcalc_blas_library_threads',
+            'Hilos configurados actualmente en cada librería BLAS cargada.',
+            labels=['library'],
+        )
+        for library in current['libraries']:
+            library_threads.add_metric([library['internal_api']], library['num_threads'])
+        yield library_threads
+
+
+def _celery_queue_depth(queue):
+    from matrixcalc_web.celery import app
+
+    try:
+        with app.connection_for_read() as conn:
+            conn.ensure_connection(max_retries=1, timeout=1)
+            with conn.channel() as channel:
+                return channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception as e:
+        logger.warning(f"No se pudo leer la cola Celery '{queue}': {e}")
+        return None
+
+
+def render_metrics():
+    """
+    Genera la exposición de métricas en formato texto de Prometheus.
+
+    Returns:
+        tuple: (contenido en bytes, content type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    scrape_registry = CollectorRegistry()
+    scrape_registry.register(CeleryQueueCollector())
+    scrape_registry.register(BlasSettingsCollector())
+
+    return generate_latest(registry) + generate_latest(scrape_registry), CONTENT_TYPE_LATEST
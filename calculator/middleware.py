@@ -0,0 +1,149 @@
+"""
+Middlewares de la app calculator.
+"""
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django_ratelimit.exceptions import Ratelimited
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from calculator import metrics, profiling
+
+
+class _QueryCounter:
+    """Execute wrapper que cuenta las consultas SQL de una petición."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Registra conteo, latencia y consultas SQL de cada petición.
+
+    Debe ir al inicio de MIDDLEWARE para que la latencia incluya el resto
+    de la cadena. Soporta sync y async; bajo ASGI las consultas del ORM async
+    corren en otro hilo, así que el conteo de consultas solo se registra en
+    modo sync.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        metrics.DB_QUERIES.labels(route=metrics.route_name(request)).observe(counter.count)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, elapsed):
+        route = metrics.route_name(request)
+        metrics.REQUEST_COUNT.labels(
+            route=route, method=request.method, status=str(response.status_code)
+        ).inc()
+        metrics.REQUEST_LATENCY.labels(route=route, method=request.method).observe(elapsed)
+
+    def process_exception(self, request, exception):
+        # Rechazos en vistas que no son de DRF (las de DRF pasan por
+        # custom_exception_handler)
+        if isinstance(exception, Ratelimited):
+            metrics.record_ratelimit_rejection(metrics.route_name(request))
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Perfila peticiones bajo demanda (ver ``calculator.profiling``).
+
+    Una petición se perfila si:
+      - trae la cabecera ``X-MatrixCalc-Profile: 1`` y el usuario es staff, o
+      - cae dentro de ``MATRIX_CONFIG['PROFILING_SAMPLE_RATE']`` (0.0 = nunca).
+
+    Debe ir después de AuthenticationMiddleware. El muestreo es por hilo, así
+    que en modo async (varias peticiones comparten el hilo del event loop) las
+    peticiones pasan sin perfilar.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _should_profile(self, request):
+        if request.META.get('HTTP_X_MATRIXCALC_PROFILE') in ('1', 'true', 'yes'):
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated and user.is_staff:
+                return True
+        rate = settings.MATRIX_CONFIG['PROFILING_SAMPLE_RATE']
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self) or not self._should_profile(request):
+            return self.get_response(request)
+
+        config = settings.MATRIX_CONFIG
+        with profiling.profile_request(config['PROFILING_INTERVAL_MS'] / 1000) as (sampler, labels):
+            response = self.get_response(request)
+
+        labels['route'] = metrics.route_name(request)
+        entry = profiling.write_profile(sampler, labels, config['PROFILING_DIR'], config['PROFILING_FORMAT'])
+        response['X-MatrixCalc-Profile-Id'] = entry['id']
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware con soporte async.
+
+    El middleware original es solo sync: bajo ASGI obligaría a Django a pasar
+    cada petición por un hilo sync antes de llegar a las vistas async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
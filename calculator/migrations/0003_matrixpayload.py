@@ -0,0 +1,48 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0002_operation_extra_data_alter_operation_operation_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatrixPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('rows', models.PositiveIntegerField()),
+                ('cols', models.PositiveIntegerField()),
+                ('blob', models.BinaryField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Payload de matriz',
+                'verbose_name_plural': 'Payloads de matrices',
+                'indexes': [models.Index(fields=['ref_count'], name='calculator__ref_cou_a98fb0_idx')],
+            },
+        ),
+        # Nullable hasta que 0005 la elimine (permite revertir 0004/0005)
+        migrations.AlterField(
+            model_name='matrix',
+            name='data',
+            field=models.JSONField(help_text='Datos de la matriz como lista de listas', null=True),
+        ),
+        migrations.AddField(
+            model_name='matrix',
+            name='content_hash',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='SHA-256 de la forma y los datos float64', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='matrix',
+            name='payload',
+            field=models.ForeignKey(help_text='Datos de la matriz (compartidos entre matrices idénticas)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='matrices', to='calculator.matrixpayload'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+"""
+Mueve los datos JSON de cada matriz a payloads deduplicados por hash.
+"""
+import hashlib
+
+import numpy as np
+from django.db import migrations
+
+
+def _content_hash(array):
+    digest = hashlib.sha256(f'{array.shape[0]}x{array.shape[1]}:'.encode())
+    digest.update(array.astype('<f8', copy=False).tobytes())
+    return digest.hexdigest()
+
+
+def move_data_to_payloads(apps, schema_editor):
+    Matrix = apps.get_model('calculator', 'Matrix')
+    MatrixPayload = apps.get_model('calculator', 'MatrixPayload')
+
+    payload_ids = dict(MatrixPayload.objects.values_list('content_hash', 'id'))
+    ref_counts = {}
+    for matrix in Matrix.objects.filter(payload__isnull=True).only('id', 'data').iterator(chunk_size=500):
+        array = np.ascontiguousarray(matrix.data, dtype=np.float64).reshape(len(matrix.data), -1) + 0.0
+        digest = _content_hash(array)
+        if digest not in payload_ids:
+            payload_ids[digest] = MatrixPayload.objects.create(
+                content_hash=digest, rows=array.shape[0], cols=array.shape[1], blob=array.astype('<f8').tobytes()
+            ).id
+        Matrix.objects.filter(pk=matrix.pk).update(payload_id=payload_ids[digest], content_hash=digest)
+        ref_counts[payload_ids[digest]] = ref_counts.get(payload_ids[digest], 0) + 1
+
+    for payload_id, count in ref_counts.items():
+        MatrixPayload.objects.filter(pk=payload_id).update(ref_count=count)
+
+
+def restore_json_data(apps, schema_editor):
+    Matrix = apps.get_model('calculator', 'Matrix')
+    for matrix in Matrix.objects.select_related('payload').iterator(chunk_size=500):
+        payload = matrix.payload
+        data = np.frombuffer(bytes(payload.blob), dtype='<f8').reshape(payload.rows, payload.cols).tolist()
+        Matrix.objects.filter(pk=matrix.pk).update(data=data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0003_matrixpayload'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_data_to_payloads, restore_json_data),
+    ]
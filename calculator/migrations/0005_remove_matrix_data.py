@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0004_populate_matrix_payloads'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='matrix',
+            name='data',
+        ),
+        migrations.AlterField(
+            model_name='matrix',
+            name='payload',
+            field=models.ForeignKey(help_text='Datos de la matriz (compartidos entre matrices idénticas)', on_delete=django.db.models.deletion.PROTECT, related_name='matrices', to='calculator.matrixpayload'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0005_remove_matrix_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationComponent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre del componente (U, S, Vh, Q, R, eigenvalues, ...)', max_length=32)),
+                ('rows', models.PositiveIntegerField()),
+                ('cols', models.PositiveIntegerField()),
+                ('operation', models.ForeignKey(help_text='Operación a la que pertenece el componente', on_delete=django.db.models.deletion.CASCADE, related_name='components', to='calculator.operation')),
+                ('payload', models.ForeignKey(help_text='Datos del componente', on_delete=django.db.models.deletion.PROTECT, related_name='components', to='calculator.matrixpayload')),
+            ],
+            options={
+                'verbose_name': 'Componente de operación',
+                'verbose_name_plural': 'Componentes de operaciones',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='operationcomponent',
+            constraint=models.UniqueConstraint(fields=('operation', 'name'), name='unique_operation_component'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0006_operationcomponent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matrixpayload',
+            name='encoding',
+            field=models.CharField(choices=[('raw', 'float64'), ('zstd', 'float64 comprimido (zstd)'), ('float32', 'float32'), ('quantized', 'Cuantizado 16 bits (con pérdida)')], default='raw', max_length=16),
+        ),
+    ]
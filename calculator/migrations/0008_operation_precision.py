@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0007_matrixpayload_encoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='precision',
+            field=models.CharField(choices=[('float64', 'Doble precisión (float64)'), ('float32', 'Simple precisión (float32)')], default='float64', help_text='Precisión de cómputo (float64 o float32)', max_length=8),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:47
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0008_operation_precision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatrixStack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre descriptivo de la pila', max_length=200)),
+                ('count', models.PositiveIntegerField(help_text='Número de matrices de la pila', validators=[django.core.validators.MinValueValidator(1)])),
+                ('rows', models.PositiveIntegerField(help_text='Filas de cada matriz', validators=[django.core.validators.MinValueValidator(1)])),
+                ('cols', models.PositiveIntegerField(help_text='Columnas de cada matriz', validators=[django.core.validators.MinValueValidator(1)])),
+                ('invalid_items', models.JSONField(blank=True, default=list, help_text='Índices de los elementos enmascarados (sin valor)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.ForeignKey(help_text='Datos de la pila ((count * rows) x cols)', on_delete=django.db.models.deletion.PROTECT, related_name='stacks', to='calculator.matrixpayload')),
+            ],
+            options={
+                'verbose_name': 'Pila de matrices',
+                'verbose_name_plural': 'Pilas de matrices',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StackOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation_type', models.CharField(choices=[('DETERMINANT', 'Determinante'), ('INVERSE', 'Inversa'), ('SOLVE', 'Resolución de sistemas'), ('EIGH', 'Valores/Vectores Propios (simétricas)')], help_text='Tipo de operación realizada', max_length=20)),
+                ('errors', models.JSONField(blank=True, default=dict, help_text='Motivo por índice de los elementos que no se pudieron calcular')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('execution_time_ms', models.PositiveIntegerField(help_text='Tiempo de ejecución en milisegundos')),
+                ('precision', models.CharField(choices=[('float64', 'Doble precisión (float64)'), ('float32', 'Simple precisión (float32)')], default='float64', help_text='Precisión de cómputo (float64 o float32)', max_length=8)),
+                ('result', models.ForeignKey(help_text='Pila resultado', on_delete=django.db.models.deletion.CASCADE, related_name='operations_as_result', to='calculator.matrixstack')),
+                ('rhs', models.ForeignKey(blank=True, help_text='Pila de términos independientes (SOLVE)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='operations_as_rhs', to='calculator.matrixstack')),
+                ('stack', models.ForeignKey(help_text='Pila operando', on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='calculator.matrixstack')),
+                ('vectors', models.ForeignKey(blank=True, help_text='Pila de autovectores (EIGH)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='operations_as_vectors', to='calculator.matrixstack')),
+            ],
+            options={
+                'verbose_name': 'Operación sobre pila',
+                'verbose_name_plural': 'Operaciones sobre pilas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['operation_type'], name='calculator__operati_45131a_idx'), models.Index(fields=['-created_at'], name='calculator__created_05cbdf_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='matrixstack',
+            index=models.Index(fields=['-created_at'], name='calculator__created_dd6dd0_idx'),
+        ),
+    ]
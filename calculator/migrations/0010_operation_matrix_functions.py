@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0009_matrixstack'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='operation',
+            name='operation_type',
+            field=models.CharField(choices=[('SUM', 'Suma'), ('SUBTRACT', 'Resta'), ('MULTIPLY', 'Multiplicación'), ('INVERSE', 'Inversa'), ('DETERMINANT', 'Determinante'), ('TRANSPOSE', 'Transpuesta'), ('RANK', 'Rango'), ('EIGEN', 'Valores/Vectores Propios'), ('SVD', 'Descomposición Valor Singular'), ('QR', 'Descomposición QR'), ('LU', 'Descomposición LU'), ('CHOLESKY', 'Descomposición Cholesky'), ('POWER', 'Potencia'), ('EXPM', 'Exponencial'), ('SQRTM', 'Raíz cuadrada'), ('LOGM', 'Logaritmo')], help_text='Tipo de operación realizada', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0011_operation_chain_multiply'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='operation',
+            name='operation_type',
+            field=models.CharField(choices=[('SUM', 'Suma'), ('SUBTRACT', 'Resta'), ('MULTIPLY', 'Multiplicación'), ('CHAIN_MULTIPLY', 'Producto en cadena'), ('INVERSE', 'Inversa'), ('DETERMINANT', 'Determinante'), ('TRANSPOSE', 'Transpuesta'), ('RANK', 'Rango'), ('EIGEN', 'Valores/Vectores Propios'), ('SVD', 'Descomposición Valor Singular'), ('QR', 'Descomposición QR'), ('LU', 'Descomposición LU'), ('CHOLESKY', 'Descomposición Cholesky'), ('POWER', 'Potencia'), ('EXPM', 'Exponencial'), ('SQRTM', 'Raíz cuadrada'), ('LOGM', 'Logaritmo'), ('CG', 'Gradiente conjugado'), ('GMRES', 'GMRES')], help_text='Tipo de operación realizada', max_length=20),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:05
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0014_operation_subspaces'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StepTrace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('algorithm', models.CharField(choices=[('ELIMINATION', 'Eliminación gaussiana'), ('RREF', 'Forma escalonada reducida'), ('LU', 'Descomposición LU')], help_text='Algoritmo trazado', max_length=20)),
+                ('rows', models.PositiveIntegerField()),
+                ('cols', models.PositiveIntegerField()),
+                ('step_count', models.PositiveIntegerField(help_text='Número de pasos')),
+                ('keyframe_interval', models.PositiveIntegerField(help_text='Pasos entre fotogramas clave', validators=[django.core.validators.MinValueValidator(1)])),
+                ('keyframe_count', models.PositiveIntegerField(help_text='Fotogramas clave guardados', validators=[django.core.validators.MinValueValidator(1)])),
+                ('steps', models.BinaryField(help_text='Deltas de operaciones de fila')),
+                ('rank', models.PositiveIntegerField(help_text='Número de pivotes')),
+                ('pivot_columns', models.JSONField(default=list, help_text='Columnas pivote de la forma final')),
+                ('execution_time_ms', models.PositiveIntegerField(help_text='Tiempo de ejecución en milisegundos')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('matrix', models.ForeignKey(help_text='Matriz de partida', on_delete=django.db.models.deletion.CASCADE, related_name='traces', to='calculator.matrix')),
+                ('payload', models.ForeignKey(help_text='Fotogramas clave ((keyframe_count * rows) x cols)', on_delete=django.db.models.deletion.PROTECT, related_name='traces', to='calculator.matrixpayload')),
+            ],
+            options={
+                'verbose_name': 'Traza paso a paso',
+                'verbose_name_plural': 'Trazas paso a paso',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='calculator__created_c92389_idx')],
+            },
+        ),
+    ]
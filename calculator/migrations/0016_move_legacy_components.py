@@ -0,0 +1,136 @@
+"""
+Mueve las descomposiciones antiguas (SVD, QR, EIGEN) de ``Operation.extra_data``
+a componentes (``OperationComponent``) con payloads deduplicados por hash.
+
+Antes de 0006 cada descomposición se guardaba completa en ``extra_data`` como
+listas JSON: ``{'U', 'S', 'Vh'}``, ``{'Q', 'R'}`` o ``{'eigenvalues': [{'real',
+'imag', ...}], 'eigenvectors'}`` (autovectores complejos como texto). La
+migración inversa reconstruye ese formato a partir de los componentes y los
+elimina.
+"""
+import hashlib
+
+import numpy as np
+from django.db import migrations
+from django.db.models import F
+
+from calculator import encodings
+
+LEGACY_KEYS = {
+    'SVD': ('U', 'S', 'Vh'),
+    'QR': ('Q', 'R'),
+    'EIGEN': ('eigenvalues', 'eigenvectors'),
+}
+
+
+def _content_hash(array):
+    digest = hashlib.sha256(f'{array.shape[0]}x{array.shape[1]}:'.encode())
+    digest.update(array.astype('<f8', copy=False).tobytes())
+    return digest.hexdigest()
+
+
+def _matrix(values):
+    array = np.array(values, dtype=np.float64)
+    return (array.reshape(-1, 1) if array.ndim == 1 else array) + 0.0
+
+
+def _legacy_components(operation_type, data):
+    """Componentes {nombre: array 2D} de un ``extra_data`` antiguo."""
+    if operation_type == 'SVD':
+        return {'U': _matrix(data['U']), 'S': _matrix(data['S']), 'Vh': _matrix(data['Vh'])}
+    if operation_type == 'QR':
+        return {'Q': _matrix(data['Q']), 'R': _matrix(data['R'])}
+
+    values = data['eigenvalues']
+    vectors = np.array([[complex(value) for value in row] for row in data['eigenvectors']], dtype=complex)
+    components = {
+        'eigenvalues': _matrix([[value['real'], value['imag']] for value in values]),
+        'eigenvectors': vectors.real + 0.0,
+    }
+    if np.any(vectors.imag):
+        components['eigenvectors_imag'] = vectors.imag + 0.0
+    return components
+
+
+def move_to_components(apps, schema_editor):
+    Operation = apps.get_model('calculator', 'Operation')
+    OperationComponent = apps.get_model('calculator', 'OperationComponent')
+    MatrixPayload = apps.get_model('calculator', 'MatrixPayload')
+
+    legacy = Operation.objects.filter(operation_type__in=LEGACY_KEYS, components__isnull=True)
+    for operation in legacy.only('id', 'operation_type', 'extra_data').iterator(chunk_size=500):
+        data = operation.extra_data
+        keys = LEGACY_KEYS[operation.operation_type]
+        if not isinstance(data, dict) or not all(key in data for key in keys):
+            continue
+
+        components = []
+        for name, array in _legacy_components(operation.operation_type, data).items():
+            payload, _ = MatrixPayload.objects.get_or_create(
+                content_hash=_content_hash(array),
+                defaults={'rows': array.shape[0], 'cols': array.shape[1],
+                          'blob': array.astype('<f8').tobytes(), 'encoding': 'raw'},
+            )
+            MatrixPayload.objects.filter(pk=payload.pk).update(ref_count=F('ref_count') + 1)
+            components.append(OperationComponent(
+                operation_id=operation.id, name=name, rows=array.shape[0], cols=array.shape[1], payload_id=payload.id
+            ))
+        OperationComponent.objects.bulk_create(components)
+
+        rest = {key: value for key, value in data.items() if key not in keys}
+        Operation.objects.filter(pk=operation.pk).update(extra_data=rest or None)
+
+
+def _legacy_data(operation_type, arrays):
+    if operation_type == 'SVD':
+        return {'U': arrays['U'].tolist(), 'S': arrays['S'].ravel().tolist(), 'Vh': arrays['Vh'].tolist()}
+    if operation_type == 'QR':
+        return {'Q': arrays['Q'].tolist(), 'R': arrays['R'].tolist()}
+
+    values = [
+        {'real': float(real), 'imag': float(imag), 'is_complex': bool(imag)}
+        for real, imag in arrays['eigenvalues']
+    ]
+    vectors = arrays['eigenvectors'] + 1j * arrays.get('eigenvectors_imag', 0.0)
+    rows = [
+        [str(value) if not np.isclose(value.imag, 0) else float(value.real) for value in row]
+        for row in vectors
+    ]
+    return {'eigenvalues': values, 'eigenvectors': rows}
+
+
+def restore_extra_data(apps, schema_editor):
+    Operation = apps.get_model('calculator', 'Operation')
+    OperationComponent = apps.get_model('calculator', 'OperationComponent')
+    MatrixPayload = apps.get_model('calculator', 'MatrixPayload')
+
+    for operation in Operation.objects.filter(operation_type__in=LEGACY_KEYS).iterator(chunk_size=500):
+        components = list(OperationComponent.objects.filter(operation_id=operation.id).select_related('payload'))
+        names = {component.name for component in components}
+        if not set(LEGACY_KEYS[operation.operation_type]) <= names:
+            continue
+        arrays = {
+            component.name: encodings.decode(
+                component.payload.blob, component.payload.encoding, component.rows, component.cols
+            )
+            for component in components
+        }
+        data = {**(operation.extra_data or {}), **_legacy_data(operation.operation_type, arrays)}
+        Operation.objects.filter(pk=operation.pk).update(extra_data=data)
+
+        OperationComponent.objects.filter(operation_id=operation.id).delete()
+        for component in components:
+            MatrixPayload.objects.filter(pk=component.payload_id, ref_count__gt=0).update(
+                ref_count=F('ref_count') - 1
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0015_steptrace'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_to_components, restore_extra_data),
+    ]
@@ -5,11 +5,276 @@ Este módulo define los modelos de base de datos para almacenar matrices
 y operaciones realizadas sobre ellas.
 """
 
-from django.db import models
+import hashlib
+
+import numpy as np
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 
+from calculator import encodings
+from calculator.utils import glassbox
+
+
+def as_payload_array(data):
+    """Convierte los datos de una matriz al array canónico: float64 2D, C-contiguo."""
+    array = np.ascontiguousarray(data, dtype=np.float64)
+    if array.ndim == 1 and array.size == 0:
+        array = array.reshape(0, 0)
+    if array.ndim != 2:
+        raise ValueError("Los datos de la matriz deben ser bidimensionales")
+    # -0.0 y 0.0 son el mismo valor pero distintos bytes
+    return array + 0.0
+
+
+def content_hash(array):
+    """SHA-256 sobre la forma y los bytes float64 (little-endian) de la matriz."""
+    digest = hashlib.sha256(f'{array.shape[0]}x{array.shape[1]}:'.encode())
+    digest.update(array.astype('<f8', copy=False).tobytes())
+    return digest.hexdigest()
+
+
+class MatrixPayloadManager(models.Manager):
+    """Alta y baja de referencias a payloads compartidos."""
+
+    def acquire(self, array, encoding=None):
+        """
+        Payload con el contenido de ``array`` (creándolo si no existe) con una
+        referencia más.
+
+        ``encoding`` (por defecto ``MATRIX_CONFIG['PAYLOAD_ENCODING']``) solo
+        se aplica al crear el payload: si ya existe uno con los mismos valores
+        se comparte con la codificación que tenga.
+        """
+        encoding = encodings.validate_encoding(encoding or encodings.default_encoding())
+        blob, stored = encodings.stored_array(array, encoding)
+        digest = content_hash(stored)
+        with transaction.atomic():
+            payload, _ = self.get_or_create(
+                content_hash=digest,
+                defaults={'rows': array.shape[0], 'cols': array.shape[1], 'blob': blob, 'encoding': encoding},
+            )
+            self.filter(pk=payload.pk).update(ref_count=F('ref_count') + 1)
+        return payload
+
+    def release(self, payload_id):
+        """Quita una referencia; los payloads sin referencias los elimina la limpieza."""
+        self.filter(pk=payload_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+    def attach(self, objs):
+        """
+        Asigna payload a objetos (matrices o componentes) con datos pendientes
+        sin guardarlos (``bulk_create``): una consulta para los existentes y
+        un ``bulk_create`` para los nuevos.
+
+        Returns:
+            set: ids de los payloads asignados
+        """
+        pending = {}
+        digests = {}
+        default = encodings.default_encoding()
+        for obj in objs:
+            if obj._pending_array is not None:
+                encoding = encodings.validate_encoding(obj._pending_encoding or default)
+                blob, stored = encodings.stored_array(obj._pending_array, encoding)
+                digest = digests[id(obj)] = content_hash(stored)
+                pending.setdefault(digest, (stored.shape, blob, encoding))
+                if obj.TRACKS_CONTENT_HASH:
+                    obj.content_hash = digest
+        if not pending:
+            return set()
+
+        existing = dict(self.filter(content_hash__in=pending).values_list('content_hash', 'id'))
+        missing = [
+            MatrixPayload(content_hash=digest, rows=shape[0], cols=shape[1], blob=blob, encoding=encoding)
+            for digest, (shape, blob, encoding) in pending.items() if digest not in existing
+        ]
+        if missing:
+            # ignore_conflicts: otro proceso pudo crear el mismo payload entretanto
+            self.bulk_create(missing, ignore_conflicts=True)
+            existing.update(self.filter(content_hash__in=[p.content_hash for p in missing])
+                            .values_list('content_hash', 'id'))
 
-class Matrix(models.Model):
+        for obj in objs:
+            if obj._pending_array is not None:
+                obj.payload_id = existing[digests[id(obj)]]
+        return set(existing.values())
+
+    def recount(self, ids=None):
+        """Recalcula ``ref_count`` a partir de las filas que referencian cada payload."""
+        queryset = self.all() if ids is None else self.filter(pk__in=ids)
+        total = 0
+        for model in (Matrix, OperationComponent, MatrixStack, StepTrace):
+            references = (
+                model._base_manager.filter(payload=OuterRef('pk'))
+                .order_by().values('payload').annotate(total=Count('pk')).values('total')
+            )
+            total = total + Coalesce(Subquery(references), 0)
+        return queryset.update(ref_count=total)
+
+
+class MatrixPayload(models.Model):
+    """
+    Contenido numérico de una o varias matrices, deduplicado por hash.
+
+    Las matrices (y componentes de descomposiciones o pilas) con los mismos datos
+    (misma forma y mismos float64) comparten un único payload; ``ref_count``
+    cuenta cuántas filas lo referencian.
+
+    Attributes:
+        content_hash: SHA-256 de la forma y los bytes float64 (ya decodificados)
+        rows, cols: Forma de la matriz
+        blob: Datos en orden fila mayor, según ``encoding``
+        encoding: Codificación de ``blob`` (ver ``calculator.encodings``)
+        ref_count: Número de matrices, componentes y pilas que usan este payload
+    """
+    ENCODING_CHOICES = [
+        ('raw', 'float64'),
+        ('zstd', 'float64 comprimido (zstd)'),
+        ('float32', 'float32'),
+        ('quantized', 'Cuantizado 16 bits (con pérdida)'),
+    ]
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    rows = models.PositiveIntegerField()
+    cols = models.PositiveIntegerField()
+    blob = models.BinaryField()
+    encoding = models.CharField(max_length=16, choices=ENCODING_CHOICES, default='raw')
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = MatrixPayloadManager()
+
+    class Meta:
+        verbose_name = "Payload de matriz"
+        verbose_name_plural = "Payloads de matrices"
+        indexes = [
+            models.Index(fields=['ref_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.rows}x{self.cols}, {self.encoding}, {self.ref_count} refs)"
+
+    def to_array(self):
+        """Datos decodificados como np.ndarray float64 (de solo lectura en ``raw``)."""
+        return encodings.decode(self.blob, self.encoding, self.rows, self.cols)
+
+
+class PayloadQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """``bulk_create`` que resuelve antes los payloads de los datos pendientes."""
+        objs = list(objs)
+        payload_ids = MatrixPayload.objects.attach(objs)
+        # Filas reemplazadas (update_conflicts): sus payloads anteriores pierden una referencia
+        ids = [obj.pk for obj in objs if obj.pk is not None]
+        if ids and kwargs.get('update_conflicts'):
+            payload_ids.update(self.model._base_manager.filter(pk__in=ids).values_list('payload_id', flat=True))
+        created = super().bulk_create(objs, *args, **kwargs)
+        MatrixPayload.objects.recount(payload_ids)
+        for obj in objs:
+            obj._pending_array = obj._pending_encoding = None
+        return created
+
+
+class MatrixManager(models.Manager.from_queryset(PayloadQuerySet)):
+
+    def get_queryset(self):
+        # Los datos viven en el payload: cargarlo en la misma consulta
+        return super().get_queryset().select_related('payload')
+
+
+class PayloadBackedModel(models.Model):
+    """
+    Base de los modelos cuyos valores viven en un ``MatrixPayload``.
+    
+    ``data`` (lista de listas) y ``array`` (np.ndarray) decodifican el payload
+    al acceder; asignar ``data`` deja los valores pendientes hasta guardar.
+    ``encoding`` elige la codificación del payload al guardar (por defecto
+    ``MATRIX_CONFIG['PAYLOAD_ENCODING']``). Las subclases declaran la FK
+    ``payload``.
+    """
+    # Copiar el hash del payload a un campo ``content_hash`` propio
+    TRACKS_CONTENT_HASH = False
+    
+    # Datos y codificación asignados aún sin guardar / caché del payload decodificado
+    _pending_array = None
+    _pending_encoding = None
+    _array = None
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def array(self):
+        """Datos como np.ndarray float64 de solo lectura."""
+        if self._pending_array is not None:
+            return self._pending_array
+        if self._array is None:
+            self._array = self.payload.to_array()
+        return self._array
+    
+    @property
+    def data(self):
+        """Datos como lista de listas de float."""
+        return self.array.tolist()
+    
+    @data.setter
+    def data(self, value):
+        self._pending_array = as_payload_array(value)
+        self._array = None
+    
+    @property
+    def encoding(self):
+        """Codificación del payload (o la que se aplicará al guardar)."""
+        if self._pending_encoding is not None:
+            return self._pending_encoding
+        if self.payload_id is not None:
+            return self.payload.encoding
+        return encodings.default_encoding()
+    
+    @encoding.setter
+    def encoding(self, value):
+        if value is None:
+            return
+        self._pending_encoding = encodings.validate_encoding(value)
+        if self._pending_array is None and self.payload_id is not None:
+            # Cambiar la codificación de una fila guardada: recodificar sus datos
+            self._pending_array = as_payload_array(self.array)
+    
+    def save_base(self, *args, **kwargs):
+        """
+        Guarda la fila asignando (o compartiendo) el payload de sus datos.
+        
+        Se intercepta ``save_base`` y no ``save`` para cubrir también las
+        cargas raw (``loaddata``).
+        """
+        if self._pending_array is None:
+            return super().save_base(*args, **kwargs)
+        
+        with transaction.atomic():
+            previous = self.payload_id
+            payload = MatrixPayload.objects.acquire(self._pending_array, self._pending_encoding)
+            self.payload = payload
+            changed = {'payload'}
+            if self.TRACKS_CONTENT_HASH:
+                self.content_hash = payload.content_hash
+                changed.add('content_hash')
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *changed}
+            super().save_base(*args, **kwargs)
+            if previous is not None:
+                MatrixPayload.objects.release(previous)
+        # Con codificaciones con pérdida los valores guardados difieren de los
+        # asignados: se decodifican del payload al acceder
+        self._array = None
+        self._pending_array = self._pending_encoding = None
+
+
+class Matrix(PayloadBackedModel):
     """
     Modelo para almacenar matrices en la base de datos.
     
@@ -17,7 +282,9 @@ class Matrix(models.Model):
         name: Nombre descriptivo de la matriz
         rows: Número de filas
         cols: Número de columnas
-        data: Datos de la matriz en formato JSON (lista de listas)
+        data: Datos de la matriz (lista de listas); se guardan en un
+            ``MatrixPayload`` compartido entre matrices idénticas
+        content_hash: Hash del contenido (igual al de su payload)
         created_at: Fecha y hora de creación
         updated_at: Fecha y hora de última actualización
     """
@@ -33,12 +300,23 @@ class Matrix(models.Model):
         validators=[MinValueValidator(1)],
         help_text="Número de columnas"
     )
-    data = models.JSONField(
-        help_text="Datos de la matriz como lista de listas"
+    payload = models.ForeignKey(
+        MatrixPayload,
+        on_delete=models.PROTECT,
+        related_name='matrices',
+        help_text="Datos de la matriz (compartidos entre matrices idénticas)"
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        db_index=True,
+        editable=False,
+        help_text="SHA-256 de la forma y los datos float64"
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MatrixManager()
+    
     class Meta:
         verbose_name = "Matriz"
         verbose_name_plural = "Matrices"
@@ -49,6 +327,8 @@ class Matrix(models.Model):
             models.Index(fields=['-created_at']),
         ]
     
+    TRACKS_CONTENT_HASH = True
+    
     def __str__(self):
         return f"{self.name} ({self.rows}x{self.cols})"
     
@@ -69,6 +349,7 @@ class Operation(models.Model):
         result: Matriz resultado de la operación
         created_at: Fecha y hora de ejecución
         execution_time_ms: Tiempo de ejecución en milisegundos
+        precision: Precisión en que se calculó (float64 o float32)
     """
     
     # Tipos de operaciones disponibles
@@ -76,6 +357,7 @@ class Operation(models.Model):
         ('SUM', 'Suma'),
         ('SUBTRACT', 'Resta'),
         ('MULTIPLY', 'Multiplicación'),
+        ('CHAIN_MULTIPLY', 'Producto en cadena'),
         ('INVERSE', 'Inversa'),
         ('DETERMINANT', 'Determinante'),
         ('TRANSPOSE', 'Transpuesta'),
@@ -86,6 +368,24 @@ class Operation(models.Model):
         ('QR', 'Descomposición QR'),
         ('LU', 'Descomposición LU'),
         ('CHOLESKY', 'Descomposición Cholesky'),
+        ('LSTSQ', 'Mínimos cuadrados'),
+        ('PINV', 'Pseudoinversa'),
+        ('COLSPACE', 'Espacio columna'),
+        ('NULLSPACE', 'Espacio nulo'),
+        ('RREF', 'Forma escalonada reducida'),
+        # Funciones de matrices
+        ('POWER', 'Potencia'),
+        ('EXPM', 'Exponencial'),
+        ('SQRTM', 'Raíz cuadrada'),
+        ('LOGM', 'Logaritmo'),
+        # Solvers iterativos de A x = b
+        ('CG', 'Gradiente conjugado'),
+        ('GMRES', 'GMRES'),
+    ]
+    
+    PRECISIONS = [
+        ('float64', 'Doble precisión (float64)'),
+        ('float32', 'Simple precisión (float32)'),
     ]
     
     operation_type = models.CharField(
@@ -122,6 +422,12 @@ class Operation(models.Model):
     execution_time_ms = models.PositiveIntegerField(
         help_text="Tiempo de ejecución en milisegundos"
     )
+    precision = models.CharField(
+        max_length=8,
+        choices=PRECISIONS,
+        default='float64',
+        help_text="Precisión de cómputo (float64 o float32)"
+    )
     
     class Meta:
         verbose_name = "Operación"
@@ -142,3 +448,329 @@ class Operation(models.Model):
     def is_binary_operation(self):
         """Retorna True si la operación requiere dos matrices."""
         return self.operation_type in ['SUM', 'SUBTRACT', 'MULTIPLY']
+
+
+class OperationComponent(PayloadBackedModel):
+    """
+    Componente de una descomposición (SVD, QR, EIGEN) asociado a su operación.
+    
+    Cada componente se guarda una sola vez, en binario, como payload
+    compartido: el que coincide con la matriz resultado (Q en QR, S en SVD)
+    reutiliza el mismo payload. ``rows``/``cols`` permiten listar los
+    componentes sin cargar sus datos.
+    
+    Attributes:
+        operation: Operación a la que pertenece
+        name: Nombre del componente (U, S, Vh, Q, R, eigenvalues, ...)
+        rows, cols: Forma del componente
+    """
+    operation = models.ForeignKey(
+        Operation,
+        on_delete=models.CASCADE,
+        related_name='components',
+        help_text="Operación a la que pertenece el componente"
+    )
+    name = models.CharField(
+        max_length=32,
+        help_text="Nombre del componente (U, S, Vh, Q, R, eigenvalues, ...)"
+    )
+    rows = models.PositiveIntegerField()
+    cols = models.PositiveIntegerField()
+    payload = models.ForeignKey(
+        MatrixPayload,
+        on_delete=models.PROTECT,
+        related_name='components',
+        help_text="Datos del componente"
+    )
+    
+    objects = PayloadQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = "Componente de operación"
+        verbose_name_plural = "Componentes de operaciones"
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['operation', 'name'], name='unique_operation_component'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.rows}x{self.cols}) de la operación {self.operation_id}"
+
+
+class MatrixStack(PayloadBackedModel):
+    """
+    Pila de ``count`` matrices pequeñas de la misma forma (N x rows x cols).
+    
+    Los valores se guardan contiguos en un único payload de
+    ``(count * rows) x cols`` (orden fila mayor de la pila completa), de modo
+    que ``stack`` los devuelve como un array 3D sin copias para operar de
+    forma vectorizada sobre toda la pila.
+    
+    Attributes:
+        name: Nombre descriptivo de la pila
+        count: Número de matrices (N)
+        rows, cols: Forma de cada matriz
+        invalid_items: Índices de los elementos sin valor (p. ej. las matrices
+            singulares al invertir una pila); sus valores son NaN
+    """
+    name = models.CharField(
+        max_length=200,
+        help_text="Nombre descriptivo de la pila"
+    )
+    count = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Número de matrices de la pila"
+    )
+    rows = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Filas de cada matriz"
+    )
+    cols = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Columnas de cada matriz"
+    )
+    payload = models.ForeignKey(
+        MatrixPayload,
+        on_delete=models.PROTECT,
+        related_name='stacks',
+        help_text="Datos de la pila ((count * rows) x cols)"
+    )
+    invalid_items = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Índices de los elementos enmascarados (sin valor)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = MatrixManager()
+    
+    class Meta:
+        verbose_name = "Pila de matrices"
+        verbose_name_plural = "Pilas de matrices"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.count}x{self.rows}x{self.cols})"
+    
+    @property
+    def stack(self):
+        """Datos como np.ndarray float64 (count, rows, cols) de solo lectura."""
+        return self.array.reshape(self.count, self.rows, self.cols)
+    
+    @stack.setter
+    def stack(self, value):
+        array = np.asarray(value, dtype=np.float64)
+        if array.ndim != 3:
+            raise ValueError("Los datos de la pila deben ser tridimensionales (N x filas x columnas)")
+        self.count, self.rows, self.cols = array.shape
+        self.data = array.reshape(-1, array.shape[2])
+    
+    @property
+    def mask(self):
+        """Máscara booleana de la pila: True en los elementos con valor."""
+        mask = np.ones(self.count, dtype=bool)
+        mask[list(self.invalid_items)] = False
+        return mask
+
+
+class StackOperation(models.Model):
+    """
+    Operación vectorizada sobre todos los elementos de una pila.
+    
+    Los errores por elemento (matriz singular, no simétrica, ...) no abortan
+    la operación: se registran en ``errors`` y los elementos afectados quedan
+    enmascarados en la pila resultado.
+    
+    Attributes:
+        operation_type: Tipo de operación
+        stack: Pila operando
+        rhs: Pila de términos independientes (solo SOLVE)
+        result: Pila resultado (autovalores en EIGH)
+        vectors: Pila de autovectores (solo EIGH)
+        errors: Motivo por índice de cada elemento que no se pudo calcular
+        precision: Precisión en que se calculó (float64 o float32)
+    """
+    OPERATION_TYPES = [
+        ('DETERMINANT', 'Determinante'),
+        ('INVERSE', 'Inversa'),
+        ('SOLVE', 'Resolución de sistemas'),
+        ('EIGH', 'Valores/Vectores Propios (simétricas)'),
+    ]
+    
+    operation_type = models.CharField(
+        max_length=20,
+        choices=OPERATION_TYPES,
+        help_text="Tipo de operación realizada"
+    )
+    stack = models.ForeignKey(
+        MatrixStack,
+        on_delete=models.CASCADE,
+        related_name='operations',
+        help_text="Pila operando"
+    )
+    rhs = models.ForeignKey(
+        MatrixStack,
+        on_delete=models.CASCADE,
+        related_name='operations_as_rhs',
+        null=True,
+        blank=True,
+        help_text="Pila de términos independientes (SOLVE)"
+    )
+    result = models.ForeignKey(
+        MatrixStack,
+        on_delete=models.CASCADE,
+        related_name='operations_as_result',
+        help_text="Pila resultado"
+    )
+    vectors = models.ForeignKey(
+        MatrixStack,
+        on_delete=models.CASCADE,
+        related_name='operations_as_vectors',
+        null=True,
+        blank=True,
+        help_text="Pila de autovectores (EIGH)"
+    )
+    errors = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Motivo por índice de los elementos que no se pudieron calcular"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    execution_time_ms = models.PositiveIntegerField(
+        help_text="Tiempo de ejecución en milisegundos"
+    )
+    precision = models.CharField(
+        max_length=8,
+        choices=Operation.PRECISIONS,
+        default='float64',
+        help_text="Precisión de cómputo (float64 o float32)"
+    )
+    
+    class Meta:
+        verbose_name = "Operación sobre pila"
+        verbose_name_plural = "Operaciones sobre pilas"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['operation_type']),
+            models.Index(fields=['-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_operation_type_display()}: {self.stack.name}"
+
+
+class StepTrace(PayloadBackedModel):
+    """
+    Traza paso a paso (modo GlassBox) de una eliminación gaussiana, RREF o LU.
+    
+    Cada paso se guarda como un delta de operación de fila de 15 bytes en
+    ``steps`` y la matriz completa solo cada ``keyframe_interval`` pasos: los
+    fotogramas clave van contiguos en el payload (``(keyframe_count * rows) x
+    cols``, como en ``MatrixStack``). El estado tras cualquier paso se
+    reconstruye al pedirlo (ver ``calculator.utils.glassbox``).
+    
+    Attributes:
+        algorithm: ELIMINATION, RREF o LU
+        matrix: Matriz de partida
+        rows, cols: Forma de la matriz
+        step_count: Número de pasos
+        keyframe_interval: Pasos entre fotogramas clave
+        keyframe_count: Fotogramas clave guardados (el primero es la matriz inicial)
+        steps: Deltas de los pasos (``glassbox.STEP_DTYPE``)
+        rank: Número de pivotes
+        pivot_columns: Columnas pivote de la forma final
+    """
+    ALGORITHMS = [
+        ('ELIMINATION', 'Eliminación gaussiana'),
+        ('RREF', 'Forma escalonada reducida'),
+        ('LU', 'Descomposición LU'),
+    ]
+    
+    algorithm = models.CharField(
+        max_length=20,
+        choices=ALGORITHMS,
+        help_text="Algoritmo trazado"
+    )
+    matrix = models.ForeignKey(
+        Matrix,
+        on_delete=models.CASCADE,
+        related_name='traces',
+        help_text="Matriz de partida"
+    )
+    rows = models.PositiveIntegerField()
+    cols = models.PositiveIntegerField()
+    step_count = models.PositiveIntegerField(help_text="Número de pasos")
+    keyframe_interval = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Pasos entre fotogramas clave"
+    )
+    keyframe_count = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Fotogramas clave guardados"
+    )
+    steps = models.BinaryField(help_text="Deltas de operaciones de fila")
+    payload = models.ForeignKey(
+        MatrixPayload,
+        on_delete=models.PROTECT,
+        related_name='traces',
+        help_text="Fotogramas clave ((keyframe_count * rows) x cols)"
+    )
+    rank = models.PositiveIntegerField(help_text="Número de pivotes")
+    pivot_columns = models.JSONField(default=list, help_text="Columnas pivote de la forma final")
+    execution_time_ms = models.PositiveIntegerField(
+        help_text="Tiempo de ejecución en milisegundos"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = MatrixManager()
+    
+    class Meta:
+        verbose_name = "Traza paso a paso"
+        verbose_name_plural = "Trazas paso a paso"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_algorithm_display()}: {self.matrix.name} ({self.step_count} pasos)"
+    
+    @property
+    def keyframes(self):
+        """Fotogramas clave como np.ndarray (keyframe_count, rows, cols) de solo lectura."""
+        return self.array.reshape(self.keyframe_count, self.rows, self.cols)
+    
+    @keyframes.setter
+    def keyframes(self, value):
+        array = np.asarray(value, dtype=np.float64)
+        self.keyframe_count, self.rows, self.cols = array.shape
+        self.data = array.reshape(-1, array.shape[2])
+    
+    @property
+    def step_array(self):
+        """Deltas como array estructurado de ``glassbox.STEP_DTYPE``."""
+        return np.frombuffer(bytes(self.steps), dtype=glassbox.STEP_DTYPE)
+    
+    def replay(self, start, stop):
+        """(índice, estado) tras cada paso de ``start`` a ``stop - 1`` (ver ``glassbox.replay``)."""
+        return glassbox.replay(self.keyframes, self.step_array, self.keyframe_interval, start, stop)
+    
+    def state_after(self, index):
+        """Matriz tras el paso ``index`` (-1: la matriz inicial)."""
+        return glassbox.state_after(self.keyframes, self.step_array, self.keyframe_interval, index)
+    
+    @property
+    def storage_bytes(self):
+        """Bytes guardados: deltas más fotogramas clave (tras codificar)."""
+        return len(self.steps) + len(self.payload.blob)
+
+
+@receiver(post_delete, sender=Matrix, dispatch_uid='matrixcalc_release_payload')
+@receiver(post_delete, sender=OperationComponent, dispatch_uid='matrixcalc_release_component_payload')
+@receiver(post_delete, sender=MatrixStack, dispatch_uid='matrixcalc_release_stack_payload')
+@receiver(post_delete, sender=StepTrace, dispatch_uid='matrixcalc_release_trace_payload')
+def _release_payload(sender, instance, **kwargs):
+    MatrixPayload.objects.release(instance.payload_id)
@@ -0,0 +1,203 @@
+"""
+Profiling bajo demanda de peticiones.
+
+Un ``StackSampler`` muestrea periódicamente la pila del hilo que atiende la
+petición (``sys._current_frames``) y acumula las pilas en formato "collapsed"
+(``a;b;c <conteo>``). Al terminar, el perfil se escribe en
+``MATRIX_CONFIG['PROFILING_DIR']`` como archivo speedscope o collapsed-stack,
+organizado por tipo de operación y forma de la matriz, y se añade una línea a
+``index.jsonl`` para poder localizarlo después (ver ``list_profiles``).
+"""
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+INDEX_FILENAME = 'index.jsonl'
+
+# Etiquetas del perfil activo en el contexto actual (None si no se perfila)
+_active_labels = contextvars.ContextVar('matrixcalc_profile_labels', default=None)
+
+
+def annotate(**labels):
+    """
+    Añade etiquetas (operation_type, shape...) al perfil en curso.
+
+    No hace nada si la petición actual no se está perfilando.
+    """
+    current = _active_labels.get()
+    if current is not None:
+        current.update(labels)
+
+
+def _frame_name(code):
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler:
+    """
+    Profiler estadístico para un único hilo.
+
+    Args:
+        thread_id: Identificador del hilo a muestrear (``threading.get_ident()``)
+        interval: Segundos entre muestras
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='matrixcalc-profiler', daemon=True)
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    @property
+    def sample_count(self):
+        return sum(self.stacks.values())
+
+    def to_collapsed(self):
+        """Formato collapsed-stack (flamegraph.pl, speedscope, inferno)."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_speedscope(self, name):
+        """Formato JSON de speedscope (perfil de tipo 'sampled')."""
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.items():
+            indices = []
+            for frame_name in stack.split(';'):
+                if frame_name not in frame_index:
+                    frame_index[frame_name] = len(frames)
+                    frames.append({'name': frame_name})
+                indices.append(frame_index[frame_name])
+            samples.append(indices)
+            weights.append(count * self.interval)
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'matrixcalc',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+@contextlib.contextmanager
+def profile_request(interval):
+    """
+    Perfila el bloque en el hilo actual.
+
+    Yields:
+        tuple: (sampler, labels) — ``labels`` recibe lo que registre ``annotate``
+    """
+    labels = {}
+    token = _active_labels.set(labels)
+    sampler = StackSampler(threading.get_ident(), interval=interval).start()
+    try:
+        yield sampler, labels
+    finally:
+        sampler.stop()
+        _active_labels.reset(token)
+
+
+def write_profile(sampler, labels, profile_dir, fmt='speedscope'):
+    """
+    Escribe el perfil en disco y lo registra en el índice.
+
+    Returns:
+        dict: Entrada del índice (incluye la ruta relativa del archivo)
+    """
+    profile_dir = Path(profile_dir)
+    operation_type = labels.get('operation_type') or 'none'
+    shape = labels.get('shape') or 'none'
+    timestamp = datetime.now(timezone.utc)
+    profile_id = f"{timestamp.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    target_dir = profile_dir / operation_type / shape
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    name = f"{labels.get('route', 'request')} {operation_type} {shape}"
+    if fmt == 'collapsed':
+        path = target_dir / f"{profile_id}.collapsed.txt"
+        path.write_text(sampler.to_collapsed(), encoding='utf-8')
+    else:
+        path = target_dir / f"{profile_id}.speedscope.json"
+        path.write_text(json.dumps(sampler.to_speedscope(name)), encoding='utf-8')
+
+    entry = {
+        'id': profile_id,
+        'path': str(path.relative_to(profile_dir)),
+        'format': fmt,
+        'operation_type': operation_type,
+        'shape': shape,
+        'route': labels.get('route'),
+        'duration_ms': round(sampler.duration * 1000, 2),
+        'samples': sampler.sample_count,
+        'created_at': timestamp.isoformat(),
+    }
+    # Una línea por perfil; O_APPEND mantiene las líneas íntegras entre workers
+    with open(profile_dir / INDEX_FILENAME, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def read_index(profile_dir, operation_type=None, shape=None):
+    """Lee el índice de perfiles aplicando filtros opcionales."""
+    index_path = Path(profile_dir) / INDEX_FILENAME
+    if not index_path.exists():
+        return []
+
+    entries = []
+    with open(index_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if operation_type and entry.get('operation_type') != operation_type:
+                continue
+            if shape and entry.get('shape') != shape:
+                continue
+            entries.append(entry)
+    return entries
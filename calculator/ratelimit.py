@@ -0,0 +1,333 @@
+"""
+Rate limiting ponderado por costo para los endpoints de operaciones.
+
+Cada cliente (usuario autenticado o IP) dispone de un token bucket con
+capacidad ``CAPACITY`` que se recarga a ``REFILL_PER_SECOND`` tokens/s. Cada
+petición se cobra según el costo estimado de la operación a partir de
+``rows``/``cols`` de los operandos, de modo que una suma 2x2 cuesta ~1 token y
+una SVD 100x100 varias decenas.
+
+El estado del bucket vive en el cache por defecto. Los backends compartidos
+(``SharedSQLiteCache``, ``InstrumentedRedisCache``) exponen
+``consume_tokens`` y realizan la recarga y el cobro de forma atómica.
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+
+from calculator import metrics
+from calculator.models import Matrix, MatrixStack
+from calculator.utils import InvalidMatrixError, chain_dims, matrix_chain_order
+from calculator.utils.matrix_model import GMRES_RESTART, ITERATIVE_MAX_ITER_FACTOR
+
+OPERAND_FIELDS = ('matrix_id', 'matrix_a_id', 'matrix_b_id')
+STACK_OPERAND_FIELDS = ('stack_id', 'rhs_stack_id')
+
+# Flops aproximados por tipo de operación (orden de magnitud, Golub & Van Loan).
+# m, n: dimensiones del operando A; k: columnas de B (solo MULTIPLY).
+_FLOP_ESTIMATES = {
+    'SUM': lambda m, n, k: m * n,
+    'SUBTRACT': lambda m, n, k: m * n,
+    'TRANSPOSE': lambda m, n, k: m * n,
+    'MULTIPLY': lambda m, n, k: 2 * m * n * k,
+    'DETERMINANT': lambda m, n, k: (2 / 3) * n ** 3,
+    # Número de condición (SVD) + inversión por LU
+    'INVERSE': lambda m, n, k: 4 * n ** 3 + 2 * n ** 3,
+    'RANK': lambda m, n, k: 4 * m * n * min(m, n),
+    # QR completa de Aᵀ / QR con pivoteo más la eliminación sobre la base del espacio fila
+    'COLSPACE': lambda m, n, k: 4 * m * n * min(m, n),
+    'NULLSPACE': lambda m, n, k: 4 * m * n * min(m, n) + 2 * n ** 3,
+    'RREF': lambda m, n, k: 4 * m * n * min(m, n) + 2 * n * min(m, n) ** 2,
+    'CHOLESKY': lambda m, n, k: n ** 3 / 3,
+    # QR (si m > n) + SVD de R; LSTSQ añade Uᵀ B y el residuo
+    'PINV': lambda m, n, k: 4 * m * n * n + 21 * n ** 3 + 2 * m * n * n,
+    'LSTSQ': lambda m, n, k: 4 * m * n * n + 21 * n ** 3 + 6 * m * n * k,
+    'QR': lambda m, n, k: 2 * m * n * min(m, n),
+    'SVD': lambda m, n, k: 4 * m * m * n + 8 * m * n * n + 9 * n ** 3,
+    'EIGEN': lambda m, n, k: 25 * n ** 3,
+    # Funciones de matrices. POWER: ~16 productos (exponentes hasta ~2^8);
+    # SQRTM/LOGM: Schur (~25 n³) más la recurrencia triangular y el residuo
+    'POWER': lambda m, n, k: 16 * 2 * n ** 3,
+    'EXPM': lambda m, n, k: 2 * (8 * 2 * n ** 3 + (8 / 3) * n ** 3),
+    'SQRTM': lambda m, n, k: 25 * n ** 3 + n ** 3 / 3 + 2 * 2 * n ** 3,
+    'LOGM': lambda m, n, k: 25 * n ** 3 + 8 * n ** 3 / 3 + 20 * n ** 3,
+    # Operaciones sobre pilas (costo de un elemento; se multiplica por N)
+    'SOLVE': lambda m, n, k: 4 * n ** 3 + (2 / 3) * n ** 3 + 2 * n * n * k,
+    'EIGH': lambda m, n, k: 9 * n ** 3,
+}
+
+
+ITERATIVE_OPERATIONS = ('CG', 'GMRES')
+
+
+def _positive_int(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        return None
+    return value
+
+
+def iterative_flops(operation_type, n, params=None):
+    """
+    Flops de CG/GMRES con el tope de iteraciones que usará el solver.
+
+    ``params`` es el body de la petición: ``max_iter`` (por defecto
+    ``ITERATIVE_MAX_ITER_FACTOR`` n, como ``safe_cg``), ``restart`` y
+    ``preconditioner``.
+    """
+    params = params or {}
+    max_iter = _positive_int(params.get('max_iter'))
+    if max_iter is None:
+        iterations = ITERATIVE_MAX_ITER_FACTOR * n
+    else:
+        # Por encima del tope la vista rechaza la petición
+        iterations = min(max_iter, settings.MATRIX_CONFIG['ITERATIVE_MAX_ITERATIONS'])
+    matvec = 2 * n * n
+    if operation_type == 'CG':
+        if params.get('preconditioner') == 'ichol':
+            # Factorización IC(0) y dos sustituciones triangulares por iteración
+            return n ** 3 + iterations * (2 * matvec + 10 * n)
+        return iterations * (matvec + 10 * n)
+
+    # GMRES: cada ciclo de ``restart`` iteraciones ortogonaliza contra toda la
+    # base de Arnoldi (4 n flops por vector) y recalcula el residuo
+    restart = min(_positive_int(params.get('restart')) or min(n, GMRES_RESTART), iterations)
+    cycles = -(-iterations // restart)
+    return iterations * matvec + cycles * (2 * n * restart * (restart + 1) + matvec + 2 * n * restart)
+
+
+def estimate_flops(operation_type, shape_a, shape_b=None, params=None):
+    """
+    Estima los flops de una operación a partir de las formas de sus operandos.
+
+    ``params`` (parámetros de la petición) solo se usa en los solvers iterativos.
+    """
+    m, n = shape_a
+    # El término m*n cubre lectura/serialización de operandos y resultado
+    if operation_type in ITERATIVE_OPERATIONS:
+        return iterative_flops(operation_type, n, params) + m * n
+    k = shape_b[1] if shape_b else n
+    estimate = _FLOP_ESTIMATES.get(operation_type, _FLOP_ESTIMATES['SUM'])
+    return estimate(m, n, k) + m * n
+
+
+def estimate_cost(operation_type, shape_a, shape_b=None, count=1, params=None):
+    """
+    Convierte el costo estimado de una operación en tokens (mínimo 1).
+
+    ``count`` es el número de elementos en operaciones sobre pilas.
+    """
+    config = settings.MATRIX_CONFIG['RATE_LIMIT']
+    return 1.0 + count * estimate_flops(operation_type, shape_a, shape_b, params) / config['FLOPS_PER_TOKEN']
+
+
+def client_key(request):
+    """Identifica al cliente: usuario autenticado o, si no, la IP."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.get_username()}"
+    return f"ip:{request.META.get('REMOTE_ADDR', 'unknown')}"
+
+
+def client_budget(key):
+    """Retorna (capacidad, recarga por segundo) para el cliente."""
+    config = settings.MATRIX_CONFIG['RATE_LIMIT']
+    override = config['CLIENTS'].get(key, {})
+    return (
+        float(override.get('CAPACITY', config['CAPACITY'])),
+        float(override.get('REFILL_PER_SECOND', config['REFILL_PER_SECOND'])),
+    )
+
+
+def refill_and_consume(state, cost, capacity, refill_rate, now):
+    """
+    Lógica pura del token bucket.
+
+    Args:
+        state: (tokens, timestamp) almacenado, o None si el bucket es nuevo
+        cost: Tokens a cobrar (se acota a la capacidad)
+
+    Returns:
+        tuple: (allowed, nuevo estado, tokens restantes, segundos hasta poder pagar)
+    """
+    tokens, last = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - last) * refill_rate)
+    cost = min(cost, capacity)
+
+    if tokens >= cost:
+        tokens -= cost
+        return True, (tokens, now), tokens, 0.0
+
+    wait = (cost - tokens) / refill_rate if refill_rate > 0 else float('inf')
+    return False, (tokens, now), tokens, wait
+
+
+def bucket_ttl(capacity, refill_rate):
+    """Tiempo tras el cual un bucket inactivo vuelve a estar lleno."""
+    if refill_rate <= 0:
+        return None
+    return int(capacity / refill_rate) + 1
+
+
+_local_lock = threading.Lock()
+
+
+def consume(key, cost, capacity, refill_rate):
+    """
+    Cobra ``cost`` tokens del bucket ``key``.
+
+    Returns:
+        tuple: (allowed, tokens restantes, segundos de espera)
+    """
+    cache_key = f"matrixcalc:tokens:{key}"
+    if hasattr(cache, 'consume_tokens'):
+        return cache.consume_tokens(cache_key, cost, capacity, refill_rate)
+
+    # Backends sin operación atómica (LocMemCache): el estado es local al
+    # proceso, así que basta un lock de hilo.
+    with _local_lock:
+        allowed, state, remaining, wait = refill_and_consume(
+            cache.get(cache_key), cost, capacity, refill_rate, time.time()
+        )
+        cache.set(cache_key, state, bucket_ttl(capacity, refill_rate))
+    return allowed, remaining, wait
+
+
+def charge(request, operation_type, operand_shapes, count=1, params=None):
+    """
+    Cobra al cliente el costo estimado de la operación.
+
+    Args:
+        operand_shapes: Formas (rows, cols) de los operandos existentes, en orden
+        count: Elementos de la pila (operaciones sobre pilas)
+        params: Parámetros de la petición (``max_iter``, ``restart``, ... de los solvers iterativos)
+
+    Returns:
+        tuple: (tokens cobrados, tokens restantes)
+
+    Raises:
+        Throttled: Si el presupuesto del cliente no alcanza (HTTP 429)
+    """
+    if operand_shapes:
+        cost = estimate_cost(operation_type, *operand_shapes[:2], count=count, params=params)
+    else:
+        # Operandos inexistentes: la vista responderá 404, cobro mínimo
+        cost = 1.0
+    return charge_cost(request, operation_type, cost)
+
+
+def charge_cost(request, operation_type, cost):
+    """
+    Cobra ``cost`` tokens ya calculados al cliente.
+
+    Returns:
+        tuple: (tokens cobrados, tokens restantes)
+
+    Raises:
+        Throttled: Si el presupuesto del cliente no alcanza (HTTP 429)
+    """
+    key = client_key(request)
+    capacity, refill_rate = client_budget(key)
+    allowed, remaining, wait = consume(key, cost, capacity, refill_rate)
+    if not allowed:
+        metrics.record_ratelimit_rejection(metrics.route_name(request))
+        raise Throttled(wait=wait if wait != float('inf') else None)
+
+    metrics.RATELIMIT_TOKENS.labels(operation_type=operation_type).inc(cost)
+    return cost, remaining
+
+
+def operand_ids(data, operand_fields=OPERAND_FIELDS):
+    """Extrae los IDs de operandos válidos del cuerpo de la petición, en orden."""
+    ids = [_as_int(data.get(field)) for field in operand_fields]
+    return [i for i in ids if i is not None]
+
+
+def _cost_ratelimited(operation_type, request_cost):
+    """Decorador que cobra ``request_cost(request.data)`` tokens antes de la vista."""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cost, remaining = charge_cost(request, operation_type, request_cost(request.data))
+            response = view_func(request, *args, **kwargs)
+            response['X-RateLimit-Cost'] = f"{cost:.2f}"
+            response['X-RateLimit-Remaining'] = f"{remaining:.2f}"
+            return response
+        return wrapper
+    return decorator
+
+
+def cost_ratelimit(operation_type, operand_fields=OPERAND_FIELDS):
+    """
+    Decorador para vistas de operación: cobra el costo estimado al cliente.
+
+    Las formas de los operandos se leen de ``rows``/``cols`` sin cargar los
+    datos. Si se agota el presupuesto se lanza ``Throttled`` (HTTP 429 con
+    ``Retry-After``).
+    """
+    def request_cost(data):
+        ids = operand_ids(data, operand_fields)
+        shapes = {
+            pk: (rows, cols)
+            for pk, rows, cols in Matrix.objects.filter(id__in=ids).values_list('id', 'rows', 'cols')
+        } if ids else {}
+        found = [shapes[i] for i in ids if i in shapes]
+        return estimate_cost(operation_type, *found[:2], params=data) if found else 1.0
+    return _cost_ratelimited(operation_type, request_cost)
+
+
+def stack_cost_ratelimit(operation_type, operand_fields=STACK_OPERAND_FIELDS):
+    """
+    Como ``cost_ratelimit`` para operaciones sobre pilas: se cobra el costo de
+    un elemento multiplicado por el número de elementos de la pila operando.
+    """
+    def request_cost(data):
+        ids = operand_ids(data, operand_fields)
+        stacks = {
+            pk: (rows, cols, count)
+            for pk, rows, cols, count in MatrixStack.objects.filter(id__in=ids).values_list('id', 'rows', 'cols', 'count')
+        } if ids else {}
+        found = [stacks[i] for i in ids if i in stacks]
+        if not found:
+            return 1.0
+        return estimate_cost(operation_type, *[(rows, cols) for rows, cols, _ in found[:2]], count=found[0][2])
+    return _cost_ratelimited(operation_type, request_cost)
+
+
+def chain_cost_ratelimit(operation_type='CHAIN_MULTIPLY', field='matrix_ids'):
+    """
+    Como ``cost_ratelimit`` para productos en cadena: se cobran los flops del
+    orden óptimo, calculados con las formas guardadas de la lista ``field``.
+    """
+    def request_cost(data):
+        values = data.get(field)
+        ids = [_as_int(value) for value in values] if isinstance(values, list) else []
+        if len(ids) > settings.MATRIX_CONFIG['MAX_CHAIN_LENGTH']:
+            # La vista rechaza la cadena antes de calcular el orden
+            return 1.0
+        shapes = {
+            pk: (rows, cols)
+            for pk, rows, cols in Matrix.objects.filter(id__in=ids).values_list('id', 'rows', 'cols')
+        } if ids else {}
+        if not ids or any(i not in shapes for i in ids):
+            # Operandos inexistentes o inválidos: la vista responderá con error
+            return 1.0
+        try:
+            dims = chain_dims([shapes[i] for i in ids])
+        except InvalidMatrixError:
+            return 1.0
+        config = settings.MATRIX_CONFIG['RATE_LIMIT']
+        # Igual que estimate_flops: flops más lectura/serialización de operandos y resultado
+        io = sum(rows * cols for rows, cols in (shapes[i] for i in ids)) + dims[0] * dims[-1]
+        return 1.0 + (matrix_chain_order(dims)[0] + io) / config['FLOPS_PER_TOKEN']
+    return _cost_ratelimited(operation_type, request_cost)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
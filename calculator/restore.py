@@ -0,0 +1,531 @@
+"""
+Restauración masiva de backups.
+
+Lee los backups en streaming (``backup.open_reader``: JSON o ``.npz``), valida cada registro
+y lo inserta con ``bulk_create`` en lotes de ``batch_size``, cada uno en su
+propia transacción corta. Tras cada lote se guarda el progreso en un archivo
+de estado, de modo que una restauración interrumpida puede retomarse con
+``resume=True``: los lotes se insertan con ``update_conflicts``, así que
+repetir el último lote es inocuo.
+
+Al terminar se reajustan las secuencias de claves primarias (PostgreSQL), ya
+que los registros se insertan con su id original.
+"""
+import base64
+import binascii
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from calculator import backup, encodings, events
+from calculator.models import Matrix, MatrixStack, Operation, OperationComponent, StackOperation, StepTrace
+from calculator.utils import glassbox
+
+DEFAULT_BATCH_SIZE = 1000
+STATE_FILENAME = 'restore_state.json'
+
+OPERATION_TYPES = {choice for choice, _ in Operation.OPERATION_TYPES}
+PRECISIONS = {choice for choice, _ in Operation.PRECISIONS}
+STACK_OPERATION_TYPES = {choice for choice, _ in StackOperation.OPERATION_TYPES}
+TRACE_ALGORITHMS = {choice for choice, _ in StepTrace.ALGORITHMS}
+
+
+class RestoreError(Exception):
+    """Backup o cadena de backups no restaurable."""
+
+
+# --- Validación de registros ---
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        # El formato npz entrega las fechas ya decodificadas
+        return value
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Fecha inválida: {value!r}")
+    return parsed
+
+
+def _positive_int(value, field):
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise ValueError(f"{field} debe ser un entero positivo: {value!r}")
+    return value
+
+
+def _matrix_data(data, rows, cols, allow_nan=False):
+    # allow_nan: las pilas guardan NaN en los elementos enmascarados
+    if isinstance(data, np.ndarray):
+        # Formato npz: se valida el bloque entero en vez de valor a valor
+        if data.shape != (rows, cols):
+            raise ValueError(f"Se esperaba una matriz {rows}x{cols}")
+        finite = np.isfinite(data) | np.isnan(data) if allow_nan else np.isfinite(data)
+        if data.dtype.kind not in 'iuf' or not finite.all():
+            raise ValueError("Los datos deben ser numéricos y finitos")
+        return data
+    if not isinstance(data, list) or len(data) != rows:
+        raise ValueError(f"Se esperaban {rows} filas")
+    for row in data:
+        if not isinstance(row, list) or len(row) != cols or not all(_is_number(v) for v in row):
+            raise ValueError(f"Fila inválida (se esperaban {cols} valores numéricos)")
+    return data
+
+
+def _encoding(fields):
+    # Backups anteriores a las codificaciones: la codificación por defecto
+    encoding = fields.get('encoding')
+    if encoding is None:
+        return None
+    if encoding not in encodings.ENCODINGS:
+        raise ValueError(f"Codificación desconocida: {encoding}")
+    if encoding == 'zstd' and encodings.zstandard is None:
+        return None
+    return encoding
+
+
+def matrix_from_record(record):
+    """Construye una ``Matrix`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.matrix':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    rows = _positive_int(fields['rows'], 'rows')
+    cols = _positive_int(fields['cols'], 'cols')
+    data = _matrix_data(fields['data'], rows, cols)
+
+    return Matrix(
+        id=_positive_int(record['pk'], 'pk'),
+        name=str(fields['name'])[:200],
+        rows=rows,
+        cols=cols,
+        data=data,
+        encoding=_encoding(fields),
+        created_at=_timestamp(fields['created_at']),
+        updated_at=_timestamp(fields['updated_at']),
+    )
+
+
+def operation_from_record(record):
+    """Construye una ``Operation`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.operation':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    if fields['operation_type'] not in OPERATION_TYPES:
+        raise ValueError(f"Tipo de operación desconocido: {fields['operation_type']}")
+    precision = fields.get('precision', 'float64')
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión desconocida: {precision}")
+    matrix_b = fields.get('matrix_b')
+
+    return Operation(
+        id=_positive_int(record['pk'], 'pk'),
+        operation_type=fields['operation_type'],
+        matrix_a_id=_positive_int(fields['matrix_a'], 'matrix_a'),
+        matrix_b_id=_positive_int(matrix_b, 'matrix_b') if matrix_b is not None else None,
+        result_id=_positive_int(fields['result'], 'result'),
+        extra_data=fields.get('extra_data'),
+        created_at=_timestamp(fields['created_at']),
+        execution_time_ms=max(0, int(fields['execution_time_ms'])),
+        precision=precision,
+    )
+
+
+def component_from_record(record):
+    """Construye un ``OperationComponent`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.operationcomponent':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    rows = _positive_int(fields['rows'], 'rows')
+    cols = _positive_int(fields['cols'], 'cols')
+
+    return OperationComponent(
+        id=_positive_int(record['pk'], 'pk'),
+        operation_id=_positive_int(fields['operation'], 'operation'),
+        name=str(fields['name'])[:32],
+        rows=rows,
+        cols=cols,
+        data=_matrix_data(fields['data'], rows, cols),
+        encoding=_encoding(fields),
+    )
+
+
+def stack_from_record(record):
+    """Construye una ``MatrixStack`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.matrixstack':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    count = _positive_int(fields['count'], 'count')
+    rows = _positive_int(fields['rows'], 'rows')
+    cols = _positive_int(fields['cols'], 'cols')
+    invalid_items = fields.get('invalid_items', [])
+    if not isinstance(invalid_items, list) or not all(
+        isinstance(i, int) and not isinstance(i, bool) and 0 <= i < count for i in invalid_items
+    ):
+        raise ValueError(f"invalid_items inválido: {invalid_items!r}")
+
+    return MatrixStack(
+        id=_positive_int(record['pk'], 'pk'),
+        name=str(fields['name'])[:200],
+        count=count,
+        rows=rows,
+        cols=cols,
+        invalid_items=invalid_items,
+        data=_matrix_data(fields['data'], count * rows, cols, allow_nan=True),
+        encoding=_encoding(fields),
+        created_at=_timestamp(fields['created_at']),
+    )
+
+
+def stack_operation_from_record(record):
+    """Construye una ``StackOperation`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.stackoperation':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    if fields['operation_type'] not in STACK_OPERATION_TYPES:
+        raise ValueError(f"Tipo de operación desconocido: {fields['operation_type']}")
+    precision = fields.get('precision', 'float64')
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión desconocida: {precision}")
+    errors = fields.get('errors') or {}
+    if not isinstance(errors, dict):
+        raise ValueError(f"errors inválido: {errors!r}")
+    rhs, vectors = fields.get('rhs'), fields.get('vectors')
+
+    return StackOperation(
+        id=_positive_int(record['pk'], 'pk'),
+        operation_type=fields['operation_type'],
+        stack_id=_positive_int(fields['stack'], 'stack'),
+        rhs_id=_positive_int(rhs, 'rhs') if rhs is not None else None,
+        result_id=_positive_int(fields['result'], 'result'),
+        vectors_id=_positive_int(vectors, 'vectors') if vectors is not None else None,
+        errors=errors,
+        created_at=_timestamp(fields['created_at']),
+        execution_time_ms=max(0, int(fields['execution_time_ms'])),
+        precision=precision,
+    )
+
+
+def _trace_steps(value, step_count):
+    if isinstance(value, str):
+        # JSON: el serializer de Django guarda los BinaryField en base64
+        try:
+            value = base64.b64decode(value, validate=True)
+        except binascii.Error:
+            raise ValueError("steps no es base64 válido")
+    if not isinstance(value, bytes) or len(value) != step_count * glassbox.STEP_DTYPE.itemsize:
+        raise ValueError(f"Se esperaban {step_count} pasos")
+    return value
+
+
+def trace_from_record(record):
+    """Construye una ``StepTrace`` (sin guardar) a partir de un registro del backup."""
+    if record.get('model') != 'calculator.steptrace':
+        raise ValueError(f"Modelo inesperado: {record.get('model')}")
+    fields = record['fields']
+    if fields['algorithm'] not in TRACE_ALGORITHMS:
+        raise ValueError(f"Algoritmo desconocido: {fields['algorithm']}")
+    rows = _positive_int(fields['rows'], 'rows')
+    cols = _positive_int(fields['cols'], 'cols')
+    keyframe_count = _positive_int(fields['keyframe_count'], 'keyframe_count')
+    step_count = int(fields['step_count'])
+    if step_count < 0:
+        raise ValueError(f"step_count inválido: {step_count}")
+
+    return StepTrace(
+        id=_positive_int(record['pk'], 'pk'),
+        algorithm=fields['algorithm'],
+        matrix_id=_positive_int(fields['matrix'], 'matrix'),
+        rows=rows,
+        cols=cols,
+        step_count=step_count,
+        keyframe_interval=_positive_int(fields['keyframe_interval'], 'keyframe_interval'),
+        keyframe_count=keyframe_count,
+        steps=_trace_steps(fields['steps'], step_count),
+        rank=max(0, int(fields['rank'])),
+        pivot_columns=list(fields.get('pivot_columns') or []),
+        execution_time_ms=max(0, int(fields['execution_time_ms'])),
+        data=_matrix_data(fields['data'], keyframe_count * rows, cols),
+        encoding=_encoding(fields),
+        created_at=_timestamp(fields['created_at']),
+    )
+
+
+BUILDERS = {
+    'matrices': (Matrix, matrix_from_record),
+    'operations': (Operation, operation_from_record),
+    'components': (OperationComponent, component_from_record),
+    'stacks': (MatrixStack, stack_from_record),
+    'stack_operations': (StackOperation, stack_operation_from_record),
+    'traces': (StepTrace, trace_from_record),
+}
+
+
+# --- Cadena de backups ---
+
+def validate_chain(paths, headers):
+    """
+    Comprueba que cada incremental parta del checkpoint del backup anterior.
+
+    Raises:
+        RestoreError: Si la cadena no es consistente
+    """
+    previous = None
+    for position, (path, header) in enumerate(zip(paths, headers)):
+        backup_type = header.get('backup_type', 'full')
+        if position == 0:
+            if backup_type == 'incremental' and len(paths) > 1:
+                raise RestoreError(f"{path} es incremental: la cadena debe empezar por un backup completo")
+        else:
+            if backup_type != 'incremental':
+                raise RestoreError(f"{path} no es un backup incremental")
+            if not backup.same_checkpoint(header.get('since'), previous):
+                raise RestoreError(
+                    f"{path} no continúa al backup anterior de la cadena (checkpoint de partida distinto)"
+                )
+        previous = header.get('checkpoint')
+
+
+def read_headers(paths):
+    headers = []
+    for path in paths:
+        with backup.open_reader(path) as reader:
+            headers.append(dict(reader.header))
+    return headers
+
+
+# --- Estado (reanudación) ---
+
+class RestoreState:
+    """Progreso persistido de una restauración: archivo y registro alcanzados."""
+
+    def __init__(self, path, files):
+        # path=None: sin persistencia (restauración atómica)
+        self.path = Path(path) if path is not None else None
+        self.files = [str(f) for f in files]
+        self.file_index = 0
+        self.position = 0
+        self.cleared = False
+
+    @classmethod
+    def load(cls, path, files):
+        state = cls(path, files)
+        if state.path is None or not state.path.exists():
+            return state
+        with open(state.path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('files') != state.files:
+            raise RestoreError("El estado guardado corresponde a otra lista de backups")
+        state.file_index = saved['file_index']
+        state.position = saved['position']
+        state.cleared = saved.get('cleared', False)
+        return state
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'files': self.files,
+                'file_index': self.file_index,
+                'position': self.position,
+                'cleared': self.cleared,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+def default_state_path():
+    return Path(settings.BACKUP_DIR) / STATE_FILENAME
+
+
+# --- Inserción ---
+
+@contextmanager
+def _preserve_timestamps():
+    """
+    Desactiva auto_now/auto_now_add durante la restauración.
+
+    ``bulk_create`` llama a ``pre_save`` y sobrescribiría las fechas originales.
+    """
+    fields = [
+        Matrix._meta.get_field('created_at'),
+        Matrix._meta.get_field('updated_at'),
+        Operation._meta.get_field('created_at'),
+        MatrixStack._meta.get_field('created_at'),
+        StackOperation._meta.get_field('created_at'),
+        StepTrace._meta.get_field('created_at'),
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _update_fields(model):
+    return [f.name for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def _insert_batch(model, objs):
+    """
+    Inserta un lote; si viola una FK se reintenta fila a fila.
+
+    Returns:
+        tuple: (insertados, rechazados)
+    """
+    kwargs = {'update_conflicts': True, 'update_fields': _update_fields(model)}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = ['id']
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objs, **kwargs)
+        return len(objs), 0
+    except IntegrityError:
+        pass
+
+    inserted = 0
+    for obj in objs:
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([obj], **kwargs)
+            inserted += 1
+        except IntegrityError:
+            continue
+    return inserted, len(objs) - inserted
+
+
+def reset_sequences():
+    """Reajusta las secuencias de PK tras insertar ids explícitos."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Matrix, Operation, OperationComponent, MatrixStack, StackOperation, StepTrace]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def restore_backup(paths, batch_size=DEFAULT_BATCH_SIZE, clear=False, resume=False,
+                   state_path=None, strict=False, atomic=False, progress=None):
+    """
+    Restaura un backup completo y sus incrementales (en orden) por lotes.
+
+    Args:
+        clear: Eliminar los datos existentes antes de restaurar
+        resume: Retomar desde el archivo de estado de una ejecución anterior
+        strict: Abortar ante el primer registro inválido (por defecto se omite)
+        atomic: Restaurar todo en una única transacción (no reanudable)
+        progress: Callback opcional que recibe un dict tras cada lote
+
+    Returns:
+        dict: Totales de registros leídos, insertados, inválidos y rechazados por FK
+    """
+    paths = [str(p) for p in paths]
+    validate_chain(paths, read_headers(paths))
+
+    if atomic:
+        if resume:
+            raise RestoreError("Una restauración atómica no se puede reanudar")
+        with transaction.atomic():
+            return _restore(paths, RestoreState(None, paths), batch_size, clear, strict, progress)
+
+    state_path = state_path or default_state_path()
+    state = RestoreState.load(state_path, paths) if resume else RestoreState(state_path, paths)
+    return _restore(paths, state, batch_size, clear, strict, progress)
+
+
+def _restore(paths, state, batch_size, clear, strict, progress):
+
+    if clear and not state.cleared:
+        with transaction.atomic():
+            Operation.objects.all().delete()
+            # Las trazas se borran en cascada con sus matrices
+            Matrix.objects.all().delete()
+            # Las operaciones sobre pilas se borran en cascada con sus pilas
+            MatrixStack.objects.all().delete()
+        state.cleared = True
+        state.save()
+
+    totals = {'read': 0, 'inserted': 0, 'invalid': 0, 'rejected': 0}
+    started = time.monotonic()
+
+    def flush(section, batch, position):
+        if batch:
+            model = BUILDERS[section][0]
+            inserted, rejected = _insert_batch(model, batch)
+            totals['inserted'] += inserted
+            totals['rejected'] += rejected
+        state.position = position
+        state.save()
+        if progress is not None:
+            elapsed = time.monotonic() - started
+            progress({
+                'file': state.files[state.file_index],
+                'section': section,
+                **totals,
+                'records_per_second': totals['read'] / elapsed if elapsed > 0 else 0.0,
+            })
+
+    with _preserve_timestamps():
+        for index, path in enumerate(paths):
+            if index < state.file_index:
+                continue
+            skip = state.position if index == state.file_index else 0
+            state.file_index, state.position = index, skip
+
+            position = 0
+            section = None
+            batch = []
+            with backup.open_reader(path) as reader:
+                for record_section, record in reader.records():
+                    position += 1
+                    if position <= skip:
+                        continue
+                    if record_section != section:
+                        # Las secciones llegan en el orden de RECORD_SECTIONS: cada
+                        # modelo después de los que referencia
+                        if section is not None:
+                            flush(section, batch, position - 1)
+                        section, batch = record_section, []
+
+                    totals['read'] += 1
+                    try:
+                        batch.append(BUILDERS[section][1](record))
+                    except (KeyError, TypeError, ValueError) as e:
+                        if strict:
+                            raise RestoreError(f"{path}: registro {position} inválido: {e}")
+                        totals['invalid'] += 1
+
+                    if len(batch) >= batch_size:
+                        flush(section, batch, position)
+                        batch = []
+
+            if section is not None:
+                flush(section, batch, position)
+            state.file_index, state.position = index + 1, 0
+            state.save()
+
+    reset_sequences()
+    state.discard()
+    events.publish_on_commit('stats.resync', {'reason': 'import'})
+
+    totals['seconds'] = round(time.monotonic() - started, 2)
+    return totals
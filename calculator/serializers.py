@@ -9,8 +9,9 @@ import numpy as np
 from rest_framework import serializers
 from django.conf import settings
 
-from calculator.models import Matrix, Operation
-from calculator.utils import parse_matrix, InvalidMatrixError
+from calculator import encodings
+from calculator.models import Matrix, MatrixStack, Operation, OperationComponent, StackOperation, StepTrace
+from calculator.utils import glassbox, parse_matrix, InvalidMatrixError
 
 
 class MatrixSerializer(serializers.ModelSerializer):
@@ -21,10 +22,14 @@ class MatrixSerializer(serializers.ModelSerializer):
     incluyendo validación de dimensiones y datos matriciales.
     """
     dimensions = serializers.ReadOnlyField()
+    # ``data`` es una propiedad del modelo (los valores viven en MatrixPayload)
+    data = serializers.JSONField()
+    # Codificación del payload; por defecto MATRIX_CONFIG['PAYLOAD_ENCODING']
+    encoding = serializers.ChoiceField(choices=encodings.ENCODINGS, required=False)
     
     class Meta:
         model = Matrix
-        fields = ['id', 'name', 'rows', 'cols', 'data', 'dimensions', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'rows', 'cols', 'data', 'encoding', 'dimensions', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
     
     def validate(self, attrs):
@@ -36,6 +41,9 @@ class MatrixSerializer(serializers.ModelSerializer):
         cols = attrs.get('cols')
         data = attrs.get('data')
         
+        if attrs.get('encoding') == 'zstd' and encodings.zstandard is None:
+            raise serializers.ValidationError("La codificación zstd no está disponible en este servidor.")
+        
         # Validar dimensiones máximas
         max_dim = settings.MATRIX_CONFIG['MAX_DIMENSION']
         if rows > max_dim or cols > max_dim:
@@ -75,6 +83,14 @@ class MatrixSerializer(serializers.ModelSerializer):
         """
         Crea una matriz validando los datos con parse_matrix.
         """
+        return super().create(self.normalize_data(validated_data))
+    
+    def normalize_data(self, validated_data):
+        """
+        Valida ``data`` con parse_matrix y lo normaliza a lista de listas de float.
+        
+        Se usa también desde las vistas async, que persisten con el ORM async.
+        """
         rows = validated_data['rows']
         cols = validated_data['cols']
         data = validated_data['data']
@@ -91,7 +107,7 @@ class MatrixSerializer(serializers.ModelSerializer):
         except InvalidMatrixError as e:
             raise serializers.ValidationError(str(e))
         
-        return super().create(validated_data)
+        return validated_data
     
     def to_representation(self, instance):
         """
@@ -104,6 +120,27 @@ class MatrixSerializer(serializers.ModelSerializer):
         return representation
 
 
+class OperationComponentSerializer(serializers.ModelSerializer):
+    """
+    Componente de una descomposición, sin datos (solo nombre y forma).
+    
+    Los datos se piden por separado (``OperationComponentDataSerializer``)
+    para no decodificar todos los componentes al listar operaciones.
+    """
+    
+    class Meta:
+        model = OperationComponent
+        fields = ['name', 'rows', 'cols']
+
+
+class OperationComponentDataSerializer(OperationComponentSerializer):
+    """Componente de una descomposición con sus datos (lista de listas)."""
+    data = serializers.JSONField(read_only=True)
+    
+    class Meta(OperationComponentSerializer.Meta):
+        fields = OperationComponentSerializer.Meta.fields + ['data']
+
+
 class OperationSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Operation.
@@ -115,6 +152,7 @@ class OperationSerializer(serializers.ModelSerializer):
     matrix_b = MatrixSerializer(read_only=True, allow_null=True)
     result = MatrixSerializer(read_only=True)
     operation_display = serializers.CharField(source='get_operation_type_display', read_only=True)
+    components = OperationComponentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Operation
@@ -126,12 +164,197 @@ class OperationSerializer(serializers.ModelSerializer):
             'matrix_b',
             'result',
             'extra_data',
+            'components',
+            'precision',
             'created_at',
             'execution_time_ms'
         ]
         read_only_fields = ['created_at']
 
 
+class MatrixStackSummarySerializer(serializers.ModelSerializer):
+    """
+    Pila de matrices sin datos (forma y máscara).
+    
+    ``mask`` tiene un valor por elemento: False en los elementos sin valor
+    (p. ej. matrices singulares al invertir la pila).
+    """
+    mask = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = MatrixStack
+        fields = ['id', 'name', 'count', 'rows', 'cols', 'mask', 'created_at']
+        read_only_fields = ['created_at']
+    
+    def get_mask(self, instance):
+        return instance.mask.tolist()
+
+
+class MatrixStackSerializer(MatrixStackSummarySerializer):
+    """
+    Pila de matrices con sus datos (lista de ``count`` matrices).
+    
+    Los elementos enmascarados se devuelven como ``null``.
+    """
+    data = serializers.JSONField()
+    # Codificación del payload; por defecto MATRIX_CONFIG['PAYLOAD_ENCODING']
+    encoding = serializers.ChoiceField(choices=encodings.ENCODINGS, required=False)
+    
+    class Meta(MatrixStackSummarySerializer.Meta):
+        fields = MatrixStackSummarySerializer.Meta.fields + ['data', 'encoding']
+    
+    def validate(self, attrs):
+        """
+        Valida límites de tamaño y que ``data`` sea numérico de forma
+        (count, rows, cols). Deja ``data`` convertido a np.ndarray.
+        """
+        count, rows, cols = attrs.get('count'), attrs.get('rows'), attrs.get('cols')
+        
+        if attrs.get('encoding') == 'zstd' and encodings.zstandard is None:
+            raise serializers.ValidationError("La codificación zstd no está disponible en este servidor.")
+        
+        max_dim = settings.MATRIX_CONFIG['MAX_DIMENSION']
+        if rows > max_dim or cols > max_dim:
+            raise serializers.ValidationError(
+                f"Las dimensiones de la matriz no pueden exceder {max_dim}x{max_dim}. "
+                f"Dimensiones solicitadas: {rows}x{cols}"
+            )
+        max_count = settings.MATRIX_CONFIG['MAX_STACK_SIZE']
+        if count > max_count:
+            raise serializers.ValidationError(
+                f"Una pila no puede tener más de {max_count} matrices. Solicitadas: {count}"
+            )
+        
+        # Validación vectorizada: una pila puede tener miles de elementos
+        try:
+            array = np.array(attrs.get('data'))
+        except ValueError:
+            raise serializers.ValidationError("Los datos deben ser una lista de matrices de la misma forma.")
+        if array.dtype.kind not in 'iuf':
+            raise serializers.ValidationError("Todos los valores de la pila deben ser numéricos.")
+        if array.shape != (count, rows, cols):
+            raise serializers.ValidationError(
+                f"Se esperaban datos de forma {count}x{rows}x{cols}, "
+                f"pero se recibieron {'x'.join(map(str, array.shape))}."
+            )
+        attrs['data'] = array.astype(np.float64)
+        return attrs
+    
+    def create(self, validated_data):
+        validated_data['stack'] = validated_data.pop('data')
+        return super().create(validated_data)
+    
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        mask = instance.mask
+        representation['data'] = [
+            item.tolist() if valid else None for item, valid in zip(instance.stack, mask)
+        ]
+        return representation
+
+
+class StackOperationSerializer(serializers.ModelSerializer):
+    """
+    Operación sobre una pila, con los datos de sus pilas resultado.
+    
+    ``errors`` indica por índice el motivo de cada elemento enmascarado.
+    """
+    stack = MatrixStackSummarySerializer(read_only=True)
+    rhs = MatrixStackSummarySerializer(read_only=True, allow_null=True)
+    result = MatrixStackSerializer(read_only=True)
+    vectors = MatrixStackSerializer(read_only=True, allow_null=True)
+    operation_display = serializers.CharField(source='get_operation_type_display', read_only=True)
+    
+    class Meta:
+        model = StackOperation
+        fields = [
+            'id',
+            'operation_type',
+            'operation_display',
+            'stack',
+            'rhs',
+            'result',
+            'vectors',
+            'errors',
+            'precision',
+            'created_at',
+            'execution_time_ms'
+        ]
+        read_only_fields = ['created_at']
+
+
+class StepTraceSummarySerializer(serializers.ModelSerializer):
+    """
+    Traza paso a paso sin datos.
+    
+    ``storage_bytes`` son los bytes guardados (deltas y fotogramas clave) y
+    ``snapshot_bytes`` los que ocuparía guardar la matriz completa tras cada paso.
+    """
+    algorithm_display = serializers.CharField(source='get_algorithm_display', read_only=True)
+    keyframe_interval = serializers.IntegerField(min_value=1, required=False)
+    storage_bytes = serializers.IntegerField(read_only=True)
+    snapshot_bytes = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = StepTrace
+        fields = [
+            'id',
+            'algorithm',
+            'algorithm_display',
+            'matrix',
+            'rows',
+            'cols',
+            'step_count',
+            'keyframe_interval',
+            'keyframe_count',
+            'rank',
+            'pivot_columns',
+            'storage_bytes',
+            'snapshot_bytes',
+            'execution_time_ms',
+            'created_at',
+        ]
+        read_only_fields = [
+            'rows', 'cols', 'step_count', 'keyframe_count', 'rank', 'pivot_columns',
+            'execution_time_ms', 'created_at',
+        ]
+    
+    def get_snapshot_bytes(self, instance):
+        return (instance.step_count + 1) * instance.rows * instance.cols * 8
+
+
+class StepTraceSerializer(StepTraceSummarySerializer):
+    """
+    Traza con la matriz final reconstruida (``result``) y, en LU, los
+    factores deducidos de los pasos: P A = L U con ``lower`` = L y
+    ``permutation`` la fila de A en cada fila de P A.
+    """
+    result = serializers.SerializerMethodField()
+    lower = serializers.SerializerMethodField()
+    permutation = serializers.SerializerMethodField()
+    
+    class Meta(StepTraceSummarySerializer.Meta):
+        fields = StepTraceSummarySerializer.Meta.fields + ['result', 'lower', 'permutation']
+    
+    def get_result(self, instance):
+        return instance.state_after(instance.step_count - 1).tolist()
+    
+    def _lu(self, instance):
+        if instance.algorithm != 'LU':
+            return None, None
+        if not hasattr(instance, '_lu_factors'):
+            instance._lu_factors = glassbox.lu_factors(instance.step_array, instance.rows)
+        return instance._lu_factors
+    
+    def get_lower(self, instance):
+        lower = self._lu(instance)[0]
+        return lower.tolist() if lower is not None else None
+    
+    def get_permutation(self, instance):
+        permutation = self._lu(instance)[1]
+        return permutation.tolist() if permutation is not None else None
+
+
 class StatsSerializer(serializers.Serializer):
     """
     Serializer para estadísticas agregadas del sistema.
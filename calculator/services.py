@@ -8,22 +8,38 @@ import os
 from datetime import datetime
 from typing import Any, Dict, Optional
 from django.conf import settings
-from calculator.management.commands.export_backup import Command as ExportCommand
+from calculator import backup
 from calculator.management.commands.cleanup_old_data import Command as CleanupCommand
 
 
-def export_backup_service(output_path: Optional[str] = None) -> Dict[str, Any]:
+def export_backup_service(
+    output_path: Optional[str] = None,
+    compression: Optional[str] = None,
+    incremental: bool = False,
+    backup_format: Optional[str] = None,
+    update_checkpoint: bool = False,
+) -> Dict[str, Any]:
     """
-    Exporta un respaldo completo de la base de datos a un archivo JSON.
+    Exporta un respaldo de la base de datos a un archivo JSON.
+
+    La exportación es en streaming (memoria constante); ``compression`` puede
+    ser 'none', 'gzip' o 'zstd' (por defecto se deduce de la extensión). Con
+    ``incremental`` solo se exportan los cambios desde el último checkpoint;
+    un respaldo completo solo mueve el checkpoint con ``update_checkpoint``.
+    ``backup_format='npz'`` usa el formato binario columnar.
     """
     if output_path is None:
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        output_path = os.path.join(settings.BASE_DIR, 'backups', f'backup_{timestamp}.json')
+        suffix = '_inc' if incremental else ''
+        extension = backup.backup_extension(backup_format or 'json', compression)
+        output_path = os.path.join(settings.BASE_DIR, 'backups', f'backup_{timestamp}{suffix}{extension}')
 
     try:
-        cmd = ExportCommand()
-        cmd.handle(output=output_path)
-        return {'status': 'ok', 'path': output_path}
+        result = backup.export_backup(
+            output_path, compression=compression, incremental=incremental, backup_format=backup_format,
+            update_checkpoint=update_checkpoint,
+        )
+        return {'status': 'ok', **result}
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
@@ -51,7 +67,13 @@ def maintenance_super_skill(action: str, **kwargs) -> Dict[str, Any]:
         **kwargs: Parámetros específicos de cada acción.
     """
     if action == 'backup':
-        return export_backup_service(output_path=kwargs.get('output_path'))
+        return export_backup_service(
+            output_path=kwargs.get('output_path'),
+            compression=kwargs.get('compression'),
+            incremental=kwargs.get('incremental', False),
+            backup_format=kwargs.get('backup_format'),
+            update_checkpoint=kwargs.get('update_checkpoint', False),
+        )
     elif action == 'cleanup':
         return cleanup_data_service(days=kwargs.get('days'), dry_run=kwargs.get('dry_run', False))
     else:
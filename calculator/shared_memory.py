@@ -0,0 +1,252 @@
+"""
+Transporte de operandos y resultados por memoria compartida.
+
+Enviar una operación a otro proceso (``compute_pool`` o una tarea Celery en el
+mismo host) serializa los arrays completos: pickle en el pool, JSON en Celery.
+Con este transporte cada array se copia una vez a un segmento de
+``multiprocessing.shared_memory`` y solo viaja su handle
+``{'name', 'shape', 'dtype'}`` (serializable en JSON); el proceso de cómputo
+lo abre como un ``np.ndarray`` sobre el mismo segmento, sin copiarlo.
+
+Ciclo de vida (los segmentos se nombran ``mxc_<token>_<n>``):
+
+- El proceso que atiende la petición crea los segmentos de los operandos y
+  los elimina al terminar, haya funcionado o no la tarea (``dispatch``).
+- El proceso de cómputo crea un segmento por array resultado y devuelve sus
+  handles; si falla a medias elimina los que ya creó (``compute_operation``).
+  El llamador los copia y los elimina.
+- Si el proceso de cómputo muere (timeout del pool, OOM) sin devolver los
+  handles, el llamador elimina todos los segmentos de su token buscándolos en
+  ``/dev/shm`` (solo Linux; en otros sistemas quedan hasta reiniciar).
+- Un worker Celery no se puede matar al vencer la espera: sigue calculando y
+  crearía sus resultados cuando ya nadie los recoge. Con ``deadline`` el
+  proceso de cómputo comprueba el plazo antes de empezar y después de crear
+  los resultados; si venció, los elimina él mismo (``TaskExpired``). Los que
+  crea antes del plazo ya existen cuando el llamador barre el token, que lo
+  hace después de vencido.
+
+Los segmentos se sacan del ``resource_tracker`` de ``multiprocessing``: con
+procesos que no son hijos del que creó el segmento (workers de Celery) el
+tracker los eliminaría al salir cualquiera de ellos, y aquí se eliminan
+siempre de forma explícita.
+"""
+import os
+import secrets
+import time
+from contextlib import ExitStack, contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+SEGMENT_PREFIX = 'mxc_'
+SHM_DIR = '/dev/shm'
+
+
+class TaskExpired(RuntimeError):
+    """El llamador dejó de esperar el resultado de la tarea."""
+
+
+def _check_deadline(deadline):
+    if deadline is not None and time.time() > deadline:
+        raise TaskExpired("La tarea terminó después del plazo de su llamador; se descarta el resultado")
+
+
+def _open(name, size=0, create=False):
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    # Python < 3.13 registra también los segmentos abiertos sin ``create``
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _unlink(name):
+    try:
+        segment = _open(name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    # ``unlink()`` lo da de baja en el tracker: se registra antes para no
+    # dejar un aviso de segmento desconocido
+    resource_tracker.register(segment._name, 'shared_memory')
+    segment.unlink()
+
+
+def new_token():
+    """Prefijo único para los segmentos de una tarea."""
+    return f"{SEGMENT_PREFIX}{secrets.token_hex(6)}"
+
+
+def put(token, index, array):
+    """
+    Copia ``array`` a un segmento nuevo ``<token>_<index>``.
+
+    Returns:
+        dict: Handle {'name', 'shape', 'dtype'}
+    """
+    array = np.ascontiguousarray(array)
+    name = f"{token}_{index}"
+    # Los segmentos no pueden tener tamaño 0
+    segment = _open(name, size=max(array.nbytes, 1), create=True)
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    finally:
+        segment.close()
+    return {'name': name, 'shape': list(array.shape), 'dtype': array.dtype.str}
+
+
+@contextmanager
+def attach(handle):
+    """
+    Vista de solo lectura del array de ``handle`` mientras dure el bloque.
+
+    Las referencias a la vista deben soltarse dentro del bloque: si alguna
+    sigue viva (p. ej. en un traceback) el segmento se desmapea al
+    recolectarla en vez de al salir.
+    """
+    segment = _open(handle['name'])
+    try:
+        view = np.ndarray(tuple(handle['shape']), dtype=np.dtype(handle['dtype']), buffer=segment.buf)
+        view.flags.writeable = False
+        yield view
+    finally:
+        view = None
+        try:
+            segment.close()
+        except BufferError:
+            pass
+
+
+def take(handle):
+    """Copia el array de ``handle`` a memoria del proceso y elimina el segmento."""
+    try:
+        with attach(handle) as view:
+            array = view.copy()
+            del view
+        return array
+    finally:
+        _unlink(handle['name'])
+
+
+def unlink_token(token):
+    """Elimina los segmentos de ``token`` que sigan existiendo (solo Linux)."""
+    if not os.path.isdir(SHM_DIR):
+        return 0
+    names = [name for name in os.listdir(SHM_DIR) if name.startswith(f"{token}_")]
+    for name in names:
+        _unlink(name)
+    return len(names)
+
+
+def compute_operation(token, operation_type, operands, extra_data=None, precision='float64', deadline=None):
+    """
+    Ejecuta ``_compute_operation`` sobre operandos en memoria compartida.
+
+    Se ejecuta en el proceso de cómputo (pool o worker Celery).
+
+    Args:
+        token: Prefijo de los segmentos de la tarea
+        operands: {'a', 'b', 'x0'}: {'name', 'array': handle} o None (x0 sin nombre)
+        deadline: Instante (``time.time()``) a partir del cual el llamador ya
+            no recoge el resultado, o None
+
+    Returns:
+        dict: {'result': handle, 'name', 'extra_data', 'components':
+        {nombre: handle} o None, 'execution_time_ms'}
+
+    Raises:
+        TaskExpired: Si ``deadline`` vence antes de empezar o mientras se
+            crean los resultados (que se eliminan)
+    """
+    from calculator.compute_pool import Operand
+    from calculator.views import _compute_operation
+
+    _check_deadline(deadline)
+    created = []
+    with ExitStack() as stack:
+        def operand(key):
+            entry = operands.get(key)
+            if entry is None:
+                return None
+            return Operand(entry['name'], stack.enter_context(attach(entry['array'])))
+
+        a, b, x0 = operand('a'), operand('b'), operand('x0')
+        res_arr, name, extra_data, components, execution_time_ms = _compute_operation(
+            operation_type, a, b, extra_data, precision, x0.array if x0 else None, observe=False
+        )
+        del a, b, x0
+        try:
+            result = put(f"{token}_r", 0, res_arr)
+            created.append(result['name'])
+            shared_components = None
+            if components:
+                shared_components = {}
+                for index, (key, value) in enumerate(components.items(), start=1):
+                    shared_components[key] = put(f"{token}_r", index, value)
+                    created.append(shared_components[key]['name'])
+            # Si el plazo venció, el llamador pudo barrer el token antes de
+            # que existieran estos segmentos
+            _check_deadline(deadline)
+        except BaseException:
+            for segment_name in created:
+                _unlink(segment_name)
+            raise
+
+    return {
+        'result': result,
+        'name': name,
+        'extra_data': extra_data,
+        'components': shared_components,
+        'execution_time_ms': execution_time_ms,
+    }
+
+
+def dispatch(submit, operation_type, matrix_a, matrix_b=None, extra_data=None, precision='float64', x0=None,
+             deadline=None):
+    """
+    Envía una operación por memoria compartida y recoge su resultado.
+
+    Args:
+        submit: Función que ejecuta ``compute_operation(**kwargs)`` en otro
+            proceso y devuelve su resultado (pool o tarea Celery)
+        matrix_a, matrix_b: Objetos con ``name`` y ``array``
+        x0: Array de la solución inicial o None
+        deadline: Plazo (``time.time()``) que se pasa a ``compute_operation``;
+            si ``submit`` deja de esperar, debe hacerlo una vez vencido
+
+    Returns:
+        tuple: Lo mismo que ``_compute_operation``
+    """
+    token = new_token()
+    created = []
+    out = None
+
+    def share(index, name, array):
+        handle = put(token, index, array)
+        created.append(handle['name'])
+        return {'name': name, 'array': handle}
+
+    try:
+        operands = {
+            'a': share(0, matrix_a.name, matrix_a.array),
+            'b': share(1, matrix_b.name, matrix_b.array) if matrix_b else None,
+            'x0': share(2, None, x0) if x0 is not None else None,
+        }
+        out = submit(
+            token=token, operation_type=operation_type, operands=operands,
+            extra_data=extra_data, precision=precision, deadline=deadline,
+        )
+        components = out['components']
+        return (
+            take(out['result']),
+            out['name'],
+            out['extra_data'],
+            {key: take(handle) for key, handle in components.items()} if components else None,
+            out['execution_time_ms'],
+        )
+    finally:
+        if out is not None:
+            created.append(out['result']['name'])
+            created.extend(handle['name'] for handle in (out['components'] or {}).values())
+        for segment_name in created:
+            _unlink(segment_name)
+        # Resultados huérfanos de una tarea interrumpida
+        unlink_token(token)
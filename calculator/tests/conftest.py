@@ -72,3 +72,35 @@ def api_client():
     """Create an API client for testing"""
     from rest_framework.test import APIClient
     return APIClient()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_location(tmp_path_factory):
+    """Cache SQLite propio de la sesión, fuera del archivo real en /dev/shm"""
+    from django.conf import settings
+    from django.test import override_settings
+
+    default = settings.CACHES['default']
+    if not default['BACKEND'].endswith('SharedSQLiteCache'):
+        yield None
+        return
+    location = tmp_path_factory.mktemp('cache') / 'matrixcalc-cache.sqlite3'
+    with override_settings(CACHES={**settings.CACHES, 'default': {**default, 'LOCATION': str(location)}}):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_location):
+    """El cache es compartido entre procesos: limpiarlo entre tests"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def backup_dir(settings, tmp_path):
+    """Backups y checkpoints de los tests fuera del BACKUP_DIR real"""
+    settings.BACKUP_DIR = tmp_path / 'backups'
+    settings.BACKUP_DIR.mkdir()
+    return settings.BACKUP_DIR
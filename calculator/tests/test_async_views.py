@@ -0,0 +1,118 @@
+"""
+Tests for the async API views (ASGI deployment)
+"""
+import json
+
+import numpy as np
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from calculator import async_views
+from calculator.models import Matrix, Operation
+
+
+def _post(path, payload):
+    return async_to_sync(AsyncClient().post)(path, json.dumps(payload), content_type='application/json')
+
+
+def _get(path):
+    return async_to_sync(AsyncClient().get)(path)
+
+
+@pytest.mark.django_db
+class TestAsyncOperationViews:
+    """Test suite for /api/async/operations/<slug>/"""
+
+    def test_sum_matches_sync_result(self, matrix_pair):
+        matrix_a, matrix_b = matrix_pair
+        response = _post('/api/async/operations/sum/', {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id})
+
+        assert response.status_code == 201
+        body = response.json()
+        assert body['operation_type'] == 'SUM'
+        assert body['result']['data'] == [[6, 8], [10, 12]]
+        assert 'X-RateLimit-Cost' in response
+
+    def test_svd_stores_components(self, identity_matrix):
+        response = _post('/api/async/operations/svd/', {'matrix_id': identity_matrix.id})
+
+        assert response.status_code == 201
+        assert [c['name'] for c in response.json()['components']] == ['U', 'S', 'Vh']
+        operation = Operation.objects.get(id=response.json()['id'])
+        assert operation.extra_data is None
+        assert operation.components.get(name='S').data == [[1.0], [1.0], [1.0]]
+
+    def test_float32_precision(self, matrix_pair):
+        matrix_a, matrix_b = matrix_pair
+        response = _post(
+            '/api/async/operations/sum/',
+            {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id, 'precision': 'float32'},
+        )
+
+        assert response.status_code == 201
+        assert response.json()['precision'] == 'float32'
+        assert _post('/api/async/operations/sum/', {'matrix_a_id': matrix_a.id, 'precision': 'x'}).status_code == 400
+
+    def test_singular_inverse_returns_domain_error(self, matrix):
+        response = _post('/api/async/operations/inverse/', {'matrix_id': matrix.id})
+        assert response.status_code in (400, 422)
+
+    def test_missing_matrix_returns_404_without_charging(self, matrix, monkeypatch):
+        def charge(*args, **kwargs):
+            raise AssertionError("no se debe cobrar una petición con operandos inexistentes")
+        monkeypatch.setattr(async_views, 'charge', charge)
+
+        response = _post('/api/async/operations/sum/', {'matrix_a_id': matrix.id, 'matrix_b_id': 99999})
+        assert response.status_code == 404
+        assert 'X-RateLimit-Cost' not in response
+
+    @pytest.mark.parametrize('slug', ['cg', 'gmres'])
+    def test_iterative_solvers(self, db, slug):
+        A = np.array([[4.0, 1.0], [1.0, 3.0]])
+        matrix_a = Matrix.objects.create(name='A', rows=2, cols=2, data=A)
+        b = Matrix.objects.create(name='b', rows=2, cols=1, data=[[1.0], [2.0]])
+        x0 = Matrix.objects.create(name='x0', rows=2, cols=1, data=[[0.0], [0.5]])
+
+        response = _post(f'/api/async/operations/{slug}/', {
+            'matrix_a_id': matrix_a.id, 'matrix_b_id': b.id, 'x0_id': x0.id, 'max_iter': 50,
+        })
+
+        assert response.status_code == 201
+        body = response.json()
+        assert body['operation_type'] == slug.upper() and body['extra_data']['converged']
+        assert np.allclose(body['result']['data'], np.linalg.solve(A, [[1.0], [2.0]]))
+        assert _post(f'/api/async/operations/{slug}/', {'matrix_a_id': matrix_a.id}).status_code == 400
+
+    def test_unknown_operation_returns_404(self, matrix):
+        response = _post('/api/async/operations/foo/', {'matrix_id': matrix.id})
+        assert response.status_code == 404
+
+    def test_get_not_allowed(self, db):
+        assert _get('/api/async/operations/sum/').status_code == 405
+
+
+@pytest.mark.django_db
+class TestAsyncMatrixViews:
+    """Test suite for /api/async/matrices/"""
+
+    def test_create_and_fetch(self, sample_matrix_data):
+        response = _post('/api/async/matrices/', sample_matrix_data)
+        assert response.status_code == 201
+
+        detail = _get(f"/api/async/matrices/{response.json()['id']}/")
+        assert detail.status_code == 200
+        assert detail.json()['data'] == sample_matrix_data['data']
+
+    def test_create_rejects_mismatched_dimensions(self, db):
+        response = _post('/api/async/matrices/', {'name': 'Bad', 'rows': 2, 'cols': 2, 'data': [[1, 2, 3]]})
+        assert response.status_code == 400
+        assert not Matrix.objects.exists()
+
+    def test_list_is_paginated(self, matrix_pair):
+        response = _get('/api/async/matrices/')
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['count'] == 2
+        assert [m['name'] for m in body['results']] == ['Matrix B', 'Matrix A']
@@ -0,0 +1,325 @@
+"""
+Tests for streaming backup export/import
+"""
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from calculator import backup, restore
+from calculator.models import Matrix, MatrixStack, Operation, StackOperation, StepTrace
+
+
+@pytest.fixture
+def populated_db(matrix_pair):
+    matrix_a, matrix_b = matrix_pair
+    for i in range(5):
+        Operation.objects.create(
+            operation_type='SUM', matrix_a=matrix_a, matrix_b=matrix_b, result=matrix_a, execution_time_ms=i
+        )
+    return matrix_a, matrix_b
+
+
+@pytest.mark.django_db
+class TestStreamingExport:
+    """Test suite for calculator.backup"""
+
+    def test_export_writes_import_compatible_json(self, populated_db, tmp_path):
+        out = tmp_path / 'backup.json'
+        result = backup.export_backup(out, chunk_size=2)
+
+        data = json.loads(out.read_text(encoding='utf-8'))
+        assert result['matrices'] == data['total_matrices'] == 2
+        assert result['operations'] == data['total_operations'] == 5
+        assert data['version'] == backup.BACKUP_VERSION
+        assert [m['pk'] for m in data['matrices']] == sorted(m['pk'] for m in data['matrices'])
+        assert data['matrices'][0]['fields']['data'] == [[1, 2], [3, 4]]
+
+    @pytest.mark.parametrize('suffix', ['.json.gz', '.json.zst'])
+    def test_compressed_round_trip(self, populated_db, tmp_path, suffix):
+        if suffix.endswith('.zst'):
+            pytest.importorskip('zstandard')
+        out = tmp_path / f'backup{suffix}'
+        backup.export_backup(out)
+        assert backup.compression_for_path(out) != 'none'
+
+        call_command('import_backup', str(out), '--clear')
+
+        assert Matrix.objects.count() == 2
+        assert Operation.objects.count() == 5
+
+    def test_command_picks_extension_from_compression(self, populated_db, backup_dir):
+        call_command('export_backup', '--compress', 'gzip')
+
+        files = list(backup_dir.glob('backup_*'))
+        assert len(files) == 1 and files[0].name.endswith('.json.gz')
+        with backup.open_backup_for_read(files[0]) as f:
+            assert json.load(f)['total_operations'] == 5
+
+
+@pytest.mark.django_db
+class TestIncrementalBackup:
+    """Test suite for checkpointed incremental backups"""
+
+    def test_increment_contains_only_changes(self, populated_db, tmp_path, settings):
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'BACKUP_CHECKPOINT_MARGIN': 0}
+        matrix_a, matrix_b = populated_db
+        full = backup.export_backup(tmp_path / 'full.json', incremental=True)
+        assert full['type'] == 'full'
+
+        matrix_b.name = 'Renamed'
+        matrix_b.save()
+        new_matrix = Matrix.objects.create(name='New', rows=1, cols=1, data=[[9]])
+        Operation.objects.create(operation_type='TRANSPOSE', matrix_a=new_matrix, result=new_matrix, execution_time_ms=1)
+
+        inc = backup.export_backup(tmp_path / 'inc.json', incremental=True)
+        data = json.loads((tmp_path / 'inc.json').read_text(encoding='utf-8'))
+
+        assert inc['type'] == 'incremental'
+        assert sorted(m['pk'] for m in data['matrices']) == [matrix_b.pk, new_matrix.pk]
+        assert [o['fields']['operation_type'] for o in data['operations']] == ['TRANSPOSE']
+        assert backup.same_checkpoint(data['since'], backup.read_checkpoint()) is False
+        assert backup.same_checkpoint(data['checkpoint'], backup.read_checkpoint())
+
+    def test_restore_full_plus_increments(self, populated_db, tmp_path):
+        matrix_a, _ = populated_db
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        Matrix.objects.filter(pk=matrix_a.pk).update(name='Edited', updated_at=timezone.now())
+        backup.export_backup(tmp_path / 'inc1.json', incremental=True)
+        extra = Matrix.objects.create(name='Extra', rows=1, cols=1, data=[[1]])
+        backup.export_backup(tmp_path / 'inc2.json', incremental=True)
+
+        call_command('import_backup', str(tmp_path / 'full.json'), str(tmp_path / 'inc1.json'),
+                     str(tmp_path / 'inc2.json'), '--clear')
+
+        assert Matrix.objects.count() == 3
+        assert Matrix.objects.get(pk=matrix_a.pk).name == 'Edited'
+        assert Matrix.objects.filter(pk=extra.pk).exists()
+        assert Operation.objects.count() == 5
+
+    def test_broken_chain_is_rejected(self, populated_db, tmp_path):
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        backup.export_backup(tmp_path / 'inc1.json', incremental=True)
+        backup.export_backup(tmp_path / 'inc2.json', incremental=True)
+
+        with pytest.raises(CommandError):
+            call_command('import_backup', str(tmp_path / 'full.json'), str(tmp_path / 'inc2.json'))
+
+    def test_full_export_keeps_checkpoint_unless_asked(self, populated_db, tmp_path):
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        chain = backup.read_checkpoint()
+
+        Matrix.objects.create(name='Extra', rows=1, cols=1, data=[[1]])
+        backup.export_backup(tmp_path / 'adhoc.json')
+        assert backup.read_checkpoint() == chain
+
+        call_command('export_backup', '--output', str(tmp_path / 'new.json'), '--update-checkpoint')
+        assert backup.read_checkpoint()['backup'] == str(tmp_path / 'new.json')
+
+    @pytest.mark.parametrize('margin, included', [(300, True), (0, False)])
+    def test_late_commit_below_checkpoint_is_exported(self, populated_db, tmp_path, settings, margin, included):
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'BACKUP_CHECKPOINT_MARGIN': margin}
+        matrix_a, matrix_b = populated_db
+        # Id reservado por una transacción que aún no confirmó al tomar el checkpoint
+        reserved = Operation.objects.create(operation_type='SUM', matrix_a=matrix_a, result=matrix_a, execution_time_ms=0)
+        Operation.objects.create(operation_type='SUM', matrix_a=matrix_a, result=matrix_a, execution_time_ms=0)
+        reserved_id = reserved.pk
+        reserved.delete()
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        checkpoint = backup.read_checkpoint()
+        assert reserved_id < checkpoint['operation_max_id']
+
+        late = Operation.objects.create(
+            id=reserved_id, operation_type='TRANSPOSE', matrix_a=matrix_b, result=matrix_b, execution_time_ms=0
+        )
+        Operation.objects.filter(pk=late.pk).update(
+            created_at=datetime.fromisoformat(checkpoint['timestamp']) - timedelta(seconds=1)
+        )
+        backup.export_backup(tmp_path / 'inc.json', incremental=True)
+
+        data = json.loads((tmp_path / 'inc.json').read_text(encoding='utf-8'))
+        assert (reserved_id in [o['pk'] for o in data['operations']]) is included
+
+    def test_checkpoint_without_stack_ids_exports_all_stacks(self, populated_db, tmp_path):
+        stack = MatrixStack.objects.create(name='Pila', stack=np.ones((2, 1, 1)))
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        # Checkpoint escrito antes de que los backups incluyeran las pilas
+        checkpoint = backup.read_checkpoint()
+        for key in ('stack_max_id', 'stack_operation_max_id'):
+            del checkpoint[key]
+        backup.write_checkpoint(checkpoint, tmp_path / 'full.json')
+
+        inc = backup.export_backup(tmp_path / 'inc.json', incremental=True)
+
+        data = json.loads((tmp_path / 'inc.json').read_text(encoding='utf-8'))
+        assert inc['stacks'] == 1 and data['stacks'][0]['pk'] == stack.pk
+        assert backup.same_checkpoint(data['since'], checkpoint)
+
+
+@pytest.mark.django_db
+class TestBulkRestore:
+    """Test suite for calculator.restore"""
+
+    def test_reader_streams_records_in_small_reads(self, populated_db, tmp_path, monkeypatch):
+        out = tmp_path / 'backup.json'
+        backup.export_backup(out)
+        monkeypatch.setattr(backup.BackupReader, 'READ_SIZE', 7)
+
+        with backup.BackupReader(out) as reader:
+            assert reader.header['backup_type'] == 'full'
+            sections = [section for section, _ in reader.records()]
+            assert reader.header['total_operations'] == 5
+
+        assert sections == ['matrices'] * 2 + ['operations'] * 5
+
+    def test_restore_preserves_ids_and_timestamps(self, populated_db, tmp_path):
+        matrix_a, _ = populated_db
+        created_at = Matrix.objects.get(pk=matrix_a.pk).created_at
+        backup.export_backup(tmp_path / 'full.json')
+
+        totals = restore.restore_backup([tmp_path / 'full.json'], batch_size=2, clear=True)
+
+        assert totals['inserted'] == 7
+        # El serializer JSON guarda milisegundos
+        assert Matrix.objects.get(pk=matrix_a.pk).created_at == created_at.replace(
+            microsecond=created_at.microsecond // 1000 * 1000
+        )
+        assert Matrix.objects.create(name='After', rows=1, cols=1, data=[[1]]).pk > matrix_a.pk
+
+    def test_invalid_records_are_skipped_or_abort_in_strict_mode(self, populated_db, tmp_path):
+        out = tmp_path / 'full.json'
+        backup.export_backup(out)
+        data = json.loads(out.read_text(encoding='utf-8'))
+        data['operations'][0]['fields']['operation_type'] = 'UNKNOWN'
+        out.write_text(json.dumps(data), encoding='utf-8')
+
+        with pytest.raises(restore.RestoreError):
+            restore.restore_backup([out], clear=True, strict=True)
+
+        totals = restore.restore_backup([out], clear=True)
+        assert totals['invalid'] == 1
+        assert Operation.objects.count() == 4
+
+    def test_resume_continues_after_interruption(self, populated_db, tmp_path, backup_dir):
+        out = tmp_path / 'full.json'
+        backup.export_backup(out)
+        Operation.objects.all().delete()
+
+        def interrupt(progress):
+            if progress['section'] == 'operations':
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            restore.restore_backup([out], batch_size=2, progress=interrupt)
+        assert Operation.objects.count() == 2
+        assert (backup_dir / restore.STATE_FILENAME).exists()
+
+        totals = restore.restore_backup([out], batch_size=2, resume=True)
+
+        assert totals['read'] == 3
+        assert Operation.objects.count() == 5
+        assert not (backup_dir / restore.STATE_FILENAME).exists()
+
+    @pytest.mark.parametrize('name', ['backup.json', 'backup.npz'])
+    def test_stacks_round_trip(self, populated_db, tmp_path, name):
+        stack = MatrixStack.objects.create(name='Pila', stack=np.arange(8.0).reshape(2, 2, 2))
+        result = MatrixStack.objects.create(
+            name='Inversas', stack=[[[1.0, 0.0], [0.0, 1.0]], [[np.nan] * 2] * 2], invalid_items=[1]
+        )
+        operation = StackOperation.objects.create(
+            operation_type='INVERSE', stack=stack, result=result, errors={'1': 'Matriz singular'}, execution_time_ms=3
+        )
+        result_created_at = result.created_at
+        out = tmp_path / name
+        totals = backup.export_backup(out)
+        assert (totals['stacks'], totals['stack_operations']) == (2, 1)
+
+        restore.restore_backup([out], clear=True)
+
+        restored = MatrixStack.objects.get(pk=result.pk)
+        assert restored.invalid_items == [1]
+        assert restored.stack[0].tolist() == [[1.0, 0.0], [0.0, 1.0]]
+        assert np.isnan(restored.stack[1]).all()
+        assert abs(restored.created_at - result_created_at) < timedelta(milliseconds=1)
+        assert MatrixStack.objects.get(pk=stack.pk).stack.tolist() == np.arange(8.0).reshape(2, 2, 2).tolist()
+        restored_op = StackOperation.objects.get(pk=operation.pk)
+        assert (restored_op.stack_id, restored_op.result_id, restored_op.rhs_id) == (stack.pk, result.pk, None)
+        assert restored_op.errors == {'1': 'Matriz singular'}
+
+    @pytest.mark.parametrize('name', ['backup.json', 'backup.npz'])
+    def test_traces_round_trip(self, populated_db, api_client, tmp_path, name):
+        matrix_a, _ = populated_db
+        for algorithm in ('RREF', 'LU'):
+            response = api_client.post(
+                '/api/traces/', {'matrix': matrix_a.id, 'algorithm': algorithm, 'keyframe_interval': 1}, format='json'
+            )
+            assert response.status_code == 201
+        traces = {trace.pk: trace for trace in StepTrace.objects.all()}
+        out = tmp_path / name
+        assert backup.export_backup(out, chunk_size=1)['traces'] == 2
+
+        restore.restore_backup([out], clear=True)
+
+        for pk, trace in traces.items():
+            restored = StepTrace.objects.get(pk=pk)
+            assert bytes(restored.steps) == bytes(trace.steps)
+            assert (restored.algorithm, restored.step_count, restored.matrix_id) == (
+                trace.algorithm, trace.step_count, matrix_a.pk
+            )
+            assert np.array_equal(restored.keyframes, trace.keyframes)
+            assert np.array_equal(restored.state_after(trace.step_count - 1), trace.state_after(trace.step_count - 1))
+
+
+@pytest.mark.django_db
+class TestColumnarArchive:
+    """Test suite for calculator.archive"""
+
+    def test_archive_is_loadable_with_numpy(self, populated_db, tmp_path):
+        out = tmp_path / 'backup.npz'
+        result = backup.export_backup(out, chunk_size=1)
+
+        assert result['format'] == 'npz'
+        with np.load(out) as data:
+            assert data['matrices/00000/data'].dtype == np.float64
+            assert data['matrices/00000/data'].tolist() == [1.0, 2.0, 3.0, 4.0]
+            assert data['operations/00004/id'].shape == (1,)
+
+    def test_round_trip_through_commands(self, populated_db, tmp_path):
+        matrix_a, matrix_b = populated_db
+        out = tmp_path / 'backup.npz'
+        call_command('export_backup', '--output', str(out))
+
+        call_command('import_backup', str(out), '--clear')
+
+        assert Matrix.objects.count() == 2
+        assert Matrix.objects.get(pk=matrix_a.pk).data == [[1.0, 2.0], [3.0, 4.0]]
+        assert Operation.objects.filter(matrix_b=matrix_b).count() == 5
+        assert Operation.objects.filter(extra_data__isnull=True).count() == 5
+
+    def test_blocks_are_validated_as_arrays(self, populated_db, tmp_path):
+        matrix_a, _ = populated_db
+        out = tmp_path / 'backup.npz'
+        backup.export_backup(out)
+        with backup.open_reader(out) as reader:
+            record = next(record for section, record in reader.records() if section == 'matrices')
+
+        assert isinstance(record['fields']['data'], np.ndarray)
+        assert restore.matrix_from_record(record).array.tolist() == matrix_a.data
+        record['fields']['data'] = np.array([[1.0, np.nan], [3.0, 4.0]])
+        with pytest.raises(ValueError, match='finitos'):
+            restore.matrix_from_record(record)
+        record['fields']['data'] = np.ones((1, 4))
+        with pytest.raises(ValueError, match='2x2'):
+            restore.matrix_from_record(record)
+
+    def test_json_full_with_npz_increment(self, populated_db, tmp_path):
+        backup.export_backup(tmp_path / 'full.json', update_checkpoint=True)
+        extra = Matrix.objects.create(name='Extra', rows=1, cols=3, data=[[1.5, -2, 3]])
+        backup.export_backup(tmp_path / 'inc.npz', incremental=True)
+
+        restore.restore_backup([tmp_path / 'full.json', tmp_path / 'inc.npz'], clear=True)
+
+        assert Matrix.objects.get(pk=extra.pk).data == [[1.5, -2.0, 3.0]]
@@ -0,0 +1,81 @@
+"""
+Tests for the BLAS thread pool policy
+"""
+import contextlib
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from calculator.utils import blas, safe_stack_det, safe_svd
+
+
+@pytest.fixture
+def restore_blas(settings):
+    yield
+    config = settings.MATRIX_CONFIG
+    blas.configure(
+        policy=config['BLAS_POLICY'],
+        threads=config['BLAS_THREADS'],
+        heavy_threshold=config['BLAS_HEAVY_THRESHOLD'],
+        max_concurrent_heavy=config['BLAS_MAX_CONCURRENT_HEAVY'],
+    )
+
+
+class TestBlasPolicy:
+    """Test suite for calculator.utils.blas"""
+
+    def test_unknown_policy_rejected(self, restore_blas):
+        with pytest.raises(ValueError):
+            blas.configure(policy='turbo')
+
+    @pytest.mark.skipif(blas.ThreadpoolController is None, reason="threadpoolctl no instalado")
+    def test_auto_policy_widens_only_heavy_kernels(self, restore_blas):
+        blas.configure(policy='auto', threads=3, heavy_threshold=100, max_concurrent_heavy=2)
+
+        def blas_threads_now():
+            return [lib['num_threads'] for lib in blas.current_settings()['libraries']]
+
+        with blas.blas_threads(10):
+            assert all(n == 1 for n in blas_threads_now())
+        with blas.blas_threads(1000):
+            assert all(n == 3 for n in blas_threads_now())
+        assert all(n == 1 for n in blas_threads_now())
+
+    def test_semaphore_limits_concurrent_heavy_kernels(self, restore_blas):
+        blas.configure(policy='single', threads=1, heavy_threshold=100, max_concurrent_heavy=1)
+        observed = []
+
+        def heavy():
+            with blas.blas_threads(1000):
+                observed.append(blas.current_settings()['heavy_in_flight'])
+                time.sleep(0.02)
+
+        workers = [threading.Thread(target=heavy) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert observed == [1, 1, 1, 1]
+
+    def test_decorated_functions_still_compute(self, restore_blas):
+        blas.configure(policy='auto', threads=2, heavy_threshold=4, max_concurrent_heavy=1)
+        result = safe_svd(np.eye(3))
+        assert result['S'] == [1.0, 1.0, 1.0]
+
+    def test_stacks_are_sized_per_matrix(self, monkeypatch):
+        sizes = []
+
+        @contextlib.contextmanager
+        def record(size):
+            sizes.append(size)
+            yield
+        monkeypatch.setattr(blas, 'blas_threads', record)
+
+        safe_stack_det(np.tile(np.eye(3), (1000, 1, 1)))
+        safe_svd(np.eye(4))
+
+        assert sizes == [9, 16]
+        assert blas.kernel_size([[1, 2, 3]]) == 3
@@ -0,0 +1,136 @@
+"""
+Tests for the shared cross-process cache backend
+"""
+import multiprocessing
+import os
+import stat
+import time
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from calculator.cache import SharedSQLiteCache
+
+
+def _make_cache(path, **options):
+    return SharedSQLiteCache(str(path), {'OPTIONS': options})
+
+
+def _increment_many(path, times):
+    cache = _make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class TestSharedSQLiteCache:
+    """Test suite for SharedSQLiteCache"""
+
+    def test_set_get_delete(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3')
+        cache.set('key', {'a': [1, 2]})
+        assert cache.get('key') == {'a': [1, 2]}
+        assert cache.has_key('key')
+        assert cache.delete('key')
+        assert cache.get('key', 'missing') == 'missing'
+
+    def test_add_respects_existing_and_expired_keys(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3')
+        assert cache.add('key', 1, timeout=0.05)
+        assert not cache.add('key', 2)
+        time.sleep(0.06)
+        assert cache.add('key', 3)
+        assert cache.get('key') == 3
+
+    def test_incr_missing_key_raises(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3')
+        with pytest.raises(ValueError):
+            cache.incr('missing')
+
+    def test_incr_is_atomic_across_processes(self, tmp_path):
+        path = tmp_path / 'cache.sqlite3'
+        cache = _make_cache(path)
+        cache.set('counter', 0)
+
+        ctx = multiprocessing.get_context('fork')
+        workers = [ctx.Process(target=_increment_many, args=(path, 50)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert cache.get('counter') == 200
+
+    def test_eviction_bounded_by_entries(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3', MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for i in range(30):
+            cache.set(f'key-{i}', i)
+        conn = cache._connection()
+        assert conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] <= 10
+        assert cache.get('key-29') == 29
+
+    def test_eviction_bounded_by_bytes(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3', MAX_BYTES=10_000)
+        for i in range(20):
+            cache.set(f'blob-{i}', b'x' * 2_000)
+        conn = cache._connection()
+        assert conn.execute('SELECT SUM(size) FROM cache').fetchone()[0] <= 10_000
+        assert cache.get('blob-19') is not None
+
+    def test_get_does_not_take_write_lock(self, tmp_path):
+        path = tmp_path / 'cache.sqlite3'
+        cache = _make_cache(path)
+        cache.set('key', 1)
+        cache.access_resolution = 0
+
+        writer = _make_cache(path)._connection()
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            start = time.monotonic()
+            assert cache.get('key') == 1
+            assert time.monotonic() - start < 1
+        finally:
+            writer.execute('ROLLBACK')
+
+    def test_accesses_are_written_with_next_write(self, tmp_path):
+        cache = _make_cache(tmp_path / 'cache.sqlite3', MAX_ENTRIES=2, CULL_FREQUENCY=100)
+        cache.access_resolution = 0
+        cache.set('old', 1)
+        time.sleep(0.01)
+        cache.set('new', 2)
+        time.sleep(0.01)
+        # El acceso a 'old' queda pendiente y se escribe antes de podar
+        assert cache.get('old') == 1
+        cache.set('third', 3)
+
+        assert cache.get('old') == 1
+        assert cache.get('new') is None
+
+    def test_creates_private_directory_and_file(self, tmp_path):
+        path = tmp_path / 'run' / 'cache.sqlite3'
+        _make_cache(path).set('key', 1)
+
+        assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    def test_rejects_shared_directory(self, tmp_path):
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o1777)
+
+        with pytest.raises(ImproperlyConfigured):
+            _make_cache(shared / 'cache.sqlite3').get('key')
+
+    def test_rejects_symlink(self, tmp_path):
+        (tmp_path / 'cache.sqlite3').symlink_to(tmp_path / 'elsewhere.sqlite3')
+
+        with pytest.raises(ImproperlyConfigured):
+            _make_cache(tmp_path / 'cache.sqlite3').get('key')
+
+    @pytest.mark.skipif(not hasattr(os, 'getuid') or os.getuid() != 0, reason='chown requiere root')
+    def test_rejects_file_owned_by_another_user(self, tmp_path):
+        path = tmp_path / 'cache.sqlite3'
+        path.touch(mode=0o600)
+        os.chown(path, 65534, 65534)
+
+        with pytest.raises(ImproperlyConfigured):
+            _make_cache(path).get('key')
@@ -0,0 +1,78 @@
+"""
+Tests for the optimal-order chain product (CHAIN_MULTIPLY)
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Matrix, Operation
+from calculator.utils import InvalidMatrixError, chain_dims, matrix_chain_order, safe_chain_dot
+
+
+@pytest.fixture
+def chain(db):
+    rng = np.random.default_rng(0)
+    shapes = [(10, 30), (30, 5), (5, 60)]
+    return [
+        Matrix.objects.create(name=f'M{i}', rows=r, cols=c, data=rng.standard_normal((r, c)))
+        for i, (r, c) in enumerate(shapes, start=1)
+    ]
+
+
+class TestChainOrder:
+    """Test suite for matrix_chain_order and safe_chain_dot"""
+
+    def test_textbook_chain(self):
+        # CLRS 15.2: 15125 multiplicaciones escalares
+        flops, _ = matrix_chain_order([30, 35, 15, 5, 10, 20, 25])
+        assert flops == 2 * 15125
+
+    def test_result_and_order(self):
+        A, B, C = np.ones((10, 100)), np.ones((100, 5)), np.ones((5, 50))
+        out = safe_chain_dot(C.T, B.T, A.T)
+
+        assert out['order'] == '(M1 (M2 M3))'
+        assert out['flops'] < out['naive_flops']
+        assert np.allclose(out['result'], C.T @ B.T @ A.T)
+
+    def test_incompatible_shapes_rejected(self):
+        with pytest.raises(InvalidMatrixError):
+            chain_dims([(2, 3), (4, 2)])
+
+
+@pytest.mark.django_db
+class TestChainMultiplyEndpoint:
+    """Test suite for /api/operations/chain-multiply/"""
+
+    def test_chain_multiply(self, api_client, chain):
+        ids = [matrix.id for matrix in chain]
+        response = api_client.post('/api/operations/chain-multiply/', {'matrix_ids': ids}, format='json')
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        expected = chain[0].array @ chain[1].array @ chain[2].array
+        assert np.allclose(operation.result.array, expected)
+        assert operation.extra_data['order'] == '((M1 M2) M3)'
+        assert operation.extra_data['flops_saved'] == 0
+        assert operation.matrix_a_id == ids[0] and operation.matrix_b_id == ids[-1]
+
+    def test_shapes_validated_before_loading(self, api_client, chain, django_assert_max_num_queries):
+        ids = [chain[0].id, chain[2].id]
+        with django_assert_max_num_queries(3):
+            response = api_client.post('/api/operations/chain-multiply/', {'matrix_ids': ids}, format='json')
+        assert response.status_code == 400
+
+    def test_missing_matrix_returns_404(self, api_client, chain):
+        response = api_client.post(
+            '/api/operations/chain-multiply/', {'matrix_ids': [chain[0].id, 999999]}, format='json'
+        )
+        assert response.status_code == 404
+
+    def test_chain_length_limited(self, api_client, chain, settings, django_assert_max_num_queries):
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'MAX_CHAIN_LENGTH': 4}
+        ids = [chain[0].id] * 5
+        # Se rechaza antes de consultar formas o calcular el orden
+        with django_assert_max_num_queries(0):
+            response = api_client.post('/api/operations/chain-multiply/', {'matrix_ids': ids}, format='json')
+
+        assert response.status_code == 400
+        assert 'máximo 4' in response.data['detail']
@@ -0,0 +1,104 @@
+"""
+Tests for batched retention cleanup
+"""
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from calculator import cleanup
+from calculator.models import Matrix, MatrixPayload, Operation, StepTrace
+
+
+@pytest.fixture
+def aged_data(db):
+    """Seis matrices antiguas: cuatro huérfanas y dos usadas por una operación reciente."""
+    old = timezone.now() - timedelta(days=60)
+    matrices = [Matrix.objects.create(name=f'M{i}', rows=1, cols=1, data=[[i]]) for i in range(6)]
+    Matrix.objects.update(created_at=old)
+
+    for matrix in matrices[:3]:
+        Operation.objects.create(operation_type='TRANSPOSE', matrix_a=matrix, result=matrix, execution_time_ms=1)
+    Operation.objects.update(created_at=old)
+    recent = Operation.objects.create(
+        operation_type='SUM', matrix_a=matrices[4], matrix_b=matrices[5], result=matrices[5], execution_time_ms=1
+    )
+    return matrices, recent
+
+
+@pytest.mark.django_db
+class TestBatchedCleanup:
+    """Test suite for calculator.cleanup"""
+
+    def test_deletes_expired_rows_in_batches(self, aged_data):
+        matrices, recent = aged_data
+        cutoff = timezone.now() - timedelta(days=30)
+        batches = []
+
+        totals = cleanup.run_cleanup(cutoff=cutoff, batch_size=2, sleep=0, progress=batches.append)
+
+        assert totals['operations'] == 3
+        assert totals['matrices'] == 4
+        assert totals['payloads'] == 4
+        assert [b['phase'] for b in batches] == ['operations'] * 2 + ['matrices'] * 2 + ['payloads'] * 2
+        assert MatrixPayload.objects.count() == 2
+        assert set(Matrix.objects.values_list('pk', flat=True)) == {matrices[4].pk, matrices[5].pk}
+        assert list(Operation.objects.all()) == [recent]
+
+    def test_matrix_referenced_after_selection_is_kept(self, aged_data):
+        matrices, _ = aged_data
+        cutoff = timezone.now() - timedelta(days=30)
+        Operation.objects.filter(created_at__lt=cutoff).delete()
+        queryset = cleanup.orphan_matrices(cutoff).filter(pk=matrices[0].pk)
+
+        # Una operación nueva la referencia entre la selección del lote y el DELETE
+        Operation.objects.create(operation_type='TRANSPOSE', matrix_a=matrices[0], result=matrices[0],
+                                 execution_time_ms=1)
+
+        assert cleanup._delete_matrices(queryset) == 0
+        assert Matrix.objects.filter(pk=matrices[0].pk).exists()
+
+    def test_resume_uses_saved_cutoff_and_position(self, aged_data, backup_dir):
+        cutoff = timezone.now() - timedelta(days=30)
+
+        def interrupt(progress):
+            if progress['phase'] == 'matrices':
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            cleanup.run_cleanup(cutoff=cutoff, batch_size=1, progress=interrupt)
+        state = cleanup.CleanupState.load(backup_dir / cleanup.STATE_FILENAME)
+        assert state.phase == 'matrices'
+        assert state.cutoff == cutoff
+
+        totals = cleanup.run_cleanup(batch_size=1, resume=True)
+
+        assert totals['matrices'] == 3
+        assert Matrix.objects.count() == 2
+        assert not (backup_dir / cleanup.STATE_FILENAME).exists()
+
+    def test_command_reports_progress(self, aged_data, capsys):
+        call_command('cleanup_old_data', '--days', '30', '--batch-size', '10')
+
+        output = capsys.readouterr().out
+        assert 'operations: -3' in output
+        assert 'Eliminadas 3 operaciones y 4 matrices en 3 lotes' in output
+        assert '4 payloads liberados' in output
+
+    def test_expired_traces_are_deleted_before_their_matrices(self, aged_data, api_client):
+        matrices, _ = aged_data
+        cutoff = timezone.now() - timedelta(days=30)
+        for matrix in (matrices[3], matrices[4]):
+            response = api_client.post('/api/traces/', {'matrix': matrix.id, 'algorithm': 'RREF'}, format='json')
+            assert response.status_code == 201
+        StepTrace.objects.filter(matrix=matrices[3]).update(created_at=timezone.now() - timedelta(days=60))
+        old_payload = StepTrace.objects.get(matrix=matrices[3]).payload_id
+
+        totals = cleanup.run_cleanup(cutoff=cutoff, batch_size=10, sleep=0)
+
+        assert totals['skipped_batches'] == 0
+        assert totals['traces'] == 1 and totals['matrices'] == 4
+        assert list(StepTrace.objects.values_list('matrix', flat=True)) == [matrices[4].pk]
+        assert not Matrix.objects.filter(pk=matrices[3].pk).exists()
+        assert not MatrixPayload.objects.filter(pk=old_payload).exists()
@@ -0,0 +1,133 @@
+"""
+Tests for decomposition components (OperationComponent)
+"""
+import importlib
+
+import numpy as np
+import pytest
+from django.apps import apps
+
+from calculator import backup, cleanup, restore
+from calculator.components import decompose
+from calculator.models import Matrix, MatrixPayload, Operation, OperationComponent
+
+
+@pytest.fixture
+def qr_operation(api_client, matrix):
+    response = api_client.post('/api/operations/qr/', {'matrix_id': matrix.id}, format='json')
+    assert response.status_code == 201
+    return Operation.objects.get(id=response.data['id'])
+
+
+@pytest.mark.django_db
+class TestOperationComponents:
+    """Test suite for calculator.components"""
+
+    def test_decompose_eigen_splits_complex_parts(self):
+        rotation = np.array([[0.0, -1.0], [1.0, 0.0]])
+        result, components = decompose('EIGEN', rotation)
+
+        assert result.shape == (2, 1)
+        assert components['eigenvalues'].shape == (2, 2)
+        assert sorted(components['eigenvalues'][:, 1]) == pytest.approx([-1.0, 1.0])
+        assert 'eigenvectors_imag' in components
+
+    def test_components_stored_once(self, qr_operation, matrix):
+        assert qr_operation.extra_data is None
+        assert list(qr_operation.components.values_list('name', flat=True)) == ['Q', 'R']
+
+        # Q es también la matriz resultado: comparten payload
+        q = qr_operation.components.get(name='Q')
+        assert q.payload_id == qr_operation.result.payload_id
+        assert q.payload.ref_count == 2
+
+        r = np.array(qr_operation.components.get(name='R').data)
+        assert np.allclose(q.array @ r, matrix.array)
+
+    def test_operation_lists_components_without_data(self, api_client, qr_operation):
+        response = api_client.get(f'/api/operations-history/{qr_operation.id}/')
+
+        assert response.status_code == 200
+        assert response.data['components'] == [
+            {'name': 'Q', 'rows': 3, 'cols': 3},
+            {'name': 'R', 'rows': 3, 'cols': 3},
+        ]
+
+    def test_component_endpoint_returns_data(self, api_client, qr_operation):
+        url = f'/api/operations-history/{qr_operation.id}/components/R/'
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert response.data['data'] == qr_operation.components.get(name='R').data
+        assert api_client.get(f'/api/operations-history/{qr_operation.id}/components/U/').status_code == 404
+
+    def test_backup_round_trip(self, qr_operation, tmp_path):
+        for name in ('backup.json', 'backup.npz'):
+            result = backup.export_backup(tmp_path / name)
+            assert result['components'] == 2
+
+            restore.restore_backup([tmp_path / name], clear=True)
+
+            operation = Operation.objects.get(pk=qr_operation.pk)
+            assert operation.components.get(name='R').data == qr_operation.components.get(name='R').data
+            assert MatrixPayload.objects.get(pk=operation.result.payload_id).ref_count == 2
+
+    def test_cleanup_releases_component_payloads(self, qr_operation):
+        r_payload = qr_operation.components.get(name='R').payload_id
+        Operation.objects.update(created_at=qr_operation.created_at.replace(year=2000))
+
+        cleanup.run_cleanup(cutoff=qr_operation.created_at, batch_size=10, sleep=0)
+
+        assert not OperationComponent.objects.exists()
+        assert not MatrixPayload.objects.filter(pk=r_payload).exists()
+
+
+@pytest.mark.django_db
+class TestLegacyComponentsMigration:
+    """Test suite for migration 0016 (legacy extra_data -> components)"""
+
+    migration = importlib.import_module('calculator.migrations.0016_move_legacy_components')
+
+    def legacy_operation(self, operation_type, extra_data):
+        matrix = Matrix.objects.create(name='A', rows=2, cols=2, data=[[1, 2], [3, 4]])
+        return Operation.objects.create(
+            operation_type=operation_type, matrix_a=matrix, result=matrix, execution_time_ms=1, extra_data=extra_data
+        )
+
+    def test_svd_moved_and_restored(self):
+        legacy = {'U': [[1.0, 0.0], [0.0, 1.0]], 'S': [5.0, 2.0], 'Vh': [[0.0, 1.0], [1.0, 0.0]], 'note': 'x'}
+        operation = self.legacy_operation('SVD', legacy)
+
+        self.migration.move_to_components(apps, None)
+        operation.refresh_from_db()
+        assert operation.extra_data == {'note': 'x'}
+        assert operation.components.get(name='S').array.tolist() == [[5.0], [2.0]]
+        identity = operation.components.get(name='U').payload
+        assert identity.ref_count == 1 and operation.components.get(name='Vh').payload_id != identity.id
+
+        self.migration.restore_extra_data(apps, None)
+        operation.refresh_from_db()
+        assert operation.extra_data == legacy
+        assert not operation.components.exists()
+        assert MatrixPayload.objects.get(pk=identity.pk).ref_count == 0
+
+    def test_eigen_complex_vectors(self):
+        legacy = {
+            'eigenvalues': [{'real': 0.0, 'imag': 1.0, 'is_complex': True},
+                            {'real': 0.0, 'imag': -1.0, 'is_complex': True}],
+            'eigenvectors': [[0.5, 0.5], ['0.5j', '-0.5j']],
+        }
+        operation = self.legacy_operation('EIGEN', legacy)
+
+        self.migration.move_to_components(apps, None)
+        operation.refresh_from_db()
+        assert operation.extra_data is None
+        assert operation.components.get(name='eigenvalues').array.tolist() == [[0.0, 1.0], [0.0, -1.0]]
+        assert operation.components.get(name='eigenvectors').array.tolist() == [[0.5, 0.5], [0.0, 0.0]]
+        assert operation.components.get(name='eigenvectors_imag').array.tolist() == [[0.0, 0.0], [0.5, -0.5]]
+
+    def test_new_operations_untouched(self, qr_operation):
+        self.migration.move_to_components(apps, None)
+
+        assert qr_operation.components.count() == 2
+        assert Operation.objects.get(pk=qr_operation.pk).extra_data is None
@@ -0,0 +1,82 @@
+"""
+Tests for the process-pool compute backend
+"""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from calculator import compute_pool
+from calculator.models import Operation
+
+
+@pytest.fixture
+def pool_settings(settings):
+    settings.MATRIX_CONFIG = {
+        **settings.MATRIX_CONFIG,
+        'COMPUTE_POOL_WORKERS': 1,
+        'COMPUTE_POOL_MIN_ELEMENTS': 0,
+        'COMPUTE_POOL_TIMEOUT': 30,
+    }
+    yield settings
+    compute_pool.shutdown(terminate=True)
+
+
+class TestComputePool:
+    """Test suite for calculator.compute_pool"""
+
+    def test_disabled_by_default(self, matrix):
+        assert not compute_pool.enabled()
+        assert not compute_pool.should_dispatch(matrix.array)
+
+    def test_size_threshold(self, pool_settings):
+        pool_settings.MATRIX_CONFIG['COMPUTE_POOL_MIN_ELEMENTS'] = 20
+
+        assert not compute_pool.should_dispatch(np.ones((3, 3)), np.ones((3, 3)))
+        assert compute_pool.should_dispatch(np.ones((3, 3)), None, np.ones((11, 1)))
+
+    def test_warm_starts_worker_processes(self, pool_settings):
+        assert compute_pool.warm() == 1
+        assert compute_pool.run(os.getpid) != os.getpid()
+
+    def test_timeout_restarts_pool(self, pool_settings):
+        pool_settings.MATRIX_CONFIG['COMPUTE_POOL_TIMEOUT'] = 0.5
+        compute_pool.warm()
+        pool = compute_pool.get_pool()
+
+        with pytest.raises(compute_pool.ComputePoolUnavailable):
+            compute_pool.run(time.sleep, 10)
+        assert compute_pool.get_pool() is not pool
+        pool_settings.MATRIX_CONFIG['COMPUTE_POOL_TIMEOUT'] = 30
+        assert compute_pool.run(abs, -3) == 3
+
+
+@pytest.mark.django_db
+class TestPooledOperations:
+    """Test suite for operations dispatched to the process pool"""
+
+    def test_multiply_in_pool(self, api_client, matrix_pair, pool_settings):
+        a, b = matrix_pair
+        response = api_client.post(
+            '/api/operations/multiply/', {'matrix_a_id': a.id, 'matrix_b_id': b.id}, format='json'
+        )
+
+        assert response.status_code == 201
+        assert np.allclose(response.data['result']['data'], a.array @ b.array)
+        assert Operation.objects.get(id=response.data['id']).result.array.shape == (a.rows, b.cols)
+
+    def test_shared_memory_transport(self, api_client, matrix, pool_settings):
+        pool_settings.MATRIX_CONFIG['COMPUTE_POOL_TRANSPORT'] = 'shm'
+        response = api_client.post('/api/operations/qr/', {'matrix_id': matrix.id}, format='json')
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        Q, R = (operation.components.get(name=name).array for name in ('Q', 'R'))
+        assert np.allclose(Q @ R, matrix.array)
+
+    def test_numeric_errors_propagate(self, api_client, matrix, pool_settings):
+        response = api_client.post('/api/operations/inverse/', {'matrix_id': matrix.id}, format='json')
+
+        assert response.status_code == 422
+        assert response.data['error'] == 'numeric_error'
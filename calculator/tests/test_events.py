@@ -0,0 +1,133 @@
+"""
+Tests for server-push events (SSE)
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, Client
+from django.utils import timezone
+
+from calculator import events
+from calculator.models import Matrix
+
+
+@pytest.fixture
+def small_stream(settings):
+    settings.MATRIX_CONFIG = {
+        **settings.MATRIX_CONFIG,
+        'EVENTS_KEEPALIVE_SECONDS': 0.05,
+        'EVENTS_MAX_STREAM_SECONDS': 0.2,
+        'EVENTS_POLL_INTERVAL': 0.05,
+    }
+
+
+@async_to_sync
+async def read_stream(path, **kwargs):
+    response = await AsyncClient().get(path, **kwargs)
+    return response, ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+
+class TestEventLog:
+    """Test suite for the shared event log and subscribers"""
+
+    def test_publish_assigns_increasing_ids(self):
+        first = events.publish('stats.resync', {'reason': 'test'})
+        second = events.publish('stats.resync', {'reason': 'test'})
+
+        assert second == first + 1
+        assert [e['id'] for e in events.read_events(first - 1, second)] == [first, second]
+
+    def test_subscriber_queue_is_bounded(self):
+        subscriber = events.Subscriber(maxsize=2)
+        for i in range(5):
+            subscriber.offer({'id': i})
+
+        assert subscriber.overflowed
+        assert [subscriber.get(0.01)['id'] for _ in range(2)] == [0, 1]
+        assert subscriber.get(0.01) is None
+
+    def test_broker_delivers_new_events(self):
+        broker = events.EventBroker(poll_interval=0.05)
+        subscriber, cursor = broker.subscribe(maxsize=10)
+        try:
+            seq = events.publish('stats.resync', {'reason': 'test'})
+            event = subscriber.get(2)
+            assert seq > cursor
+            assert event['id'] == seq and event['type'] == 'stats.resync'
+        finally:
+            broker.unsubscribe(subscriber)
+
+
+@pytest.mark.django_db
+class TestModelEvents:
+    """Test suite for the post_save event publishers"""
+
+    def test_operation_emits_completed_event_with_delta(self, api_client, matrix_pair, django_capture_on_commit_callbacks):
+        matrix_a, matrix_b = matrix_pair
+        events.announce_listeners()
+        start = events.current_seq()
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                '/api/operations/sum/', {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id}, format='json'
+            )
+
+        published = events.read_events(start, events.current_seq())
+        assert [e['type'] for e in published] == ['matrix.created', 'operation.completed']
+        completed = published[-1]['data']
+        assert completed['operation']['id'] == response.data['id']
+        assert completed['delta']['total_operations'] == 1
+        assert completed['delta']['operation_type'] == 'SUM'
+
+    def test_no_listeners_no_publish(self, django_capture_on_commit_callbacks):
+        start = events.current_seq()
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            Matrix.objects.create(name='Quiet', rows=1, cols=1, data=[[1]])
+
+        assert callbacks == []
+        assert events.current_seq() == start
+
+    def test_subscribing_announces_listeners(self):
+        broker = events.EventBroker(poll_interval=0.05)
+        subscriber, _ = broker.subscribe(maxsize=10)
+        try:
+            assert events.has_listeners()
+        finally:
+            broker.unsubscribe(subscriber)
+
+    def test_raw_saves_do_not_publish(self, django_capture_on_commit_callbacks):
+        events.announce_listeners()
+        now = timezone.now()
+        start = events.current_seq()
+        with django_capture_on_commit_callbacks(execute=True):
+            Matrix(name='Raw', rows=1, cols=1, data=[[1]], created_at=now, updated_at=now).save_base(raw=True)
+
+        assert events.current_seq() == start
+
+
+@pytest.mark.django_db
+class TestEventsView:
+    """Test suite for GET /api/events/"""
+
+    def test_stream_replays_missed_events(self, small_stream):
+        first = events.publish('stats.resync', {'reason': 'test'})
+        events.publish('matrix.created', {'matrix_id': 1, 'delta': {'total_matrices': 1}})
+
+        response, body = read_stream(f'/api/events/?last_event_id={first - 1}')
+        assert response['Content-Type'] == 'text/event-stream'
+
+        assert f'id: {first}\nevent: stats.resync' in body
+        assert 'event: matrix.created' in body
+
+    def test_expired_history_triggers_resync(self, small_stream):
+        seq = events.publish('matrix.created', {'matrix_id': 1, 'delta': {'total_matrices': 1}})
+        cache.delete(events.EVENT_KEY.format(seq))
+
+        _, body = read_stream('/api/events/', headers={'Last-Event-ID': str(seq - 1)})
+
+        assert 'event: stats.resync' in body
+
+    def test_wsgi_has_no_stream(self):
+        response = Client().get('/api/events/')
+
+        assert response.status_code == 204
+        assert events.get_broker().subscriber_count == 0
@@ -0,0 +1,106 @@
+"""
+Tests for the GlassBox step trace engine and /api/traces/
+"""
+import json
+
+import numpy as np
+import pytest
+
+from calculator.models import Matrix, MatrixPayload, StepTrace
+from calculator.utils import glassbox
+
+
+class TestGlassBoxEngine:
+    """Test suite for calculator.utils.glassbox"""
+
+    @pytest.mark.parametrize('algorithm', glassbox.ALGORITHMS)
+    def test_replay_matches_recording(self, algorithm):
+        A = np.random.default_rng(0).standard_normal((6, 5))
+        trace = glassbox.record(A, algorithm, interval=4)
+        steps, keyframes = trace['steps'], trace['keyframes']
+
+        assert len(keyframes) == 1 + len(steps) // 4
+        states = [state.copy() for _, state in glassbox.replay(keyframes, steps, 4, 0, len(steps))]
+        for index in (0, 3, 4, 9, len(steps) - 1):
+            assert np.array_equal(glassbox.state_after(keyframes, steps, 4, index), states[index])
+        assert np.array_equal(states[-1], trace['result'])
+
+    def test_rref_steps(self):
+        trace = glassbox.record([[2.0, 4.0, 2.0], [1.0, 3.0, 0.0], [3.0, 7.0, 2.0]], 'RREF', interval=100)
+
+        assert trace['pivot_columns'] == [0, 1]
+        assert np.allclose(trace['result'], [[1, 0, 3], [0, 1, -1], [0, 0, 0]])
+        first = glassbox.step_data(trace['steps'][0], 0)
+        assert first['op'] == 'swap' and first['description'].startswith('Intercambiar F1 y F3')
+
+    def test_lu_factors_from_steps(self):
+        A = np.random.default_rng(1).standard_normal((5, 5))
+        trace = glassbox.record(A, 'LU', interval=glassbox.default_interval(5, 5))
+        L, perm = glassbox.lu_factors(trace['steps'], 5)
+
+        assert np.allclose(np.triu(trace['result']), trace['result'])
+        assert np.allclose(L @ trace['result'], A[perm])
+
+    def test_trace_is_compact(self):
+        A = np.random.default_rng(2).standard_normal((60, 60))
+        interval = glassbox.default_interval(60, 60)
+        trace = glassbox.record(A, 'RREF', interval)
+
+        stored = trace['steps'].nbytes + trace['keyframes'].nbytes
+        assert stored < len(trace['steps']) * A.nbytes / 100
+
+
+@pytest.mark.django_db
+class TestTraceEndpoints:
+    """Test suite for /api/traces/"""
+
+    @pytest.fixture
+    def trace(self, api_client, matrix):
+        response = api_client.post(
+            '/api/traces/', {'matrix': matrix.id, 'algorithm': 'RREF', 'keyframe_interval': 2}, format='json'
+        )
+        assert response.status_code == 201
+        return response.data
+
+    def test_create_and_retrieve(self, api_client, trace, matrix):
+        assert trace['rank'] == 2 and trace['keyframe_count'] == 1 + trace['step_count'] // 2
+        assert np.allclose(trace['result'], [[1, 0, -1], [0, 1, 2], [0, 0, 0]])
+        assert trace['storage_bytes'] < trace['snapshot_bytes']
+
+        stored = StepTrace.objects.get(id=trace['id'])
+        assert stored.payload.ref_count == 1
+        assert api_client.get('/api/traces/').data['results'][0]['id'] == trace['id']
+
+    def test_steps_pages(self, api_client, trace, matrix):
+        page = api_client.get(f"/api/traces/{trace['id']}/steps/?offset=1&limit=2").data
+
+        assert page['count'] == trace['step_count'] and len(page['steps']) == 2
+        single = api_client.get(f"/api/traces/{trace['id']}/steps/2/").data
+        assert single['state'] == page['steps'][1]['state']
+        initial = api_client.get(f"/api/traces/{trace['id']}/steps/-1/").data
+        assert initial['state'] == matrix.data
+
+        without_states = api_client.get(f"/api/traces/{trace['id']}/steps/?states=false").data
+        assert 'state' not in without_states['steps'][0]
+        assert api_client.get(f"/api/traces/{trace['id']}/steps/?limit=100000").status_code == 400
+        assert api_client.get(f"/api/traces/{trace['id']}/steps/99/").status_code == 404
+
+    def test_stream(self, api_client, trace):
+        response = api_client.get(f"/api/traces/{trace['id']}/stream/")
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        assert [line['index'] for line in lines] == list(range(trace['step_count']))
+        assert np.allclose(lines[-1]['state'], trace['result'])
+
+    def test_delete_releases_keyframes(self, api_client, trace):
+        payload_id = StepTrace.objects.get(id=trace['id']).payload_id
+
+        assert api_client.delete(f"/api/traces/{trace['id']}/").status_code == 204
+        assert MatrixPayload.objects.get(id=payload_id).ref_count == 0
+
+    def test_lu_factors(self, api_client):
+        A = Matrix.objects.create(name='A', rows=3, cols=3, data=[[1, 2, 3], [4, 5, 6], [7, 8, 10]])
+        data = api_client.post('/api/traces/', {'matrix': A.id, 'algorithm': 'LU'}, format='json').data
+
+        assert np.allclose(np.array(data['lower']) @ data['result'], A.array[data['permutation']])
@@ -0,0 +1,124 @@
+"""
+Tests for the iterative solvers (CG, GMRES)
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Matrix, Operation
+from calculator.utils import InvalidMatrixError, NumericError, safe_cg, safe_gmres
+
+
+def _spd(n, seed=0):
+    rng = np.random.default_rng(seed)
+    M = rng.standard_normal((n, n))
+    return M @ M.T + n * np.eye(n), rng.standard_normal((n, 1))
+
+
+@pytest.fixture
+def system(db):
+    A, b = _spd(12)
+    return (
+        Matrix.objects.create(name='A', rows=12, cols=12, data=A),
+        Matrix.objects.create(name='b', rows=12, cols=1, data=b),
+    )
+
+
+class TestIterativeSolvers:
+    """Test suite for safe_cg and safe_gmres"""
+
+    @pytest.mark.parametrize('preconditioner', ['none', 'jacobi', 'ichol'])
+    def test_cg_converges(self, preconditioner):
+        A, b = _spd(20)
+        out = safe_cg(A, b, preconditioner=preconditioner)
+
+        assert out['converged']
+        assert out['residual_norm'] <= 1e-8
+        assert out['iterations'] == len(out['history']) - 1
+        assert np.allclose(out['result'], np.linalg.solve(A, b))
+
+    def test_gmres_nonsymmetric_with_restart(self):
+        A, b = _spd(20)
+        A = A + 3 * np.triu(np.ones((20, 20)), 1)
+        out = safe_gmres(A, b, restart=5)
+
+        assert out['converged'] and out['restart'] == 5
+        assert np.allclose(out['result'], np.linalg.solve(A, b))
+
+    def test_warm_start_reduces_iterations(self):
+        A, b = _spd(20)
+        cold = safe_cg(A, b, preconditioner='none')
+        rough = safe_cg(A, b, tol=1e-3, preconditioner='none')['result']
+        warm = safe_cg(A, b, x0=rough, preconditioner='none')
+
+        assert warm['iterations'] < cold['iterations']
+
+    def test_not_converged_is_reported(self):
+        A, b = _spd(20)
+        out = safe_cg(A, b, max_iter=2, preconditioner='none')
+
+        assert not out['converged']
+        assert out['iterations'] == 2
+
+    def test_invalid_inputs(self):
+        A, b = _spd(4)
+        with pytest.raises(InvalidMatrixError):
+            safe_cg(A + np.triu(np.ones((4, 4)), 1), b)
+        with pytest.raises(InvalidMatrixError):
+            safe_gmres(A, b, preconditioner='ichol')
+        with pytest.raises(InvalidMatrixError):
+            safe_cg(A, b, tol=0)
+        with pytest.raises(NumericError):
+            safe_cg(-A, b, preconditioner='none')
+
+
+@pytest.mark.django_db
+class TestIterativeEndpoints:
+    """Test suite for /api/operations/cg/ and /api/operations/gmres/"""
+
+    def test_cg_records_history(self, api_client, system):
+        A, b = system
+        response = api_client.post(
+            '/api/operations/cg/', {'matrix_a_id': A.id, 'matrix_b_id': b.id, 'preconditioner': 'ichol'},
+            format='json',
+        )
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        assert operation.operation_type == 'CG'
+        assert operation.extra_data['converged']
+        assert operation.extra_data['history'][0] == pytest.approx(1.0)
+        assert np.allclose(operation.result.array, np.linalg.solve(A.array, b.array))
+
+    def test_gmres_warm_start_from_previous_result(self, api_client, system):
+        A, b = system
+        first = api_client.post(
+            '/api/operations/gmres/', {'matrix_a_id': A.id, 'matrix_b_id': b.id, 'max_iter': 3}, format='json'
+        )
+        assert first.status_code == 201
+        assert not first.data['extra_data']['converged']
+
+        previous = Operation.objects.get(id=first.data['id']).result
+        second = api_client.post(
+            '/api/operations/gmres/',
+            {'matrix_a_id': A.id, 'matrix_b_id': b.id, 'x0_id': previous.id},
+            format='json',
+        )
+        assert second.status_code == 201
+        extra = second.data['extra_data']
+        assert extra['converged'] and extra['x0_id'] == previous.id
+        assert extra['history'][0] == pytest.approx(first.data['extra_data']['residual_norm'])
+
+    def test_default_max_iter_is_ten_n(self, api_client, system):
+        A, b = system
+        response = api_client.post('/api/operations/cg/', {'matrix_a_id': A.id, 'matrix_b_id': b.id}, format='json')
+
+        assert response.status_code == 201
+        assert response.data['extra_data']['max_iter'] == 10 * A.rows
+
+    def test_max_iter_above_limit_rejected(self, api_client, system, settings):
+        A, b = system
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'ITERATIVE_MAX_ITERATIONS': 10}
+        response = api_client.post(
+            '/api/operations/cg/', {'matrix_a_id': A.id, 'matrix_b_id': b.id, 'max_iter': 50}, format='json'
+        )
+        assert response.status_code == 400
@@ -0,0 +1,87 @@
+"""
+Tests for least squares, pseudo-inverse and the INVERSE fallback
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Matrix, Operation
+from calculator.utils import InvalidMatrixError, safe_inv_or_pinv, safe_lstsq, safe_pinv
+
+
+class TestLeastSquares:
+    """Test suite for safe_lstsq, safe_pinv and safe_inv_or_pinv"""
+
+    def test_lstsq_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        A, B = rng.standard_normal((8, 3)), rng.standard_normal((8, 2))
+        out = safe_lstsq(A, B)
+        X, residuals, rank, s = np.linalg.lstsq(A, B, rcond=None)
+
+        assert out['method'] == 'qr+svd'
+        assert out['rank'] == rank == 3
+        assert np.allclose(out['result'], X)
+        assert np.allclose(np.square(out['residuals']), residuals)
+        assert np.allclose(out['singular_values'], s)
+
+    def test_pinv_wide_and_rank_deficient(self):
+        A = np.array([[1.0, 2.0, 3.0], [2.0, 4.0, 6.0]])
+        out = safe_pinv(A)
+
+        assert out['method'] == 'svd' and out['rank'] == 1
+        assert np.allclose(out['result'], np.linalg.pinv(A))
+
+    def test_rcond_truncates_small_singular_values(self):
+        A = np.diag([1.0, 1e-6])
+        assert safe_pinv(A)['rank'] == 2
+        assert safe_pinv(A, rcond=1e-3)['rank'] == 1
+        with pytest.raises(InvalidMatrixError):
+            safe_pinv(A, rcond=-1)
+
+    def test_inverse_falls_back_only_when_needed(self):
+        regular = safe_inv_or_pinv([[4.0, 7.0], [2.0, 6.0]])
+        assert not regular['pseudo_inverse']
+        assert np.allclose(regular['result'], [[0.6, -0.7], [-0.2, 0.4]])
+
+        singular = safe_inv_or_pinv([[1.0, 2.0], [2.0, 4.0]])
+        assert singular['pseudo_inverse'] and singular['rank'] == 1
+        assert singular['condition_number'] is None or singular['condition_number'] > 1e12
+
+
+@pytest.mark.django_db
+class TestLeastSquaresEndpoints:
+    """Test suite for /api/operations/lstsq/, /pinv/ and the INVERSE fallback"""
+
+    def test_lstsq_endpoint(self, api_client):
+        A = Matrix.objects.create(name='A', rows=3, cols=2, data=[[1, 0], [1, 1], [1, 2]])
+        b = Matrix.objects.create(name='b', rows=3, cols=1, data=[[6], [0], [0]])
+        response = api_client.post(
+            '/api/operations/lstsq/', {'matrix_a_id': A.id, 'matrix_b_id': b.id}, format='json'
+        )
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        assert np.allclose(operation.result.array, [[5], [-3]])
+        assert operation.extra_data['rank'] == 2
+        assert operation.extra_data['residuals'][0] == pytest.approx(np.sqrt(6))
+
+    def test_inverse_fallback(self, api_client):
+        singular = Matrix.objects.create(name='S', rows=2, cols=2, data=[[1, 2], [2, 4]])
+
+        response = api_client.post('/api/operations/inverse/', {'matrix_id': singular.id}, format='json')
+        assert response.status_code == 422
+
+        response = api_client.post(
+            '/api/operations/inverse/', {'matrix_id': singular.id, 'fallback': True}, format='json'
+        )
+        assert response.status_code == 201
+        assert response.data['extra_data']['pseudo_inverse'] is True
+        operation = Operation.objects.get(id=response.data['id'])
+        assert np.allclose(operation.result.array, np.linalg.pinv([[1, 2], [2, 4]]))
+
+    def test_pinv_endpoint(self, api_client, matrix):
+        response = api_client.post('/api/operations/pinv/', {'matrix_id': matrix.id}, format='json')
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        assert operation.operation_type == 'PINV'
+        assert np.allclose(operation.result.array, np.linalg.pinv(matrix.array))
@@ -0,0 +1,103 @@
+"""
+Tests for matrix functions (power, exponential, square root, logarithm)
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Operation
+from calculator.utils import (
+    InvalidMatrixError, NumericError, safe_expm, safe_logm, safe_matrix_power, safe_sqrtm,
+)
+from calculator.utils.matrix_functions import schur
+
+
+def _symmetric_function(A, f):
+    # Referencia: f(A) = V f(Λ) Vᵀ para A simétrica
+    values, vectors = np.linalg.eigh(A)
+    return vectors @ np.diag(f(values)) @ vectors.T
+
+
+class TestMatrixFunctions:
+    """Test suite for the matrix function kernels of matrix_model"""
+
+    def test_schur_is_unitary_triangularization(self):
+        A = np.random.default_rng(0).standard_normal((8, 8))
+        T, Q = schur(A)
+
+        assert np.allclose(np.tril(T, -1), 0)
+        assert np.allclose(Q @ Q.conj().T, np.eye(8))
+        assert np.allclose(Q @ T @ Q.conj().T, A)
+
+    def test_power_by_repeated_squaring(self):
+        fibonacci = np.array([[1.0, 1.0], [1.0, 0.0]])
+        out = safe_matrix_power(fibonacci, 10)
+
+        assert out['result'].tolist() == [[89.0, 55.0], [55.0, 34.0]]
+        assert out['products'] == 4
+        assert out['error_estimate'] < 1e-12
+        assert np.allclose(safe_matrix_power(fibonacci, -2)['result'] @ (fibonacci @ fibonacci), np.eye(2))
+        assert safe_matrix_power(fibonacci, 0)['result'].tolist() == [[1.0, 0.0], [0.0, 1.0]]
+
+    def test_power_rejects_non_integer_exponent(self):
+        with pytest.raises(InvalidMatrixError):
+            safe_matrix_power(np.eye(2), 1.5)
+
+    def test_expm_matches_eigendecomposition(self):
+        # ||A||₁ = 10 > θ₁₃: requiere escalado
+        A = 2 * np.array([[4.0, 1.0, 0.0], [1.0, 3.0, 1.0], [0.0, 1.0, 2.0]])
+        out = safe_expm(A)
+
+        assert np.allclose(out['result'], _symmetric_function(A, np.exp))
+        assert out['error_estimate'] < 1e-12
+        assert out['pade_degree'] == 13 and out['squarings'] >= 1
+
+    def test_sqrtm_and_logm_invert_their_functions(self):
+        A = np.array([[4.0, 1.0, 0.0], [1.0, 3.0, 1.0], [0.0, 1.0, 2.0]])
+
+        root = safe_sqrtm(A)
+        assert np.allclose(root['result'] @ root['result'], A)
+        assert root['error_estimate'] < 1e-12
+
+        log = safe_logm(A)
+        assert np.allclose(log['result'], _symmetric_function(A, np.log))
+        assert np.allclose(safe_logm(safe_expm(np.array([[0.0, 1.0], [-2.0, -3.0]]))['result'])['result'],
+                           [[0.0, 1.0], [-2.0, -3.0]])
+
+    def test_non_real_principal_functions_rejected(self):
+        negative = np.diag([-1.0, 2.0])
+        with pytest.raises(NumericError):
+            safe_sqrtm(negative)
+        with pytest.raises(NumericError):
+            safe_logm(negative)
+        with pytest.raises(NumericError):
+            safe_logm(np.zeros((2, 2)))
+
+
+@pytest.mark.django_db
+class TestMatrixFunctionEndpoints:
+    """Test suite for the matrix function endpoints"""
+
+    def test_power_endpoint_records_error_estimate(self, api_client, identity_matrix):
+        response = api_client.post(
+            '/api/operations/power/', {'matrix_id': identity_matrix.id, 'exponent': 5}, format='json'
+        )
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        assert operation.operation_type == 'POWER'
+        assert operation.extra_data['exponent'] == 5
+        assert operation.extra_data['error_estimate'] == pytest.approx(0.0, abs=1e-12)
+        assert operation.result.data == identity_matrix.data
+
+    def test_power_endpoint_requires_integer_exponent(self, api_client, identity_matrix):
+        response = api_client.post(
+            '/api/operations/power/', {'matrix_id': identity_matrix.id, 'exponent': 'dos'}, format='json'
+        )
+        assert response.status_code == 400
+
+    def test_expm_endpoint(self, api_client, identity_matrix):
+        response = api_client.post('/api/operations/expm/', {'matrix_id': identity_matrix.id}, format='json')
+
+        assert response.status_code == 201
+        assert np.allclose(response.data['result']['data'], np.e * np.eye(identity_matrix.rows))
+        assert 'error_estimate' in response.data['extra_data']
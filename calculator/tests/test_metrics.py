@@ -0,0 +1,50 @@
+"""
+Tests for the Prometheus metrics endpoint
+"""
+import pytest
+from rest_framework import status
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    """Test suite for /metrics"""
+
+    def test_metrics_exposition_format(self, api_client):
+        """Test GET /metrics returns Prometheus text format"""
+        response = api_client.get('/metrics')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        assert b'matrixcalc_http_requests_total' in response.content
+        assert b'matrixcalc_celery_queue_depth' in response.content
+
+    def test_operation_records_metrics(self, api_client, matrix_pair):
+        """Test that an operation updates request, compute and dimension metrics"""
+        matrix_a, matrix_b = matrix_pair
+        response = api_client.post(
+            '/api/operations/sum/',
+            {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        body = api_client.get('/metrics').content.decode()
+        assert 'matrixcalc_http_requests_total{method="POST",route="sum-matrices",status="201"}' in body
+        assert 'matrixcalc_operation_compute_seconds_count{operation_type="SUM"}' in body
+        assert 'matrixcalc_operation_matrix_dimension_bucket{axis="rows",le="2.0",operation_type="SUM"}' in body
+        assert 'matrixcalc_db_queries_per_request_count{route="sum-matrices"}' in body
+
+    def test_cache_access_is_counted(self):
+        """Test that cache reads are classified as hits or misses"""
+        from django.core.cache import cache
+        from calculator.metrics import CACHE_REQUESTS
+
+        hits = CACHE_REQUESTS.labels(result='hit')._value.get()
+        misses = CACHE_REQUESTS.labels(result='miss')._value.get()
+
+        cache.set('metrics-test-key', 1)
+        assert cache.get('metrics-test-key') == 1
+        assert cache.get('metrics-test-missing', 'default') == 'default'
+
+        assert CACHE_REQUESTS.labels(result='hit')._value.get() == hits + 1
+        assert CACHE_REQUESTS.labels(result='miss')._value.get() == misses + 1
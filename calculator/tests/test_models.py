@@ -1,9 +1,10 @@
 """
 Tests for Matrix and MatrixHistory models
 """
+import numpy as np
 import pytest
 from django.core.exceptions import ValidationError
-from calculator.models import Matrix, Operation
+from calculator.models import Matrix, MatrixPayload, Operation
 import json
 
 
@@ -152,3 +153,113 @@ class TestOperationModel:
         # Operation should be deleted due to CASCADE
         assert not Matrix.objects.filter(id=matrix_id).exists()
         assert Operation.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestMatrixPayload:
+    """Test suite for content-hash deduplicated payloads"""
+    
+    def test_identical_matrices_share_payload(self):
+        """Test identical data is stored once with distinct metadata"""
+        a = Matrix.objects.create(name='A', rows=2, cols=2, data=[[1, 2], [3, 4]])
+        b = Matrix.objects.create(name='B', rows=2, cols=2, data=[[1.0, 2.0], [3.0, 4.0]])
+        
+        assert a.payload_id == b.payload_id
+        assert a.content_hash == b.content_hash
+        assert MatrixPayload.objects.get(pk=a.payload_id).ref_count == 2
+        assert Matrix.objects.get(pk=b.pk).name == 'B'
+    
+    def test_hash_includes_shape_and_normalizes_zero(self):
+        """Test same bytes with another shape is a different payload"""
+        row = Matrix.objects.create(name='Row', rows=1, cols=4, data=[[1, 2, 3, 4]])
+        square = Matrix.objects.create(name='Square', rows=2, cols=2, data=[[1, 2], [3, 4]])
+        zero = Matrix.objects.create(name='Zero', rows=1, cols=1, data=[[0.0]])
+        negative_zero = Matrix.objects.create(name='-Zero', rows=1, cols=1, data=[[-0.0]])
+        
+        assert row.payload_id != square.payload_id
+        assert zero.payload_id == negative_zero.payload_id
+    
+    def test_update_and_delete_release_references(self):
+        """Test ref_count follows data changes and deletions"""
+        a = Matrix.objects.create(name='A', rows=1, cols=1, data=[[1]])
+        b = Matrix.objects.create(name='B', rows=1, cols=1, data=[[1]])
+        shared = a.payload_id
+        
+        b.data = [[2]]
+        b.save()
+        assert MatrixPayload.objects.get(pk=shared).ref_count == 1
+        
+        a.delete()
+        assert MatrixPayload.objects.get(pk=shared).ref_count == 0
+        assert Matrix.objects.get(pk=b.pk).data == [[2.0]]
+    
+    def test_bulk_create_attaches_payloads(self):
+        """Test bulk_create resolves payloads and reference counts"""
+        existing = Matrix.objects.create(name='Existing', rows=1, cols=2, data=[[5, 6]])
+        Matrix.objects.bulk_create([
+            Matrix(name=f'Bulk {i}', rows=1, cols=2, data=[[5, 6]] if i % 2 else [[7, 8]])
+            for i in range(4)
+        ])
+        
+        assert MatrixPayload.objects.count() == 2
+        assert MatrixPayload.objects.get(pk=existing.payload_id).ref_count == 3
+        assert Matrix.objects.filter(content_hash=existing.content_hash).count() == 3
+
+
+@pytest.mark.django_db
+class TestPayloadEncodings:
+    """Test suite for per-payload storage encodings"""
+    
+    DATA = [[1.0 / 3, -2.5e-7, 1e6], [0.0, 42.0, -17.25]]
+    
+    def test_zstd_is_lossless(self):
+        """Test compressed float64 decodes to the exact values"""
+        matrix = Matrix.objects.create(name='Z', rows=2, cols=3, data=self.DATA, encoding='zstd')
+        reloaded = Matrix.objects.get(pk=matrix.pk)
+        
+        assert reloaded.encoding == 'zstd'
+        assert reloaded.data == self.DATA
+        assert reloaded.content_hash == Matrix.objects.create(name='R', rows=2, cols=3, data=self.DATA).content_hash
+    
+    def test_lossy_encodings_round_values(self):
+        """Test float32/quantized store fewer bytes and decode close to the input"""
+        single = Matrix.objects.create(name='F', rows=2, cols=3, data=self.DATA, encoding='float32')
+        quantized = Matrix.objects.create(name='Q', rows=2, cols=3, data=self.DATA, encoding='quantized')
+        
+        assert len(single.payload.blob) == 6 * 4
+        assert np.allclose(Matrix.objects.get(pk=single.pk).array, self.DATA, rtol=1e-7, atol=0)
+        assert np.allclose(Matrix.objects.get(pk=quantized.pk).array, self.DATA, rtol=0, atol=1e6 / 65535)
+        assert single.payload_id != quantized.payload_id
+    
+    def test_default_encoding_from_settings(self, settings):
+        """Test MATRIX_CONFIG['PAYLOAD_ENCODING'] applies when none is given"""
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'PAYLOAD_ENCODING': 'float32'}
+        matrix = Matrix.objects.create(name='D', rows=1, cols=2, data=[[0.1, 0.2]])
+        
+        assert matrix.payload.encoding == 'float32'
+    
+    def test_changing_encoding_reencodes(self):
+        """Test assigning encoding to a saved matrix moves it to a new payload"""
+        matrix = Matrix.objects.create(name='M', rows=1, cols=2, data=[[0.1, 0.2]])
+        raw_payload = matrix.payload_id
+        
+        matrix.encoding = 'float32'
+        matrix.save()
+        
+        assert Matrix.objects.get(pk=matrix.pk).encoding == 'float32'
+        assert MatrixPayload.objects.get(pk=raw_payload).ref_count == 0
+    
+    def test_storage_report(self):
+        """Test the report command prints totals and estimates"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        for encoding in ('raw', 'zstd', 'float32'):
+            Matrix.objects.create(name=encoding, rows=2, cols=3, data=self.DATA, encoding=encoding)
+        out = StringIO()
+        call_command('payload_storage_report', '--estimate', '10', stdout=out)
+        
+        output = out.getvalue()
+        assert 'float32' in output and 'zstd' in output
+        assert 'Ahorro' in output
+        assert 'quantized' in output
@@ -0,0 +1,67 @@
+"""
+Tests for the float32/float64 compute precision
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Operation
+from calculator.utils import InvalidMatrixError, NumericError, safe_cholesky, safe_dot, safe_inv, safe_svd
+from calculator.utils.matrix_model import condition_threshold
+
+
+class TestPrecision:
+    """Test suite for the precision parameter of matrix_model"""
+
+    def test_outputs_keep_requested_dtype(self):
+        A = np.arange(4.0).reshape(2, 2)
+
+        assert safe_dot(A, A).dtype == np.float64
+        assert safe_dot(A, A, precision='float32').dtype == np.float32
+        assert safe_svd(A, as_arrays=True, precision='float32')['U'].dtype == np.float32
+        assert safe_cholesky(np.eye(2) * 4, precision='float32').dtype == np.float32
+
+    def test_unknown_precision_rejected(self):
+        with pytest.raises(InvalidMatrixError):
+            safe_dot(np.eye(2), np.eye(2), precision='float16')
+
+    def test_condition_threshold_scales_with_epsilon(self):
+        assert condition_threshold('float64') == pytest.approx(1e12)
+        assert condition_threshold('float32') < 1e4
+
+        # cond ~ 4e4: aceptable en float64, demasiado mal condicionada en float32
+        A = np.array([[1.0, 1.0], [1.0, 1.00005]])
+        safe_inv(A)
+        with pytest.raises(NumericError):
+            safe_inv(A, precision='float32')
+
+
+@pytest.mark.django_db
+class TestOperationPrecision:
+    """Test suite for precision on the operation endpoints"""
+
+    def test_float32_operation_is_recorded(self, api_client, matrix_pair):
+        matrix_a, matrix_b = matrix_pair
+        response = api_client.post(
+            '/api/operations/multiply/',
+            {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id, 'precision': 'float32'},
+            format='json',
+        )
+
+        assert response.status_code == 201
+        assert response.data['precision'] == 'float32'
+        operation = Operation.objects.get(id=response.data['id'])
+        assert operation.precision == 'float32'
+        assert operation.result.payload.encoding == 'float32'
+        assert operation.result.data == [[19.0, 22.0], [43.0, 50.0]]
+
+    def test_default_precision_is_float64(self, api_client, matrix):
+        response = api_client.post('/api/operations/transpose/', {'matrix_id': matrix.id}, format='json')
+
+        assert response.status_code == 201
+        assert response.data['precision'] == 'float64'
+
+    def test_invalid_precision_returns_400(self, api_client, matrix):
+        response = api_client.post(
+            '/api/operations/transpose/', {'matrix_id': matrix.id, 'precision': 'half'}, format='json'
+        )
+        assert response.status_code == 400
@@ -0,0 +1,99 @@
+"""
+Tests for on-demand request profiling
+"""
+import json
+import threading
+import time
+
+import pytest
+from rest_framework import status
+
+from calculator.profiling import StackSampler, profile_request, annotate, read_index
+
+
+@pytest.fixture
+def profiling_settings(settings, tmp_path):
+    settings.MATRIX_CONFIG = {
+        **settings.MATRIX_CONFIG,
+        'PROFILING_DIR': str(tmp_path),
+        'PROFILING_INTERVAL_MS': 1,
+        'PROFILING_SAMPLE_RATE': 0.0,
+    }
+    return tmp_path
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStackSampler:
+    """Test suite for the statistical sampler"""
+
+    def test_collapsed_and_speedscope_output(self):
+        with profile_request(0.001) as (sampler, labels):
+            annotate(operation_type='SVD', shape='3x3')
+            _busy(0.05)
+
+        assert labels == {'operation_type': 'SVD', 'shape': '3x3'}
+        assert sampler.sample_count > 0
+        assert '_busy' in sampler.to_collapsed()
+
+        doc = sampler.to_speedscope('test')
+        profile = doc['profiles'][0]
+        assert profile['type'] == 'sampled'
+        assert len(profile['samples']) == len(profile['weights'])
+
+    def test_samples_only_the_target_thread(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+        idle = StackSampler(-1, interval=0.001).start()
+        _busy(0.03)
+        sampler.stop()
+        idle.stop()
+
+        assert sampler.duration >= 0.03
+        assert '_busy' in sampler.to_collapsed()
+        assert idle.sample_count == 0
+
+    def test_annotate_outside_profile_is_noop(self):
+        annotate(operation_type='SUM')  # No debe fallar
+
+
+@pytest.mark.django_db
+class TestProfilingMiddleware:
+    """Test suite for ProfilingMiddleware"""
+
+    def test_staff_header_writes_indexed_profile(self, api_client, matrix_pair, profiling_settings):
+        from django.contrib.auth.models import User
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        api_client.force_login(admin)
+        matrix_a, matrix_b = matrix_pair
+
+        response = api_client.post(
+            '/api/operations/sum/',
+            {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id},
+            format='json',
+            HTTP_X_MATRIXCALC_PROFILE='1'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'X-MatrixCalc-Profile-Id' in response
+
+        entries = read_index(profiling_settings, operation_type='SUM', shape='2x2')
+        assert len(entries) == 1
+        profile_file = profiling_settings / entries[0]['path']
+        assert json.loads(profile_file.read_text())['profiles'][0]['type'] == 'sampled'
+
+    def test_header_ignored_for_anonymous(self, api_client, matrix_pair, profiling_settings):
+        matrix_a, matrix_b = matrix_pair
+        response = api_client.post(
+            '/api/operations/sum/',
+            {'matrix_a_id': matrix_a.id, 'matrix_b_id': matrix_b.id},
+            format='json',
+            HTTP_X_MATRIXCALC_PROFILE='1'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'X-MatrixCalc-Profile-Id' not in response
+        assert read_index(profiling_settings) == []
@@ -0,0 +1,92 @@
+"""
+Tests for the rank-revealing QR engine (rank, column space, null space, RREF)
+"""
+import numpy as np
+import pytest
+
+from calculator.models import Matrix, Operation
+from calculator.utils import (
+    InvalidMatrixError, safe_column_space, safe_null_space, safe_rank, safe_rref,
+)
+from calculator.utils.rank_revealing import pivoted_qr
+
+
+def _low_rank(rows, cols, rank, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((rows, rank)) @ rng.standard_normal((rank, cols))
+
+
+class TestRankRevealing:
+    """Test suite for the QR and SVD paths of the subspace functions"""
+
+    def test_pivoted_qr_factorization(self):
+        A = _low_rank(12, 9, 4)
+        Q, R, perm, rank = pivoted_qr(A, 1e-12)
+
+        assert rank == 4
+        assert np.allclose(Q @ Q.T, np.eye(12))
+        assert np.allclose(Q[:, :rank] @ R[:rank], A[:, perm])
+        assert np.all(np.diff(np.abs(np.diag(R[:rank]))) <= 0)
+
+    @pytest.mark.parametrize('shape', [(40, 8), (8, 40), (15, 15)])
+    @pytest.mark.parametrize('method', ['qr', 'svd'])
+    def test_subspaces(self, shape, method):
+        A = _low_rank(*shape, 3)
+        colspace = safe_column_space(A, method)
+        nullspace = safe_null_space(A, method)
+
+        assert safe_rank(A, method=method) == colspace['rank'] == nullspace['rank'] == 3
+        basis = colspace['result']
+        assert np.allclose(basis @ (basis.T @ A), A)
+        N = nullspace['result']
+        assert N.shape == (shape[1], shape[1] - 3)
+        assert np.allclose(A @ N, 0) and np.allclose(N.T @ N, np.eye(shape[1] - 3))
+
+    @pytest.mark.parametrize('method', ['qr', 'svd'])
+    def test_rref(self, method):
+        A = np.array([[1.0, 2.0, 1.0, 4.0], [2.0, 4.0, 0.0, 6.0], [3.0, 6.0, 1.0, 10.0]])
+        out = safe_rref(A, method)
+
+        assert out['pivot_columns'] == [0, 2]
+        assert np.allclose(out['result'], [[1, 2, 0, 3], [0, 0, 1, 1], [0, 0, 0, 0]])
+
+    def test_pivot_columns_and_trivial_subspaces(self):
+        A = np.array([[1.0, 2.0, 0.0], [0.0, 0.0, 1.0]])
+        assert safe_column_space(A)['pivot_columns'] in ([0, 2], [1, 2])
+        assert safe_null_space(np.eye(3))['nullity'] == 0
+        assert np.allclose(safe_null_space(np.eye(3))['result'], 0)
+        assert safe_rank(np.zeros((3, 4)), method='qr') == 0
+
+    def test_unknown_method_rejected(self):
+        with pytest.raises(InvalidMatrixError):
+            safe_rank(np.eye(2), method='lu')
+
+
+@pytest.mark.django_db
+class TestSubspaceEndpoints:
+    """Test suite for /api/operations/{rank,colspace,nullspace,rref}/"""
+
+    def test_nullspace_endpoint(self, api_client, matrix):
+        response = api_client.post(
+            '/api/operations/nullspace/', {'matrix_id': matrix.id, 'method': 'qr'}, format='json'
+        )
+
+        assert response.status_code == 201
+        operation = Operation.objects.get(id=response.data['id'])
+        assert operation.extra_data['rank'] == 2 and operation.extra_data['nullity'] == 1
+        assert np.allclose(matrix.array @ operation.result.array, 0)
+
+    def test_rank_method_default_from_settings(self, api_client, matrix, settings):
+        settings.MATRIX_CONFIG = {**settings.MATRIX_CONFIG, 'RANK_METHOD': 'qr'}
+        response = api_client.post('/api/operations/rank/', {'matrix_id': matrix.id}, format='json')
+
+        assert response.status_code == 201
+        assert response.data['extra_data']['method'] == 'qr'
+        assert Operation.objects.get(id=response.data['id']).result.data == [[2.0]]
+
+    def test_rref_endpoint(self, api_client):
+        A = Matrix.objects.create(name='A', rows=2, cols=3, data=[[2, 4, 2], [1, 3, 0]])
+        response = api_client.post('/api/operations/rref/', {'matrix_id': A.id}, format='json')
+
+        assert response.status_code == 201
+        assert np.allclose(Operation.objects.get(id=response.data['id']).result.array, [[1, 0, 3], [0, 1, -1]])
@@ -0,0 +1,86 @@
+"""
+Tests for cost-weighted rate limiting
+"""
+import pytest
+from rest_framework import status
+
+from calculator.models import Matrix
+from calculator.ratelimit import estimate_cost, estimate_flops, refill_and_consume
+
+
+class TestCostModel:
+    """Test suite for cost estimation and the token bucket"""
+
+    def test_large_svd_costs_more_than_small_sum(self):
+        assert estimate_cost('SUM', (2, 2), (2, 2)) < 1.1
+        assert estimate_cost('SVD', (100, 100)) > 20 * estimate_cost('SUM', (2, 2), (2, 2))
+
+    def test_multiply_uses_inner_and_outer_dimensions(self):
+        assert estimate_cost('MULTIPLY', (100, 10), (10, 100)) > estimate_cost('MULTIPLY', (10, 100), (100, 10))
+
+    def test_iterative_cost_follows_effective_max_iter(self):
+        default = estimate_flops('CG', (20, 20))
+        # Sin max_iter el solver usa 10 n iteraciones
+        assert default == estimate_flops('CG', (20, 20), params={'max_iter': 200})
+        assert estimate_flops('CG', (20, 20), params={'max_iter': 1000}) > 4.5 * default
+        assert estimate_flops('CG', (20, 20), params={'max_iter': 2000}) == estimate_flops(
+            'CG', (20, 20), params={'max_iter': 1000}
+        )
+
+    def test_gmres_cost_counts_restart_cycles(self):
+        params = {'max_iter': 600}
+        short = estimate_flops('GMRES', (60, 60), params={**params, 'restart': 5})
+        long = estimate_flops('GMRES', (60, 60), params={**params, 'restart': 60})
+        assert long > short > estimate_flops('CG', (60, 60), params=params)
+
+    def test_bucket_refills_over_time(self):
+        allowed, state, remaining, wait = refill_and_consume(None, 8, capacity=10, refill_rate=1, now=0)
+        assert allowed and remaining == 2
+
+        allowed, state, remaining, wait = refill_and_consume(state, 5, capacity=10, refill_rate=1, now=1)
+        assert not allowed
+        assert wait == pytest.approx(2)
+
+        allowed, state, remaining, wait = refill_and_consume(state, 5, capacity=10, refill_rate=1, now=3)
+        assert allowed and remaining == pytest.approx(0)
+
+    def test_cost_above_capacity_is_clamped(self):
+        allowed, _, remaining, _ = refill_and_consume(None, 1000, capacity=10, refill_rate=1, now=0)
+        assert allowed and remaining == 0
+
+
+@pytest.mark.django_db
+class TestCostRateLimitView:
+    """Test suite for the decorated operation endpoints"""
+
+    @pytest.fixture
+    def small_budget(self, settings):
+        settings.MATRIX_CONFIG = {
+            **settings.MATRIX_CONFIG,
+            'RATE_LIMIT': {
+                'CAPACITY': 5,
+                'REFILL_PER_SECOND': 0.001,
+                'FLOPS_PER_TOKEN': 1e3,
+                'CLIENTS': {'ip:10.0.0.2': {'CAPACITY': 1000}},
+            },
+        }
+
+    def test_expensive_request_is_throttled(self, api_client, small_budget):
+        big = Matrix.objects.create(name='Big', rows=20, cols=20, data=[[float(i == j) for j in range(20)] for i in range(20)])
+
+        response = api_client.post('/api/operations/svd/', {'matrix_id': big.id}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert float(response['X-RateLimit-Remaining']) == pytest.approx(0)
+
+        response = api_client.post('/api/operations/transpose/', {'matrix_id': big.id}, format='json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 'Retry-After' in response
+
+    def test_per_client_budget_override(self, api_client, small_budget):
+        big = Matrix.objects.create(name='Big', rows=20, cols=20, data=[[float(i == j) for j in range(20)] for i in range(20)])
+
+        for _ in range(3):
+            response = api_client.post(
+                '/api/operations/svd/', {'matrix_id': big.id}, format='json', REMOTE_ADDR='10.0.0.2'
+            )
+            assert response.status_code == status.HTTP_201_CREATED
@@ -0,0 +1,157 @@
+"""
+Tests for the shared-memory operand transport
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from calculator import shared_memory
+from calculator.compute_pool import Operand
+from calculator.utils import NumericError
+
+
+def segments():
+    return {name for name in os.listdir(shared_memory.SHM_DIR) if name.startswith(shared_memory.SEGMENT_PREFIX)}
+
+
+def json_submit(**kwargs):
+    """Ejecuta la tarea en el proceso, con argumentos y resultado pasados por JSON como en Celery."""
+    out = shared_memory.compute_operation(**json.loads(json.dumps(kwargs)))
+    return json.loads(json.dumps(out))
+
+
+@pytest.mark.skipif(not os.path.isdir(shared_memory.SHM_DIR), reason='Requiere /dev/shm')
+class TestSharedMemoryTransport:
+    """Test suite for calculator.shared_memory"""
+
+    @pytest.mark.parametrize('array', [np.arange(12.0).reshape(3, 4), np.ones((2, 2), dtype=np.float32), np.zeros((0, 3))])
+    def test_put_take_roundtrip(self, array):
+        handle = shared_memory.put(shared_memory.new_token(), 0, array)
+
+        with shared_memory.attach(handle) as view:
+            assert not view.flags.writeable
+            del view
+        restored = shared_memory.take(handle)
+        assert restored.dtype == array.dtype and np.array_equal(restored, array)
+        assert handle['name'] not in segments()
+
+    def test_dispatch_decomposition(self, matrix):
+        before = segments()
+        res_arr, name, _, components, _ = shared_memory.dispatch(
+            json_submit, 'SVD', Operand(matrix.name, matrix.array)
+        )
+
+        assert name == f"SVD-S({matrix.name})"
+        assert np.allclose(components['U'] @ np.diag(res_arr.ravel()) @ components['Vh'], matrix.array)
+        assert segments() == before
+
+    def test_failed_operation_releases_segments(self, matrix):
+        before = segments()
+
+        with pytest.raises(NumericError):
+            shared_memory.dispatch(json_submit, 'INVERSE', Operand(matrix.name, matrix.array))
+        assert segments() == before
+
+    def test_interrupted_task_releases_results(self, matrix_pair):
+        a, b = matrix_pair
+        before = segments()
+
+        def crashing_submit(**kwargs):
+            # Resultado creado por un proceso que muere sin devolver el handle
+            shared_memory.put(f"{kwargs['token']}_r", 0, np.ones((4, 4)))
+            raise RuntimeError('worker lost')
+
+        with pytest.raises(RuntimeError):
+            shared_memory.dispatch(crashing_submit, 'SUM', Operand(a.name, a.array), Operand(b.name, b.array))
+        assert segments() == before
+
+    def test_late_worker_discards_results(self, matrix_pair, monkeypatch):
+        from calculator import views
+
+        a, b = matrix_pair
+        before = segments()
+        caller_gave_up = threading.Event()
+        compute = views._compute_operation
+        workers, errors = [], []
+
+        def slow_compute(*args, **kwargs):
+            # El worker ya tiene los operandos mapeados cuando el llamador se rinde
+            caller_gave_up.wait(5)
+            return compute(*args, **kwargs)
+
+        def run_worker(kwargs):
+            try:
+                shared_memory.compute_operation(**kwargs)
+            except shared_memory.TaskExpired as e:
+                errors.append(e)
+
+        def timing_out_submit(**kwargs):
+            workers.append(threading.Thread(target=run_worker, args=(kwargs,)))
+            workers[0].start()
+            time.sleep(max(0.0, kwargs['deadline'] - time.time()))
+            raise TimeoutError
+
+        monkeypatch.setattr(views, '_compute_operation', slow_compute)
+        with pytest.raises(TimeoutError):
+            shared_memory.dispatch(
+                timing_out_submit, 'SUM', Operand(a.name, a.array), Operand(b.name, b.array),
+                deadline=time.time() + 0.1,
+            )
+        caller_gave_up.set()
+        workers[0].join()
+
+        assert len(errors) == 1
+        assert segments() == before
+
+    def test_expired_task_does_not_start(self, matrix):
+        handle = shared_memory.put(shared_memory.new_token(), 0, matrix.array)
+        try:
+            with pytest.raises(shared_memory.TaskExpired):
+                shared_memory.compute_operation(
+                    'mxc_expired', 'TRANSPOSE', {'a': {'name': matrix.name, 'array': handle}},
+                    deadline=time.time() - 1,
+                )
+        finally:
+            shared_memory.take(handle)
+
+    def test_celery_task(self, matrix_pair, settings):
+        from matrixcalc_web.celery import app
+        from calculator.celery_tasks import run_operation_on_worker
+
+        a, b = matrix_pair
+        app.conf.task_always_eager = True
+        try:
+            res_arr, name, _, components, _ = run_operation_on_worker('MULTIPLY', a, b, timeout=10)
+        finally:
+            app.conf.task_always_eager = False
+
+        assert np.allclose(res_arr, a.array @ b.array) and components is None
+        assert name == f"Producto: {a.name} × {b.name}"
+
+    def test_celery_timeout_revokes_task(self, matrix, monkeypatch):
+        from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+        from calculator import celery_tasks
+
+        before = segments()
+        revoked = []
+
+        class PendingResult:
+            def get(self, timeout=None):
+                raise CeleryTimeoutError()
+
+            def revoke(self):
+                revoked.append(True)
+
+        monkeypatch.setattr(celery_tasks.compute_operation_task, 'apply_async', lambda **kwargs: PendingResult())
+        started = time.time()
+        with pytest.raises(CeleryTimeoutError):
+            celery_tasks.run_operation_on_worker('TRANSPOSE', Operand(matrix.name, matrix.array), timeout=0.1)
+
+        assert revoked == [True]
+        assert time.time() - started >= 0.1
+        assert segments() == before
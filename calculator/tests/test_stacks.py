@@ -0,0 +1,118 @@
+"""
+Tests for matrix stacks and vectorized stack operations
+"""
+import numpy as np
+import pytest
+
+from calculator.models import MatrixPayload, MatrixStack, StackOperation
+from calculator.utils import InvalidMatrixError, safe_stack_det, safe_stack_eigh, safe_stack_inv, safe_stack_solve
+
+STACK = [
+    [[4.0, 7.0], [2.0, 6.0]],
+    [[1.0, 2.0], [2.0, 4.0]],  # singular
+    [[2.0, 1.0], [1.0, 3.0]],
+]
+
+
+@pytest.fixture
+def stack():
+    return MatrixStack.objects.create(name='Pila', stack=STACK)
+
+
+class TestStackModel:
+    """Test suite for the safe_stack_* functions of matrix_model"""
+
+    def test_inverse_masks_singular_items(self):
+        out = safe_stack_inv(np.array(STACK))
+
+        assert out['valid'].tolist() == [True, False, True]
+        assert list(out['errors']) == [1]
+        assert np.isnan(out['values'][1]).all()
+        assert np.allclose(out['values'][[0, 2]], np.linalg.inv(np.array(STACK)[[0, 2]]))
+
+    def test_input_mask_is_propagated(self):
+        out = safe_stack_det(np.array(STACK), valid=[False, True, True])
+
+        assert out['valid'].tolist() == [False, True, True]
+        assert out['values'][1:] == pytest.approx([0.0, 5.0])
+
+    def test_solve_and_eigh(self):
+        S = np.array(STACK)
+        solved = safe_stack_solve(S, np.ones((3, 2, 1)))
+        assert np.allclose(S[0] @ solved['values'][0], 1.0)
+        assert solved['valid'].tolist() == [True, False, True]
+
+        eigh = safe_stack_eigh(S)
+        # La primera no es simétrica
+        assert eigh['valid'].tolist() == [False, True, True]
+        assert eigh['values'][1] == pytest.approx([0.0, 5.0])
+
+    def test_rejects_non_square_stack(self):
+        with pytest.raises(InvalidMatrixError):
+            safe_stack_inv(np.zeros((2, 2, 3)))
+
+
+@pytest.mark.django_db
+class TestMatrixStackAPI:
+    """Test suite for the stack endpoints"""
+
+    def test_create_and_list_stack(self, api_client):
+        payload = {'name': 'Pila', 'count': 3, 'rows': 2, 'cols': 2, 'data': STACK}
+        response = api_client.post('/api/stacks/', payload, format='json')
+
+        assert response.status_code == 201
+        stack = MatrixStack.objects.get(id=response.data['id'])
+        assert stack.stack.tolist() == STACK
+        assert stack.payload.rows == 6
+
+        listing = api_client.get('/api/stacks/')
+        assert 'data' not in listing.data['results'][0]
+
+    def test_create_rejects_wrong_shape(self, api_client):
+        payload = {'name': 'Pila', 'count': 2, 'rows': 2, 'cols': 2, 'data': STACK}
+        assert api_client.post('/api/stacks/', payload, format='json').status_code == 400
+
+    def test_inverse_reports_masked_items(self, api_client, stack):
+        response = api_client.post('/api/stacks/operations/inverse/', {'stack_id': stack.id}, format='json')
+
+        assert response.status_code == 201
+        result = response.data['result']
+        assert result['mask'] == [True, False, True]
+        assert result['data'][1] is None
+        assert list(response.data['errors']) == ['1']
+
+        # La máscara del resultado se propaga a la siguiente operación
+        response = api_client.post('/api/stacks/operations/determinant/', {'stack_id': result['id']}, format='json')
+        assert response.data['result']['mask'] == [True, False, True]
+        assert response.data['result']['data'][2] == [[pytest.approx(0.2)]]
+
+    def test_solve_requires_rhs(self, api_client, stack):
+        rhs = MatrixStack.objects.create(name='B', stack=np.ones((3, 2, 1)))
+
+        assert api_client.post(
+            '/api/stacks/operations/solve/', {'stack_id': stack.id}, format='json'
+        ).status_code == 400
+        response = api_client.post(
+            '/api/stacks/operations/solve/', {'stack_id': stack.id, 'rhs_stack_id': rhs.id}, format='json'
+        )
+        assert response.status_code == 201
+        assert response.data['rhs']['id'] == rhs.id
+
+    def test_eigh_stores_vectors(self, api_client, stack):
+        response = api_client.post(
+            '/api/stacks/operations/eigh/', {'stack_id': stack.id, 'precision': 'float32'}, format='json'
+        )
+
+        assert response.status_code == 201
+        operation = StackOperation.objects.get(id=response.data['id'])
+        assert operation.vectors.stack.shape == (3, 2, 2)
+        assert operation.result.payload.encoding == 'float32'
+        assert operation.vectors.invalid_items == [0]
+
+    def test_stack_payloads_are_referenced(self, stack):
+        assert MatrixPayload.objects.get(pk=stack.payload_id).ref_count == 1
+        MatrixPayload.objects.recount()
+        assert MatrixPayload.objects.get(pk=stack.payload_id).ref_count == 1
+
+        stack.delete()
+        assert MatrixPayload.objects.get(pk=stack.payload_id).ref_count == 0
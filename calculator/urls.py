@@ -4,12 +4,15 @@ URLs para la app calculator.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from calculator import views
+from calculator import async_views, views
 
 # Router para ViewSets
 router = DefaultRouter()
 router.register(r'matrices', views.MatrixViewSet, basename='matrix')
 router.register(r'operations-history', views.OperationViewSet, basename='operation')
+router.register(r'stacks', views.MatrixStackViewSet, basename='stack')
+router.register(r'stack-operations', views.StackOperationViewSet, basename='stack-operation')
+router.register(r'traces', views.StepTraceViewSet, basename='trace')
 
 # URLs de operaciones y stats
 urlpatterns = [
@@ -17,7 +20,10 @@ urlpatterns = [
     path('operations/sum/', views.sum_matrices, name='sum-matrices'),
     path('operations/subtract/', views.subtract_matrices, name='subtract-matrices'),
     path('operations/multiply/', views.multiply_matrices, name='multiply-matrices'),
+    path('operations/chain-multiply/', views.chain_multiply_matrices, name='chain-multiply-matrices'),
     path('operations/inverse/', views.inverse_matrix, name='inverse-matrix'),
+    path('operations/pinv/', views.pseudo_inverse_matrix, name='pinv-matrix'),
+    path('operations/lstsq/', views.lstsq_matrices, name='lstsq-matrices'),
     path('operations/determinant/', views.determinant_matrix, name='determinant-matrix'),
     path('operations/transpose/', views.transpose_matrix, name='transpose-matrix'),
     # Nuevas operaciones v3.0
@@ -25,7 +31,30 @@ urlpatterns = [
     path('operations/eigenvalues/', views.calculate_eigenvalues, name='eigenvalues-matrix'),
     path('operations/svd/', views.calculate_svd, name='svd-matrix'),
     path('operations/qr/', views.calculate_qr, name='qr-matrix'),
+    path('operations/colspace/', views.column_space, name='colspace-matrix'),
+    path('operations/nullspace/', views.null_space, name='nullspace-matrix'),
+    path('operations/rref/', views.row_reduce, name='rref-matrix'),
     path('operations/cholesky/', views.calculate_cholesky, name='cholesky-matrix'),
+    # Funciones de matrices
+    path('operations/power/', views.matrix_power, name='power-matrix'),
+    path('operations/expm/', views.matrix_exponential, name='expm-matrix'),
+    path('operations/sqrtm/', views.matrix_sqrt, name='sqrtm-matrix'),
+    path('operations/logm/', views.matrix_log, name='logm-matrix'),
+    path('operations/cg/', views.cg_solve, name='cg-solve'),
+    path('operations/gmres/', views.gmres_solve, name='gmres-solve'),
+    # Operaciones vectorizadas sobre pilas de matrices
+    path('stacks/operations/determinant/', views.stack_determinant, name='stack-determinant'),
+    path('stacks/operations/inverse/', views.stack_inverse, name='stack-inverse'),
+    path('stacks/operations/solve/', views.stack_solve, name='stack-solve'),
+    path('stacks/operations/eigh/', views.stack_eigh, name='stack-eigh'),
+    
+    # API async (servida bajo ASGI, ver async_views.py)
+    path('async/operations/<slug:slug>/', async_views.operation_view, name='async-operation'),
+    path('async/matrices/', async_views.matrix_list_view, name='async-matrix-list'),
+    path('async/matrices/<int:pk>/', async_views.matrix_detail_view, name='async-matrix-detail'),
+    
+    # Eventos push (SSE)
+    path('events/', async_views.events_view, name='events'),
     
     # ViewSets
     path('', include(router.urls)),
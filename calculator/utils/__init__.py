@@ -10,15 +10,38 @@ from calculator.utils.matrix_model import (
     safe_add,
     safe_subtract,
     safe_dot,
+    safe_chain_dot,
+    matrix_chain_order,
+    chain_dims,
     safe_inv,
     safe_det,
     safe_transpose,
     # Nuevas operaciones v3.0
     safe_rank,
     safe_eigenvalues,
+    safe_eig,
     safe_svd,
     safe_qr,
     safe_cholesky,
+    safe_lstsq,
+    safe_pinv,
+    safe_inv_or_pinv,
+    safe_column_space,
+    safe_null_space,
+    safe_rref,
+    RANK_METHODS,
+    safe_matrix_power,
+    safe_expm,
+    safe_sqrtm,
+    safe_logm,
+    safe_cg,
+    safe_gmres,
+    safe_stack_det,
+    safe_stack_inv,
+    safe_stack_solve,
+    safe_stack_eigh,
+    PRECISIONS,
+    resolve_dtype,
 )
 from calculator.utils.exceptions import (
     MatrixModelError,
@@ -31,14 +54,37 @@ __all__ = [
     'safe_add',
     'safe_subtract',
     'safe_dot',
+    'safe_chain_dot',
+    'matrix_chain_order',
+    'chain_dims',
     'safe_inv',
     'safe_det',
     'safe_transpose',
     'safe_rank',
     'safe_eigenvalues',
+    'safe_eig',
     'safe_svd',
     'safe_qr',
     'safe_cholesky',
+    'safe_lstsq',
+    'safe_pinv',
+    'safe_inv_or_pinv',
+    'safe_column_space',
+    'safe_null_space',
+    'safe_rref',
+    'RANK_METHODS',
+    'safe_matrix_power',
+    'safe_expm',
+    'safe_sqrtm',
+    'safe_logm',
+    'safe_cg',
+    'safe_gmres',
+    'safe_stack_det',
+    'safe_stack_inv',
+    'safe_stack_solve',
+    'safe_stack_eigh',
+    'PRECISIONS',
+    'resolve_dtype',
     'MatrixModelError',
     'InvalidMatrixError',
     'NumericError',
@@ -0,0 +1,172 @@
+"""blas.py
+
+Control del pool de hilos BLAS/LAPACK alrededor de las funciones de
+``matrix_model``.
+
+Gunicorn corre varios workers con varios hilos cada uno, y OpenBLAS/MKL crean
+además su propio pool por proceso: varias SVD concurrentes sobre-suscriben los
+núcleos. Este módulo aplica una política configurable:
+
+- ``auto``: BLAS monohilo por defecto; los kernels "pesados" (operandos con
+  al menos ``heavy_threshold`` elementos) suben a ``threads`` hilos.
+- ``single``: siempre monohilo.
+- ``multi``: siempre ``threads`` hilos.
+- ``inherit``: no se toca la configuración de la librería BLAS.
+
+El número de hilos BLAS es un ajuste global del proceso, así que los kernels
+pesados concurrentes comparten el mismo pool: el primero que entra lo amplía
+y el último que sale lo restaura. Además un semáforo por proceso limita a
+``max_concurrent_heavy`` los kernels pesados simultáneos.
+
+Si ``threadpoolctl`` no está instalado solo se aplica el semáforo.
+"""
+
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from threadpoolctl import ThreadpoolController
+except ImportError:  # pragma: no cover - dependencia opcional
+    ThreadpoolController = None
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('auto', 'single', 'multi', 'inherit')
+
+_lock = threading.Lock()
+_state = {
+    'policy': 'inherit',
+    'threads': 1,
+    'heavy_threshold': 10_000,
+    'max_concurrent_heavy': 2,
+    'heavy_in_flight': 0,
+}
+_controller = None
+_heavy_limiter = None
+_heavy_semaphore = threading.BoundedSemaphore(_state['max_concurrent_heavy'])
+
+
+def _get_controller():
+    global _controller
+    if _controller is None and ThreadpoolController is not None:
+        _controller = ThreadpoolController()
+    return _controller
+
+
+def configure(policy='auto', threads=1, heavy_threshold=10_000, max_concurrent_heavy=2):
+    """
+    Aplica la política de hilos BLAS al proceso actual.
+
+    Debe llamarse al arrancar cada proceso (``CalculatorConfig.ready``), ya
+    que la configuración de BLAS no se hereda de forma fiable tras un fork.
+    """
+    global _heavy_semaphore
+
+    if policy not in POLICIES:
+        raise ValueError(f"Política BLAS desconocida: {policy}. Opciones: {', '.join(POLICIES)}")
+
+    with _lock:
+        _state.update(
+            policy=policy,
+            threads=max(1, int(threads)),
+            heavy_threshold=int(heavy_threshold),
+            max_concurrent_heavy=max(1, int(max_concurrent_heavy)),
+        )
+        _heavy_semaphore = threading.BoundedSemaphore(_state['max_concurrent_heavy'])
+
+        controller = _get_controller()
+        if controller is None:
+            if policy != 'inherit':
+                logger.warning("threadpoolctl no está instalado; solo se limitará la concurrencia de kernels pesados")
+            return
+
+        baseline = _baseline_threads()
+        if baseline is not None:
+            controller.limit(limits=baseline, user_api='blas')
+
+
+def _baseline_threads():
+    policy = _state['policy']
+    if policy == 'inherit':
+        return None
+    if policy == 'multi':
+        return _state['threads']
+    return 1
+
+
+def current_settings():
+    """Retorna la configuración vigente (para métricas y diagnóstico)."""
+    controller = _get_controller()
+    libraries = []
+    if controller is not None:
+        libraries = [
+            {'internal_api': lib.internal_api, 'num_threads': lib.num_threads}
+            for lib in controller.lib_controllers
+            if lib.user_api == 'blas'
+        ]
+    with _lock:
+        settings = {key: value for key, value in _state.items()}
+    settings['libraries'] = libraries
+    return settings
+
+
+@contextmanager
+def blas_threads(size):
+    """
+    Ejecuta el bloque con la política BLAS correspondiente a ``size`` elementos.
+    """
+    global _heavy_limiter
+
+    if _state['policy'] == 'inherit' or size < _state['heavy_threshold']:
+        yield
+        return
+
+    semaphore = _heavy_semaphore
+    with semaphore:
+        controller = _get_controller()
+        widen = controller is not None and _state['policy'] == 'auto'
+        with _lock:
+            _state['heavy_in_flight'] += 1
+            if widen and _state['heavy_in_flight'] == 1:
+                _heavy_limiter = controller.limit(limits=_state['threads'], user_api='blas')
+        try:
+            yield
+        finally:
+            with _lock:
+                _state['heavy_in_flight'] -= 1
+                if widen and _state['heavy_in_flight'] == 0 and _heavy_limiter is not None:
+                    _heavy_limiter.restore_original_limits()
+                    _heavy_limiter = None
+
+
+def kernel_size(operand):
+    """
+    Elementos de cada matriz de ``operand``.
+
+    En una pila (N x filas x columnas) LAPACK procesa las matrices de una en
+    una, así que cuenta el tamaño de cada matriz (los dos últimos ejes) y no
+    el de la pila completa.
+    """
+    shape = np.shape(operand)
+    if len(shape) > 2:
+        return shape[-2] * shape[-1]
+    return int(np.prod(shape))
+
+
+def blas_policy(func):
+    """
+    Decorador para funciones de ``matrix_model`` que llaman a BLAS/LAPACK.
+
+    El tamaño del kernel se toma como el mayor ``kernel_size`` entre los
+    operandos posicionales.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        size = max((kernel_size(arg) for arg in args), default=0)
+        with blas_threads(size):
+            return func(*args, **kwargs)
+    return wrapper
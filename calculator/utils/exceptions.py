@@ -7,6 +7,7 @@ de excepciones de Django REST Framework para asegurar respuestas consistentes.
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status
+from django_ratelimit.exceptions import Ratelimited
 
 
 class MatrixModelError(ValueError):
@@ -25,6 +26,12 @@ def custom_exception_handler(exc, context):
     """
     Handler global para mapear excepciones de dominio a respuestas HTTP.
     """
+    # Contabilizar rechazos de rate limiting antes de delegar en DRF
+    if isinstance(exc, Ratelimited):
+        from calculator.metrics import record_ratelimit_rejection, route_name
+        request = context.get('request')
+        record_ratelimit_rejection(route_name(request) if request is not None else None)
+
     # Llamar al handler por defecto de DRF primero
     response = exception_handler(exc, context)
     
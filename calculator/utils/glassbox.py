@@ -0,0 +1,192 @@
+"""glassbox.py
+
+Motor de trazas paso a paso del modo GlassBox: eliminación gaussiana, forma
+escalonada reducida (RREF) y LU, registradas como operaciones de fila.
+
+Guardar la matriz completa tras cada paso costaría O(n²) por paso, O(n⁴)
+bytes para una RREF de n x n. En su lugar cada paso es un delta de 15 bytes
+(``STEP_DTYPE``):
+
+- ``SWAP``: F_row ↔ F_source
+- ``SCALE``: F_row ← factor · F_row (y A[row, col] = 1 exacto)
+- ``ADD``: F_row ← F_row + factor · F_source (y A[row, col] = 0 exacto)
+
+más un fotograma clave (la matriz completa) cada ``interval`` pasos. El estado
+tras el paso k se reconstruye desde el fotograma anterior aplicando a lo sumo
+``interval`` deltas; como el motor avanza aplicando esos mismos deltas, la
+reconstrucción es bit a bit idéntica al cálculo original.
+
+Estas funciones no validan entradas: trabajan en float64.
+"""
+
+import numpy as np
+
+ALGORITHMS = ('ELIMINATION', 'RREF', 'LU')
+
+SWAP, SCALE, ADD = 0, 1, 2
+OP_NAMES = {SWAP: 'swap', SCALE: 'scale', ADD: 'add'}
+
+# Delta de un paso: operación, fila destino, fila fuente, columna pivote, factor
+STEP_DTYPE = np.dtype([
+    ('op', 'u1'), ('row', '<u2'), ('source', '<u2'), ('col', '<u2'), ('factor', '<f8'),
+])
+
+
+def default_interval(rows, cols):
+    """
+    Pasos entre fotogramas clave para que los fotogramas (8 m n bytes cada uno)
+    ocupen lo mismo que los deltas entre ellos (15 bytes por paso).
+    """
+    return max(1, rows * cols * 8 // STEP_DTYPE.itemsize)
+
+
+def apply_step(M, step):
+    """Aplica un paso a ``M`` en su sitio."""
+    op, row, source, col = int(step['op']), int(step['row']), int(step['source']), int(step['col'])
+    if op == SWAP:
+        M[[row, source]] = M[[source, row]]
+    elif op == SCALE:
+        M[row] *= step['factor']
+        M[row, col] = 1.0
+    else:
+        M[row] += step['factor'] * M[source]
+        M[row, col] = 0.0
+
+
+def _steps(M, algorithm, tol):
+    """
+    Genera los pasos del algoritmo sobre ``M`` (que el llamador actualiza con
+    ``apply_step`` antes de pedir el siguiente).
+    """
+    m, n = M.shape
+    pivot_row = 0
+    for col in range(n):
+        if pivot_row == m:
+            return
+        # Pivoteo parcial: mayor |valor| en la columna
+        p = pivot_row + int(np.argmax(np.abs(M[pivot_row:, col])))
+        if abs(M[p, col]) <= tol:
+            continue
+        if p != pivot_row:
+            yield (SWAP, pivot_row, p, col, 0.0)
+        if algorithm == 'RREF' and M[pivot_row, col] != 1.0:
+            yield (SCALE, pivot_row, pivot_row, col, 1.0 / M[pivot_row, col])
+        rows = range(m) if algorithm == 'RREF' else range(pivot_row + 1, m)
+        for i in rows:
+            if i != pivot_row and M[i, col] != 0:
+                yield (ADD, i, pivot_row, col, -M[i, col] / M[pivot_row, col])
+        pivot_row += 1
+
+
+def record(A, algorithm, interval, tol=None):
+    """
+    Ejecuta el algoritmo registrando deltas y fotogramas clave.
+
+    Args:
+        interval: Pasos entre fotogramas clave (el fotograma 0 es A)
+        tol: |pivote| mínimo; por defecto max(m, n) · ε · max|A|
+
+    Returns:
+        dict: {'steps': array de STEP_DTYPE, 'keyframes': array (K, m, n),
+        'result': matriz final, 'pivot_columns': columnas pivote}
+    """
+    M = np.array(A, dtype=np.float64, copy=True)
+    if tol is None:
+        tol = max(M.shape) * np.finfo(np.float64).eps * (np.abs(M).max() if M.size else 0.0)
+
+    steps = []
+    keyframes = [M.copy()]
+    for op, row, source, col, factor in _steps(M, algorithm, tol):
+        step = np.array((op, row, source, col, factor), dtype=STEP_DTYPE)
+        apply_step(M, step)
+        steps.append(step)
+        if len(steps) % interval == 0:
+            keyframes.append(M.copy())
+
+    return {
+        'steps': np.array(steps, dtype=STEP_DTYPE),
+        'keyframes': np.stack(keyframes),
+        'result': M,
+        'pivot_columns': _pivot_columns(M, tol),
+    }
+
+
+def _pivot_columns(M, tol):
+    """Columnas del primer elemento no nulo de cada fila de una forma escalonada."""
+    columns = []
+    for row in M:
+        nonzero = np.flatnonzero(np.abs(row) > tol)
+        if nonzero.size == 0:
+            break
+        columns.append(int(nonzero[0]))
+    return columns
+
+
+def replay(keyframes, steps, interval, start, stop):
+    """
+    Genera (índice, estado) tras cada paso de ``start`` a ``stop - 1``.
+
+    Se parte del fotograma clave anterior a ``start``; el estado generado es
+    el mismo array actualizado en su sitio (copiarlo si se guarda).
+    """
+    frame = min(start // interval, len(keyframes) - 1)
+    M = np.array(keyframes[frame], copy=True)
+    for index in range(frame * interval, stop):
+        apply_step(M, steps[index])
+        if index >= start:
+            yield index, M
+
+
+def state_after(keyframes, steps, interval, index):
+    """Matriz tras el paso ``index`` (-1: la matriz inicial)."""
+    if index < 0:
+        return np.array(keyframes[0], copy=True)
+    for _, M in replay(keyframes, steps, interval, index, index + 1):
+        return M.copy()
+
+
+def lu_factors(steps, rows):
+    """
+    L (m x m, diagonal unitaria) y permutación de filas de una traza LU:
+    P A = L U con U la matriz final. Se deducen de los deltas sin recalcular.
+
+    Returns:
+        tuple: (L, permutación: fila i de P A = fila ``perm[i]`` de A)
+    """
+    L = np.eye(rows)
+    perm = np.arange(rows)
+    for step in steps:
+        row, source = int(step['row']), int(step['source'])
+        if step['op'] == SWAP:
+            # ``row`` es la fila pivote: los multiplicadores ya calculados
+            # (columnas anteriores de L) viajan con su fila
+            L[[row, source], :row] = L[[source, row], :row]
+            perm[[row, source]] = perm[[source, row]]
+        elif step['op'] == ADD:
+            L[row, source] = -step['factor']
+    return L, perm
+
+
+def step_data(step, index):
+    """Paso como dict serializable (filas y columnas desde 0) con su descripción."""
+    return {
+        'index': index,
+        'op': OP_NAMES[int(step['op'])],
+        'row': int(step['row']),
+        'source': int(step['source']),
+        'col': int(step['col']),
+        'factor': float(step['factor']),
+        'description': describe(step),
+    }
+
+
+def describe(step):
+    """Descripción narrativa de un paso (filas numeradas desde 1)."""
+    op, row, source = int(step['op']), int(step['row']) + 1, int(step['source']) + 1
+    factor = float(step['factor'])
+    if op == SWAP:
+        return f"Intercambiar F{row} y F{source} para usar el mayor pivote de la columna {int(step['col']) + 1}"
+    if op == SCALE:
+        return f"F{row} ← {factor:.6g} · F{row} para dejar el pivote en 1"
+    sign = '+' if factor >= 0 else '−'
+    return f"F{row} ← F{row} {sign} {abs(factor):.6g} · F{source} para anular la columna {int(step['col']) + 1}"
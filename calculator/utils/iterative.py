@@ -0,0 +1,164 @@
+"""iterative.py
+
+Solvers iterativos de Krylov que usan ``safe_cg`` y ``safe_gmres`` de
+``matrix_model``:
+
+- Gradiente conjugado precondicionado para sistemas simétricos definidos
+  positivos.
+- GMRES(m) con reinicio y precondicionado por la derecha para sistemas
+  generales (Arnoldi con Gram-Schmidt modificado y rotaciones de Givens).
+
+Precondicionadores: ``none``, ``jacobi`` (diagonal) e ``ichol`` (Cholesky
+incompleta IC(0): mismo patrón de ceros que A; solo para CG).
+
+Cada iteración cuesta un producto matriz-vector, O(n²) con las matrices
+densas de la aplicación, frente al O(n³) de una factorización: compensa cuando
+la convergencia llega en pocas iteraciones (matrices bien condicionadas o una
+buena solución inicial).
+
+Estas funciones no validan entradas: trabajan con vectores 1D en el dtype de
+``A`` y lanzan ``np.linalg.LinAlgError`` ante rupturas numéricas.
+"""
+
+import numpy as np
+
+PRECONDITIONERS = ('none', 'jacobi', 'ichol')
+
+
+def incomplete_cholesky(A):
+    """
+    Factor L de la Cholesky incompleta IC(0) (A ≈ L Lᵀ, L con el patrón de tril(A)).
+
+    Raises:
+        np.linalg.LinAlgError: Si aparece un pivote no positivo
+    """
+    n = A.shape[0]
+    pattern = np.tril(A != 0)
+    L = np.tril(A).astype(A.dtype, copy=True)
+    for k in range(n):
+        if L[k, k] <= 0:
+            raise np.linalg.LinAlgError(f"Pivote no positivo en la columna {k} de IC(0)")
+        L[k, k] = np.sqrt(L[k, k])
+        L[k + 1:, k] /= L[k, k]
+        column = L[k + 1:, k]
+        L[k + 1:, k + 1:] -= np.tril(np.outer(column, column)) * pattern[k + 1:, k + 1:]
+    return L
+
+
+def preconditioner(A, kind):
+    """
+    Función r -> M⁻¹ r del precondicionador ``kind``.
+
+    Raises:
+        np.linalg.LinAlgError: Si no se puede construir (diagonal nula, IC(0) falla)
+    """
+    if kind == 'none':
+        return lambda r: r
+    if kind == 'jacobi':
+        diagonal = np.diag(A).copy()
+        if np.any(diagonal == 0):
+            raise np.linalg.LinAlgError("El precondicionador de Jacobi requiere diagonal sin ceros")
+        return lambda r: r / diagonal
+    L = incomplete_cholesky(A)
+    return lambda r: np.linalg.solve(L.T, np.linalg.solve(L, r))
+
+
+def conjugate_gradient(A, b, x0, tol, max_iter, apply_preconditioner):
+    """
+    Gradiente conjugado precondicionado.
+
+    Returns:
+        tuple: (x, historial de residuos relativos ||r||/||b||, convergió)
+    """
+    b_norm = np.linalg.norm(b) or 1.0
+    x = x0.copy()
+    r = b - A @ x
+    z = apply_preconditioner(r)
+    p = z.copy()
+    rz = r @ z
+    history = [float(np.linalg.norm(r) / b_norm)]
+
+    for _ in range(max_iter):
+        if history[-1] <= tol:
+            break
+        Ap = A @ p
+        curvature = p @ Ap
+        if curvature <= 0:
+            raise np.linalg.LinAlgError("La matriz no es definida positiva (pᵀAp <= 0)")
+        alpha = rz / curvature
+        x += alpha * p
+        r -= alpha * Ap
+        history.append(float(np.linalg.norm(r) / b_norm))
+        if history[-1] <= tol:
+            break
+        z = apply_preconditioner(r)
+        rz_next = r @ z
+        p = z + (rz_next / rz) * p
+        rz = rz_next
+
+    return x, history, history[-1] <= tol
+
+
+def gmres(A, b, x0, tol, max_iter, restart, apply_preconditioner):
+    """
+    GMRES(restart) precondicionado por la derecha.
+
+    El historial registra el residuo relativo que estima la recurrencia de
+    Givens en cada iteración de Arnoldi.
+
+    Returns:
+        tuple: (x, historial de residuos relativos ||r||/||b||, convergió)
+    """
+    n = A.shape[0]
+    b_norm = np.linalg.norm(b) or 1.0
+    x = x0.copy()
+    history = [float(np.linalg.norm(b - A @ x) / b_norm)]
+    iterations = 0
+
+    while iterations < max_iter and history[-1] > tol:
+        r = b - A @ x
+        beta = np.linalg.norm(r)
+        m = min(restart, max_iter - iterations)
+        V = np.zeros((n, m + 1), dtype=A.dtype)
+        Z = np.zeros((n, m), dtype=A.dtype)
+        H = np.zeros((m + 1, m), dtype=A.dtype)
+        cs = np.zeros(m, dtype=A.dtype)
+        sn = np.zeros(m, dtype=A.dtype)
+        g = np.zeros(m + 1, dtype=A.dtype)
+        V[:, 0] = r / beta
+        g[0] = beta
+
+        k = 0
+        for j in range(m):
+            Z[:, j] = apply_preconditioner(V[:, j])
+            w = A @ Z[:, j]
+            for i in range(j + 1):
+                H[i, j] = w @ V[:, i]
+                w -= H[i, j] * V[:, i]
+            H[j + 1, j] = np.linalg.norm(w)
+            # Ruptura afortunada: el subespacio de Krylov contiene la solución
+            exhausted = H[j + 1, j] == 0
+            if not exhausted:
+                V[:, j + 1] = w / H[j + 1, j]
+
+            # Rotaciones previas y nueva rotación que anula H[j + 1, j]
+            for i in range(j):
+                H[i, j], H[i + 1, j] = cs[i] * H[i, j] + sn[i] * H[i + 1, j], -sn[i] * H[i, j] + cs[i] * H[i + 1, j]
+            denominator = np.hypot(H[j, j], H[j + 1, j])
+            if denominator == 0:
+                raise np.linalg.LinAlgError("GMRES: la matriz de Hessenberg es singular")
+            cs[j], sn[j] = H[j, j] / denominator, H[j + 1, j] / denominator
+            H[j, j], H[j + 1, j] = denominator, 0.0
+            g[j + 1] = -sn[j] * g[j]
+            g[j] = cs[j] * g[j]
+
+            k = j + 1
+            iterations += 1
+            history.append(float(abs(g[j + 1]) / b_norm))
+            if history[-1] <= tol or exhausted:
+                break
+
+        y = np.linalg.solve(H[:k, :k], g[:k])
+        x += Z[:, :k] @ y
+
+    return x, history, history[-1] <= tol
@@ -0,0 +1,276 @@
+"""matrix_functions.py
+
+Núcleos numéricos de las funciones de matrices (potencia, exponencial, raíz
+cuadrada y logaritmo) que usan las funciones ``safe_*`` de ``matrix_model``.
+
+- Potencia entera por cuadrados sucesivos: O(log k) productos.
+- ``expm`` por escalado y cuadrado con aproximantes de Padé [m/m]
+  (Higham 2005): se elige el menor grado m ∈ {3, 5, 7, 9, 13} cuyo umbral
+  θ_m cubre ||A||₁ y, si no basta, se escala A / 2^s.
+- ``sqrtm`` y ``logm`` sobre la forma de Schur compleja A = Q T Qᴴ: la raíz
+  triangular se obtiene por recurrencia (Björck-Hammarling) y el logaritmo por
+  escalado inverso y cuadrado (raíces sucesivas de T hasta ||T - I||₁ ≤ 0.25 y
+  Padé de log(I + X) en fracciones parciales con nodos de Gauss-Legendre).
+
+NumPy no expone la descomposición de Schur, así que se calcula aquí: reducción
+a Hessenberg con Householder e iteración QR con desplazamiento de Wilkinson y
+rotaciones de Givens complejas. Las dimensiones de la aplicación están
+acotadas (``MAX_DIMENSION``) y cada rotación es una operación vectorizada
+sobre dos filas o columnas.
+
+Estas funciones no validan entradas ni convierten tipos: trabajan en el dtype
+de ``A`` y lanzan ``np.linalg.LinAlgError`` ante fallos numéricos.
+"""
+
+import numpy as np
+
+# Coeficientes de Padé [m/m] de exp y umbrales θ_m de ||A||₁ (Higham 2005, tabla 2.3)
+PADE_COEFFICIENTS = {
+    3: (120., 60., 12., 1.),
+    5: (30240., 15120., 3360., 420., 30., 1.),
+    7: (17297280., 8648640., 1995840., 277200., 25200., 1512., 56., 1.),
+    9: (17643225600., 8821612800., 2075673600., 302702400., 30270240., 2162160., 110880., 3960., 90., 1.),
+    13: (
+        64764752532480000., 32382376266240000., 7771770303897600., 1187353796428800.,
+        129060195264000., 10559470521600., 670442572800., 33522128640., 1323241920.,
+        40840800., 960960., 16380., 182., 1.,
+    ),
+}
+PADE_THETAS = {
+    3: 1.495585217958292e-2,
+    5: 2.539398330063230e-1,
+    7: 9.504178996162932e-1,
+    9: 2.097847961257068e0,
+    13: 5.371920351148152e0,
+}
+
+# Escalado inverso del logaritmo: raíces de T hasta ||T - I||₁ <= LOGM_THETA
+LOGM_THETA = 0.25
+LOGM_PADE_DEGREE = 7
+MAX_SQUARE_ROOTS = 64
+
+
+def matrix_power(A, k):
+    """
+    A^k (k >= 0) por cuadrados sucesivos.
+
+    Returns:
+        tuple: (A^k, número de productos realizados)
+    """
+    result = None
+    base = A
+    products = 0
+    while k:
+        if k & 1:
+            if result is None:
+                result = base
+            else:
+                result = result @ base
+                products += 1
+        k >>= 1
+        if k:
+            base = base @ base
+            products += 1
+    if result is None:
+        return np.eye(A.shape[0], dtype=A.dtype), 0
+    return result, products
+
+
+def _pade(A, m):
+    """Aproximante de Padé [m/m] de exp(A): (V - U)⁻¹ (V + U)."""
+    b = PADE_COEFFICIENTS[m]
+    identity = np.eye(A.shape[0], dtype=A.dtype)
+    A2 = A @ A
+    if m == 13:
+        A4 = A2 @ A2
+        A6 = A4 @ A2
+        U = A @ (A6 @ (b[13] * A6 + b[11] * A4 + b[9] * A2) + b[7] * A6 + b[5] * A4 + b[3] * A2 + b[1] * identity)
+        V = A6 @ (b[12] * A6 + b[10] * A4 + b[8] * A2) + b[6] * A6 + b[4] * A4 + b[2] * A2 + b[0] * identity
+    else:
+        powers = [identity, A2]
+        while len(powers) < (m + 1) // 2:
+            powers.append(powers[-1] @ A2)
+        U = A @ sum(b[2 * j + 1] * P for j, P in enumerate(powers))
+        V = sum(b[2 * j] * P for j, P in enumerate(powers))
+    return np.linalg.solve(V - U, V + U)
+
+
+def _scaled_pade(A, m, s):
+    X = _pade(A / 2 ** s, m)
+    for _ in range(s):
+        X = X @ X
+    return X
+
+
+def expm_parameters(A):
+    """Grado de Padé y número de cuadrados (m, s) para ``A``."""
+    norm = np.linalg.norm(A, 1)
+    for m in (3, 5, 7, 9):
+        if norm <= PADE_THETAS[m]:
+            return m, 0
+    return 13, max(0, int(np.ceil(np.log2(norm / PADE_THETAS[13]))))
+
+
+def expm(A):
+    """
+    exp(A) por escalado y cuadrado.
+
+    Returns:
+        tuple: (exp(A), grado de Padé, número de cuadrados)
+    """
+    m, s = expm_parameters(A)
+    return _scaled_pade(A, m, s), m, s
+
+
+def expm_alternative(A, s):
+    """exp(A) con un cuadrado más que ``s`` (Padé 13), para estimar el error."""
+    return _scaled_pade(A, 13, s + 1)
+
+
+# --- Forma de Schur ---
+
+def _givens(x, y):
+    """Rotación unitaria [[c, s], [-s̄, c]] con c real que anula ``y`` en (x, y)."""
+    norm = np.hypot(abs(x), abs(y))
+    if norm == 0:
+        return 1.0, 0.0
+    if x == 0:
+        return 0.0, 1.0
+    c = abs(x) / norm
+    s = (x / abs(x)) * np.conj(y) / norm
+    return c, s
+
+
+def _rotate_rows(M, i, c, s, columns):
+    top = M[i, columns].copy()
+    bottom = M[i + 1, columns]
+    M[i, columns] = c * top + s * bottom
+    M[i + 1, columns] = -np.conj(s) * top + c * bottom
+
+
+def _rotate_columns(M, i, c, s, rows):
+    left = M[rows, i].copy()
+    right = M[rows, i + 1]
+    M[rows, i] = c * left + np.conj(s) * right
+    M[rows, i + 1] = -s * left + c * right
+
+
+def schur(A):
+    """
+    Descomposición de Schur compleja A = Q T Qᴴ.
+
+    Returns:
+        tuple: (T triangular superior, Q unitaria), ambas complejas
+
+    Raises:
+        np.linalg.LinAlgError: Si la iteración QR no converge
+    """
+    n = A.shape[0]
+    H = np.array(A, dtype=np.result_type(A.dtype, np.complex64))
+    Q = np.eye(n, dtype=H.dtype)
+    eps = np.finfo(H.real.dtype).eps
+
+    # Reducción a Hessenberg con reflexiones de Householder
+    for k in range(n - 2):
+        x = H[k + 1:, k]
+        norm = np.linalg.norm(x)
+        if norm == 0:
+            continue
+        phase = x[0] / abs(x[0]) if x[0] != 0 else 1.0
+        v = x.copy()
+        v[0] += phase * norm
+        v /= np.linalg.norm(v)
+        H[k + 1:, :] -= 2 * np.outer(v, v.conj() @ H[k + 1:, :])
+        H[:, k + 1:] -= 2 * np.outer(H[:, k + 1:] @ v, v.conj())
+        Q[:, k + 1:] -= 2 * np.outer(Q[:, k + 1:] @ v, v.conj())
+
+    def negligible(i):
+        return abs(H[i, i - 1]) <= eps * (abs(H[i, i]) + abs(H[i - 1, i - 1]))
+
+    # Iteración QR con desplazamiento de Wilkinson sobre el bloque activo [lo, hi]
+    hi = n - 1
+    iterations = 0
+    while hi > 0:
+        if negligible(hi):
+            H[hi, hi - 1] = 0
+            hi -= 1
+            iterations = 0
+            continue
+        iterations += 1
+        if iterations > 30 * n:
+            raise np.linalg.LinAlgError("La iteración QR de Schur no convergió")
+
+        lo = hi - 1
+        while lo > 0 and not negligible(lo):
+            lo -= 1
+        if lo > 0:
+            H[lo, lo - 1] = 0
+
+        a, b, c, d = H[hi - 1, hi - 1], H[hi - 1, hi], H[hi, hi - 1], H[hi, hi]
+        if iterations % 10 == 0:
+            # Desplazamiento excepcional para romper ciclos
+            shift = d + abs(c)
+        else:
+            half_trace = (a + d) / 2
+            root = np.sqrt(half_trace ** 2 - (a * d - b * c))
+            shift = min(half_trace + root, half_trace - root, key=lambda mu: abs(mu - d))
+
+        x, y = H[lo, lo] - shift, H[lo + 1, lo]
+        for k in range(lo, hi):
+            cos, sin = _givens(x, y)
+            _rotate_rows(H, k, cos, sin, slice(max(lo, k - 1), n))
+            _rotate_columns(H, k, cos, sin, slice(0, min(k + 3, hi + 1)))
+            _rotate_columns(Q, k, cos, sin, slice(0, n))
+            if k < hi - 1:
+                x, y = H[k + 1, k], H[k + 2, k]
+
+    return np.triu(H), Q
+
+
+def sqrtm_triangular(T):
+    """
+    Raíz cuadrada principal de una matriz triangular superior (Björck-Hammarling).
+
+    Raises:
+        np.linalg.LinAlgError: Si la raíz no existe (autovalor nulo repetido)
+    """
+    n = T.shape[0]
+    R = np.zeros_like(T)
+    for j in range(n):
+        R[j, j] = np.sqrt(T[j, j])
+        for i in range(j - 1, -1, -1):
+            denominator = R[i, i] + R[j, j]
+            numerator = T[i, j] - R[i, i + 1:j] @ R[i + 1:j, j]
+            if denominator == 0:
+                if numerator != 0:
+                    raise np.linalg.LinAlgError("La matriz no tiene raíz cuadrada")
+                continue
+            R[i, j] = numerator / denominator
+    return R
+
+
+def logm_triangular(T):
+    """
+    Logaritmo principal de una matriz triangular superior sin autovalores
+    nulos ni reales negativos, por escalado inverso y cuadrado.
+
+    Returns:
+        tuple: (log(T), número de raíces cuadradas tomadas)
+    """
+    n = T.shape[0]
+    identity = np.eye(n, dtype=T.dtype)
+    roots = 0
+    while np.linalg.norm(T - identity, 1) > LOGM_THETA:
+        if roots == MAX_SQUARE_ROOTS:
+            raise np.linalg.LinAlgError("El escalado inverso del logaritmo no convergió")
+        T = sqrtm_triangular(T)
+        roots += 1
+
+    # Padé de log(I + X) en fracciones parciales: Σ w_j X (I + x_j X)⁻¹
+    X = T - identity
+    nodes, weights = np.polynomial.legendre.leggauss(LOGM_PADE_DEGREE)
+    L = sum(
+        (weight / 2) * np.linalg.solve(identity + ((node + 1) / 2) * X, X)
+        for node, weight in zip(nodes, weights)
+    )
+    return 2 ** roots * L, roots
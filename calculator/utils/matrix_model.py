@@ -4,31 +4,97 @@
 Lógica pura para operaciones matriciales usando NumPy.
 
 Este módulo levanta excepciones de dominio definidas en `exceptions.py`.
-Todas las salidas numéricas usan np.float64 y las entradas son validadas.
+Las funciones que llaman a BLAS/LAPACK aplican la política de hilos de `blas.py`.
+Las entradas son validadas. Las funciones ``safe_*`` aceptan ``precision``
+('float64' por defecto, o 'float32'): los operandos se convierten a ese tipo y
+las salidas lo conservan. float32 usa la mitad de ancho de banda de memoria y
+las rutinas LAPACK de simple precisión, a cambio de ~7 dígitos significativos.
 """
 
 from typing import Any
 import numpy as np
 
 from calculator.utils.exceptions import InvalidMatrixError, NumericError, MatrixModelError
+from calculator.utils.blas import blas_policy
+from calculator.utils import iterative, matrix_functions, rank_revealing
 
 __all__ = [
     "parse_matrix",
     "safe_add",
     "safe_subtract",
     "safe_dot",
+    "safe_chain_dot",
+    "matrix_chain_order",
+    "chain_dims",
     "safe_inv",
     "safe_det",
     "safe_transpose",
     # Nuevas funciones v3.0
     "safe_eigenvalues",
+    "safe_eig",
     "safe_rank",
     "safe_svd",
     "safe_qr",
     "safe_lu",
     "safe_cholesky",
+    # Mínimos cuadrados y pseudoinversa
+    "safe_lstsq",
+    "safe_pinv",
+    "safe_inv_or_pinv",
+    # Rango y subespacios (QR con pivoteo o SVD)
+    "safe_column_space",
+    "safe_null_space",
+    "safe_rref",
+    "RANK_METHODS",
+    # Funciones de matrices
+    "safe_matrix_power",
+    "safe_expm",
+    "safe_sqrtm",
+    "safe_logm",
+    # Solvers iterativos
+    "safe_cg",
+    "safe_gmres",
+    # Pilas de matrices (N x n x n)
+    "safe_stack_det",
+    "safe_stack_inv",
+    "safe_stack_solve",
+    "safe_stack_eigh",
+    "PRECISIONS",
+    "resolve_dtype",
+    "condition_threshold",
 ]
 
+# Precisión de cómputo -> dtype de NumPy
+PRECISIONS = {
+    'float64': np.float64,
+    'float32': np.float32,
+}
+
+# Umbral de condición en float64: con cond > 1e12 quedan ~4 dígitos fiables.
+# En otras precisiones se escala por el épsilon para conservar los mismos
+# dígitos fiables (float32: ~1.9e3).
+CONDITION_THRESHOLD = 1e12
+
+
+def resolve_dtype(precision: str = 'float64') -> type:
+    """dtype de NumPy para una precisión ('float64' o 'float32')."""
+    try:
+        return PRECISIONS[precision or 'float64']
+    except KeyError:
+        raise InvalidMatrixError(
+            f"Precisión no soportada: {precision} (opciones: {', '.join(PRECISIONS)})."
+        ) from None
+
+
+def condition_threshold(precision: str = 'float64') -> float:
+    """Número de condición máximo aceptado para invertir en la precisión dada."""
+    eps = np.finfo(resolve_dtype(precision)).eps
+    return CONDITION_THRESHOLD * float(np.finfo(np.float64).eps / eps)
+
+
+def _as_array(A: Any, precision: str) -> np.ndarray:
+    return np.ascontiguousarray(A, dtype=resolve_dtype(precision))
+
 
 def parse_matrix(text: str, rows: int, cols: int, dtype=np.float64) -> np.ndarray:
     """
@@ -86,14 +152,14 @@ def parse_matrix(text: str, rows: int, cols: int, dtype=np.float64) -> np.ndarra
     return arr
 
 
-def safe_add(A: Any, B: Any) -> np.ndarray:
+def safe_add(A: Any, B: Any, precision: str = 'float64') -> np.ndarray:
     """
     Suma dos matrices A y B utilizando np.add.
     Lanza ValueError si las formas (shapes) de las matrices son incompatibles.
     """
-    # Normalizamos a float64 para consistencia numérica
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
-    B_np = np.ascontiguousarray(B, dtype=np.float64)
+    # Normalizamos a la precisión pedida para consistencia numérica
+    A_np = _as_array(A, precision)
+    B_np = _as_array(B, precision)
 
     if A_np.shape != B_np.shape:
         raise InvalidMatrixError(f"Shapes incompatibles para suma: A{A_np.shape} vs B{B_np.shape}.")
@@ -101,13 +167,13 @@ def safe_add(A: Any, B: Any) -> np.ndarray:
     return np.add(A_np, B_np)
 
 
-def safe_subtract(A: Any, B: Any) -> np.ndarray:
+def safe_subtract(A: Any, B: Any, precision: str = 'float64') -> np.ndarray:
     """
     Resta la matriz B de la matriz A (A - B) utilizando NumPy.
     Verifica shapes para compatibilidad y lanza ValueError si son incompatibles.
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
-    B_np = np.ascontiguousarray(B, dtype=np.float64)
+    A_np = _as_array(A, precision)
+    B_np = _as_array(B, precision)
 
     if A_np.shape != B_np.shape:
         raise InvalidMatrixError(f"Shapes incompatibles para resta: A{A_np.shape} vs B{B_np.shape}.")
@@ -115,17 +181,22 @@ def safe_subtract(A: Any, B: Any) -> np.ndarray:
     return np.subtract(A_np, B_np)
 
 
-def safe_inv(A: Any) -> np.ndarray:
+@blas_policy
+def safe_inv(A: Any, precision: str = 'float64') -> np.ndarray:
     """
     Calcula la inversa de A de forma segura.
     Lanza ValueError si la matriz no es cuadrada o si es singular/mal condicionada.
     """
-    # Convertimos a float64 para mayor robustez numérica
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
 
     if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
         raise ValueError(f"La matriz debe ser cuadrada para calcular la inversa (shape={A_np.shape}).")
 
+    return _checked_inverse(A_np, precision)[0]
+
+
+def _checked_inverse(A_np: np.ndarray, precision: str) -> tuple:
+    """Inversa de una matriz cuadrada ya validada y su número de condición."""
     # Comprobar condicionamiento numérico
     try:
         cond = np.linalg.cond(A_np)
@@ -137,25 +208,27 @@ def safe_inv(A: Any) -> np.ndarray:
     # La heurística anterior (1/eps) produce valores extremadamente grandes
     # (orden 1e16 para float64). Para la mayoría de aplicaciones numéricas
     # consideramos una matriz mal condicionada si su número de condición supera
-    # 1e12 — este umbral es una elección pragmática que detecta problemas
-    # numéricos reales sin ser excesivamente restrictivo.
-    threshold = 1e12
+    # 1e12 en float64 — este umbral es una elección pragmática que detecta
+    # problemas numéricos reales sin ser excesivamente restrictivo. En float32
+    # se escala por el épsilon (ver ``condition_threshold``).
+    threshold = condition_threshold(precision)
     if not np.isfinite(cond) or cond > threshold:
         raise NumericError(f"La matriz está mal condicionada o es singular (condición={cond:.3e}). No es segura para invertir.")
 
     try:
         inv = np.linalg.inv(A_np)
-        return inv
+        return inv, float(cond)
     except np.linalg.LinAlgError as exc:
         raise NumericError("La matriz es singular y no tiene inversa.") from exc
 
 
-def safe_det(A: Any) -> float:
+@blas_policy
+def safe_det(A: Any, precision: str = 'float64') -> float:
     """
     Calcula el determinante de A (np.linalg.det).
     Lanza ValueError si la matriz no es cuadrada.
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
 
     if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
         raise InvalidMatrixError(f"La matriz debe ser cuadrada para calcular el determinante (shape={A_np.shape}).")
@@ -166,13 +239,14 @@ def safe_det(A: Any) -> float:
         raise NumericError("Error al calcular el determinante.") from exc
 
 
-def safe_dot(A: Any, B: Any) -> np.ndarray:
+@blas_policy
+def safe_dot(A: Any, B: Any, precision: str = 'float64') -> np.ndarray:
     """
     Realiza la multiplicación matricial A @ B (np.matmul) validando shapes.
     Lanza ValueError si las dimensiones no son compatibles para la multiplicación.
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
-    B_np = np.ascontiguousarray(B, dtype=np.float64)
+    A_np = _as_array(A, precision)
+    B_np = _as_array(B, precision)
 
     if A_np.ndim != 2 or B_np.ndim != 2:
         raise InvalidMatrixError(f"Ambos operandos deben ser matrices 2D. Got shapes: A{A_np.shape}, B{B_np.shape}")
@@ -186,18 +260,112 @@ def safe_dot(A: Any, B: Any) -> np.ndarray:
         raise NumericError("Error al multiplicar las matrices.") from exc
 
 
-def safe_transpose(A: Any) -> np.ndarray:
-    """Return the transpose of A as a contiguous np.float64 2D array.
+def matrix_chain_order(dims: list) -> tuple:
+    """
+    Orden óptimo de un producto en cadena (programación dinámica, O(k³)).
+
+    La matriz i de la cadena tiene forma dims[i] x dims[i + 1]; el costo se
+    cuenta en flops (2 · m · n · p por producto m x n por n x p).
+
+    Returns:
+        tuple: (flops del orden óptimo, tabla de cortes ``split[i][j]``)
+    """
+    count = len(dims) - 1
+    cost = [[0] * count for _ in range(count)]
+    split = [[0] * count for _ in range(count)]
+    for length in range(2, count + 1):
+        for i in range(count - length + 1):
+            j = i + length - 1
+            cost[i][j], split[i][j] = min(
+                (cost[i][k] + cost[k + 1][j] + 2 * dims[i] * dims[k + 1] * dims[j + 1], k)
+                for k in range(i, j)
+            )
+    return cost[0][count - 1], split
+
+
+def chain_flops_left_to_right(dims: list) -> int:
+    """Flops del producto en cadena evaluado de izquierda a derecha."""
+    return sum(2 * dims[0] * dims[k] * dims[k + 1] for k in range(1, len(dims) - 1))
+
+
+def chain_dims(shapes: list) -> list:
+    """
+    Dimensiones de una cadena a partir de las formas (rows, cols) de sus matrices.
+
+    Raises:
+        InvalidMatrixError: Si hay menos de dos matrices o formas incompatibles
+    """
+    if len(shapes) < 2:
+        raise InvalidMatrixError("El producto en cadena requiere al menos dos matrices.")
+    for position, (left, right) in enumerate(zip(shapes, shapes[1:]), start=1):
+        if left[1] != right[0]:
+            raise InvalidMatrixError(
+                f"Shapes incompatibles en la cadena: la matriz {position} es {left[0]}x{left[1]} "
+                f"y la {position + 1} es {right[0]}x{right[1]}."
+            )
+    return [shapes[0][0]] + [cols for _, cols in shapes]
+
+
+@blas_policy
+def safe_chain_dot(*matrices: Any, precision: str = 'float64') -> dict:
+    """
+    Producto A1 · A2 · ... · Ak en el orden de menor costo.
+
+    Returns:
+        dict: {'result': np.ndarray, 'order': parentización ("((M1 M2) M3)"),
+        'flops': int, 'naive_flops': int (de izquierda a derecha)}
+    """
+    arrays = [_as_array(M, precision) for M in matrices]
+    if any(M.ndim != 2 for M in arrays):
+        raise InvalidMatrixError("Todos los operandos deben ser matrices 2D.")
+    dims = chain_dims([M.shape for M in arrays])
+    flops, split = matrix_chain_order(dims)
+
+    def multiply(i, j):
+        if i == j:
+            return arrays[i], f"M{i + 1}"
+        left, left_order = multiply(i, split[i][j])
+        right, right_order = multiply(split[i][j] + 1, j)
+        return np.matmul(left, right), f"({left_order} {right_order})"
+
+    try:
+        result, order = multiply(0, len(arrays) - 1)
+    except Exception as exc:
+        raise NumericError("Error al multiplicar la cadena de matrices.") from exc
+    return {'result': result, 'order': order, 'flops': flops, 'naive_flops': chain_flops_left_to_right(dims)}
+
+
+def safe_transpose(A: Any, precision: str = 'float64') -> np.ndarray:
+    """Return the transpose of A as a 2D array in the requested precision.
 
     Raises InvalidMatrixError if input is not 2D.
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
     if A_np.ndim != 2:
         raise InvalidMatrixError(f"El operando debe ser una matriz 2D (shape={A_np.shape}).")
     return A_np.T
 
 
-def safe_eigenvalues(A: Any) -> dict:
+@blas_policy
+def safe_eig(A: Any, precision: str = 'float64') -> tuple:
+    """
+    Valores y vectores propios como arrays (posiblemente complejos).
+    
+    Returns:
+        tuple: (valores, vectores) de np.linalg.eig; los autovectores son las columnas
+    """
+    A_np = _as_array(A, precision)
+    
+    if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
+        raise InvalidMatrixError(f"La matriz debe ser cuadrada para calcular valores propios (shape={A_np.shape}).")
+    
+    try:
+        return np.linalg.eig(A_np)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("El cálculo de valores propios no convergió.") from exc
+
+
+def safe_eigenvalues(A: Any, precision: str = 'float64') -> dict:
     """
     Calcula valores y vectores propios de una matriz cuadrada.
     
@@ -207,72 +375,80 @@ def safe_eigenvalues(A: Any) -> dict:
             'eigenvectors': [[...], ...]  # Columnas son los autovectores
         }
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    vals, vecs = safe_eig(A, precision=precision)
+    # Formatear valores propios (manejo de complejos)
+    vals_list = []
+    for v in vals:
+        if np.iscomplex(v):
+            vals_list.append({'real': float(v.real), 'imag': float(v.imag), 'is_complex': True})
+        else:
+            vals_list.append({'real': float(v.real), 'imag': 0.0, 'is_complex': False})
+            
+    # Los vectores propios en numpy son las columnas de 'vecs'.
+    # Para visualización fácil, convertimos a lista de listas standard (filas)
+    # pero mantenemos la estructura numérica.
+    # Nota: Los autovectores pueden ser complejos si los autovalores lo son.
+    # Por simplicidad en JSON, tomamos la parte real si es complejo, o notificamos.
+    # Para v3.0 MVP: Retornamos representación string si es complejo para evitar errores de JSON simples,
+    # o estructuras separadas.
     
-    if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
-        raise InvalidMatrixError(f"La matriz debe ser cuadrada para calcular valores propios (shape={A_np.shape}).")
-
-    try:
-        vals, vecs = np.linalg.eig(A_np)
-        
-        # Formatear valores propios (manejo de complejos)
-        vals_list = []
-        for v in vals:
-            if np.iscomplex(v):
-                vals_list.append({'real': float(v.real), 'imag': float(v.imag), 'is_complex': True})
+    # Enfoque robusto: Convertir a listas de componentes reales/imag para vectores también sería ideal,
+    # pero muy verboso. Convertiremos a listas de floats tomando parte real si la imaginaria es despreciable,
+    # o string complex representation si no.
+    
+    vecs_formatted = []
+    for row in vecs:
+        row_formatted = []
+        for val in row:
+            if np.iscomplex(val) and not np.isclose(val.imag, 0):
+                row_formatted.append(str(val)) # Fallback a string para complejos
             else:
-                vals_list.append({'real': float(v.real), 'imag': 0.0, 'is_complex': False})
-                
-        # Los vectores propios en numpy son las columnas de 'vecs'.
-        # Para visualización fácil, convertimos a lista de listas standard (filas)
-        # pero mantenemos la estructura numérica.
-        # Nota: Los autovectores pueden ser complejos si los autovalores lo son.
-        # Por simplicidad en JSON, tomamos la parte real si es complejo, o notificamos.
-        # Para v3.0 MVP: Retornamos representación string si es complejo para evitar errores de JSON simples,
-        # o estructuras separadas.
-        
-        # Enfoque robusto: Convertir a listas de componentes reales/imag para vectores también sería ideal,
-        # pero muy verboso. Convertiremos a listas de floats tomando parte real si la imaginaria es despreciable,
-        # o string complex representation si no.
-        
-        vecs_formatted = []
-        for row in vecs:
-            row_formatted = []
-            for val in row:
-                if np.iscomplex(val) and not np.isclose(val.imag, 0):
-                    row_formatted.append(str(val)) # Fallback a string para complejos
-                else:
-                    row_formatted.append(float(val.real))
-            vecs_formatted.append(row_formatted)
+                row_formatted.append(float(val.real))
+        vecs_formatted.append(row_formatted)
 
-        return {
-            'eigenvalues': vals_list,
-            'eigenvectors': vecs_formatted
-        }
-    except np.linalg.LinAlgError as exc:
-        raise NumericError("El cálculo de valores propios no convergió.") from exc
+    return {
+        'eigenvalues': vals_list,
+        'eigenvectors': vecs_formatted
+    }
 
 
-def safe_rank(A: Any) -> int:
-    """Calcula el rango matricial usando SVD."""
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+@blas_policy
+def safe_rank(A: Any, precision: str = 'float64', method: str = 'svd', rcond: float = None) -> int:
+    """
+    Calcula el rango matricial.
+
+    ``method`` 'svd' (valores singulares, más robusto) o 'qr' (QR con pivoteo
+    de columnas, más barato y se detiene en el rango). ``rcond`` como en
+    ``safe_pinv``.
+    """
+    A_np = _as_array(A, precision)
+    _check_rank_method(method)
+    if A_np.ndim != 2 or A_np.size == 0:
+        raise InvalidMatrixError(f"Se esperaba una matriz 2D no vacía (shape={A_np.shape}).")
+    rcond = _resolve_rcond(rcond, A_np)
     try:
-        return int(np.linalg.matrix_rank(A_np))
-    except Exception as exc:
+        if method == 'qr':
+            return rank_revealing.rank_qr(A_np, rcond)
+        s = np.linalg.svd(A_np, compute_uv=False)
+        return int(np.count_nonzero(s > rcond * s[0])) if s[0] > 0 else 0
+    except np.linalg.LinAlgError as exc:
          raise NumericError("Error al calcular el rango de la matriz.") from exc
 
 
-def safe_svd(A: Any) -> dict:
+@blas_policy
+def safe_svd(A: Any, as_arrays: bool = False, precision: str = 'float64') -> dict:
     """
     Calcula la descomposición en valores singulares (SVD).
     A = U * S * Vh
     
     Returns:
-        dict: {'U': list, 'S': list, 'Vh': list}
+        dict: {'U': list, 'S': list, 'Vh': list} (np.ndarray con ``as_arrays``)
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
     try:
         u, s, vh = np.linalg.svd(A_np, full_matrices=True)
+        if as_arrays:
+            return {'U': u, 'S': s, 'Vh': vh}
         return {
             'U': u.tolist(),
             'S': s.tolist(), # Valores singulares (vector 1D)
@@ -282,17 +458,20 @@ def safe_svd(A: Any) -> dict:
         raise NumericError("El cálculo SVD no convergió.") from exc
 
 
-def safe_qr(A: Any) -> dict:
+@blas_policy
+def safe_qr(A: Any, as_arrays: bool = False, precision: str = 'float64') -> dict:
     """
     Calcula la descomposición QR.
     A = Q * R
     
     Returns:
-        dict: {'Q': list, 'R': list}
+        dict: {'Q': list, 'R': list} (np.ndarray con ``as_arrays``)
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
     try:
         q, r = np.linalg.qr(A_np)
+        if as_arrays:
+            return {'Q': q, 'R': r}
         return {
             'Q': q.tolist(),
             'R': r.tolist()
@@ -301,23 +480,734 @@ def safe_qr(A: Any) -> dict:
         raise NumericError("Error en la descomposición QR.") from exc
 
 
-def safe_cholesky(A: Any) -> list:
+@blas_policy
+def safe_cholesky(A: Any, precision: str = 'float64') -> np.ndarray:
     """
     Calcula la descomposición de Cholesky.
     A = L * L.H
     
     Requiere que la matriz sea Hermítica (simétrica si real) y definida positiva.
+    Devuelve L como np.ndarray en la precisión pedida.
     """
-    A_np = np.ascontiguousarray(A, dtype=np.float64)
+    A_np = _as_array(A, precision)
     
     if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
         raise InvalidMatrixError(f"La matriz debe ser cuadrada (shape={A_np.shape}).")
         
     try:
-        L = np.linalg.cholesky(A_np)
-        return L.tolist()
+        return np.linalg.cholesky(A_np)
     except np.linalg.LinAlgError:
         raise NumericError(
             "La matriz no es definida positiva. La descomposición de Cholesky require "
             "una matriz simétrica y definida positiva."
         )
+
+
+# --- Mínimos cuadrados y pseudoinversa ---
+#
+# Una sola SVD reducida de A (precedida de QR si A es alta: la SVD se hace
+# sobre R, n x n) da el rango, los valores singulares y la solución: los
+# valores singulares <= rcond * σ_max se tratan como cero.
+
+def _resolve_rcond(rcond: Any, A_np: np.ndarray) -> float:
+    """``rcond`` validado; por defecto max(m, n) * eps, como NumPy."""
+    if rcond is None:
+        return float(max(A_np.shape) * np.finfo(A_np.dtype).eps)
+    if isinstance(rcond, bool) or not isinstance(rcond, (int, float)) or not 0 <= rcond < 1:
+        raise InvalidMatrixError(f"rcond debe ser un número en [0, 1) (recibido: {rcond!r}).")
+    return float(rcond)
+
+
+def _truncated_svd(A_np: np.ndarray, rcond: float) -> dict:
+    """
+    SVD reducida truncada al rango numérico de A.
+
+    Returns:
+        dict: {'U', 'S', 'Vh'} de rango ``rank``, 'singular_values' (todos),
+        'rank' y 'method' ('qr+svd' o 'svd')
+    """
+    if A_np.ndim != 2 or A_np.size == 0:
+        raise InvalidMatrixError(f"Se esperaba una matriz 2D no vacía (shape={A_np.shape}).")
+    m, n = A_np.shape
+    try:
+        if m > n:
+            Q, R = np.linalg.qr(A_np)
+            U, s, Vh = np.linalg.svd(R)
+            U = Q @ U
+            method = 'qr+svd'
+        else:
+            U, s, Vh = np.linalg.svd(A_np, full_matrices=False)
+            method = 'svd'
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("El cálculo SVD no convergió.") from exc
+    if not np.isfinite(s).all():
+        raise NumericError("La matriz contiene valores no finitos.")
+
+    rank = int(np.count_nonzero(s > rcond * s[0])) if s[0] > 0 else 0
+    return {
+        'U': U[:, :rank], 'S': s[:rank], 'Vh': Vh[:rank],
+        'singular_values': s, 'rank': rank, 'method': method,
+    }
+
+
+def _pseudo_inverse(svd: dict) -> np.ndarray:
+    return (svd['Vh'].T / svd['S']) @ svd['U'].T
+
+
+def _svd_info(svd: dict, rcond: float) -> dict:
+    return {
+        'rank': svd['rank'],
+        'singular_values': svd['singular_values'].tolist(),
+        'rcond': rcond,
+        'method': svd['method'],
+    }
+
+
+@blas_policy
+def safe_lstsq(A: Any, B: Any, rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Solución de mínimo cuadrado (y mínima norma) de A X ≈ B, con A de m x n
+    cualquiera y B de m filas.
+
+    Returns:
+        dict: {'result': X (n x k), 'residuals': ||A x_j - b_j|| por columna,
+        'rank', 'singular_values', 'rcond', 'method'}
+    """
+    A_np = _as_array(A, precision)
+    B_np = _as_array(B, precision)
+    if B_np.ndim == 1:
+        B_np = B_np.reshape(-1, 1)
+    if A_np.ndim != 2 or B_np.ndim != 2 or B_np.shape[0] != A_np.shape[0]:
+        raise InvalidMatrixError(
+            f"B debe tener tantas filas como A (A: {A_np.shape}, B: {B_np.shape})."
+        )
+    rcond = _resolve_rcond(rcond, A_np)
+    svd = _truncated_svd(A_np, rcond)
+
+    X = svd['Vh'].T @ ((svd['U'].T @ B_np) / svd['S'][:, np.newaxis])
+    residuals = np.linalg.norm(A_np @ X - B_np, axis=0)
+    return {'result': X, 'residuals': residuals.tolist(), **_svd_info(svd, rcond)}
+
+
+@blas_policy
+def safe_pinv(A: Any, rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Pseudoinversa de Moore-Penrose A⁺ (n x m) de una matriz m x n.
+
+    Returns:
+        dict: {'result': A⁺, 'rank', 'singular_values', 'rcond', 'method'}
+    """
+    A_np = _as_array(A, precision)
+    rcond = _resolve_rcond(rcond, A_np)
+    svd = _truncated_svd(A_np, rcond)
+    return {'result': _pseudo_inverse(svd), **_svd_info(svd, rcond)}
+
+
+@blas_policy
+def safe_inv_or_pinv(A: Any, rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Inversa de A o, si A no es cuadrada, es singular o su condición supera
+    ``condition_threshold``, su pseudoinversa. Ambas salen de la misma SVD.
+
+    Returns:
+        dict: {'result', 'pseudo_inverse': si se usó la pseudoinversa,
+        'condition_number' (None si A es singular), 'rank', 'singular_values',
+        'rcond', 'method'}
+    """
+    A_np = _as_array(A, precision)
+    rcond = _resolve_rcond(rcond, A_np)
+    svd = _truncated_svd(A_np, rcond)
+    s = svd['singular_values']
+    cond = float(s[0] / s[-1]) if s[-1] > 0 else None
+
+    square = A_np.shape[0] == A_np.shape[1]
+    invertible = square and svd['rank'] == A_np.shape[0] and cond <= condition_threshold(precision)
+    return {
+        'result': _pseudo_inverse(svd),
+        'pseudo_inverse': not invertible,
+        'condition_number': cond,
+        **_svd_info(svd, rcond),
+    }
+
+
+# --- Rango y subespacios ---
+#
+# Bases del espacio columna y nulo y forma escalonada reducida por QR con
+# pivoteo de columnas ('qr', ver ``rank_revealing``) o por SVD ('svd').
+# Retornan un dict con el resultado ('result'), el rango y los parámetros.
+
+RANK_METHODS = ('qr', 'svd')
+
+
+def _check_rank_method(method: str) -> None:
+    if method not in RANK_METHODS:
+        raise InvalidMatrixError(f"Método desconocido: {method} (opciones: {', '.join(RANK_METHODS)}).")
+
+
+def _subspace_input(A: Any, method: str, rcond: Any, precision: str) -> tuple:
+    _check_rank_method(method)
+    A_np = _as_array(A, precision)
+    if A_np.ndim != 2 or A_np.size == 0:
+        raise InvalidMatrixError(f"Se esperaba una matriz 2D no vacía (shape={A_np.shape}).")
+    return A_np, _resolve_rcond(rcond, A_np)
+
+
+def _basis_or_zero(basis: np.ndarray) -> np.ndarray:
+    """Una base vacía (subespacio {0}) se representa con un vector columna nulo."""
+    return basis if basis.shape[1] else np.zeros((basis.shape[0], 1), dtype=basis.dtype)
+
+
+@blas_policy
+def safe_column_space(A: Any, method: str = 'qr', rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Base ortonormal del espacio columna de A.
+
+    Returns:
+        dict: {'result': base m x rank, 'rank', 'pivot_columns' (columnas de A
+        independientes; solo 'qr'), 'method', 'rcond'}
+    """
+    A_np, rcond = _subspace_input(A, method, rcond, precision)
+    pivot_columns = None
+    try:
+        if method == 'qr':
+            basis, pivots = rank_revealing.column_space_qr(A_np, rcond)
+            pivot_columns = pivots.tolist()
+        else:
+            basis = _truncated_svd(A_np, rcond)['U']
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("Error al calcular el espacio columna.") from exc
+    return {
+        'result': _basis_or_zero(basis), 'rank': basis.shape[1], 'pivot_columns': pivot_columns,
+        'method': method, 'rcond': rcond,
+    }
+
+
+@blas_policy
+def safe_null_space(A: Any, method: str = 'qr', rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Base ortonormal del espacio nulo de A (n x nulidad; un vector nulo si la
+    nulidad es 0).
+
+    Returns:
+        dict: {'result', 'rank', 'nullity', 'method', 'rcond'}
+    """
+    A_np, rcond = _subspace_input(A, method, rcond, precision)
+    try:
+        if method == 'qr':
+            basis, rank = rank_revealing.null_space_qr(A_np, rcond)
+        else:
+            # Vh completa (n x n): solo hace falta full_matrices si A es ancha
+            _, s, Vh = np.linalg.svd(A_np, full_matrices=A_np.shape[0] < A_np.shape[1])
+            rank = int(np.count_nonzero(s > rcond * s[0])) if s[0] > 0 else 0
+            basis = Vh[rank:].T
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("Error al calcular el espacio nulo.") from exc
+    return {
+        'result': _basis_or_zero(basis), 'rank': rank, 'nullity': basis.shape[1],
+        'method': method, 'rcond': rcond,
+    }
+
+
+@blas_policy
+def safe_rref(A: Any, method: str = 'qr', rcond: float = None, precision: str = 'float64') -> dict:
+    """
+    Forma escalonada reducida por filas de A (m x n, filas nulas al final).
+
+    Se calcula sobre una base del espacio fila obtenida con ``method``, de
+    modo que el rango lo decide la QR con pivoteo o la SVD y no la
+    eliminación gaussiana.
+
+    Returns:
+        dict: {'result', 'rank', 'pivot_columns', 'method', 'rcond'}
+    """
+    A_np, rcond = _subspace_input(A, method, rcond, precision)
+    try:
+        if method == 'qr':
+            rows = rank_revealing.row_basis_qr(A_np, rcond)
+        else:
+            svd = _truncated_svd(A_np, rcond)
+            rows = svd['S'][:, np.newaxis] * svd['Vh']
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("Error al calcular la forma escalonada.") from exc
+
+    tol = max(rcond, 10 * max(A_np.shape) * np.finfo(A_np.dtype).eps)
+    reduced, pivots = rank_revealing.rref(rows, rows.shape[0], tol)
+    result = np.zeros_like(A_np)
+    result[:reduced.shape[0]] = reduced
+    return {'result': result, 'rank': len(pivots), 'pivot_columns': pivots, 'method': method, 'rcond': rcond}
+
+
+# --- Funciones de matrices ---
+#
+# Potencia entera, exponencial, raíz cuadrada y logaritmo (ver
+# ``matrix_functions``). Retornan un dict con el resultado ('result') y una
+# estimación del error relativo ('error_estimate') más los parámetros del
+# algoritmo usados.
+
+# |k| máximo de safe_matrix_power (32 cuadrados como mucho)
+MAX_POWER_EXPONENT = 2 ** 32
+
+
+def _as_square(A: Any, precision: str) -> np.ndarray:
+    A_np = _as_array(A, precision)
+    if A_np.ndim != 2 or A_np.shape[0] != A_np.shape[1]:
+        raise InvalidMatrixError(f"La matriz debe ser cuadrada (shape={A_np.shape}).")
+    return A_np
+
+
+def _finite_result(X: np.ndarray, operation: str) -> np.ndarray:
+    if not np.isfinite(X).all():
+        raise NumericError(f"{operation}: el resultado desborda la precisión de cómputo.")
+    return X
+
+
+def _relative_residual(residual: np.ndarray, A: np.ndarray) -> float:
+    norm = np.linalg.norm(A)
+    return float(np.linalg.norm(residual) / norm) if norm else 0.0
+
+
+def _real_schur(A_np: np.ndarray, operation: str) -> tuple:
+    """
+    Forma de Schur compleja de una matriz real cuyos autovalores permiten una
+    función principal real (ninguno real negativo ni, para el logaritmo, nulo).
+    """
+    try:
+        T, Q = matrix_functions.schur(A_np)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError(f"{operation}: la descomposición de Schur no convergió.") from exc
+    eigenvalues = np.diag(T)
+    tolerance = np.sqrt(np.finfo(A_np.dtype).eps) * max(1.0, float(np.abs(eigenvalues).max(initial=0.0)))
+    if np.any((np.abs(eigenvalues.imag) <= tolerance) & (eigenvalues.real < -tolerance)):
+        raise NumericError(
+            f"{operation}: la matriz tiene autovalores reales negativos; su función principal no es real."
+        )
+    return T, Q
+
+
+def _real_part(X: np.ndarray, dtype, operation: str) -> np.ndarray:
+    tolerance = np.sqrt(np.finfo(dtype).eps) * max(1.0, float(np.abs(X).max(initial=0.0)))
+    if np.abs(X.imag).max(initial=0.0) > tolerance:
+        raise NumericError(f"{operation}: el resultado principal no es real.")
+    return np.ascontiguousarray(X.real, dtype=dtype)
+
+
+@blas_policy
+def safe_matrix_power(A: Any, k: int, precision: str = 'float64') -> dict:
+    """
+    Potencia entera A^k por cuadrados sucesivos (O(log |k|) productos).
+
+    Con k < 0 se eleva la inversa (la matriz debe ser invertible). La
+    estimación de error es la cota a priori del redondeo de los productos,
+    products · n · u · ||B||₁^|k| / ||B^|k|||₁ con B = A o A⁻¹, más |k| · cond(A) · u
+    si hubo que invertir.
+
+    Returns:
+        dict: {'result': np.ndarray, 'error_estimate': float, 'products': int}
+    """
+    A_np = _as_square(A, precision)
+    if isinstance(k, bool) or not isinstance(k, (int, np.integer)):
+        raise InvalidMatrixError(f"El exponente debe ser un entero (recibido: {k!r}).")
+    k = int(k)
+    if abs(k) > MAX_POWER_EXPONENT:
+        raise InvalidMatrixError(f"El exponente no puede superar {MAX_POWER_EXPONENT} en valor absoluto.")
+
+    unit_roundoff = float(np.finfo(A_np.dtype).eps) / 2
+    base, inverse_error = A_np, 0.0
+    if k < 0:
+        base, cond = _checked_inverse(A_np, precision)
+        inverse_error = abs(k) * cond * unit_roundoff
+
+    X, products = matrix_functions.matrix_power(base, abs(k))
+    _finite_result(X, "Potencia")
+
+    error = inverse_error
+    norm_x = np.linalg.norm(X, 1)
+    if products and norm_x:
+        # En logaritmos: ||B||^|k| puede desbordar aunque B^k no lo haga
+        log_ratio = abs(k) * np.log(np.linalg.norm(base, 1)) - np.log(norm_x)
+        error += products * A_np.shape[0] * unit_roundoff * float(np.exp(min(log_ratio, 700.0)))
+    return {'result': X, 'error_estimate': error, 'products': products}
+
+
+@blas_policy
+def safe_expm(A: Any, precision: str = 'float64') -> dict:
+    """
+    Exponencial de matriz por escalado y cuadrado con Padé [m/m].
+
+    La estimación de error es la diferencia relativa con el mismo cálculo con
+    un cuadrado más (Padé 13 sobre A / 2^(s+1)): ambos tienen error de
+    truncamiento despreciable, así que difieren por redondeo y
+    condicionamiento.
+
+    Returns:
+        dict: {'result': np.ndarray, 'error_estimate': float,
+        'pade_degree': int, 'squarings': int}
+    """
+    A_np = _as_square(A, precision)
+    try:
+        with np.errstate(over='ignore', invalid='ignore'):
+            X, degree, squarings = matrix_functions.expm(A_np)
+            _finite_result(X, "Exponencial")
+            alternative = matrix_functions.expm_alternative(A_np, squarings)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("Exponencial: el aproximante de Padé es singular.") from exc
+
+    norm_x = np.linalg.norm(X, 1)
+    error = float(np.linalg.norm(X - alternative, 1) / norm_x) if norm_x else 0.0
+    return {
+        'result': X,
+        'error_estimate': error if np.isfinite(error) else 1.0,
+        'pade_degree': degree,
+        'squarings': squarings,
+    }
+
+
+@blas_policy
+def safe_sqrtm(A: Any, precision: str = 'float64') -> dict:
+    """
+    Raíz cuadrada principal por la forma de Schur (Björck-Hammarling).
+
+    La matriz no puede tener autovalores reales negativos (su raíz principal
+    sería compleja). La estimación de error es el residuo relativo
+    ||X² - A||_F / ||A||_F.
+
+    Returns:
+        dict: {'result': np.ndarray, 'error_estimate': float}
+    """
+    A_np = _as_square(A, precision)
+    T, Q = _real_schur(A_np, "Raíz cuadrada")
+    try:
+        R = matrix_functions.sqrtm_triangular(T)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError("Raíz cuadrada: la matriz no tiene raíz cuadrada (autovalor nulo defectivo).") from exc
+    X = _finite_result(_real_part(Q @ R @ Q.conj().T, A_np.dtype, "Raíz cuadrada"), "Raíz cuadrada")
+    return {'result': X, 'error_estimate': _relative_residual(X @ X - A_np, A_np)}
+
+
+@blas_policy
+def safe_logm(A: Any, precision: str = 'float64') -> dict:
+    """
+    Logaritmo principal por la forma de Schur (escalado inverso y cuadrado).
+
+    La matriz debe ser invertible y sin autovalores reales negativos. La
+    estimación de error es el residuo relativo ||exp(X) - A||_F / ||A||_F.
+
+    Returns:
+        dict: {'result': np.ndarray, 'error_estimate': float, 'square_roots': int}
+    """
+    A_np = _as_square(A, precision)
+    T, Q = _real_schur(A_np, "Logaritmo")
+    eigenvalues = np.abs(np.diag(T))
+    if eigenvalues.size and eigenvalues.min() <= np.finfo(A_np.dtype).eps * eigenvalues.max():
+        raise NumericError("Logaritmo: la matriz es singular; el logaritmo no existe.")
+    try:
+        L, roots = matrix_functions.logm_triangular(T)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError(f"Logaritmo: {exc}.") from exc
+    X = _finite_result(_real_part(Q @ L @ Q.conj().T, A_np.dtype, "Logaritmo"), "Logaritmo")
+    with np.errstate(over='ignore', invalid='ignore'):
+        residual = _relative_residual(matrix_functions.expm(X)[0] - A_np, A_np)
+    return {'result': X, 'error_estimate': residual if np.isfinite(residual) else 1.0, 'square_roots': roots}
+
+# --- Solvers iterativos ---
+#
+# CG y GMRES (ver ``iterative``) para A x = b con b de una columna. No
+# converger dentro de ``max_iter`` no es un error: se informa en 'converged'
+# junto con el historial de residuos relativos.
+
+ITERATIVE_TOL = 1e-8
+GMRES_RESTART = 30
+# max_iter por defecto: ITERATIVE_MAX_ITER_FACTOR * n
+ITERATIVE_MAX_ITER_FACTOR = 10
+
+
+def _iterative_system(A: Any, b: Any, x0: Any, tol: Any, max_iter: Any, preconditioner: str,
+                      precision: str) -> tuple:
+    """Valida y normaliza los argumentos comunes de los solvers iterativos."""
+    A_np = _as_square(A, precision)
+    n = A_np.shape[0]
+    b_np = _as_array(b, precision)
+    if b_np.size != n or (b_np.ndim == 2 and b_np.shape[1] != 1) or b_np.ndim > 2:
+        raise InvalidMatrixError(f"b debe ser un vector columna de {n} filas (shape={b_np.shape}).")
+    x0_np = np.zeros(n, dtype=A_np.dtype) if x0 is None else _as_array(x0, precision).reshape(-1).copy()
+    if x0_np.size != n:
+        raise InvalidMatrixError(f"La solución inicial debe tener {n} filas (recibidas: {x0_np.size}).")
+
+    tol = ITERATIVE_TOL if tol is None else tol
+    if isinstance(tol, bool) or not isinstance(tol, (int, float)) or not 0 < tol < 1:
+        raise InvalidMatrixError(f"La tolerancia debe ser un número en (0, 1) (recibida: {tol!r}).")
+    max_iter = ITERATIVE_MAX_ITER_FACTOR * n if max_iter is None else max_iter
+    if isinstance(max_iter, bool) or not isinstance(max_iter, int) or max_iter < 1:
+        raise InvalidMatrixError(f"max_iter debe ser un entero positivo (recibido: {max_iter!r}).")
+    if preconditioner not in iterative.PRECONDITIONERS:
+        raise InvalidMatrixError(
+            f"Precondicionador desconocido: {preconditioner} (opciones: {', '.join(iterative.PRECONDITIONERS)})."
+        )
+    return A_np, b_np.reshape(-1), x0_np, float(tol), max_iter
+
+
+def _iterative_result(A_np, b_np, x, history, converged, **params) -> dict:
+    if not np.isfinite(x).all() or not np.isfinite(history).all():
+        raise NumericError("El solver iterativo divergió (valores no finitos).")
+    b_norm = np.linalg.norm(b_np) or 1.0
+    return {
+        'result': x.reshape(-1, 1),
+        'converged': bool(converged),
+        'iterations': len(history) - 1,
+        'residual_norm': float(np.linalg.norm(b_np - A_np @ x) / b_norm),
+        'history': history,
+        **params,
+    }
+
+
+@blas_policy
+def safe_cg(A: Any, b: Any, x0: Any = None, tol: float = None, max_iter: int = None,
+            preconditioner: str = 'jacobi', precision: str = 'float64') -> dict:
+    """
+    Resuelve A x = b con gradiente conjugado precondicionado (A simétrica
+    definida positiva).
+
+    Args:
+        x0: Solución inicial (warm start); por defecto ceros
+        tol: Residuo relativo ||b - A x|| / ||b|| objetivo (por defecto 1e-8)
+        max_iter: Máximo de iteraciones (por defecto 10 n)
+        preconditioner: 'none', 'jacobi' o 'ichol'
+
+    Returns:
+        dict: {'result': x (n x 1), 'converged', 'iterations', 'residual_norm',
+        'history', 'tol', 'max_iter', 'preconditioner'}
+    """
+    A_np, b_np, x0_np, tol, max_iter = _iterative_system(A, b, x0, tol, max_iter, preconditioner, precision)
+    scale = max(1.0, float(np.abs(A_np).max(initial=0.0)))
+    if np.abs(A_np - A_np.T).max(initial=0.0) > np.sqrt(np.finfo(A_np.dtype).eps) * scale:
+        raise InvalidMatrixError("El gradiente conjugado requiere una matriz simétrica (use GMRES).")
+    try:
+        apply = iterative.preconditioner(A_np, preconditioner)
+        x, history, converged = iterative.conjugate_gradient(A_np, b_np, x0_np, tol, max_iter, apply)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError(f"Gradiente conjugado: {exc}.") from exc
+    return _iterative_result(
+        A_np, b_np, x, history, converged, tol=tol, max_iter=max_iter, preconditioner=preconditioner
+    )
+
+
+@blas_policy
+def safe_gmres(A: Any, b: Any, x0: Any = None, tol: float = None, max_iter: int = None,
+               restart: int = None, preconditioner: str = 'jacobi', precision: str = 'float64') -> dict:
+    """
+    Resuelve A x = b con GMRES(restart) precondicionado por la derecha.
+
+    Args:
+        x0, tol, max_iter: Como en ``safe_cg``
+        restart: Dimensión del subespacio de Krylov antes de reiniciar (por defecto min(n, 30))
+        preconditioner: 'none' o 'jacobi'
+
+    Returns:
+        dict: como ``safe_cg`` más 'restart'
+    """
+    A_np, b_np, x0_np, tol, max_iter = _iterative_system(A, b, x0, tol, max_iter, preconditioner, precision)
+    if preconditioner == 'ichol':
+        raise InvalidMatrixError("El precondicionador ichol solo aplica a matrices simétricas (use CG).")
+    restart = min(A_np.shape[0], GMRES_RESTART) if restart is None else restart
+    if isinstance(restart, bool) or not isinstance(restart, int) or restart < 1:
+        raise InvalidMatrixError(f"restart debe ser un entero positivo (recibido: {restart!r}).")
+    try:
+        apply = iterative.preconditioner(A_np, preconditioner)
+        x, history, converged = iterative.gmres(A_np, b_np, x0_np, tol, max_iter, restart, apply)
+    except np.linalg.LinAlgError as exc:
+        raise NumericError(f"GMRES: {exc}.") from exc
+    return _iterative_result(
+        A_np, b_np, x, history, converged,
+        tol=tol, max_iter=max_iter, restart=restart, preconditioner=preconditioner
+    )
+
+# --- Pilas de matrices ---
+#
+# Las funciones ``safe_stack_*`` operan sobre arrays 3D (N, n, n) con las
+# rutinas vectorizadas de np.linalg (un solo bucle en C sobre la pila). Un
+# elemento problemático no aborta la pila: se marca como inválido en la máscara
+# ``valid`` (con su motivo en ``errors``) y su resultado queda a NaN.
+#
+# Todas retornan un dict {'values': np.ndarray, 'valid': np.ndarray[bool],
+# 'errors': {índice: motivo}}; ``valid`` de entrada permite propagar una
+# máscara previa (elementos ya inválidos en la pila operando).
+
+
+def _as_stack(S: Any, precision: str, name: str = "La pila") -> np.ndarray:
+    S_np = _as_array(S, precision)
+    if S_np.ndim != 3:
+        raise InvalidMatrixError(f"{name} debe ser un array 3D (N x filas x columnas) (shape={S_np.shape}).")
+    return S_np
+
+
+def _as_square_stack(S: Any, precision: str) -> np.ndarray:
+    S_np = _as_stack(S, precision)
+    if S_np.shape[1] != S_np.shape[2]:
+        raise InvalidMatrixError(f"Las matrices de la pila deben ser cuadradas (shape={S_np.shape}).")
+    return S_np
+
+
+def _initial_mask(S_np: np.ndarray, valid: Any, errors: dict) -> np.ndarray:
+    """Máscara de partida: la recibida y, además, sin valores no finitos."""
+    mask = np.ones(len(S_np), dtype=bool) if valid is None else np.array(valid, dtype=bool)
+    if mask.shape != (len(S_np),):
+        raise InvalidMatrixError(f"La máscara debe tener un valor por elemento de la pila ({len(S_np)}).")
+    for i in np.flatnonzero(~mask):
+        errors[int(i)] = "Elemento enmascarado en la pila operando."
+    finite = np.isfinite(S_np).all(axis=(1, 2))
+    for i in np.flatnonzero(mask & ~finite):
+        errors[int(i)] = "La matriz contiene valores no finitos."
+    return mask & finite
+
+
+def _mask_ill_conditioned(S_np: np.ndarray, mask: np.ndarray, errors: dict, precision: str) -> None:
+    """Enmascara los elementos singulares o mal condicionados (mismo umbral que ``safe_inv``)."""
+    index = np.flatnonzero(mask)
+    if index.size == 0:
+        return
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cond = np.linalg.cond(S_np[index])
+    threshold = condition_threshold(precision)
+    for i, c in zip(index, cond):
+        if not np.isfinite(c) or c > threshold:
+            mask[i] = False
+            errors[int(i)] = f"La matriz está mal condicionada o es singular (condición={c:.3e})."
+
+
+def _apply_valid(func, mask: np.ndarray, errors: dict, *stacks: np.ndarray):
+    """
+    Aplica ``func`` de una vez sobre los elementos válidos de las pilas.
+
+    Si LAPACK rechaza el lote completo (basta un elemento que falle), se repite
+    elemento a elemento y los que fallan se enmascaran.
+
+    Returns:
+        tuple: (índices calculados, salida de ``func`` para esos índices o None)
+    """
+    index = np.flatnonzero(mask)
+    if index.size == 0:
+        return index, None
+    try:
+        return index, func(*(s[index] for s in stacks))
+    except np.linalg.LinAlgError:
+        pass
+
+    done, outputs = [], []
+    for i in index:
+        try:
+            outputs.append(func(*(s[i:i + 1] for s in stacks)))
+            done.append(i)
+        except np.linalg.LinAlgError as exc:
+            mask[i] = False
+            errors[int(i)] = f"Error numérico: {exc}."
+    if not done:
+        return np.array(done, dtype=int), None
+    if isinstance(outputs[0], tuple):
+        return np.array(done), tuple(np.concatenate(parts) for parts in zip(*outputs))
+    return np.array(done), np.concatenate(outputs)
+
+
+@blas_policy
+def safe_stack_det(S: Any, valid: Any = None, precision: str = 'float64') -> dict:
+    """
+    Determinante de cada matriz de una pila (N, n, n).
+
+    Returns:
+        dict: {'values': (N,), 'valid': (N,) bool, 'errors': {índice: motivo}}
+    """
+    S_np = _as_square_stack(S, precision)
+    errors = {}
+    mask = _initial_mask(S_np, valid, errors)
+
+    values = np.full(len(S_np), np.nan, dtype=S_np.dtype)
+    index, dets = _apply_valid(np.linalg.det, mask, errors, S_np)
+    if dets is not None:
+        values[index] = dets
+    return {'values': values, 'valid': mask, 'errors': errors}
+
+
+@blas_policy
+def safe_stack_inv(S: Any, valid: Any = None, precision: str = 'float64') -> dict:
+    """
+    Inversa de cada matriz de una pila (N, n, n).
+
+    Las matrices singulares o mal condicionadas se enmascaran.
+
+    Returns:
+        dict: {'values': (N, n, n), 'valid': (N,) bool, 'errors': {índice: motivo}}
+    """
+    S_np = _as_square_stack(S, precision)
+    errors = {}
+    mask = _initial_mask(S_np, valid, errors)
+    _mask_ill_conditioned(S_np, mask, errors, precision)
+
+    values = np.full_like(S_np, np.nan)
+    index, inverses = _apply_valid(np.linalg.inv, mask, errors, S_np)
+    if inverses is not None:
+        values[index] = inverses
+    return {'values': values, 'valid': mask, 'errors': errors}
+
+
+@blas_policy
+def safe_stack_solve(S: Any, B: Any, valid: Any = None, precision: str = 'float64') -> dict:
+    """
+    Resuelve S[i] @ X[i] = B[i] para cada elemento de las pilas.
+
+    ``S`` es (N, n, n) y ``B`` (N, n, k). Los sistemas singulares o mal
+    condicionados se enmascaran.
+
+    Returns:
+        dict: {'values': (N, n, k), 'valid': (N,) bool, 'errors': {índice: motivo}}
+    """
+    S_np = _as_square_stack(S, precision)
+    B_np = _as_stack(B, precision, name="La pila de términos independientes")
+    if B_np.shape[0] != S_np.shape[0] or B_np.shape[1] != S_np.shape[1]:
+        raise InvalidMatrixError(
+            f"Shapes incompatibles para resolver: S{S_np.shape} vs B{B_np.shape}. "
+            "Se requiere el mismo número de elementos y B.filas == S.filas."
+        )
+    errors = {}
+    mask = _initial_mask(S_np, valid, errors)
+    finite_b = np.isfinite(B_np).all(axis=(1, 2))
+    for i in np.flatnonzero(mask & ~finite_b):
+        errors[int(i)] = "Los términos independientes contienen valores no finitos."
+    mask &= finite_b
+    _mask_ill_conditioned(S_np, mask, errors, precision)
+
+    values = np.full_like(B_np, np.nan)
+    index, solutions = _apply_valid(np.linalg.solve, mask, errors, S_np, B_np)
+    if solutions is not None:
+        values[index] = solutions
+    return {'values': values, 'valid': mask, 'errors': errors}
+
+
+@blas_policy
+def safe_stack_eigh(S: Any, valid: Any = None, precision: str = 'float64') -> dict:
+    """
+    Valores y vectores propios de cada matriz simétrica de una pila (N, n, n).
+
+    Las matrices no simétricas se enmascaran (np.linalg.eigh solo lee el
+    triángulo inferior y daría un resultado sin sentido).
+
+    Returns:
+        dict: {'values': (N, n) ascendentes, 'vectors': (N, n, n) por columnas,
+        'valid': (N,) bool, 'errors': {índice: motivo}}
+    """
+    S_np = _as_square_stack(S, precision)
+    errors = {}
+    mask = _initial_mask(S_np, valid, errors)
+    eps = np.finfo(S_np.dtype).eps
+    with np.errstate(invalid='ignore'):
+        scale = np.abs(S_np).max(axis=(1, 2), initial=0.0)
+        asymmetry = np.abs(S_np - S_np.transpose(0, 2, 1)).max(axis=(1, 2), initial=0.0)
+    symmetric = asymmetry <= np.sqrt(eps) * np.maximum(scale, 1.0)
+    for i in np.flatnonzero(mask & ~symmetric):
+        errors[int(i)] = "La matriz no es simétrica."
+    mask &= symmetric
+
+    values = np.full(S_np.shape[:2], np.nan, dtype=S_np.dtype)
+    vectors = np.full_like(S_np, np.nan)
+    index, result = _apply_valid(np.linalg.eigh, mask, errors, S_np)
+    if result is not None:
+        values[index], vectors[index] = result
+    return {'values': values, 'vectors': vectors, 'valid': mask, 'errors': errors}
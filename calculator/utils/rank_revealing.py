@@ -0,0 +1,164 @@
+"""rank_revealing.py
+
+Núcleos de QR con pivoteo de columnas (Businger-Golub) para el rango, las
+bases del espacio columna y del espacio nulo y la forma escalonada reducida
+que usan las funciones ``safe_*`` de ``matrix_model``.
+
+A P = Q R con |R₀₀| ≥ |R₁₁| ≥ ...: en cada paso se elige la columna restante
+de mayor norma, así que el rango numérico es el primer k con
+|R_kk| ≤ rcond · |R₀₀| y la factorización se detiene ahí (más barata cuanto
+menor es el rango). Si A es alta (m > n) se reduce antes con la QR de LAPACK
+sin pivoteo, A = Q₀ R₀, y el pivoteo trabaja sobre R₀ (n x n): las normas de
+columna, y por tanto los pivotes, son las mismas. Las funciones que no
+necesitan Q no la acumulan.
+
+NumPy no expone la QR con pivoteo (LAPACK geqp3), así que se calcula aquí; cada
+paso es una reflexión de Householder vectorizada sobre el bloque restante.
+
+Estas funciones no validan entradas: trabajan en el dtype de ``A``.
+"""
+
+import numpy as np
+
+
+def pivoted_qr(A, rcond, with_q=True):
+    """
+    QR con pivoteo de columnas, detenida en el rango numérico.
+
+    Las normas de las columnas restantes se actualizan restando R[k, j]² y se
+    recalculan solo cuando la resta pierde precisión (como LAPACK geqp3).
+
+    Returns:
+        tuple: (Q m x m ortogonal o None si no ``with_q``, R m x n (filas >=
+        rank sin reducir), permutación de columnas, rango)
+    """
+    m, n = A.shape
+    R = np.array(A, copy=True)
+    Q = np.eye(m, dtype=A.dtype) if with_q else None
+    perm = np.arange(n)
+    norms = np.einsum('ij,ij->j', R, R)
+    reference = norms.copy()
+    tiny = np.sqrt(np.finfo(R.dtype).eps)
+    threshold = None
+    rank = 0
+
+    for k in range(min(m, n)):
+        j = k + int(np.argmax(norms[k:]))
+        if j != k:
+            R[:, [k, j]] = R[:, [j, k]]
+            perm[[k, j]] = perm[[j, k]]
+            norms[[k, j]] = norms[[j, k]]
+            reference[[k, j]] = reference[[j, k]]
+
+        alpha = np.linalg.norm(R[k:, k])
+        if threshold is None:
+            threshold = rcond * alpha
+        if alpha == 0 or alpha <= threshold:
+            break
+
+        # Reflexión de Householder que anula R[k + 1:, k]
+        v = R[k:, k].copy()
+        v[0] += np.copysign(alpha, v[0])
+        v /= np.linalg.norm(v)
+        R[k:, k:] -= 2 * np.outer(v, v @ R[k:, k:])
+        if with_q:
+            Q[:, k:] -= 2 * np.outer(Q[:, k:] @ v, v)
+        R[k + 1:, k] = 0
+        rank += 1
+
+        norms[k + 1:] -= R[k, k + 1:] ** 2
+        stale = k + 1 + np.flatnonzero(norms[k + 1:] <= tiny * reference[k + 1:])
+        if stale.size:
+            norms[stale] = np.einsum('ij,ij->j', R[k + 1:, stale], R[k + 1:, stale])
+            reference[stale] = norms[stale]
+
+    return Q, R, perm, rank
+
+
+def _reduce(A, with_q=True):
+    """(Q₀, R₀) si A es alta (Q₀ None si no ``with_q``); (None, A) si no."""
+    if A.shape[0] > A.shape[1]:
+        if not with_q:
+            return None, np.linalg.qr(A, mode='r')
+        return np.linalg.qr(A)
+    return None, A
+
+
+def rank_qr(A, rcond):
+    # rank(A) = rank(Aᵀ): se reduce siempre la orientación alta
+    B = A if A.shape[0] >= A.shape[1] else A.T
+    return pivoted_qr(_reduce(B, with_q=False)[1], rcond, with_q=False)[3]
+
+
+def column_space_qr(A, rcond):
+    """
+    Base ortonormal del espacio columna.
+
+    Returns:
+        tuple: (base m x rank, índices de las columnas de A que la generan)
+    """
+    Q0, B = _reduce(A)
+    Q, _, perm, rank = pivoted_qr(B, rcond)
+    basis = Q[:, :rank]
+    if Q0 is not None:
+        basis = Q0 @ basis
+    return basis, np.sort(perm[:rank])
+
+
+def null_space_qr(A, rcond):
+    """
+    Base ortonormal del espacio nulo: complemento ortogonal del espacio fila.
+
+    Con la QR completa de LAPACK Aᵀ = Q₀ R₀, el espacio fila está en las
+    k = min(m, n) primeras columnas de Q₀ y el pivoteo solo trabaja sobre el
+    bloque R₀[:k] (k x m).
+
+    Returns:
+        tuple: (base n x (n - rank), rango)
+    """
+    k = min(A.shape)
+    Q0, R0 = np.linalg.qr(A.T, mode='complete')
+    Q1, _, _, rank = pivoted_qr(R0[:k], rcond)
+    return np.hstack([Q0[:, :k] @ Q1[:, rank:], Q0[:, k:]]), rank
+
+
+def row_basis_qr(A, rcond):
+    """Base (no ortonormal) del espacio fila: las ``rank`` primeras filas de R Pᵀ."""
+    B = _reduce(A, with_q=False)[1]
+    _, R, perm, rank = pivoted_qr(B, rcond, with_q=False)
+    rows = np.empty((rank, A.shape[1]), dtype=A.dtype)
+    rows[:, perm] = R[:rank]
+    return rows
+
+
+def rref(rows, rank, tol):
+    """
+    Forma escalonada reducida por Gauss-Jordan con pivoteo parcial de una base
+    del espacio fila (``rank`` filas linealmente independientes).
+
+    Las columnas cuyo mejor pivote no supera ``tol`` · max|rows| se consideran
+    dependientes; se paran al encontrar ``rank`` pivotes.
+
+    Returns:
+        tuple: (matriz rank x n en forma escalonada reducida, columnas pivote)
+    """
+    M = np.array(rows, copy=True)
+    n = M.shape[1]
+    cutoff = tol * (np.abs(M).max() if M.size else 0.0)
+    pivots = []
+    for j in range(n):
+        if len(pivots) == rank:
+            break
+        i = len(pivots)
+        p = i + int(np.argmax(np.abs(M[i:, j])))
+        if abs(M[p, j]) <= cutoff:
+            M[i:, j] = 0
+            continue
+        M[[i, p]] = M[[p, i]]
+        M[i] /= M[i, j]
+        others = np.arange(M.shape[0]) != i
+        M[others] -= np.outer(M[others, j], M[i])
+        M[others, j] = 0
+        pivots.append(j)
+    M[len(pivots):] = 0
+    return M, pivots
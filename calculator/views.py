@@ -5,103 +5,213 @@ Define los ViewSets y vistas función para operaciones matriciales,
 con rate limiting y manejo de errores.
 """
 
+import json
 import time
 import numpy as np
 from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Count, Avg, Q
-from rest_framework import viewsets, status
+from rest_framework import mixins, serializers as drf_serializers, viewsets, status
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
-from django.http import HttpResponse, FileResponse
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
 
-from calculator.models import Matrix, Operation
-from calculator.serializers import MatrixSerializer, OperationSerializer, StatsSerializer
+from calculator import compute_pool, events, metrics, profiling
+from calculator.components import DECOMPOSITIONS, decompose, result_encoding, save_components
+from calculator.models import Matrix, MatrixStack, Operation, StackOperation, StepTrace
+from calculator.ratelimit import chain_cost_ratelimit, cost_ratelimit, stack_cost_ratelimit
+from calculator.serializers import (
+    MatrixSerializer, OperationSerializer, StatsSerializer,
+    OperationComponentSerializer, OperationComponentDataSerializer,
+    MatrixStackSerializer, MatrixStackSummarySerializer, StackOperationSerializer,
+    StepTraceSerializer, StepTraceSummarySerializer,
+)
 from calculator.utils import (
-    parse_matrix, safe_add, safe_subtract, safe_dot,
+    glassbox, parse_matrix, safe_add, safe_subtract, safe_dot, safe_chain_dot, chain_dims,
     safe_inv, safe_det, safe_transpose,
-    safe_rank, safe_eigenvalues, safe_svd, safe_qr, safe_cholesky,
+    safe_rank, safe_column_space, safe_null_space, safe_rref, safe_cholesky, safe_lstsq, safe_pinv, safe_inv_or_pinv, resolve_dtype,
+    safe_matrix_power, safe_expm, safe_sqrtm, safe_logm, safe_cg, safe_gmres,
+    safe_stack_det, safe_stack_inv, safe_stack_solve, safe_stack_eigh,
     InvalidMatrixError, NumericError
 )
 
 
 # --- Helpers de Operación ---
 
-def _perform_matrix_operation(operation_type, matrix_a_id, matrix_b_id=None, extra_data=None):
+def _precision(request):
+    """Precisión de cómputo pedida en el body (``precision``: float64 | float32)."""
+    return request.data.get('precision') or 'float64'
+
+
+def _compute_operation(operation_type, matrix_a, matrix_b=None, extra_data=None, precision='float64',
+                       x0=None, observe=True):
+    """
+    Ejecuta la parte numérica de una operación sobre matrices ya cargadas.
+
+    No accede a la base de datos, por lo que puede ejecutarse en un executor
+    (ver ``async_views``) o en otro proceso (ver ``compute_pool``): de las
+    matrices solo usa ``name`` y ``array``. ``precision`` ('float64' o
+    'float32') es el tipo en que se convierten los operandos y se calcula el
+    resultado. ``x0`` es la solución inicial (warm start) de los solvers
+    iterativos, ya cargada. Con ``observe=False`` no se registran métricas
+    (las registra el proceso que atiende la petición).
+
+    Returns:
+        tuple: (resultado como np.ndarray 2D, nombre del resultado, extra_data,
+        componentes {nombre: np.ndarray} de una descomposición, tiempo en ms)
+    """
+    # Preparar operandos
+    dtype = resolve_dtype(precision)
+    A = np.array(matrix_a.array, dtype=dtype)
+    B = np.array(matrix_b.array, dtype=dtype) if matrix_b else None
+    params = extra_data or {}
+    rank_method = params.get('method') or settings.MATRIX_CONFIG['RANK_METHOD']
+    profiling.annotate(operation_type=operation_type, shape=f"{A.shape[0]}x{A.shape[1]}")
+    
+    # Mapeo de funciones de utilidad
+    ops_map = {
+        'SUM': lambda: (safe_add(A, B, precision=precision), f"Suma: {matrix_a.name} + {matrix_b.name}"),
+        'SUBTRACT': lambda: (safe_subtract(A, B, precision=precision), f"Resta: {matrix_a.name} - {matrix_b.name}"),
+        'MULTIPLY': lambda: (safe_dot(A, B, precision=precision), f"Producto: {matrix_a.name} × {matrix_b.name}"),
+        # Con ``fallback`` la inversa cae a la pseudoinversa (misma SVD) en vez de fallar
+        'INVERSE': lambda: (
+            safe_inv_or_pinv(A, params.get('rcond'), precision=precision) if params.get('fallback')
+            else safe_inv(A, precision=precision),
+            f"Inversa: {matrix_a.name}⁻¹"
+        ),
+        'PINV': lambda: (safe_pinv(A, params.get('rcond'), precision=precision), f"Pseudoinversa: {matrix_a.name}⁺"),
+        'LSTSQ': lambda: (
+            safe_lstsq(A, B, params.get('rcond'), precision=precision),
+            f"Mínimos cuadrados: {matrix_a.name} \\ {matrix_b.name}"
+        ),
+        'DETERMINANT': lambda: (np.array([[float(safe_det(A, precision=precision))]]), f"Det({matrix_a.name})"),
+        'TRANSPOSE': lambda: (safe_transpose(A, precision=precision), f"Transpuesta: {matrix_a.name}ᵀ"),
+        'RANK': lambda: (
+            {
+                'result': np.array([[float(safe_rank(A, precision, rank_method, params.get('rcond')))]]),
+                'method': rank_method,
+            },
+            f"Rank({matrix_a.name})"
+        ),
+        # Subespacios: QR con pivoteo o SVD según ``method``
+        'COLSPACE': lambda: (
+            safe_column_space(A, rank_method, params.get('rcond'), precision=precision), f"Col({matrix_a.name})"
+        ),
+        'NULLSPACE': lambda: (
+            safe_null_space(A, rank_method, params.get('rcond'), precision=precision), f"Nul({matrix_a.name})"
+        ),
+        'RREF': lambda: (safe_rref(A, rank_method, params.get('rcond'), precision=precision), f"RREF({matrix_a.name})"),
+        'CHOLESKY': lambda: (safe_cholesky(A, precision=precision), f"Cholesky-L({matrix_a.name})"),
+        # Funciones de matrices: retornan un dict con el resultado y su estimación de error
+        'POWER': lambda: (
+            safe_matrix_power(A, params.get('exponent'), precision=precision),
+            f"{matrix_a.name}^{params.get('exponent')}"
+        ),
+        'EXPM': lambda: (safe_expm(A, precision=precision), f"exp({matrix_a.name})"),
+        'SQRTM': lambda: (safe_sqrtm(A, precision=precision), f"sqrt({matrix_a.name})"),
+        'LOGM': lambda: (safe_logm(A, precision=precision), f"log({matrix_a.name})"),
+        # Solvers iterativos: A x = B con B de una columna
+        'CG': lambda: (
+            safe_cg(A, B, x0, params.get('tol'), params.get('max_iter'),
+                    params.get('preconditioner') or 'jacobi', precision=precision),
+            f"CG: {matrix_a.name} \\ {matrix_b.name}"
+        ),
+        'GMRES': lambda: (
+            safe_gmres(A, B, x0, params.get('tol'), params.get('max_iter'), params.get('restart'),
+                       params.get('preconditioner') or 'jacobi', precision=precision),
+            f"GMRES: {matrix_a.name} \\ {matrix_b.name}"
+        ),
+    }
+    # Descomposiciones: el resultado principal es uno de sus componentes
+    decomposition_names = {
+        'EIGEN': f"Eigenvals({matrix_a.name})",
+        'SVD': f"SVD-S({matrix_a.name})",
+        'QR': f"QR-Q({matrix_a.name})",
+    }
+
+    # Ejecución y timing
+    start_time = time.time()
+    
+    components = None
+    if operation_type in DECOMPOSITIONS:
+        res_arr, components = decompose(operation_type, A, precision=precision)
+        name = decomposition_names[operation_type]
+    else:
+        res_arr, name = ops_map[operation_type]()
+        if isinstance(res_arr, dict):
+            # El resto del dict (estimación de error, parámetros) va a extra_data
+            info = dict(res_arr)
+            res_arr = info.pop('result')
+            extra_data = {**(extra_data or {}), **info}
+        if isinstance(res_arr, list): res_arr = np.array(res_arr)
+
+    elapsed = time.time() - start_time
+    execution_time_ms = int(elapsed * 1000)
+    if observe:
+        metrics.observe_operation(operation_type, elapsed, A.shape, B.shape if B is not None else None)
+
+    return res_arr, name, extra_data, components, execution_time_ms
+
+
+def _perform_matrix_operation(operation_type, matrix_a_id, matrix_b_id=None, extra_data=None,
+                              precision='float64', x0_id=None):
     """
     Helper centralizado para ejecutar operaciones, medir tiempo y persistir resultados.
+
+    ``x0_id`` es una matriz guardada (p. ej. el resultado de una resolución
+    anterior) que los solvers iterativos usan como solución inicial.
     """
+    # Validar la precisión antes de cargar los operandos
+    resolve_dtype(precision)
     try:
         matrix_a = Matrix.objects.get(id=matrix_a_id)
         matrix_b = Matrix.objects.get(id=matrix_b_id) if matrix_b_id else None
+        x0 = Matrix.objects.get(id=x0_id).array if x0_id else None
     except Matrix.DoesNotExist:
         return Response({'error': 'Una o ambos matrices no existen'}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        # Preparar operandos
-        A = np.array(matrix_a.data, dtype=np.float64)
-        B = np.array(matrix_b.data, dtype=np.float64) if matrix_b else None
-        
-        # Mapeo de funciones de utilidad
-        ops_map = {
-            'SUM': lambda: (safe_add(A, B), f"Suma: {matrix_a.name} + {matrix_b.name}"),
-            'SUBTRACT': lambda: (safe_subtract(A, B), f"Resta: {matrix_a.name} - {matrix_b.name}"),
-            'MULTIPLY': lambda: (safe_dot(A, B), f"Producto: {matrix_a.name} × {matrix_b.name}"),
-            'INVERSE': lambda: (safe_inv(A), f"Inversa: {matrix_a.name}⁻¹"),
-            'DETERMINANT': lambda: (np.array([[float(safe_det(A))]]), f"Det({matrix_a.name})"),
-            'TRANSPOSE': lambda: (safe_transpose(A), f"Transpuesta: {matrix_a.name}ᵀ"),
-            'RANK': lambda: (np.array([[float(safe_rank(A))]]), f"Rank({matrix_a.name})"),
-            'EIGEN': lambda: (None, None), # Caso especial manejado abajo o via safe_eigenvalues directamente
-            'SVD': lambda: (None, None),
-            'QR': lambda: (None, None),
-            'CHOLESKY': lambda: (safe_cholesky(A), f"Cholesky-L({matrix_a.name})"),
-        }
-
-        # Ejecución y timing
-        start_time = time.time()
-        
-        # Casos especiales (v3.0) que retornan estructuras complejas
-        if operation_type in ['EIGEN', 'SVD', 'QR']:
-            if operation_type == 'EIGEN':
-                data = safe_eigenvalues(A)
-                # Resultado principal: autovalores como columna real
-                res_arr = np.array([[v['real']] for v in data['eigenvalues']])
-                name = f"Eigenvals({matrix_a.name})"
-            elif operation_type == 'SVD':
-                data = safe_svd(A)
-                res_arr = np.array([[v] for v in data['S']]) # Valores singulares
-                name = f"SVD-S({matrix_a.name})"
-            elif operation_type == 'QR':
-                data = safe_qr(A)
-                res_arr = np.array(data['Q'])
-                name = f"QR-Q({matrix_a.name})"
-            
-            extra_data = data # Guardar todo en JSON extra
+        operands = (matrix_a.array, matrix_b.array if matrix_b else None, x0)
+        if compute_pool.should_dispatch(*operands):
+            # Cómputo en el pool de procesos: solo viajan nombres y arrays
+            res_arr, name, extra_data, components, execution_time_ms = compute_pool.run_operation(
+                operation_type, matrix_a, matrix_b, extra_data, precision, x0
+            )
+            metrics.observe_operation(
+                operation_type, execution_time_ms / 1000, operands[0].shape,
+                operands[1].shape if matrix_b else None
+            )
         else:
-            res_arr, name = ops_map[operation_type]()
-            if isinstance(res_arr, list): res_arr = np.array(res_arr)
-
-        execution_time_ms = int((time.time() - start_time) * 1000)
+            res_arr, name, extra_data, components, execution_time_ms = _compute_operation(
+                operation_type, matrix_a, matrix_b, extra_data, precision, x0
+            )
 
-        # Persistir
-        result_matrix = Matrix.objects.create(
-            name=name,
-            rows=res_arr.shape[0],
-            cols=res_arr.shape[1],
-            data=res_arr.tolist()
-        )
+        # Persistir (un resultado float32 se guarda en float32 sin pérdida)
+        encoding = result_encoding(precision)
+        with transaction.atomic():
+            result_matrix = Matrix.objects.create(
+                name=name,
+                rows=res_arr.shape[0],
+                cols=res_arr.shape[1],
+                data=res_arr,
+                encoding=encoding
+            )
 
-        operation = Operation.objects.create(
-            operation_type=operation_type,
-            matrix_a=matrix_a,
-            matrix_b=matrix_b,
-            result=result_matrix,
-            execution_time_ms=execution_time_ms,
-            extra_data=extra_data
-        )
+            operation = Operation.objects.create(
+                operation_type=operation_type,
+                matrix_a=matrix_a,
+                matrix_b=matrix_b,
+                result=result_matrix,
+                execution_time_ms=execution_time_ms,
+                extra_data=extra_data,
+                precision=precision
+            )
+            if components:
+                save_components(operation, components, encoding)
 
         return Response(OperationSerializer(operation).data, status=status.HTTP_201_CREATED)
 
@@ -109,6 +219,66 @@ def _perform_matrix_operation(operation_type, matrix_a_id, matrix_b_id=None, ext
         raise
 
 
+def _perform_stack_operation(operation_type, stack_id, rhs_stack_id=None, precision='float64'):
+    """
+    Ejecuta una operación vectorizada sobre una pila y persiste las pilas resultado.
+
+    Los elementos que no se pueden calcular (singulares, no simétricos, ...)
+    quedan enmascarados en el resultado con su motivo en ``errors``; la
+    operación solo falla si la pila completa es inválida (formas, precisión).
+    """
+    resolve_dtype(precision)
+    try:
+        stack = MatrixStack.objects.get(id=stack_id)
+        rhs = MatrixStack.objects.get(id=rhs_stack_id) if rhs_stack_id else None
+    except MatrixStack.DoesNotExist:
+        return Response({'error': 'Una o ambas pilas no existen'}, status=status.HTTP_404_NOT_FOUND)
+    if operation_type == 'SOLVE' and rhs is None:
+        raise InvalidMatrixError("La resolución de sistemas requiere rhs_stack_id.")
+
+    S = stack.stack
+    profiling.annotate(operation_type=f"STACK_{operation_type}", shape=f"{S.shape[0]}x{S.shape[1]}x{S.shape[2]}")
+    start_time = time.time()
+    vectors = None
+    if operation_type == 'DETERMINANT':
+        out = safe_stack_det(S, valid=stack.mask, precision=precision)
+        values, name = out['values'].reshape(-1, 1, 1), f"Det({stack.name})"
+    elif operation_type == 'INVERSE':
+        out = safe_stack_inv(S, valid=stack.mask, precision=precision)
+        values, name = out['values'], f"Inversa: {stack.name}⁻¹"
+    elif operation_type == 'SOLVE':
+        out = safe_stack_solve(S, rhs.stack, valid=stack.mask & rhs.mask, precision=precision)
+        values, name = out['values'], f"Solución: {stack.name} \\ {rhs.name}"
+    else:
+        out = safe_stack_eigh(S, valid=stack.mask, precision=precision)
+        values, name = out['values'][:, :, np.newaxis], f"Eigenvals({stack.name})"
+        vectors = out['vectors']
+    elapsed = time.time() - start_time
+    metrics.observe_operation(f"STACK_{operation_type}", elapsed, S.shape[1:])
+
+    invalid_items = sorted(out['errors'])
+    encoding = result_encoding(precision)
+    with transaction.atomic():
+        result = MatrixStack.objects.create(
+            name=name, stack=values, invalid_items=invalid_items, encoding=encoding
+        )
+        vectors_stack = MatrixStack.objects.create(
+            name=f"Eigenvecs({stack.name})", stack=vectors, invalid_items=invalid_items, encoding=encoding
+        ) if vectors is not None else None
+        operation = StackOperation.objects.create(
+            operation_type=operation_type,
+            stack=stack,
+            rhs=rhs,
+            result=result,
+            vectors=vectors_stack,
+            errors={str(i): out['errors'][i] for i in invalid_items},
+            execution_time_ms=int(elapsed * 1000),
+            precision=precision
+        )
+
+    return Response(StackOperationSerializer(operation).data, status=status.HTTP_201_CREATED)
+
+
 # --- ViewSets ---
 def ratelimit_viewset(rate):
     def decorator(cls):
@@ -134,6 +304,11 @@ class MatrixViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'name', 'rows', 'cols']
     ordering = ['-created_at']
     
+    def perform_destroy(self, instance):
+        # El borrado cascada a operaciones: los clientes recalculan sus stats
+        super().perform_destroy(instance)
+        events.publish_on_commit('stats.resync', {'reason': 'matrix_deleted'})
+    
     @action(detail=True, methods=['get'])
     def export_csv(self, request, pk=None):
         """
@@ -241,7 +416,11 @@ class OperationViewSet(viewsets.ReadOnlyModelViewSet):
     Permite listar y ver detalles de operaciones realizadas,
     con filtros por tipo y fecha.
     """
-    queryset = Operation.objects.all().select_related('matrix_a', 'matrix_b', 'result')
+    queryset = (
+        Operation.objects.all()
+        .select_related('matrix_a__payload', 'matrix_b__payload', 'result__payload')
+        .prefetch_related('components')
+    )
     serializer_class = OperationSerializer
     filterset_fields = ['operation_type']
     ordering_fields = ['created_at', 'execution_time_ms']
@@ -263,51 +442,324 @@ class OperationViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(created_at__lte=date_to)
         
         return queryset
+    
+    @action(detail=True, methods=['get'])
+    def components(self, request, pk=None):
+        """
+        Lista los componentes de una descomposición (nombre y forma, sin datos).
+        GET /api/operations/{id}/components/
+        """
+        operation = self.get_object()
+        return Response(OperationComponentSerializer(operation.components.all(), many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path=r'components/(?P<name>[\w-]+)')
+    def component(self, request, pk=None, name=None):
+        """
+        Devuelve los datos de un componente (U, S, Vh, Q, R, eigenvalues, ...).
+        GET /api/operations/{id}/components/{name}/
+        """
+        operation = self.get_object()
+        component = operation.components.select_related('payload').filter(name=name).first()
+        if component is None:
+            return Response(
+                {'error': f'La operación no tiene el componente {name}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(OperationComponentDataSerializer(component).data)
+
+
+@method_decorator(ratelimit(key='ip', rate='100/m', method='POST'), name='create')
+@method_decorator(ratelimit(key='ip', rate='100/m', method='DELETE'), name='destroy')
+class MatrixStackViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet para pilas de matrices (N matrices de la misma forma).
+    
+    Las pilas no se modifican: las operaciones crean pilas nuevas. El listado
+    no incluye los datos.
+    """
+    queryset = MatrixStack.objects.all()
+    serializer_class = MatrixStackSerializer
+    filterset_fields = ['name', 'count', 'rows', 'cols']
+    ordering_fields = ['created_at', 'name', 'count']
+    ordering = ['-created_at']
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return MatrixStackSummarySerializer
+        return super().get_serializer_class()
+
+
+class StackOperationViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet de solo lectura para el historial de operaciones sobre pilas."""
+    queryset = StackOperation.objects.all().select_related(
+        'stack', 'rhs', 'result__payload', 'vectors__payload'
+    )
+    serializer_class = StackOperationSerializer
+    filterset_fields = ['operation_type']
+    ordering_fields = ['created_at', 'execution_time_ms']
+    ordering = ['-created_at']
+
+
+def _page_param(request, name, default, maximum):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if not 0 <= value <= maximum:
+        raise drf_serializers.ValidationError({name: f"Debe ser un entero entre 0 y {maximum}."})
+    return value
+
+
+@method_decorator(ratelimit(key='ip', rate='30/m', method='POST'), name='create')
+@method_decorator(ratelimit(key='ip', rate='100/m', method='DELETE'), name='destroy')
+class StepTraceViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet de trazas paso a paso (modo GlassBox).
+    
+    POST {matrix, algorithm, keyframe_interval?} ejecuta el algoritmo y guarda
+    sus pasos como deltas; los estados intermedios se reconstruyen al pedirlos
+    por páginas (``steps``), de uno en uno (``steps/{index}``) o en stream
+    NDJSON (``stream``).
+    """
+    queryset = StepTrace.objects.all()
+    serializer_class = StepTraceSerializer
+    filterset_fields = ['algorithm', 'matrix']
+    ordering_fields = ['created_at', 'step_count']
+    ordering = ['-created_at']
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return StepTraceSummarySerializer
+        return super().get_serializer_class()
+    
+    def perform_create(self, serializer):
+        matrix = serializer.validated_data['matrix']
+        algorithm = serializer.validated_data['algorithm']
+        interval = (
+            serializer.validated_data.get('keyframe_interval')
+            or settings.MATRIX_CONFIG['GLASSBOX_KEYFRAME_INTERVAL']
+            or glassbox.default_interval(matrix.rows, matrix.cols)
+        )
+        profiling.annotate(operation_type=f"TRACE_{algorithm}", shape=f"{matrix.rows}x{matrix.cols}")
+        start_time = time.time()
+        trace = glassbox.record(matrix.array, algorithm, interval)
+        elapsed = time.time() - start_time
+        metrics.observe_operation(f"TRACE_{algorithm}", elapsed, (matrix.rows, matrix.cols))
+        serializer.save(
+            step_count=len(trace['steps']),
+            keyframe_interval=interval,
+            keyframes=trace['keyframes'],
+            steps=trace['steps'].tobytes(),
+            rank=len(trace['pivot_columns']),
+            pivot_columns=trace['pivot_columns'],
+            execution_time_ms=int(elapsed * 1000),
+        )
+    
+    @action(detail=True, methods=['get'])
+    def steps(self, request, pk=None):
+        """
+        Página de pasos con el estado tras cada uno.
+        GET /api/traces/{id}/steps/?offset=0&limit=100&states=false
+        """
+        trace = self.get_object()
+        page_size = settings.MATRIX_CONFIG['GLASSBOX_PAGE_SIZE']
+        offset = _page_param(request, 'offset', 0, trace.step_count)
+        limit = _page_param(request, 'limit', page_size, page_size)
+        stop = min(offset + limit, trace.step_count)
+        steps = trace.step_array
+        
+        if request.query_params.get('states', 'true').lower() in ('0', 'false', 'no'):
+            items = [glassbox.step_data(steps[i], i) for i in range(offset, stop)]
+        else:
+            items = [
+                {**glassbox.step_data(steps[i], i), 'state': state.tolist()}
+                for i, state in trace.replay(offset, stop)
+            ]
+        return Response({'count': trace.step_count, 'offset': offset, 'limit': limit, 'steps': items})
+    
+    @action(detail=True, methods=['get'], url_path=r'steps/(?P<index>-?\d+)')
+    def step(self, request, pk=None, index=None):
+        """
+        Un paso con el estado tras él (``-1``: la matriz inicial).
+        GET /api/traces/{id}/steps/{index}/
+        """
+        trace = self.get_object()
+        index = int(index)
+        if not -1 <= index < trace.step_count:
+            return Response(
+                {'error': f'La traza tiene {trace.step_count} pasos'}, status=status.HTTP_404_NOT_FOUND
+            )
+        data = glassbox.step_data(trace.step_array[index], index) if index >= 0 else {'index': -1}
+        return Response({**data, 'state': trace.state_after(index).tolist()})
+    
+    @action(detail=True, methods=['get'])
+    def stream(self, request, pk=None):
+        """
+        Todos los pasos desde ``start`` con su estado, una línea JSON por paso.
+        GET /api/traces/{id}/stream/?start=0
+        """
+        trace = self.get_object()
+        start = _page_param(request, 'start', 0, trace.step_count)
+        steps = trace.step_array
+        lines = (
+            json.dumps({**glassbox.step_data(steps[i], i), 'state': state.tolist()}) + '\n'
+            for i, state in trace.replay(start, trace.step_count)
+        )
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
 # Vistas función para operaciones matriciales
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('SUM')
 def sum_matrices(request):
     """Suma dos matrices."""
-    return _perform_matrix_operation('SUM', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'))
+    return _perform_matrix_operation(
+        'SUM', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'), precision=_precision(request)
+    )
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('SUBTRACT')
 def subtract_matrices(request):
     """Resta dos matrices."""
-    return _perform_matrix_operation('SUBTRACT', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'))
+    return _perform_matrix_operation(
+        'SUBTRACT', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'), precision=_precision(request)
+    )
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('MULTIPLY')
 def multiply_matrices(request):
     """Multiplica dos matrices."""
-    return _perform_matrix_operation('MULTIPLY', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'))
+    return _perform_matrix_operation(
+        'MULTIPLY', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'), precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@chain_cost_ratelimit('CHAIN_MULTIPLY')
+def chain_multiply_matrices(request):
+    """
+    Multiplica una cadena de matrices (``matrix_ids``) en el orden óptimo.
+
+    Las formas se validan con ``rows``/``cols`` guardados antes de cargar los
+    datos. ``extra_data`` incluye la parentización usada y los flops
+    ahorrados frente al orden de izquierda a derecha.
+    """
+    precision = _precision(request)
+    resolve_dtype(precision)
+    matrix_ids = request.data.get('matrix_ids')
+    if not isinstance(matrix_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in matrix_ids):
+        raise InvalidMatrixError("matrix_ids debe ser una lista de IDs de matrices.")
+    max_length = settings.MATRIX_CONFIG['MAX_CHAIN_LENGTH']
+    if len(matrix_ids) > max_length:
+        raise InvalidMatrixError(f"La cadena admite como máximo {max_length} matrices.")
+
+    shapes = {
+        pk: (rows, cols)
+        for pk, rows, cols in Matrix.objects.filter(id__in=matrix_ids).values_list('id', 'rows', 'cols')
+    }
+    if any(i not in shapes for i in matrix_ids):
+        return Response({'error': 'Una o más matrices no existen'}, status=status.HTTP_404_NOT_FOUND)
+    chain_dims([shapes[i] for i in matrix_ids])
+
+    matrices = Matrix.objects.in_bulk(set(matrix_ids))
+    chain = [matrices[i] for i in matrix_ids]
+    profiling.annotate(operation_type='CHAIN_MULTIPLY', shape=f"{len(chain)} matrices")
+
+    start_time = time.time()
+    out = safe_chain_dot(*(matrix.array for matrix in chain), precision=precision)
+    elapsed = time.time() - start_time
+    metrics.observe_operation('CHAIN_MULTIPLY', elapsed, *(shapes[i] for i in matrix_ids))
+
+    res_arr = out['result']
+    extra_data = {
+        'matrix_ids': matrix_ids,
+        'order': out['order'],
+        'flops': out['flops'],
+        'naive_flops': out['naive_flops'],
+        'flops_saved': out['naive_flops'] - out['flops'],
+    }
+    with transaction.atomic():
+        result_matrix = Matrix.objects.create(
+            name=f"Producto: {' × '.join(matrix.name for matrix in chain)}"[:200],
+            rows=res_arr.shape[0],
+            cols=res_arr.shape[1],
+            data=res_arr,
+            encoding=result_encoding(precision)
+        )
+        operation = Operation.objects.create(
+            operation_type='CHAIN_MULTIPLY',
+            matrix_a=chain[0],
+            matrix_b=chain[-1],
+            result=result_matrix,
+            execution_time_ms=int(elapsed * 1000),
+            extra_data=extra_data,
+            precision=precision
+        )
+    return Response(OperationSerializer(operation).data, status=status.HTTP_201_CREATED)
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('INVERSE')
 def inverse_matrix(request):
-    """Calcula la inversa de una matriz."""
-    return _perform_matrix_operation('INVERSE', request.data.get('matrix_id'))
+    """
+    Calcula la inversa de una matriz.
+
+    Con ``fallback: true`` una matriz singular, mal condicionada o no cuadrada
+    devuelve su pseudoinversa (``extra_data.pseudo_inverse``) en vez de un error.
+    """
+    extra_data = None
+    if request.data.get('fallback'):
+        extra_data = {'fallback': True, 'rcond': request.data.get('rcond')}
+    return _perform_matrix_operation(
+        'INVERSE', request.data.get('matrix_id'), extra_data=extra_data, precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('PINV')
+def pseudo_inverse_matrix(request):
+    """Calcula la pseudoinversa de Moore-Penrose (``rcond`` opcional)."""
+    return _perform_matrix_operation(
+        'PINV', request.data.get('matrix_id'), extra_data={'rcond': request.data.get('rcond')},
+        precision=_precision(request)
+    )
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('LSTSQ')
+def lstsq_matrices(request):
+    """Resuelve A X ≈ B por mínimos cuadrados (A de cualquier forma)."""
+    if not request.data.get('matrix_b_id'):
+        raise InvalidMatrixError("LSTSQ requiere matrix_b_id.")
+    return _perform_matrix_operation(
+        'LSTSQ', request.data.get('matrix_a_id'), request.data.get('matrix_b_id'),
+        extra_data={'rcond': request.data.get('rcond')}, precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('DETERMINANT')
 def determinant_matrix(request):
     """Calcula el determinante de una matriz."""
     # El helper ya guarda el resultado como 1x1, podemos añadir lógica extra si es necesario
-    return _perform_matrix_operation('DETERMINANT', request.data.get('matrix_id'))
+    return _perform_matrix_operation('DETERMINANT', request.data.get('matrix_id'), precision=_precision(request))
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='50/m', method='POST')
+@cost_ratelimit('TRANSPOSE')
 def transpose_matrix(request):
     """Calcula la transpuesta de una matriz."""
-    return _perform_matrix_operation('TRANSPOSE', request.data.get('matrix_id'))
+    return _perform_matrix_operation('TRANSPOSE', request.data.get('matrix_id'), precision=_precision(request))
 
 
 
@@ -385,36 +837,185 @@ def stats_view(request):
     return Response(serializer.data)
 
 
+def metrics_view(request):
+    """
+    Expone las métricas de runtime en formato de texto Prometheus.
+
+    Con PROMETHEUS_MULTIPROC_DIR configurado agrega los valores de todos
+    los workers de gunicorn de la instancia.
+    """
+    content, content_type = metrics.render_metrics()
+    return HttpResponse(content, content_type=content_type)
+
+
 @api_view(['POST'])
-@ratelimit(key='ip', rate='30/m', method='POST')
+@cost_ratelimit('RANK')
 def calculate_rank(request):
-    """Calcula el rango de una matriz."""
-    return _perform_matrix_operation('RANK', request.data.get('matrix_id'))
+    """Calcula el rango de una matriz (``method``: svd | qr, ``rcond`` opcional)."""
+    return _perform_matrix_operation(
+        'RANK', request.data.get('matrix_id'), extra_data=_rank_params(request), precision=_precision(request)
+    )
+
+
+def _rank_params(request):
+    """``method`` y ``rcond`` del body de las operaciones de rango y subespacios."""
+    return {key: request.data[key] for key in ('method', 'rcond') if request.data.get(key) is not None}
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='20/m', method='POST')
+@cost_ratelimit('COLSPACE')
+def column_space(request):
+    """Base ortonormal del espacio columna y columnas pivote de una matriz."""
+    return _perform_matrix_operation(
+        'COLSPACE', request.data.get('matrix_id'), extra_data=_rank_params(request), precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('NULLSPACE')
+def null_space(request):
+    """Base ortonormal del espacio nulo de una matriz."""
+    return _perform_matrix_operation(
+        'NULLSPACE', request.data.get('matrix_id'), extra_data=_rank_params(request), precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('RREF')
+def row_reduce(request):
+    """Forma escalonada reducida por filas de una matriz."""
+    return _perform_matrix_operation(
+        'RREF', request.data.get('matrix_id'), extra_data=_rank_params(request), precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('EIGEN')
 def calculate_eigenvalues(request):
     """Calcula valores y vectores propios."""
-    return _perform_matrix_operation('EIGEN', request.data.get('matrix_id'))
+    return _perform_matrix_operation('EIGEN', request.data.get('matrix_id'), precision=_precision(request))
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='20/m', method='POST')
+@cost_ratelimit('SVD')
 def calculate_svd(request):
     """Calcula descomposición SVD (U, S, Vh)."""
-    return _perform_matrix_operation('SVD', request.data.get('matrix_id'))
+    return _perform_matrix_operation('SVD', request.data.get('matrix_id'), precision=_precision(request))
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='20/m', method='POST')
+@cost_ratelimit('QR')
 def calculate_qr(request):
     """Calcula descomposición QR."""
-    return _perform_matrix_operation('QR', request.data.get('matrix_id'))
+    return _perform_matrix_operation('QR', request.data.get('matrix_id'), precision=_precision(request))
 
 
 @api_view(['POST'])
-@ratelimit(key='ip', rate='20/m', method='POST')
+@cost_ratelimit('CHOLESKY')
 def calculate_cholesky(request):
     """Calcula descomposición Cholesky."""
-    return _perform_matrix_operation('CHOLESKY', request.data.get('matrix_id'))
+    return _perform_matrix_operation('CHOLESKY', request.data.get('matrix_id'), precision=_precision(request))
+
+
+
+@api_view(['POST'])
+@cost_ratelimit('POWER')
+def matrix_power(request):
+    """Calcula A^k (``exponent`` entero) por cuadrados sucesivos."""
+    return _perform_matrix_operation(
+        'POWER', request.data.get('matrix_id'), extra_data={'exponent': request.data.get('exponent')},
+        precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('EXPM')
+def matrix_exponential(request):
+    """Calcula la exponencial de una matriz."""
+    return _perform_matrix_operation('EXPM', request.data.get('matrix_id'), precision=_precision(request))
+
+
+@api_view(['POST'])
+@cost_ratelimit('SQRTM')
+def matrix_sqrt(request):
+    """Calcula la raíz cuadrada principal de una matriz."""
+    return _perform_matrix_operation('SQRTM', request.data.get('matrix_id'), precision=_precision(request))
+
+
+@api_view(['POST'])
+@cost_ratelimit('LOGM')
+def matrix_log(request):
+    """Calcula el logaritmo principal de una matriz."""
+    return _perform_matrix_operation('LOGM', request.data.get('matrix_id'), precision=_precision(request))
+
+
+def _iterative_solve(request, operation_type):
+    """
+    Resuelve A x = b (``matrix_a_id``, ``matrix_b_id``) con un solver iterativo.
+
+    Parámetros opcionales del body: ``tol``, ``max_iter`` (por defecto 10 n,
+    acotado por ``ITERATIVE_MAX_ITERATIONS``), ``preconditioner``, ``restart`` (GMRES) y
+    ``x0_id`` (solución inicial guardada). No converger no es un error: la
+    operación se guarda con ``converged`` falso y el historial de residuos.
+    """
+    params = {
+        key: request.data.get(key)
+        for key in ('tol', 'max_iter', 'preconditioner', 'restart', 'x0_id')
+        if request.data.get(key) is not None
+    }
+    if not request.data.get('matrix_b_id'):
+        raise InvalidMatrixError(f"{operation_type} requiere matrix_b_id (vector b).")
+    limit = settings.MATRIX_CONFIG['ITERATIVE_MAX_ITERATIONS']
+    max_iter = params.get('max_iter')
+    if isinstance(max_iter, int) and not isinstance(max_iter, bool) and max_iter > limit:
+        raise InvalidMatrixError(f"max_iter no puede superar {limit}.")
+    return _perform_matrix_operation(
+        operation_type, request.data.get('matrix_a_id'), request.data.get('matrix_b_id'),
+        extra_data=params, precision=_precision(request), x0_id=params.get('x0_id')
+    )
+
+
+@api_view(['POST'])
+@cost_ratelimit('CG')
+def cg_solve(request):
+    """Resuelve A x = b (A simétrica definida positiva) con gradiente conjugado."""
+    return _iterative_solve(request, 'CG')
+
+
+@api_view(['POST'])
+@cost_ratelimit('GMRES')
+def gmres_solve(request):
+    """Resuelve A x = b con GMRES con reinicio."""
+    return _iterative_solve(request, 'GMRES')
+
+
+# Vistas función para operaciones sobre pilas
+
+@api_view(['POST'])
+@stack_cost_ratelimit('DETERMINANT')
+def stack_determinant(request):
+    """Calcula el determinante de cada matriz de una pila."""
+    return _perform_stack_operation('DETERMINANT', request.data.get('stack_id'), precision=_precision(request))
+
+
+@api_view(['POST'])
+@stack_cost_ratelimit('INVERSE')
+def stack_inverse(request):
+    """Calcula la inversa de cada matriz de una pila (enmascara las singulares)."""
+    return _perform_stack_operation('INVERSE', request.data.get('stack_id'), precision=_precision(request))
+
+
+@api_view(['POST'])
+@stack_cost_ratelimit('SOLVE')
+def stack_solve(request):
+    """Resuelve S[i] X[i] = B[i] para cada elemento de dos pilas."""
+    return _perform_stack_operation(
+        'SOLVE', request.data.get('stack_id'), request.data.get('rhs_stack_id'), precision=_precision(request)
+    )
+
+
+@api_view(['POST'])
+@stack_cost_ratelimit('EIGH')
+def stack_eigh(request):
+    """Calcula valores y vectores propios de cada matriz simétrica de una pila."""
+    return _perform_stack_operation('EIGH', request.data.get('stack_id'), precision=_precision(request))
@@ -0,0 +1,62 @@
+/**
+ * Composable para el stream de eventos push del backend (Server-Sent Events)
+ *
+ * EventSource reconecta solo y reenvía Last-Event-ID, así que el servidor
+ * reenvía los eventos perdidos. Si el servidor cierra con `overflow` (cliente
+ * demasiado lento) se abre un stream nuevo sin historial y se notifica con
+ * `onResync` para recargar las estadísticas completas.
+ *
+ * Si el servidor no ofrece el stream (responde 204 bajo WSGI, o un error que
+ * EventSource no reintenta) se llama a `onUnavailable` una vez.
+ */
+import { ref } from 'vue'
+
+const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000/api'
+
+export type EventHandlers = Record<string, (data: any) => void>
+
+export function useEventStream(handlers: EventHandlers, onResync: () => void, onUnavailable?: () => void) {
+  const connected = ref(false)
+  let source: EventSource | null = null
+
+  const open = () => {
+    if (source) return
+    source = new EventSource(`${API_BASE_URL}/events/`)
+    source.onopen = () => {
+      connected.value = true
+    }
+    source.onerror = () => {
+      connected.value = false
+      // EventSource reintenta por su cuenta (campo retry del servidor)
+      // salvo que la conexión haya fallado de forma definitiva
+      if (source?.readyState === EventSource.CLOSED) {
+        close()
+        onUnavailable?.()
+      }
+    }
+
+    for (const [type, handler] of Object.entries(handlers)) {
+      source.addEventListener(type, (event) => {
+        handler(JSON.parse((event as MessageEvent).data))
+      })
+    }
+    source.addEventListener('stats.resync', () => onResync())
+    source.addEventListener('overflow', () => {
+      close()
+      onResync()
+      open()
+    })
+  }
+
+  const close = () => {
+    source?.close()
+    source = null
+    connected.value = false
+  }
+
+  return {
+    connected,
+    open,
+    close
+  }
+}
@@ -8,6 +8,7 @@ import type {
   Matrix, 
   MatrixCreateDTO, 
   Operation, 
+  OperationComponent,
   OperationRequest, 
   Stats, 
   PaginatedResponse,
@@ -185,6 +186,22 @@ export function useMatrixAPI() {
     }
   }
 
+  const getOperationComponent = async (operationId: number, name: string): Promise<OperationComponent> => {
+    loading.value = true
+    error.value = null
+    try {
+      const response = await axios.get<OperationComponent>(
+        `${API_BASE_URL}/operations-history/${operationId}/components/${name}/`
+      )
+      return response.data
+    } catch (err) {
+      error.value = handleError(err)
+      throw err
+    } finally {
+      loading.value = false
+    }
+  }
+
   const sumMatrices = async (request: OperationRequest): Promise<Operation> => {
     loading.value = true
     error.value = null
@@ -370,6 +387,7 @@ export function useMatrixAPI() {
     importMatrixCSV,
     // Operations
     getOperations,
+    getOperationComponent,
     sumMatrices,
     subtractMatrices,
     multiplyMatrices,
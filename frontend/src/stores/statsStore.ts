@@ -4,14 +4,22 @@
 import { defineStore } from 'pinia'
 import { ref, computed } from 'vue'
 import { useMatrixAPI } from '@/composables/useMatrixAPI'
-import type { Stats, Operation } from '@/types/matrix'
+import { useEventStream } from '@/composables/useEventStream'
+import type {
+  Stats,
+  Operation,
+  OperationSummary,
+  StatsDelta,
+  OperationCompletedEvent,
+  MatrixCreatedEvent
+} from '@/types/matrix'
 
 export const useStatsStore = defineStore('stats', () => {
   const api = useMatrixAPI()
   
   // State
   const stats = ref<Stats | null>(null)
-  const operations = ref<Operation[]>([])
+  const operations = ref<(Operation | OperationSummary)[]>([])
   const operationsCount = ref(0)
   const lastUpdate = ref<Date | null>(null)
 
@@ -96,12 +104,20 @@ export const useStatsStore = defineStore('stats', () => {
           throw new Error(`Unknown operation type: ${type}`)
       }
 
-      // Añadir la operación al inicio de la lista
-      operations.value.unshift(operation)
-      operationsCount.value++
+      // Añadir la operación al inicio de la lista (el evento push puede
+      // haber llegado antes que la respuesta)
+      const index = operations.value.findIndex(op => op.id === operation.id)
+      if (index >= 0) {
+        operations.value[index] = operation
+      } else {
+        operations.value.unshift(operation)
+        operationsCount.value++
+      }
 
-      // Actualizar stats
-      await fetchStats()
+      // Con el stream activo las stats llegan como deltas
+      if (!stream.connected.value) {
+        await fetchStats()
+      }
 
       return operation
     } catch (error) {
@@ -115,12 +131,93 @@ export const useStatsStore = defineStore('stats', () => {
     operationsCount.value = 0
   }
 
+  // Eventos push: deltas incrementales en lugar de recargar /api/stats/
+  function applyDelta(delta: StatsDelta) {
+    const current = stats.value
+    if (!current) return
+
+    current.total_matrices += delta.total_matrices ?? 0
+    current.recent_operations_count += delta.recent_operations_count ?? 0
+    current.storage_mb = Math.round((current.storage_mb + (delta.storage_mb ?? 0)) * 100) / 100
+
+    if (delta.total_operations && delta.operation_type) {
+      const time = delta.execution_time_ms ?? 0
+      const total = current.total_operations
+      current.average_execution_time_ms =
+        (current.average_execution_time_ms * total + time) / (total + delta.total_operations)
+      current.total_operations += delta.total_operations
+
+      const byType = current.operations_by_type.find(item => item.operation_type === delta.operation_type)
+      if (byType) {
+        byType.avg_time = (byType.avg_time * byType.count + time) / (byType.count + 1)
+        byType.count++
+      } else {
+        current.operations_by_type.push({ operation_type: delta.operation_type, count: 1, avg_time: time })
+      }
+      current.operations_by_type.sort((a, b) => b.count - a.count)
+
+      const day = current.operations_timeline.find(item => item.date === delta.date)
+      if (day) {
+        day.count++
+      } else if (delta.date) {
+        current.operations_timeline.push({ date: delta.date, count: 1 })
+      }
+    }
+    lastUpdate.value = new Date()
+  }
+
+  // Sin stream (servidor WSGI) se recargan stats e historial periódicamente
+  const POLL_INTERVAL_MS = 30000
+  let pollTimer: ReturnType<typeof setInterval> | null = null
+
+  function startPolling() {
+    if (pollTimer) return
+    pollTimer = setInterval(() => {
+      fetchStats().catch(() => {})
+      fetchOperations().catch(() => {})
+    }, POLL_INTERVAL_MS)
+  }
+
+  function stopPolling() {
+    if (pollTimer) {
+      clearInterval(pollTimer)
+      pollTimer = null
+    }
+  }
+
+  const stream = useEventStream(
+    {
+      'operation.completed': (event: OperationCompletedEvent) => {
+        if (!operations.value.some(op => op.id === event.operation.id)) {
+          operations.value.unshift(event.operation)
+          operationsCount.value++
+        }
+        applyDelta(event.delta)
+      },
+      'matrix.created': (event: MatrixCreatedEvent) => applyDelta(event.delta),
+    },
+    () => {
+      fetchStats().catch(() => {})
+    },
+    startPolling
+  )
+
+  function connectLive() {
+    stream.open()
+  }
+
+  function disconnectLive() {
+    stream.close()
+    stopPolling()
+  }
+
   return {
     // State
     stats,
     operations,
     operationsCount,
     lastUpdate,
+    live: stream.connected,
     // Getters
     recentOperations,
     operationsByType,
@@ -129,6 +226,9 @@ export const useStatsStore = defineStore('stats', () => {
     fetchStats,
     fetchOperations,
     performOperation,
-    clearOperations
+    clearOperations,
+    applyDelta,
+    connectLive,
+    disconnectLive
   }
 })
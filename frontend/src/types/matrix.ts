@@ -8,15 +8,20 @@ export interface Matrix {
   rows: number
   cols: number
   data: number[][]
+  encoding?: PayloadEncoding
   created_at: string
   updated_at: string
 }
 
+/** Codificación de almacenamiento (`quantized` es con pérdida, solo para visualizar) */
+export type PayloadEncoding = 'raw' | 'zstd' | 'float32' | 'quantized'
+
 export interface MatrixCreateDTO {
   name: string
   rows: number
   cols: number
   data: number[][]
+  encoding?: PayloadEncoding
 }
 
 export interface Operation {
@@ -26,14 +31,28 @@ export interface Operation {
   matrix_b?: Matrix | null
   result: Matrix
   extra_data?: any
+  components?: OperationComponent[]
+  precision?: Precision
   execution_time_ms: number
   created_at: string
 }
 
+/**
+ * Componente de una descomposición (U, S, Vh, Q, R, eigenvalues, ...).
+ * Al listar operaciones solo llegan nombre y forma; `data` se pide aparte.
+ */
+export interface OperationComponent {
+  name: string
+  rows: number
+  cols: number
+  data?: number[][]
+}
+
 export type OperationType = 
   | 'SUM' 
   | 'SUBTRACT' 
   | 'MULTIPLY' 
+  | 'CHAIN_MULTIPLY'
   | 'INVERSE' 
   | 'DETERMINANT' 
   | 'TRANSPOSE'
@@ -42,11 +61,40 @@ export type OperationType =
   | 'SVD'
   | 'QR'
   | 'CHOLESKY'
+  | 'LSTSQ'
+  | 'PINV'
+  | 'COLSPACE'
+  | 'NULLSPACE'
+  | 'RREF'
+  | 'POWER'
+  | 'EXPM'
+  | 'SQRTM'
+  | 'LOGM'
+  | 'CG'
+  | 'GMRES'
+
+/** Precisión de cómputo: float32 es más rápido y usa la mitad de memoria (~7 dígitos) */
+export type Precision = 'float64' | 'float32'
 
 export interface OperationRequest {
   matrix_a_id?: number
   matrix_b_id?: number
   matrix_id?: number
+  precision?: Precision
+  /** INVERSE: usar la pseudoinversa si la matriz es singular o mal condicionada */
+  fallback?: boolean
+  /** LSTSQ/PINV: valores singulares <= rcond * σ_max se tratan como cero */
+  rcond?: number
+  /** RANK/COLSPACE/NULLSPACE/RREF: QR con pivoteo o SVD */
+  method?: 'qr' | 'svd'
+  /** Exponente entero de POWER */
+  exponent?: number
+  /** Solvers iterativos (CG/GMRES): solución inicial guardada y parámetros */
+  x0_id?: number
+  tol?: number
+  max_iter?: number
+  restart?: number
+  preconditioner?: 'none' | 'jacobi' | 'ichol'
 }
 
 export interface Stats {
@@ -91,3 +139,69 @@ export interface APIError {
   error: string
   detail?: string
 }
+
+// Eventos push (GET /api/events/, Server-Sent Events)
+
+export interface OperationSummary {
+  id: number
+  operation_type: OperationType
+  matrix_a: number
+  matrix_b: number | null
+  result: number
+  execution_time_ms: number
+  created_at: string
+}
+
+export interface StatsDelta {
+  total_matrices?: number
+  total_operations?: number
+  recent_operations_count?: number
+  storage_mb?: number
+  operation_type?: OperationType
+  execution_time_ms?: number
+  date?: string
+}
+
+export interface OperationCompletedEvent {
+  operation: OperationSummary
+  delta: StatsDelta
+}
+
+export interface MatrixCreatedEvent {
+  matrix_id: number
+  delta: StatsDelta
+}
+
+/** Traza paso a paso del modo GlassBox (`/api/traces/`) */
+export type TraceAlgorithm = 'ELIMINATION' | 'RREF' | 'LU'
+
+export interface StepTrace {
+  id: number
+  algorithm: TraceAlgorithm
+  matrix: number
+  rows: number
+  cols: number
+  step_count: number
+  keyframe_interval: number
+  rank: number
+  pivot_columns: number[]
+  storage_bytes: number
+  snapshot_bytes: number
+  result?: number[][]
+  /** Solo LU: P A = L U */
+  lower?: number[][] | null
+  permutation?: number[] | null
+}
+
+/** Operación de fila de un paso; filas y columnas desde 0 */
+export interface TraceStep {
+  index: number
+  op: 'swap' | 'scale' | 'add'
+  row: number
+  source: number
+  col: number
+  factor: number
+  description: string
+  /** Matriz tras el paso (se omite con `states=false`) */
+  state?: number[][]
+}
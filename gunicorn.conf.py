@@ -0,0 +1,31 @@
+"""
+Configuración de gunicorn para MatrixCalc.
+
+Los parámetros de bind/workers/threads se siguen pasando por línea de comandos
+(ver Dockerfile.backend); aquí solo viven los hooks de ciclo de vida.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    """Limpia los archivos de métricas multiproceso de ejecuciones anteriores."""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Marca como muertos los archivos de métricas de un worker que terminó."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Arranca el pool de cómputo del worker (si está habilitado) antes de atender peticiones."""
+    from calculator import compute_pool
+    ready = compute_pool.warm()
+    if ready:
+        worker.log.info("Pool de cómputo listo: %d procesos", ready)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 import dj_database_url
@@ -58,13 +59,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'calculator.middleware.MetricsMiddleware',  # Primero: mide la petición completa
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Servir static files en producción
+    'calculator.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise (static files) con soporte ASGI
     'corsheaders.middleware.CorsMiddleware',  # CORS debe ir antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'calculator.middleware.ProfilingMiddleware',  # Requiere request.user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -246,18 +249,110 @@ RATELIMIT_ENABLE = True
 RATELIMIT_USE_CACHE = 'default'
 
 # Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'matrixcalc-cache',
+# El cache debe ser compartido entre workers de gunicorn: los contadores de
+# rate limiting viven aquí. Por defecto se usa un archivo SQLite mapeado en
+# memoria dentro de RUN_DIR, un directorio privado del usuario del servicio
+# (0700): el backend deserializa con pickle lo que lee del archivo, así que no
+# puede estar en un directorio donde otro usuario pueda crearlo o escribirlo
+# (como /dev/shm). Para tenerlo en memoria, apuntar RUN_DIR a un tmpfs privado
+# (p. ej. /run/matrixcalc). CACHE_BACKEND=redis usa REDIS_URL.
+RUN_DIR = Path(os.environ.get('RUN_DIR', BASE_DIR / 'run'))
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'shared')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'calculator.cache.InstrumentedRedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'calculator.cache.InstrumentedLocMemCache',
+            'LOCATION': 'matrixcalc-cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'calculator.cache.InstrumentedSharedSQLiteCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(RUN_DIR / 'matrixcalc-cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+                'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+            },
+        }
     }
-}
 
 # Matrix Calculator Configuration
 MATRIX_CONFIG = {
     'MAX_DIMENSION': int(os.environ.get('MAX_DIMENSION', 100)),
     'RETENTION_DAYS': int(os.environ.get('RETENTION_DAYS', 30)),
     'CONDITION_THRESHOLD': float(os.environ.get('CONDITION_THRESHOLD', 1e12)),
+    # Colas de Celery cuya profundidad se expone en /metrics
+    'METRICS_CELERY_QUEUES': os.environ.get('METRICS_CELERY_QUEUES', 'celery').split(','),
+    # Profiling bajo demanda (cabecera X-MatrixCalc-Profile para staff o muestreo)
+    'PROFILING_SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0.0)),
+    'PROFILING_INTERVAL_MS': float(os.environ.get('PROFILING_INTERVAL_MS', 5)),
+    'PROFILING_FORMAT': os.environ.get('PROFILING_FORMAT', 'speedscope'),  # speedscope | collapsed
+    'PROFILING_DIR': os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles')),
+    # Rate limiting ponderado por costo en endpoints de operaciones (token bucket).
+    # Por defecto ~50 operaciones baratas por minuto; una SVD 100x100 cuesta ~23 tokens.
+    # RATE_LIMIT_CLIENTS: JSON {"ip:1.2.3.4": {"CAPACITY": 500, "REFILL_PER_SECOND": 5}}
+    'RATE_LIMIT': {
+        'CAPACITY': float(os.environ.get('RATE_LIMIT_CAPACITY', 100)),
+        'REFILL_PER_SECOND': float(os.environ.get('RATE_LIMIT_REFILL_PER_SECOND', 50 / 60)),
+        'FLOPS_PER_TOKEN': float(os.environ.get('RATE_LIMIT_FLOPS_PER_TOKEN', 1e6)),
+        'CLIENTS': json.loads(os.environ.get('RATE_LIMIT_CLIENTS', '{}')),
+    },
+    # Hilos BLAS/LAPACK (ver calculator/utils/blas.py). BLAS_THREADS por defecto
+    # reparte los núcleos entre los workers de gunicorn (WEB_CONCURRENCY).
+    'BLAS_POLICY': os.environ.get('BLAS_POLICY', 'auto'),  # auto | single | multi | inherit
+    'BLAS_THREADS': int(os.environ.get(
+        'BLAS_THREADS', max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 2)))
+    )),
+    'BLAS_HEAVY_THRESHOLD': int(os.environ.get('BLAS_HEAVY_THRESHOLD', 10_000)),  # elementos por matriz
+    'BLAS_MAX_CONCURRENT_HEAVY': int(os.environ.get('BLAS_MAX_CONCURRENT_HEAVY', 2)),
+    # Hilos del executor de cómputo de las vistas async (calculator/async_views.py)
+    'ASYNC_COMPUTE_WORKERS': int(os.environ.get('ASYNC_COMPUTE_WORKERS', os.cpu_count() or 1)),
+    # Pool de procesos para el cómputo de las operaciones sync (calculator/compute_pool.py):
+    # procesos por worker de gunicorn (0: deshabilitado), segundos máximos por tarea y
+    # elementos mínimos (sumando operandos) para enviar una operación al pool. Transporte
+    # de los arrays: pickle | shm (memoria compartida, ver calculator/shared_memory.py)
+    'COMPUTE_POOL_WORKERS': int(os.environ.get('COMPUTE_POOL_WORKERS', 0)),
+    'COMPUTE_POOL_TIMEOUT': float(os.environ.get('COMPUTE_POOL_TIMEOUT', 30)),
+    'COMPUTE_POOL_MIN_ELEMENTS': int(os.environ.get('COMPUTE_POOL_MIN_ELEMENTS', 2_500)),
+    'COMPUTE_POOL_TRANSPORT': os.environ.get('COMPUTE_POOL_TRANSPORT', 'pickle'),
+    # Eventos push SSE (ver calculator/events.py)
+    'EVENTS_QUEUE_SIZE': int(os.environ.get('EVENTS_QUEUE_SIZE', 100)),  # eventos por conexión
+    'EVENTS_POLL_INTERVAL': float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5)),  # segundos
+    'EVENTS_RETENTION_SECONDS': int(os.environ.get('EVENTS_RETENTION_SECONDS', 300)),
+    'EVENTS_KEEPALIVE_SECONDS': float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', 15)),
+    'EVENTS_MAX_STREAM_SECONDS': float(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 300)),
+    # Limpieza por lotes (ver calculator/cleanup.py): filas por transacción y pausa entre lotes
+    'CLEANUP_BATCH_SIZE': int(os.environ.get('CLEANUP_BATCH_SIZE', 1000)),
+    'CLEANUP_SLEEP_SECONDS': float(os.environ.get('CLEANUP_SLEEP_SECONDS', 0)),
+    # Backups incrementales: segundos previos al checkpoint anterior que se vuelven a
+    # exportar, para recoger filas con id menor que confirmaron después del checkpoint
+    'BACKUP_CHECKPOINT_MARGIN': float(os.environ.get('BACKUP_CHECKPOINT_MARGIN', 300)),
+    # Codificación por defecto de los payloads de matrices (ver calculator/encodings.py):
+    # raw | zstd | float32 | quantized (esta última con pérdida, solo para visualización)
+    'PAYLOAD_ENCODING': os.environ.get('PAYLOAD_ENCODING', 'raw'),
+    # Pilas de matrices (ver MatrixStack): elementos máximos por pila; cada
+    # matriz de la pila respeta además MAX_DIMENSION
+    'MAX_STACK_SIZE': int(os.environ.get('MAX_STACK_SIZE', 10_000)),
+    # Rango y subespacios: 'svd' (más robusto) o 'qr' (QR con pivoteo, más barato
+    # con rango bajo; ver benchmarks/bench_rank_methods.py). Se puede pedir por operación
+    'RANK_METHOD': os.environ.get('RANK_METHOD', 'svd'),
+    # Trazas GlassBox: pasos entre fotogramas clave (0: automático, ~m·n/2) y
+    # pasos máximos por página de /api/traces/{id}/steps/
+    'GLASSBOX_KEYFRAME_INTERVAL': int(os.environ.get('GLASSBOX_KEYFRAME_INTERVAL', 0)),
+    'GLASSBOX_PAGE_SIZE': int(os.environ.get('GLASSBOX_PAGE_SIZE', 100)),
+    # Producto en cadena: matrices máximas por petición (el orden óptimo es O(k³))
+    'MAX_CHAIN_LENGTH': int(os.environ.get('MAX_CHAIN_LENGTH', 32)),
+    # Solvers iterativos (CG/GMRES): tope de ``max_iter`` aceptado por la API
+    'ITERATIVE_MAX_ITERATIONS': int(os.environ.get('ITERATIVE_MAX_ITERATIONS', 1000)),
 }
 
 # Scheduler Configuration
@@ -6,9 +6,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from calculator.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('calculator.urls')),
+    # Métricas Prometheus (fuera de /api para el scraper)
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Servir archivos estáticos en desarrollo